@@ -12,19 +12,21 @@ inputs:
     - oxcgrt_si_chi_gri.xlsx (processed file; created in )
     - gdp_usd_ihme.xlsx (processed file; created in gdp_formatting.py)
     - qaly_losses_overall.xlsx (processed file; created in qaly_losses_mean.py)
+    - qaly_losses_overall_nodsct.xlsx, qaly_losses_overall_sixpct.xlsx (processed files; created in qaly_losses_mean.py)
     - fullincome.xlsx (processed file; created in fullincome.py)
     - direct_costs_jk.xlsx (processed file; created in direct_costs.py)
     - indirect_costs_jk.xlsx (processed file; created in indirect_costs.py)
+    - indirect_costs_jk_nodsct.xlsx, indirect_costs_jk_sixpct.xlsx (processed files; created in indirect_costs_nodsct.py and indirect_costs_sixpct.py)
     - national_population_2019.dta (processed file)
-    - sur_recursive_and_gdp_subsamples_inf_lower_global_vov.xlsx (processed file; created in sur_recursive_and_gdp_subsamples_inf_lower.py)
-    - sur_recursive_and_gdp_subsamples_inf_upper_global_vov (processed file; created in sur_recursive_and_gdp_subsamples_inf_upper.py)
-    - sur_recursive_and_gdp_subsamples_deaths_unscaled_global_vov (processed file; created in sur_recursive_and_gdp_subsamples_deaths_unscaled.py)
-    - sur_recursive_and_gdp_subsamples_nodsct_global_vov (processed file; created in sur_recursive_and_gdp_subsamples_nodsct.py)
-    - sur_recursive_and_gdp_subsamples_sixpct_global_vov (processed file; created in sur_recursive_and_gdp_subsamples_sixpct_global_vov.py)
     - table1_updated (processed file; created in table1.py)
 
 outputs:
     - sur_recursive_and_gdp_subsamples_global_vov.xlsx
+    - sur_recursive_and_gdp_subsamples_{inf_lower,inf_upper,deaths_unscaled,nodsct,sixpct}_global_vov.xlsx
+    - sur_recursive_and_gdp_subsamples_{inf_lower,inf_upper,deaths_unscaled,nodsct,sixpct}_comp_inf.xlsx
+    - sur_recursive_and_gdp_subsamples_{inf_lower,inf_upper,deaths_unscaled,nodsct,sixpct}_output.xlsx
+    - tables2_and_3_{inf_lower,inf_upper,deaths_unscaled,nodsct,sixpct}.xlsx
+    - table3_jk_{inf_lower,inf_upper,deaths_unscaled,nodsct,sixpct}.xlsx
     - sur_recursive_and_gdp_subsamples_output.xlsx
     - country_comparison.xlsx
     - manuscript_tables.xlsx
@@ -36,23 +38,24 @@ outputs:
 import numpy as np
 import pandas as pd
 import xlsxwriter
-from linearmodels.system import SUR
-from scipy.stats import multivariate_normal
 import statsmodels.api as sm
-import statsmodels.stats.api as sms
-from statsmodels.compat import lzip
-import statsmodels.formula.api as smf
 from math import lcm
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output
+from regbase import load_regbase, match_regbase_keys
+from sur_models import SUR_model, prepare_psa_models, psa_depvars, run_psa_parallel
 
 pd.options.display.float_format = '{:.2f}'.format
 
 # %% load in and format any data
 
-# load in the regression base file
-qdata = pd.read_excel("../output/ihme_quarterly_regbase_boosters.xlsx")
+# load in the regression base file (with categorical country and quarter keys, see regbase.py)
+qdata = load_regbase("../output/ihme_quarterly_regbase_boosters.xlsx")
 
 # load in the oxford government response tracker data
-oxcgrt = pd.read_excel("../output/oxcgrt_si_chi_gri.xlsx")
+oxcgrt = read_output("../output/oxcgrt_si_chi_gri.xlsx")
 
 # make country and time categorical
 var_names = ["country_group", "time"]
@@ -60,845 +63,111 @@ for var in var_names:
     qdata[var] = pd.Categorical(qdata[var])
 
 # load in the gdp data in USD
-gdp_usd = pd.read_excel("../output/gdp_usd_ihme.xlsx")
+gdp_usd = read_output("../output/gdp_usd_ihme.xlsx")
 
 # create a year-quarter field in the gdp data
 gdp_usd["yyyy_qq"] = gdp_usd["date"].str[:4] + "_" + gdp_usd["date"].str[4:]
 
 # add the GDP data to the regression base file
-qdata = qdata.merge(gdp_usd[["country", "yyyy_qq", "gdp_projected_usd", "gdp_observed_usd", "loss", "type"]],
+qdata = qdata.merge(match_regbase_keys(gdp_usd[["country", "yyyy_qq", "gdp_projected_usd", "gdp_observed_usd", "loss", "type"]], qdata),
                     on = ["country", "yyyy_qq"], how = "left")
 
 # remove 2022
 qdata = qdata[qdata["year"] != 2022]
 
-# load in QALY loss data
-qalys = pd.read_excel("../output/qaly_losses_overall.xlsx")
-qalys = qalys[["country", "yyyy_qq", "Q_nonfatal", "Q_fatal", "Q_overall"]]
-
 # load in full income data
-fullincome = pd.read_excel("../output/fullincome.xlsx")
-
-# load in cost data
-direct_costs = pd.read_excel("../output/direct_costs_jk.xlsx")
-indirect_costs = pd.read_excel("../output/indirect_costs_jk.xlsx")
-costs = direct_costs.merge(indirect_costs, on = ["country", "yyyy_qq"],
-                           how = "outer")
-costs = costs.replace(np.nan, 0)
+fullincome = read_output("../output/fullincome.xlsx")
 
-# create 9 lags of new and cumulative infections
-for c in qdata.country.unique():
-    qdata["inf_abs"] = qdata["inf_mean"]*qdata["tot_pop"]
-    qdata.loc[(qdata["country"] == c), "cum_inf"] = qdata.loc[(qdata["country"] == c), "inf_abs"].cumsum()
-    qdata["cum_inf_pc"] = qdata["cum_inf"]/qdata["tot_pop"]
-    for i in range(1, 9):
-        lag_string = "L" + str(i) + "_" + "cum_inf_pc"
-        qdata.loc[qdata["country"] == c, lag_string] = qdata.loc[qdata["country"] == c, "cum_inf_pc"].shift(i, fill_value = 0)
-    for i in range(1, 9):
-        lag_string = "L" + str(i) + "_" + "inf_pc"
-        qdata.loc[qdata["country"] == c, lag_string] = qdata.loc[qdata["country"] == c, "inf_mean"].shift(i, fill_value = 0)
+# load in direct cost data (these don't depend on the discount rate)
+direct_costs = read_output("../output/direct_costs_jk.xlsx")
 
-# merge oxcgrt data to regression data
-qdata = qdata.merge(oxcgrt, how = "left", on = ["country", "yyyy_qq"])
+# load in the 2019 population data 
+pop2019 = pd.read_stata("../input/national_population_2019.dta")
 
-# remove puerto rico
-qdata = qdata[qdata["country"] != "Puerto Rico"]
-#qdata.to_excel("../output/pre_reg_data.xlsx")
+# the QALY and cost inputs for each discount rate, so each file is read only once
+value_inputs = dict()
 
-# create a separate data frame for quarterly gdp data
-quarterly_data = qdata[qdata["type"] == "quarterly"]
+def load_value_inputs(discount = ""):
+    """
+    Load the QALY losses and the direct and indirect costs for a discount rate.
 
-# see which entries get dropped 
-dropped = qdata.loc[qdata.index.difference(qdata.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").index)]
+    Parameters
+    ----------
+    discount : string, optional
+        The suffix of the discount rate's QALY and indirect cost files ("" for 3%, "_nodsct" for 0%, and "_sixpct"
+        for 6%). The default is "".
 
-# %% seeming unrelated regressions
+    Returns
+    -------
+    qalys : data frame
+        The nonfatal, fatal and overall QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
 
-# create a class that contains functions for various regression optoins
-class SUR_model:
-    def __init__(self):
-        # instantiate outputs as Nonetypes
-        self.depvar = None
-        self.data = None
-        self.reg_data = None
-        self.formulae = None
-        self.model = None
-        self.results = None
-        self.params = None
-        self.nopfz_uptake = None
-        self.novax_uptake = None
-        self.results_data = None
-        self.n_samp = None
-        self.percentiles_pfz = None
-        self.percentiles_allvax = None
-        self.outcome_list = None
-        self.df_list = None
-        self.nopfz_inf_lags = None
-        self.novax_inf_lags = None
-        self.comp_inf_lags = None
-        self.bp_test_dep = None
-        self.annual_data = None
-        self.annual_formula = None
-        self.annual_mod = None
-        self.annual_results = None
-        self.annual_results_data = None    
-        self.annual_gdp_list = None
-        self.annual_gdp_df_list = None
-
-    def run_quarterly_basecase(self, depvar="inf_mean", data = qdata):
-        """
-        Run base case on quarterly data (infections, deaths, quartlery GDP)
-
-        Parameters
-        ----------
-        depvar : string, optional
-            A string with the dependent variable. The default is "inf_mean".
-        data : data frame, optional
-            A data frame with the regression data. The default is qdata.
-
-        Returns
-        -------
-        None.
-
-        """
-        self.depvar = depvar
-        self.data = data
-        # drop countries from the regression base file that don't have data
-        inf_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
-        
-        # set up and run the regression on infections and deaths
-        formulae = {'infections': 'inf_mean ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq',
-                    'deaths': 'daily_deaths ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq'}
-        self.formulae = formulae
-        
-        # run the SUR regression using the infections and deaths formulae
-        inf_model = SUR.from_formula(formulae, inf_data)
-        inf_sur = inf_model.fit(method = "ols", cov_type = "robust")
-        
-        #extract the mean parameter coefficients and covariance matrix from regression
-        inf_params = inf_sur.params
-        
-        #label the columns in the design matrix
-        inf_exog = pd.DataFrame(inf_sur.model._exog[0].ndarray)
-        inf_exog.columns = [x for x in inf_params.index if "infections_" in x]
-        
-        # create a dictionary of quarters, and the quarters two or more after it
-        q_dict = {"2020_Q4" : ["2021_Q2", "2021_Q3", "2021_Q4"],
-                  "2021_Q1" : ["2021_Q3", "2021_Q4"],
-                  "2021_Q2": ["2021_Q4"],
-                  "2021_Q3": [""],
-                  "2021_Q4": [""]}
-        
-        # create a list of the quarters that are keys in the dictionary
-        q_list = list(q_dict.keys())
-        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-        nopfz_inf = inf_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
-            nopfz_inf[col] = 0
-        
-        # in the no Pfizer scenario, set the government response index to its pre-vax value
-        for c in inf_data.country.unique():
-            try:
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake_pfizer.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = nopfz_inf.loc[(nopfz_inf[("infections_country[T." + c + "]")] == 1) & (nopfz_inf[("infections_yyyy_qq[T." + first_vax + "]")] == 1), ("infections_L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    nopfz_inf.loc[(nopfz_inf[("infections_country[T." + c + "]")] == 1) & (nopfz_inf[("infections_yyyy_qq[T." + val + "]")] == 1), ("infections_L1_gri")] = country_fixed_gri
-            except:
-                continue
-        
-        #create a "novax" design matrix (i.e., to set vax parameters to 0)
-        novax_inf = inf_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
-                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
-            novax_inf[col] = 0
-        
-        # in the no vaccination scenario, set the government response index to its pre-vax value
-        for c in inf_data.country.unique():
-            try:
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = novax_inf.loc[(novax_inf[("infections_country[T." + c + "]")] == 1) & (novax_inf[("infections_yyyy_qq[T." + first_vax + "]")] == 1), ("infections_L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    novax_inf.loc[(novax_inf[("infections_country[T." + c + "]")] == 1) & (novax_inf[("infections_yyyy_qq[T." + val + "]")] == 1), ("infections_L1_gri")] = country_fixed_gri
-            except:
-                continue
-           
-        # get the infection coefficients from the SUR model
-        inf_betas = inf_params.loc[[x for x in inf_params.index if "infections_" in x],]
-        
-        # in the no Pfizer scenario, we adjust infections (which represent natural immunity)
-        # so that they reflect trends in the absence of Pfizer vaccination
-        for c in inf_data.country.unique():
-            try:
-                country_string = "infections_country[T." + c + "]"
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake_pfizer.ne(0))).idxmax(), "yyyy_qq"]
-                for val in q_dict[first_vax]:
-                    nopfz_inf = nopfz_inf[[x for x in inf_params.index if "infections_" in x]]
-                    nopfz_predictions = np.dot(nopfz_inf, inf_betas)
-                    nopfz_inf["pred"] = nopfz_predictions
-                    nopfz_inf = pd.concat([nopfz_inf, inf_data["tot_pop"]], axis = 1)
-                    q_string = "infections_yyyy_qq[T." + val + "]"
-                    try:
-                        nopfz_inf.loc[(nopfz_inf[country_string] == 1) & (nopfz_inf[q_string] == 1), ("infections_L1_inf_pc")] = nopfz_inf.loc[(nopfz_inf[country_string] == 1), "pred"].shift(1, fill_value = 0)
-                        nopfz_inf.loc[(nopfz_inf[country_string] == 1), "L1_tot_pop"] = nopfz_inf.loc[(nopfz_inf[country_string] == 1), "tot_pop"].shift(1, fill_value = 1)
-                        nopfz_inf["L1_abs"] = nopfz_inf["infections_L1_inf_pc"]*nopfz_inf["L1_tot_pop"]
-                        nopfz_inf.loc[(nopfz_inf[country_string] == 1), "L1_cuml"] = nopfz_inf.loc[(nopfz_inf[country_string] == 1), "L1_abs"].cumsum()
-                        nopfz_inf["pred_L1_cum_pc"] = nopfz_inf["L1_cuml"]/nopfz_inf["L1_tot_pop"]
-                        nopfz_inf.loc[(nopfz_inf[country_string] == 1) & (nopfz_inf[q_string] == 1), ("infections_L2_cum_inf_pc")] = nopfz_inf.loc[(nopfz_inf[country_string] == 1), ("pred_L1_cum_pc")].shift(1, fill_value = 0)
-                    except:
-                        continue
-            except:
-                continue
-        # in the no vaccination scenario, we adjust infections (which represent natural immunity)
-        # so that they reflect trends in the absence of any vaccination
-        for c in inf_data.country.unique():
-            try:
-                country_string = "infections_country[T." + c + "]"
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake.ne(0))).idxmax(), "yyyy_qq"]
-                for val in q_dict[first_vax]:
-                    novax_inf = novax_inf[[x for x in inf_params.index if "infections_" in x]]
-                    novax_predictions = np.dot(novax_inf, inf_betas)
-                    novax_inf["pred"] = novax_predictions
-                    novax_inf = pd.concat([novax_inf, inf_data["tot_pop"]], axis = 1)
-                    q_string = "infections_yyyy_qq[T." + val + "]"
-                    try:
-                        novax_inf.loc[(novax_inf[country_string] == 1) & (novax_inf[q_string] == 1), ("infections_L1_inf_pc")] = novax_inf.loc[(novax_inf[country_string] == 1), "pred"].shift(1, fill_value = 0)
-                        novax_inf.loc[(novax_inf[country_string] == 1), "L1_tot_pop"] = novax_inf.loc[(novax_inf[country_string] == 1), "tot_pop"].shift(1, fill_value = 1)
-                        novax_inf["L1_abs"] = novax_inf["infections_L1_inf_pc"]*novax_inf["L1_tot_pop"]
-                        novax_inf.loc[(novax_inf[country_string] == 1), "L1_cuml"] = novax_inf.loc[(novax_inf[country_string] == 1), "L1_abs"].cumsum()
-                        novax_inf["pred_L1_cum_pc"] = novax_inf["L1_cuml"]/novax_inf["L1_tot_pop"]
-                        novax_inf.loc[(novax_inf[country_string] == 1) & (novax_inf[q_string] == 1), ("infections_L2_cum_inf_pc")] = novax_inf.loc[(novax_inf[country_string] == 1), ("pred_L1_cum_pc")].shift(1, fill_value = 0)
-                    except:
-                        continue
-            except:
-                continue
-        
-        # save the infections in the no pfizer and no vaccination scenarios to compare
-        self.nopfz_inf_lags = nopfz_inf[["infections_L1_inf_pc", "infections_L2_cum_inf_pc"]]
-        self.novax_inf_lags = novax_inf[["infections_L1_inf_pc", "infections_L2_cum_inf_pc"]]
-        comp_inf_lags = inf_data[["country", "yyyy_qq", "L1_inf_pc", "L2_cum_inf_pc"]].join(self.nopfz_inf_lags, how = "outer")
-        comp_inf_lags = comp_inf_lags.join(self.novax_inf_lags, how = "outer", lsuffix = "_nopfz", rsuffix = "_novax")
-        self.comp_inf_lags = comp_inf_lags
-        
-        # if the dependent variable was set as infections or deaths
-        if depvar == "inf_mean" or depvar == "daily_deaths":
-            # run the SUR model on either dependent variable 
-            reg_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
-            model = SUR.from_formula(formulae, reg_data)
-            model_sur = model.fit(method = "ols", cov_type = "robust")
-            # and save the parameters
-            mean_params = model_sur.params
-            self.results = model_sur
-        # but if the dependent variable was GDP
-        elif depvar == "gdp_gap":
-            # run an OLS regression on quarterly GDP
-            reg_data = data[data["type"] == "quarterly"]
-            reg_data = reg_data[reg_data["country"] != "Moldova"]
-            formula = "gdp_gap ~ L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq"
-            model = smf.ols(formula, reg_data)
-            model_res = model.fit(cov_type = "HC1")
-            # and save the parameters
-            mean_params = model_res.params
-            self.results = model_res
-        
-        self.reg_data = reg_data
-        self.model = model
-        
-        self.params = mean_params
-        
-        # if the dependent variable is infections
-        if depvar == "inf_mean":
-            prefix = "infections_"
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_sur.model._exog[0].ndarray)
-            vax_exog.columns = [x for x in mean_params.index if prefix in x]
-            # grab the residuals
-            resids = model_sur.resids["infections"]
-            # and run a Breusch-Pagan test
-            bp_test_names = ['Lagrange multiplier statistic', 'p-value',
-             'f-value', 'f p-value']
-            bp_test_result = sms.het_breuschpagan(resids, vax_exog)
-            self.bp_test_dep = lzip(bp_test_names, bp_test_result)
-        # do the same process but for deaths, if deaths are the dependnet variable
-        elif depvar == "daily_deaths":
-            prefix = "deaths_"
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_sur.model._exog[1].ndarray)
-            vax_exog.columns = [x for x in mean_params.index if prefix in x]
-            resids = model_sur.resids["deaths"]
-            bp_test_names = ['Lagrange multiplier statistic', 'p-value',
-             'f-value', 'f p-value']
-            bp_test_result = sms.het_breuschpagan(resids, vax_exog)
-            self.bp_test_dep = lzip(bp_test_names, bp_test_result)
-        #and if the dependent variable is GDP, just get the design matrix
-        elif depvar == "gdp_gap":
-            prefix = ""
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_res.model.exog)
-            #label the columns in the design matrix
-            vax_exog.columns = mean_params.index   
-        
-        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-        nopfz_exog = vax_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in vax_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
-            nopfz_exog[col] = 0
-        
-        # adjust the GRI for no pfizer vaccination
-        for c in reg_data.country.unique():
-            try:
-                first_vax = reg_data.loc[((reg_data["country"] == c) & (reg_data.uptake_pfizer.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = nopfz_exog.loc[(nopfz_exog[(prefix + "country[T." + c + "]")] == 1) & (nopfz_exog[(prefix + "yyyy_qq[T." + first_vax + "]")] == 1), (prefix + "L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    nopfz_exog.loc[(nopfz_exog[(prefix + "country[T." + c + "]")] == 1) & (nopfz_exog[(prefix + "yyyy_qq[T." + val + "]")] == 1), (prefix + "L1_gri")] = country_fixed_gri
-            except:
-                continue
-
-        #create a "novax" design matrix (i.e., to set vax parameters to 0)
-        novax_exog = vax_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in vax_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
-                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
-            novax_exog[col] = 0
-
-        # adjust the GRI for no vaccination of any kind
-        for c in reg_data.country.unique():
-            try:
-                first_vax = reg_data.loc[((reg_data["country"] == c) & (reg_data.uptake.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = novax_exog.loc[(novax_exog[(prefix + "country[T." + c + "]")] == 1) & (novax_exog[(prefix + "yyyy_qq[T." + first_vax + "]")] == 1), (prefix + "L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    novax_exog.loc[(novax_exog[(prefix + "country[T." + c + "]")] == 1) & (novax_exog[(prefix + "yyyy_qq[T." + val + "]")] == 1), (prefix + "L1_gri")] = country_fixed_gri
-            except:
-                continue 
-        
-        # extract the mean parameters
-        betas = mean_params.loc[[x for x in mean_params.index if prefix in x],]
-        
-        #predict inf_mean values using the original design matrix and the i-th iteration of parameter estimates
-        vax_predictions = np.dot(vax_exog, betas)
-        
-        # set the natural immunity variables to the adjusted values in the absence of pfizer/all vaccination 
-        if depvar == "inf_mean" or depvar == "daily_deaths":
-            nopfz_exog[(prefix + "L1_inf_pc")] = nopfz_inf["infections_L1_inf_pc"]
-            nopfz_exog[(prefix + "L2_cum_inf_pc")] = nopfz_inf["infections_L2_cum_inf_pc"]
-            novax_exog[(prefix + "L1_inf_pc")] = novax_inf["infections_L1_inf_pc"]
-            novax_exog[(prefix + "L2_cum_inf_pc")] = novax_inf["infections_L2_cum_inf_pc"]
-        elif depvar == "gdp_gap":
-            matching_rows = list(inf_data[inf_data.isin(reg_data.to_dict(orient='list')).all(axis=1)].index)
-            inf_in_nopfz = nopfz_inf.loc[matching_rows].reset_index()
-            inf_in_novax = novax_inf.loc[matching_rows].reset_index()
-            nopfz_exog[(prefix + "L1_inf_pc")] = inf_in_nopfz["infections_L1_inf_pc"]
-            nopfz_exog[(prefix + "L2_cum_inf_pc")] = inf_in_nopfz["infections_L2_cum_inf_pc"]
-            novax_exog[(prefix + "L1_inf_pc")] = inf_in_novax["infections_L1_inf_pc"]
-            novax_exog[(prefix + "L2_cum_inf_pc")] = inf_in_novax["infections_L2_cum_inf_pc"]
-    
-        # predict the dependent variable based on the betas and the no pfizer/vaccination variables
-        nopfz_predictions = np.dot(nopfz_exog, betas)
-        novax_predictions = np.dot(novax_exog, betas)
-        
-        #add the predictions to the data frame
-        reg_data["pred_vax"] = vax_predictions
-        reg_data["pred_nopfz"] = nopfz_predictions
-        reg_data["pred_novax"] = novax_predictions
-        if depvar == "inf_mean" or depvar == "daily_deaths":
-            #calculate the impact of vaccination/pfizer for each country-quarter
-            reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_nopfz"] - reg_data["pred_vax"])*reg_data["tot_pop"]
-            reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_novax"] - reg_data["pred_vax"])*reg_data["tot_pop"]
-        else:
-            reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_vax"] - reg_data["pred_nopfz"])*reg_data["gdp_projected_usd"]
-            reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_vax"] - reg_data["pred_novax"])*reg_data["gdp_projected_usd"]
-        self.results_data = reg_data
-    
-    def run_annual_gdp(self, data = qdata):     
-        """
-        Run the regression for the annual GDP.
-
-        Parameters
-        ----------
-        data : data frame, optional
-            Data frame for the regrssion. The default is qdata.
-
-        Returns
-        -------
-        None.
-
-        """
-        # create a data frame with only annual GDP data
-        annual_data = qdata[qdata["type"] == "annual"]
-        # create a year field in the GDP in USD data
-        gdp_usd["year"] = gdp_usd["date"].str[:4].astype(int)
-        # get gdp in 2019
-        pcgdp2019 = gdp_usd[(gdp_usd["year"] == 2019) & (gdp_usd["type"] == "annual")]
-        # collapse 2019 gdp by country
-        pcgdp2019 = pcgdp2019.groupby("country")[["gdp_observed_usd"]].sum().reset_index()
-        pcgdp2019 = pcgdp2019.rename(columns = {"gdp_observed_usd": "gdp2019"})
-        # load in 2019 population data
-        pop2019 = pd.read_stata("../input/national_population_2019.dta")
-        # add population data to 2019 gdp
-        pcgdp2019 = pcgdp2019.merge(pop2019, how = "left", on = "country")
-        # calculate 2019 per capita GDP
-        pcgdp2019["pcgdp2019"] = pcgdp2019["gdp2019"]/pcgdp2019["tot_pop"]
-
-        # add 2019 per capita gdp to the annual GDP data
-        annual_data = annual_data.merge(pcgdp2019[["country", "pcgdp2019"]], how = "left", on = "country")
+    """
+    if discount not in value_inputs:
+        # load in QALY loss data
+        qalys = read_output("../output/qaly_losses_overall" + discount + ".xlsx")
+        qalys = qalys[["country", "yyyy_qq", "Q_nonfatal", "Q_fatal", "Q_overall"]]
         
-        # collapse gdp_gap to the country-year
-        annual_gaps = annual_data.groupby(["country", "year"])[["gdp_gap"]].mean().reset_index()
+        # load in cost data
+        indirect_costs = read_output("../output/indirect_costs_jk" + discount + ".xlsx")
+        costs = direct_costs.merge(indirect_costs, on = ["country", "yyyy_qq"],
+                                   how = "outer")
+        costs = costs.replace(np.nan, 0)
+        # give them the regression base's country and quarter categories, for the merges in the valuation
+        value_inputs[discount] = (match_regbase_keys(qalys, qdata), match_regbase_keys(costs, qdata))
+    return value_inputs[discount]
+
+qalys, costs = load_value_inputs()
+
+def create_inf_lags(data, inf_col = "inf_mean", n_lags = 8):
+    """
+    Create lags of new and cumulative infections per capita within each country.
 
-        # pivot the DataFrame to have years as columns and 'value' as values
-        annual_gaps = annual_gaps.pivot(index='country', columns='year', values='gdp_gap')
+    Parameters
+    ----------
+    data : data frame
+        A data frame with the infections (per capita) and population of each country-quarter, in time order.
+    inf_col : string, optional
+        The infections measure to lag. The default is "inf_mean".
+    n_lags : integer, optional
+        The number of lags. The default is 8.
 
-        # calculate the difference between the years 2021 and 2020
-        annual_gaps['g2021_g2020'] = annual_gaps[2021] - annual_gaps[2020]
-        
-        # calculate total infections and deaths by taking them out of per capita terms
-        annual_data["n"] = annual_data["inf_mean"]*annual_data["tot_pop"]
-        annual_data["d"] = annual_data["daily_deaths"]*annual_data["tot_pop"]
-
-        # calculate cumulative infections and deaths
-        for c in annual_data.country.unique():
-            annual_data.loc[annual_data["country"] == c, "cn"] = annual_data.loc[annual_data["country"] == c, "n"].cumsum()
-            annual_data.loc[annual_data["country"] == c, "cd"] = annual_data.loc[annual_data["country"] == c, "d"].cumsum()
-        
-        # divide cumulative infections and deaths by population
-        annual_data["cn"] = annual_data["cn"]/annual_data["tot_pop"]
-        annual_data["cd"] = annual_data["cd"]/annual_data["tot_pop"]
-        # create fields for cumulative pfizer and non-pfizer uptake
-        annual_data["cv_np"] = annual_data["cum_uptake_notpfz"]
-        annual_data["cv_p"] = annual_data["cum_uptake_pfizer"]
-        annual_countries = annual_data.loc[(annual_data["yyyy_qq"] == "2021_Q1") & (annual_data["cum_uptake"] > 0), "country"].unique()
-        annual_data = annual_data[annual_data.country.isin(annual_countries)]
-
-        # create data frames specifically for 2021_Q4 and 2020_Q4
-        annual_data2021Q4 = annual_data[annual_data["yyyy_qq"] == "2021_Q4"]
-        annual_data2020Q4 = annual_data[annual_data["yyyy_qq"] == "2020_Q4"]
-
-        # we create an annual regression file that includes the cumulative vaccintions through Q4_2021 and the 
-        # cumulative infections and deaths in 2020_Q4
-        annual_reg_df = annual_gaps.merge(annual_data2021Q4[["country", "cv_np", "cv_p"]], on = "country", how = "outer")
-        annual_reg_df = annual_reg_df.merge(annual_data2020Q4[["country", "cn", "cd"]], on = "country", how = "outer")
-
-        # we rename columns and drop missing values
-        annual_reg_df = annual_reg_df.rename(columns = {2020: "g2020", 2021: "g2021", "cv_np": "cv_np2021Q4",  "cv_p": "cv_p2021Q4", "cn": "cn2020Q4", "cd": "cd2020Q4"})
-        annual_reg_df = annual_reg_df.dropna(subset = ["g2021", "g2020", "cv_np2021Q4", "cv_p2021Q4", "cn2020Q4"], how = "any").reset_index(drop = True)
-
-        # we perform the annual regression
-        formula = "g2021_g2020 ~ g2020 + cv_np2021Q4 + cv_p2021Q4 + cn2020Q4"
-        annual_gdp_mod = smf.ols(formula, annual_reg_df)
-        annual_gdp_res = annual_gdp_mod.fit(cov_type = "HC1")
-        
-        self.annual_data = annual_reg_df
-        self.annual_formula = formula
-        self.annual_mod = annual_gdp_mod
-        self.annual_results = annual_gdp_res
-        
-        # we predict our dependent variable in the presence of vaccination
-        annual_reg_df["g2021_g2020_vax"] = annual_gdp_res.predict(annual_reg_df)
-        
-        # then predict in the absence of pfizer
-        nopfz_annual = annual_reg_df.copy()
-        nopfz_annual["cv_p2021Q4"] = 0
-        nopfz_annual["g2021_g2020_nopfz"] = annual_gdp_res.predict(nopfz_annual)
-        
-        # then predict in the absence of all vaccination
-        novax_annual = nopfz_annual.copy()
-        novax_annual["cv_np2021Q4"] = 0
-        novax_annual["cv_p2021Q4"] = 0
-        novax_annual["g2021_g2020_novax"] = annual_gdp_res.predict(novax_annual)
-        
-        # we get the 2021 projected GDP in USD
-        gdp2021 = gdp_usd[gdp_usd["year"] == 2021]
-        gdp2021 = gdp2021.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
-        gdp_value = novax_annual.merge(gdp2021, on = "country", how = "left")
-        
-        # calculate GDP in the presence of vaccination, absence of vaccination, and absence of pfizer
-        gdp_value["gdp_vax"] = (gdp_value["g2021_g2020_vax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-        gdp_value["gdp_novax"] = (gdp_value["g2021_g2020_novax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-        gdp_value["gdp_nopfz"] = (gdp_value["g2021_g2020_nopfz"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-        
-        # calculate the impact of vaccination and pfizer on annual GDP
-        gdp_value["gdp_allvax"] = gdp_value["gdp_vax"] - gdp_value["gdp_novax"]
-        gdp_value["gdp_pfizer"] = gdp_value["gdp_vax"] - gdp_value["gdp_nopfz"]
-        
-        self.annual_results_data = gdp_value        
+    Returns
+    -------
+    data : data frame
+        The data frame with the cumulative infections and "L{i}_cum_inf_pc" and "L{i}_inf_pc" columns added.
 
-    def run_quarterly_psa(self, depvar="inf_mean", data = qdata, n_samp = 1000):
-        """
-        Perform a probabilistic sensitivity analysis. We assume parameters are normally distribute and, thus, use a 
-        multivariate normal distribution from which we take 1000 draws. Each draw is evaluated individually.
-        
-        Please see comments in the function "run_quarterly_basecase" for details.
-
-        Parameters
-        ----------
-        depvar : string, optional
-            A string containing the dependent variable of interest. The default is "inf_mean".
-        data : data frame, optional
-            A data frame containing the regression data. The default is qdata.
-        n_samp : integer, optional
-            An integer describing the number of iterations to perform in the simulation. The default is 1000.
-
-        Returns
-        -------
-        None.
-
-        """
-        self.n_samp = n_samp
-        #drop countries from the regression base file that don't have data
-        inf_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
-        
-        #set up and run the regression
-        formulae = {'infections': 'inf_mean ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq',
-                    'deaths': 'daily_deaths ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq'}
-        
-        inf_model = SUR.from_formula(formulae, inf_data)
-        inf_sur = inf_model.fit(method = "ols", cov_type = "robust")
-        
-        #extract the mean parameter coefficients and covariance matrix from regression
-        inf_params = inf_sur.params
-        inf_cov = inf_sur.cov
-        
-        #using those parameters, take 10000 draws of parameter estimates from a multivariate normal distribution
-        mvn_inf = multivariate_normal(mean = inf_params, cov = inf_cov, allow_singular = True, seed = 102015)
-        inf_samples = pd.DataFrame(mvn_inf.rvs(size = n_samp)).T
-        inf_samples.index = inf_params.index
-        
-        #label the columns in the design matrix
-        inf_exog = pd.DataFrame(inf_sur.model._exog[0].ndarray)
-        inf_exog.columns = [x for x in inf_params.index if "infections_" in x]       
-        
-        q_dict = {"2020_Q4" : ["2021_Q2", "2021_Q3", "2021_Q4"],
-                  "2021_Q1" : ["2021_Q3", "2021_Q4"],
-                  "2021_Q2": ["2021_Q4"],
-                  "2021_Q3": [""],
-                  "2021_Q4": [""]}
-        
-        q_list = list(q_dict.keys())
-        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-        nopfz_inf = inf_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
-            nopfz_inf[col] = 0
-        
-        for c in inf_data.country.unique():
-            try:
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake_pfizer.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = nopfz_inf.loc[(nopfz_inf[("infections_country[T." + c + "]")] == 1) & (nopfz_inf[("infections_yyyy_qq[T." + first_vax + "]")] == 1), ("infections_L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    nopfz_inf.loc[(nopfz_inf[("infections_country[T." + c + "]")] == 1) & (nopfz_inf[("infections_yyyy_qq[T." + val + "]")] == 1), ("infections_L1_gri")] = country_fixed_gri
-            except:
-                continue
-        
-        #create a "novax" design matrix (i.e., to set vax parameters to 0)
-        novax_inf = inf_exog.copy()
-        #set those vax parameters to 0.
-        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
-                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
-            novax_inf[col] = 0
-        
-        for c in inf_data.country.unique():
-            try:
-                first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake.ne(0))).idxmax(), "yyyy_qq"]
-                country_fixed_gri = novax_inf.loc[(novax_inf[("infections_country[T." + c + "]")] == 1) & (novax_inf[("infections_yyyy_qq[T." + first_vax + "]")] == 1), ("infections_L1_gri")].values[0]
-                for val in q_list[q_list.index(first_vax): ]:
-                    novax_inf.loc[(novax_inf[("infections_country[T." + c + "]")] == 1) & (novax_inf[("infections_yyyy_qq[T." + val + "]")] == 1), ("infections_L1_gri")] = country_fixed_gri
-            except:
-                continue
-           
-        #loop over each of the 1,000 iterations of parameter estimates
-        inf_samples = inf_samples.loc[[x for x in inf_samples.index if "infections_" in x],]
-        
-        if depvar == "inf_mean" or depvar == "daily_deaths":
-            reg_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
-            model = SUR.from_formula(formulae, reg_data)
-            model_sur = model.fit(method = "ols", cov_type = "robust")
-            mean_params = model_sur.params
-            cov_params = model_sur.cov
-            
-        elif depvar == "gdp_gap":
-            reg_data = data[data["type"] == "quarterly"]
-            reg_data = reg_data[reg_data["country"] != "Moldova"]
-            formula = "gdp_gap ~ L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq"
-            model = smf.ols(formula = formula, data = reg_data, missing = "drop")
-            model_res = model.fit(cov_type="HC1")
-            mean_params = model_res.params
-            cov_params = model_res.cov_params()
-        
-        #using those parameters, take 10000 draws of parameter estimates from a multivariate normal distribution
-        mvn = multivariate_normal(mean = mean_params, cov = cov_params, allow_singular = True, seed = 102015)
-        samples = pd.DataFrame(mvn.rvs(size = n_samp)).T
-        samples.index = mean_params.index
-        
-        if depvar == "inf_mean":
-            prefix = "infections_"
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_sur.model._exog[0].ndarray)
-            vax_exog.columns = [x for x in mean_params.index if prefix in x]
-            
-        elif depvar == "daily_deaths":
-            prefix = "deaths_"
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_sur.model._exog[1].ndarray)
-            vax_exog.columns = [x for x in mean_params.index if prefix in x]
-            
-        elif depvar == "gdp_gap":
-            prefix = ""
-            #grab the design matrix from the model
-            vax_exog = pd.DataFrame(model_res.model.exog)
-            #label the columns in the design matrix
-            vax_exog.columns = mean_params.index   
-            
-        #create an empty list to put in values of estimated averted outcome
-        averted_outcome_list = list([[], []])
-        averted_df_list = list([[], []])
-        #loop over each of the 1,000 iterations of parameter estimates
-        dep_samples = samples.loc[[x for x in samples.index if prefix in x],]
-        inf_samples = inf_samples.loc[[x for x in inf_samples.index if "infections_" in x],]
-        
-        for i in dep_samples.columns: 
-            nopfz_inf_iter = nopfz_inf.copy()
-            novax_inf_iter = novax_inf.copy()
-            for c in inf_data.country.unique():
-                try:
-                    country_string = "infections_country[T." + c + "]"
-                    first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake_pfizer.ne(0))).idxmax(), "yyyy_qq"]
-                    for val in q_dict[first_vax]:
-                        nopfz_inf_iter = nopfz_inf_iter[[x for x in inf_params.index if "infections_" in x]]
-                        nopfz_predictions = np.dot(nopfz_inf_iter, inf_samples[i])
-                        nopfz_inf_iter["pred"] = nopfz_predictions
-                        nopfz_inf_iter = pd.concat([nopfz_inf_iter, inf_data["tot_pop"]], axis = 1)
-                        q_string = "infections_yyyy_qq[T." + val + "]"
-                        try:
-                            nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1) & (nopfz_inf_iter[q_string] == 1), ("infections_L1_inf_pc")] = nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), "pred"].shift(1, fill_value = 0)
-                            nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), "L1_tot_pop"] = nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), "tot_pop"].shift(1, fill_value = 1)
-                            nopfz_inf_iter["L1_abs"] = nopfz_inf_iter["infections_L1_inf_pc"]*nopfz_inf_iter["L1_tot_pop"]
-                            nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), "L1_cuml"] = nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), "L1_abs"].cumsum()
-                            nopfz_inf_iter["pred_L1_cum_pc"] = nopfz_inf_iter["L1_cuml"]/nopfz_inf_iter["L1_tot_pop"]
-                            nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1) & (nopfz_inf_iter[q_string] == 1), ("infections_L2_cum_inf_pc")] = nopfz_inf_iter.loc[(nopfz_inf_iter[country_string] == 1), ("pred_L1_cum_pc")].shift(1, fill_value = 0)
-                        except:
-                            continue
-                except:
-                    continue
-            
-            for c in inf_data.country.unique():
-                try:
-                    country_string = "infections_country[T." + c + "]"
-                    first_vax = inf_data.loc[((inf_data["country"] == c) & (inf_data.uptake.ne(0))).idxmax(), "yyyy_qq"]
-                    for val in q_dict[first_vax]:
-                        novax_inf_iter = novax_inf_iter[[x for x in inf_params.index if "infections_" in x]]
-                        novax_predictions = np.dot(novax_inf_iter, inf_samples[i])
-                        novax_inf_iter["pred"] = novax_predictions
-                        novax_inf_iter = pd.concat([novax_inf_iter, inf_data["tot_pop"]], axis = 1)
-                        q_string = "infections_yyyy_qq[T." + val + "]"
-                        try:
-                            novax_inf_iter.loc[(novax_inf_iter[country_string] == 1) & (novax_inf_iter[q_string] == 1), ("infections_L1_inf_pc")] = novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), "pred"].shift(1, fill_value = 0)
-                            novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), "L1_tot_pop"] = novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), "tot_pop"].shift(1, fill_value = 1)
-                            novax_inf_iter["L1_abs"] = novax_inf_iter["infections_L1_inf_pc"]*novax_inf_iter["L1_tot_pop"]
-                            novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), "L1_cuml"] = novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), "L1_abs"].cumsum()
-                            novax_inf_iter["pred_L1_cum_pc"] = novax_inf_iter["L1_cuml"]/novax_inf_iter["L1_tot_pop"]
-                            novax_inf_iter.loc[(novax_inf_iter[country_string] == 1) & (novax_inf_iter[q_string] == 1), ("infections_L2_cum_inf_pc")] = novax_inf_iter.loc[(novax_inf_iter[country_string] == 1), ("pred_L1_cum_pc")].shift(1, fill_value = 0)
-                        except:
-                            continue
-                except:
-                    continue
-            
-            if depvar == "inf_mean" or depvar == "daily_deaths":
-                #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-                nopfz_exog = nopfz_inf_iter.copy()
-                #set those vax parameters to 0.
-                nopfz_exog = nopfz_exog[[x for x in mean_params.index if "infections_" in x]]
-                nopfz_exog.columns = nopfz_exog.columns.str.replace("infections_", prefix)
-                
-                #create a "novax" design matrix (i.e., to set vax parameters to 0)
-                novax_exog = novax_inf_iter.copy()
-                #set those vax parameters to 0.
-                novax_exog = novax_exog[[x for x in mean_params.index if "infections_" in x]]
-                novax_exog.columns = novax_exog.columns.str.replace("infections_", prefix)
-                
-            elif depvar == "gdp_gap":
-                matching_rows = list(inf_data[inf_data.isin(reg_data.to_dict(orient='list')).all(axis=1)].index)
-                inf_in_nopfz = nopfz_inf_iter.loc[matching_rows].reset_index()
-                inf_in_novax = novax_inf_iter.loc[matching_rows].reset_index()
-                
-                #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-                nopfz_exog = inf_in_nopfz.copy()
-                #set those vax parameters to 0.
-                nopfz_exog.columns = nopfz_exog.columns.str.replace("infections_", prefix)
-                nopfz_exog = nopfz_exog[[x for x in mean_params.index if prefix in x]]
-                
-                #create a "novax" design matrix (i.e., to set vax parameters to 0)
-                novax_exog = inf_in_novax.copy()
-                #set those vax parameters to 0.
-                novax_exog.columns = novax_exog.columns.str.replace("infections_", prefix)
-                novax_exog = novax_exog[[x for x in mean_params.index if prefix in x]]
-            
-            #predict inf_mean values using the original design matrix and the i-th iteration of parameter estimates
-            vax_predictions = np.dot(vax_exog, dep_samples[i])   
-            #predict inf_mean valeus using the nopfz design matrix and the i-th iteration of parameter estimates 
-            nopfz_predictions = np.dot(nopfz_exog, dep_samples[i])
-            #predict inf_mean valeus using the nopfz design matrix and the i-th iteration of parameter estimates
-            novax_predictions = np.dot(novax_exog, dep_samples[i])
-            #add the predictions to the data frame
-            reg_data["pred_vax"] = vax_predictions
-            reg_data["pred_nopfz"] = nopfz_predictions
-            reg_data["pred_novax"] = novax_predictions
-            if depvar == "inf_mean" or depvar == "daily_deaths":
-                #calculate averted infections for each country-quarter
-                reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_nopfz"] - reg_data["pred_vax"])*reg_data["tot_pop"]
-                reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_novax"] - reg_data["pred_vax"])*reg_data["tot_pop"]
-            else:
-                reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_vax"] - reg_data["pred_nopfz"])*reg_data["gdp_projected_usd"]
-                reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_vax"] - reg_data["pred_novax"])*reg_data["gdp_projected_usd"]
-            #add df values to the df list
-            averted_df_list[0].append(pd.DataFrame(reg_data[["country", "yyyy_qq", f"averted_{depvar}_pfz"]]))
-            averted_df_list[1].append(pd.DataFrame(reg_data[["country", "yyyy_qq", f"averted_{depvar}_allvax"]]))
-            #sum over all country-quarters to get total averted infections in the i-th iteration
-            averted_pfz = reg_data[f"averted_{depvar}_pfz"].sum()
-            averted_allvax = reg_data[f"averted_{depvar}_allvax"].sum()
-            #add the i-th value of averted infections to the list of averted infections
-            averted_outcome_list[0].append(averted_pfz)
-            averted_outcome_list[1].append(averted_allvax)
-        #after the for loop finishes, we have 10,000 values of estimated averted infections in our list.
-        #find the 2.5th and 97.5th percentile values among these 10,000 to get the 95% interval.
-        self.percentiles_pfz = np.percentile(averted_outcome_list[0], [2.5, 50, 97.5])
-        self.percentiles_allvax = np.percentile(averted_outcome_list[1], [2.5, 50, 97.5])
-        self.outcome_list = averted_outcome_list
-        self.df_list = averted_df_list
-
-    def run_annual_gdp_psa(self, data, n_samp = 1000):
-        """
-        Perform a probabilistic sensitivity analysis on the annual GDP. We assume parameters are normally distribute and, thus, use a 
-        multivariate normal distribution from which we take 1000 draws. Each draw is evaluated individually.
-        
-        Please see comments in the function "run_annual_gdp" for details.
-
-        Parameters
-        ----------
-        data : data frame
-            A data frame containing the regression data.
-        n_samp : integer, optional
-            An integer describing the number of simulations to perform. The default is 1000.
-
-        Returns
-        -------
-        None.
-
-        """
-        annual_data = qdata[qdata["type"] == "annual"]
-        gdp_usd["year"] = gdp_usd["date"].str[:4].astype(int)
-        pcgdp2019 = gdp_usd[(gdp_usd["year"] == 2019) & (gdp_usd["type"] == "annual")]
-        pcgdp2019 = pcgdp2019.groupby("country")[["gdp_observed_usd"]].sum().reset_index()
-        pcgdp2019 = pcgdp2019.rename(columns = {"gdp_observed_usd": "gdp2019"})
-        pop2019 = pd.read_stata("../input/national_population_2019.dta")
-        pcgdp2019 = pcgdp2019.merge(pop2019, how = "left", on = "country")
-        pcgdp2019["pcgdp2019"] = pcgdp2019["gdp2019"]/pcgdp2019["tot_pop"]
-
-        annual_data = annual_data.merge(pcgdp2019[["country", "pcgdp2019"]], how = "left", on = "country")
-        
-        annual_gaps = annual_data.groupby(["country", "year"])[["gdp_gap"]].mean().reset_index()
+    """
+    data["inf_abs"] = data[inf_col]*data["tot_pop"]
+    data["cum_inf"] = data.groupby("country")["inf_abs"].cumsum()
+    data["cum_inf_pc"] = data["cum_inf"]/data["tot_pop"]
+    for i in range(1, n_lags + 1):
+        data["L" + str(i) + "_cum_inf_pc"] = data.groupby("country")["cum_inf_pc"].shift(i, fill_value = 0)
+    for i in range(1, n_lags + 1):
+        data["L" + str(i) + "_inf_pc"] = data.groupby("country")[inf_col].shift(i, fill_value = 0)
+    return data
 
-        # Pivot the DataFrame to have years as columns and 'value' as values
-        annual_gaps = annual_gaps.pivot(index='country', columns='year', values='gdp_gap')
+# create 9 lags of new and cumulative infections
+qdata = create_inf_lags(qdata)
 
-        # Calculate the difference between the years 2021 and 2020
-        annual_gaps['g2021_g2020'] = annual_gaps[2021] - annual_gaps[2020]
-        
-        annual_data["n"] = annual_data["inf_mean"]*annual_data["tot_pop"]
-        annual_data["d"] = annual_data["daily_deaths"]*annual_data["tot_pop"]
+# merge oxcgrt data to regression data
+qdata = qdata.merge(match_regbase_keys(oxcgrt, qdata), how = "left", on = ["country", "yyyy_qq"])
 
-        for c in annual_data.country.unique():
-            annual_data.loc[annual_data["country"] == c, "cn"] = annual_data.loc[annual_data["country"] == c, "n"].cumsum()
-            annual_data.loc[annual_data["country"] == c, "cd"] = annual_data.loc[annual_data["country"] == c, "d"].cumsum()
-        
-        annual_data["cn"] = annual_data["cn"]/annual_data["tot_pop"]
-        annual_data["cd"] = annual_data["cd"]/annual_data["tot_pop"]
-        annual_data["cv_np"] = annual_data["cum_uptake_notpfz"]
-        annual_data["cv_p"] = annual_data["cum_uptake_pfizer"]
-        annual_countries = annual_data.loc[(annual_data["yyyy_qq"] == "2021_Q1") & (annual_data["cum_uptake"] > 0), "country"].unique()
-        annual_data = annual_data[annual_data.country.isin(annual_countries)]
+# remove puerto rico
+qdata = qdata[qdata["country"] != "Puerto Rico"]
+#qdata.to_excel("../output/pre_reg_data.xlsx")
 
-        annual_data2021Q4 = annual_data[annual_data["yyyy_qq"] == "2021_Q4"]
-        annual_data2020Q4 = annual_data[annual_data["yyyy_qq"] == "2020_Q4"]
+# create a separate data frame for quarterly gdp data
+quarterly_data = qdata[qdata["type"] == "quarterly"]
 
+# see which entries get dropped 
+dropped = qdata.loc[qdata.index.difference(qdata.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").index)]
 
-        annual_reg_df = annual_gaps.merge(annual_data2021Q4[["country", "cv_np", "cv_p"]], on = "country", how = "outer")
-        annual_reg_df = annual_reg_df.merge(annual_data2020Q4[["country", "cn", "cd"]], on = "country", how = "outer")
+# %% seeming unrelated regressions
 
-        annual_reg_df = annual_reg_df.rename(columns = {2020: "g2020", 2021: "g2021", "cv_np": "cv_np2021Q4",  "cv_p": "cv_p2021Q4", "cn": "cn2020Q4", "cd": "cd2020Q4"})
-        annual_reg_df = annual_reg_df.dropna(subset = ["g2021", "g2020", "cv_np2021Q4", "cv_p2021Q4", "cn2020Q4"], how = "any").reset_index(drop = True)
-        
-        formula = "g2021_g2020 ~ g2020 + cv_np2021Q4 + cv_p2021Q4 + cn2020Q4"
-        annual_gdp_mod = smf.ols(formula, annual_reg_df)
-        annual_gdp_res = annual_gdp_mod.fit(cov_type = "HC1")
-        
-        #extract the mean parameter coefficients and covariance matrix from regression
-        mean_params = annual_gdp_res.params
-        cov_params = annual_gdp_res.cov_params()
-        
-        #using those parameters, take 10000 draws of parameter estimates from a multivariate normal distribution
-        mvn = multivariate_normal(mean = mean_params, cov = cov_params, allow_singular = True, seed = 102015)
-        samples = pd.DataFrame(mvn.rvs(size = n_samp)).T
-        samples.index = mean_params.index
-        
-        #grab the design matrix from the model
-        vax_exog = pd.DataFrame(annual_gdp_res.model.exog)
-        #label the columns in the design matrix
-        vax_exog.columns = mean_params.index
-        
-        #create an empty list to put in values of estimated averted outcome
-        averted_outcome_list = list([[], []])
-        averted_df_list = list([[], []])
-        
-        #loop over each of the 1,000 iterations of parameter estimates
-        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
-        nopfz_exog = vax_exog.copy()
-        #set those vax parameters to 0.
-        nopfz_exog["cv_p2021Q4"] = 0
-        
-        #create a "novax" design matrix (i.e., to set vax parameters to 0)
-        novax_exog = vax_exog.copy()
-        #set those vax parameters to 0.
-        novax_exog["cv_p2021Q4"] = 0
-        novax_exog["cv_np2021Q4"] = 0
-        
-        for i in samples.columns:
-            #predict inf_mean values using the original design matrix and the i-th iteration of parameter estimates
-            vax_predictions = np.dot(vax_exog, samples[i])   
-            #predict inf_mean valeus using the nopfz design matrix and the i-th iteration of parameter estimates 
-            nopfz_predictions = np.dot(nopfz_exog, samples[i])
-            #predict inf_mean valeus using the nopfz design matrix and the i-th iteration of parameter estimates
-            novax_predictions = np.dot(novax_exog, samples[i])
-            
-            #add the predictions to the data frame
-            annual_reg_df["pred_vax"] = vax_predictions
-            annual_reg_df["pred_nopfz"] = nopfz_predictions
-            annual_reg_df["pred_novax"] = novax_predictions
-            
-            gdp2021 = gdp_usd[gdp_usd["year"] == 2021]
-            gdp2021 = gdp2021.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
-            gdp_value = annual_reg_df.merge(gdp2021, on = "country", how = "left")
-            
-            gdp_value["gdp_vax"] = (gdp_value["pred_vax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-            gdp_value["gdp_novax"] = (gdp_value["pred_novax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-            gdp_value["gdp_nopfz"] = (gdp_value["pred_nopfz"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
-            
-            gdp_value["averted_gdp_gap_allvax"] = gdp_value["gdp_vax"] - gdp_value["gdp_novax"]
-            gdp_value["averted_gdp_gap_pfz"] = gdp_value["gdp_vax"] - gdp_value["gdp_nopfz"]
-
-            #add df values to the df list
-            averted_df_list[0].append(pd.DataFrame(gdp_value[["country", "averted_gdp_gap_pfz"]]))
-            averted_df_list[1].append(pd.DataFrame(gdp_value[["country", "averted_gdp_gap_allvax"]]))
-            #sum over all country-quarters to get total averted infections in the i-th iteration
-            averted_pfz = gdp_value["averted_gdp_gap_pfz"].sum()
-            averted_allvax = gdp_value["averted_gdp_gap_allvax"].sum()
-            #add the i-th value of averted infections to the list of averted infections
-            averted_outcome_list[0].append(averted_pfz)
-            averted_outcome_list[1].append(averted_allvax)
-        #after the for loop finishes, we have 10,000 values of estimated averted infections in our list.
-        #find the 2.5th and 97.5th percentile values among these 10,000 to get the 95% interval.
-        self.annual_gdp_list = averted_outcome_list
-        self.annual_gdp_df_list = averted_df_list
-        
+# the regressions and their counterfactuals are in sur_models.py
 # create an object that is of the SUR_model class
 inf = SUR_model()
 # run the quarterly basecase on the infections data
@@ -927,7 +196,7 @@ gdp_q_df = gdp_q.results_data
 # create another SUR_model object
 gdp_a = SUR_model()
 # run the annual basecase on the annual GDP data
-gdp_a.run_annual_gdp(data = qdata)
+gdp_a.run_annual_gdp(data = qdata, gdp_usd = gdp_usd, pop2019 = pop2019)
 # keep the results
 gdp_a_df = gdp_a.annual_results_data
 # save the annual reg data
@@ -935,13 +204,6 @@ gdp_a_df = gdp_a.annual_results_data
 # save the results
 #gdp_a_df.to_excel("../output/annual_gdp_results_data.xlsx")
 
-# combine the quarterly GDP, deaths, and infections results with QALYs, costs, and full income data
-combined_df = gdp_q_df[["country", "yyyy_qq", "averted_gdp_gap_pfz", "averted_gdp_gap_allvax"]].merge(death_df[["country", "yyyy_qq", "averted_daily_deaths_pfz", "averted_daily_deaths_allvax"]], how = "outer", on = ["country", "yyyy_qq"])
-combined_df = combined_df.merge(inf_df, how = "outer", on = ["country", "yyyy_qq"])
-combined_df = combined_df.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
-combined_df = combined_df.merge(costs, on = ["country", "yyyy_qq"], how = "left")
-combined_df = combined_df.merge(fullincome, on = "country", how = "left")
-
 # combine the results from our regressions to compute the value of vaccination
 def compute_vov(df):
     """
@@ -1009,200 +271,684 @@ def compute_vov(df):
     df["allvax_vov"] = (df["allvax_health_value"]).add(df["averted_gdp_gap_allvax"], fill_value=0)
     return df
 
-# estimate the quarterly vov for our data
-vov_df = compute_vov(combined_df)
+# combine the results from all the regressions into the value of vaccination
+def compute_global_vov(inf_df, death_df, gdp_q_df, gdp_a, qalys, costs):
+    """
+    Computes the value of vaccination by country-quarter, by country, and globally (in total, per dose, and per 
+    capita) from the base case results of the four regressions.
+
+    Parameters
+    ----------
+    inf_df : data frame
+        The results data of the infections regression.
+    death_df : data frame
+        The results data of the deaths regression.
+    gdp_q_df : data frame
+        The results data of the quarterly GDP regression.
+    gdp_a : SUR_model
+        The SUR_model object that has run the annual GDP regression.
+    qalys : data frame
+        The QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
+
+    Returns
+    -------
+    vov_df : data frame
+        The regression results with the value of vaccination by country-quarter.
+    country_quarter_vov : data frame
+        The value of vaccination components by country-quarter.
+    country_vov : data frame
+        The value of vaccination components by country, including the annual GDP results.
+    global_vov : data frame
+        The global value of vaccination, in total, per dose, and per capita.
+    denominators : dictionary
+        The doses and populations that the per dose and per capita values are based on.
+
+    """
+    # combine the quarterly GDP, deaths, and infections results with QALYs, costs, and full income data
+    combined_df = gdp_q_df[["country", "yyyy_qq", "averted_gdp_gap_pfz", "averted_gdp_gap_allvax"]].merge(death_df[["country", "yyyy_qq", "averted_daily_deaths_pfz", "averted_daily_deaths_allvax"]], how = "outer", on = ["country", "yyyy_qq"])
+    combined_df = combined_df.merge(inf_df, how = "outer", on = ["country", "yyyy_qq"])
+    combined_df = combined_df.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
+    combined_df = combined_df.merge(costs, on = ["country", "yyyy_qq"], how = "left")
+    combined_df = combined_df.merge(fullincome, on = "country", how = "left")
+
+    # estimate the quarterly vov for our data
+    vov_df = compute_vov(combined_df)
+
+    # calculate total pfizer doses and total all doses
+    vov_df["uptake_pfizer_doses"] = vov_df["uptake_pfizer"]*vov_df["tot_pop"]
+    vov_df["uptake_doses"] = vov_df["uptake"]*vov_df["tot_pop"]
+
+    # create a list of all columns to keep
+    keep_cols = list(vov_df.loc[:, "averted_inf_mean_pfz":"allvax_vov"].columns) + list(["averted_gdp_gap_pfz",
+                                               "averted_gdp_gap_allvax", "averted_daily_deaths_pfz",
+                                               "averted_daily_deaths_allvax", "uptake_pfizer_doses",
+                                               "uptake_doses"])
+
+    # keep those columns
+    country_quarter_vov = vov_df.loc[:, (list(["country", "yyyy_qq"]) + list(keep_cols))]
+
+    # collapse the data frame to the country level
+    country_vov = vov_df.groupby(["country"], observed = True)[keep_cols].sum().reset_index()
+    # add the annual results 
+    country_vov = country_vov.merge(gdp_a.annual_results_data[["country", "gdp_allvax", "gdp_pfizer"]], on = "country", how = "outer")
+    # calculate the full VoV as the sum of quarterly and annual results
+    country_vov["pfz_full_vov"] = country_vov["pfz_vov"].add(country_vov["gdp_pfizer"], fill_value=0)
+    country_vov["allvax_full_vov"] = country_vov["allvax_vov"].add(country_vov["gdp_allvax"], fill_value=0)
+    # add regions to the data
+    country_vov = country_vov.merge(qdata[["country", "WHO_region"]].drop_duplicates(), on = "country", how = "left")
+
+    # create a new list of columns to keep
+    keep_cols = list(keep_cols) + list(["pfz_full_vov", "allvax_full_vov", "uptake_pfizer_doses", "uptake_doses", "gdp_pfizer", "gdp_allvax"])
+    # copy the country-specific vov dataframe
+    overall_vov = country_vov.copy()
+    overall_vov["country"] = "global"
+    # sum over all countries to get the global value
+    global_vov = overall_vov.groupby(["country"])[keep_cols].sum()
+
+    sur_doses_df = qdata[qdata["yyyy_qq"] != "2021_Q4"]
+    sur_doses_df["uptake_doses"] = sur_doses_df["uptake"]*sur_doses_df["tot_pop"]
+    sur_doses_df["uptake_pfizer_doses"] = sur_doses_df["uptake_pfizer"]*sur_doses_df["tot_pop"]
+
+    # calculate the number of doses in the infections and deaths regressions
+    health_doses = sur_doses_df.merge(inf_df[["country", "yyyy_qq"]], on = ["country", "yyyy_qq"], how = "right")
+    health_pfizer_doses = health_doses["uptake_pfizer_doses"].sum()
+    health_allvax_doses = health_doses["uptake_doses"].sum()
+
+    # calculate the number of doses in the quarterly GDP regression
+    q_gdp_doses = sur_doses_df.merge(gdp_q_df[["country", "yyyy_qq"]], on = ["country", "yyyy_qq"], how = "right")
+    q_gdp_pfizer_doses = q_gdp_doses["uptake_pfizer_doses"].sum()
+    q_gdp_allvax_doses = q_gdp_doses["uptake_doses"].sum()
+
+    # calculate the number of doses in the annual GDP regression
+    pop2021 = qdata.loc[qdata["year"] == 2021, ["country", "tot_pop"]].drop_duplicates()
+    a_gdp_doses = gdp_a.annual_data.merge(pop2021, how = "left", on = "country")
+    a_gdp_pfizer_doses = (a_gdp_doses["cv_p2021Q4"]*a_gdp_doses["tot_pop"]).sum()
+    a_gdp_allvax_doses = ((a_gdp_doses["cv_np2021Q4"] + a_gdp_doses["cv_p2021Q4"])*a_gdp_doses["tot_pop"]).sum()
+
+    # calculate the value per dose of the health components of value for Pfizer
+    global_vov["pfz_health_value_perdose"] = global_vov["pfz_health_value"]/health_pfizer_doses
+    # calculate the value per dose of the quarterly gdp value for Pfizer
+    global_vov["pfz_qgdp_value_perdose"] = global_vov["averted_gdp_gap_pfz"]/q_gdp_pfizer_doses
+    # calculate the value per dose of the annual gdp value for Pfizer
+    global_vov["pfz_agdp_value_perdose"] = global_vov["gdp_pfizer"]/a_gdp_pfizer_doses
+    pfz_gdp_value = [global_vov["pfz_qgdp_value_perdose"].values[0], global_vov["pfz_agdp_value_perdose"].values[0]]
+    pfz_gdp_doses = [q_gdp_pfizer_doses, a_gdp_pfizer_doses]
+    # we then calculate the dose-weighted average of the two GDP components 
+    global_vov["pfz_gdp_value_perdose"] = np.average(pfz_gdp_value, weights = pfz_gdp_doses)
+
+    # we do the same for all vaccines
+    global_vov["allvax_health_value_perdose"] = global_vov["allvax_health_value"]/health_allvax_doses
+    global_vov["allvax_qgdp_value_perdose"] = global_vov["averted_gdp_gap_allvax"]/q_gdp_allvax_doses
+    global_vov["allvax_agdp_value_perdose"] = global_vov["gdp_allvax"]/a_gdp_allvax_doses
+    allvax_gdp_value = [global_vov["allvax_qgdp_value_perdose"].values[0], global_vov["allvax_agdp_value_perdose"].values[0]]
+    allvax_gdp_doses = [q_gdp_allvax_doses, a_gdp_allvax_doses]
+    global_vov["allvax_gdp_value_perdose"] = np.average(allvax_gdp_value, weights = allvax_gdp_doses)
+
+    # we then calculate the total value per dose for Pfizer andfor all vaccines
+    global_vov["pfz_vov_perdose"] = global_vov["pfz_health_value_perdose"] + global_vov["pfz_gdp_value_perdose"]
+    global_vov["allvax_vov_perdose"] = global_vov["allvax_health_value_perdose"] + global_vov["allvax_gdp_value_perdose"]
+
+    # calculate the population of the people in the countries included in the infections and death regressions
+    allvax_health_countries = inf_df.country.unique()
+    pfizer_health_countries = inf_df.loc[(inf_df["L1_uptake_pfizer"] != 0), "country"].unique()
+    allvax_health_pop = pop2019.loc[pop2019.country.isin(allvax_health_countries), "tot_pop"].sum()
+    pfizer_health_pop = pop2019.loc[pop2019.country.isin(pfizer_health_countries), "tot_pop"].sum()
+
+    # calculate the population of the people in the countries included in the quarterly GDP regressions
+    allvax_qgdp_countries = gdp_q_df.country.unique()
+    pfizer_qgdp_countries = gdp_q_df.loc[(gdp_q_df["L1_uptake_pfizer"] != 0), "country"].unique()
+    allvax_qgdp_pop = pop2019.loc[pop2019.country.isin(allvax_qgdp_countries), "tot_pop"].sum()
+    pfizer_qgdp_pop = pop2019.loc[pop2019.country.isin(pfizer_qgdp_countries), "tot_pop"].sum()
+
+    # calculate the population of the people in the countries included in the annual GDP regressions
+    allvax_agdp_countries = gdp_a.annual_results_data.country.unique()
+    pfizer_agdp_countries = gdp_a.annual_data.loc[gdp_a.annual_data["cv_p2021Q4"] != 0, "country"].unique()
+    allvax_agdp_pop = pop2019.loc[pop2019.country.isin(allvax_agdp_countries), "tot_pop"].sum()
+    pfizer_agdp_pop = pop2019.loc[pop2019.country.isin(pfizer_agdp_countries), "tot_pop"].sum()
+
+    # calculate the value per capita of the health components of value for Pfizer
+    global_vov["pfz_health_value_percapita"] = global_vov["pfz_health_value"]/pfizer_health_pop
+    # calculate the value per capita of the quarterly GDP value for Pfizer
+    global_vov["pfz_qgdp_value_percapita"] = global_vov["averted_gdp_gap_pfz"]/pfizer_qgdp_pop
+    # calculate the value per capita of the annual GDP value for Pfizer
+    global_vov["pfz_agdp_value_percapita"] = global_vov["gdp_pfizer"]/pfizer_agdp_pop
+    # calculate the population-weighted average of the GDP results for Pfizer
+    pfz_gdp_value = [global_vov["pfz_qgdp_value_percapita"].values[0], global_vov["pfz_agdp_value_percapita"].values[0]]
+    pfz_gdp_pop = [pfizer_qgdp_pop, pfizer_agdp_pop]
+    global_vov["pfz_gdp_value_percapita"] = np.average(pfz_gdp_value, weights = pfz_gdp_pop)
+
+    # do the same for all vaccines
+    global_vov["allvax_health_value_percapita"] = global_vov["allvax_health_value"]/allvax_health_pop
+    global_vov["allvax_qgdp_value_percapita"] = global_vov["averted_gdp_gap_allvax"]/allvax_qgdp_pop
+    global_vov["allvax_agdp_value_percapita"] = global_vov["gdp_allvax"]/allvax_agdp_pop
+    allvax_gdp_value = [global_vov["allvax_qgdp_value_percapita"].values[0], global_vov["allvax_agdp_value_percapita"].values[0]]
+    allvax_gdp_pop = [allvax_qgdp_pop, allvax_agdp_pop]
+    global_vov["allvax_gdp_value_percapita"] = np.average(allvax_gdp_value, weights = allvax_gdp_pop)
+
+    # calculate the full value per capita for Pfizer and all vaccines
+    global_vov["pfz_vov_percapita"] = global_vov["pfz_health_value_percapita"] + global_vov["pfz_gdp_value_percapita"]
+    global_vov["allvax_vov_percapita"] = global_vov["allvax_health_value_percapita"] + global_vov["allvax_gdp_value_percapita"]
+
+    denominators = {"health_pfizer_doses": health_pfizer_doses, "health_allvax_doses": health_allvax_doses,
+                    "q_gdp_pfizer_doses": q_gdp_pfizer_doses, "q_gdp_allvax_doses": q_gdp_allvax_doses,
+                    "a_gdp_pfizer_doses": a_gdp_pfizer_doses, "a_gdp_allvax_doses": a_gdp_allvax_doses,
+                    "allvax_health_pop": allvax_health_pop, "pfizer_health_pop": pfizer_health_pop,
+                    "allvax_qgdp_pop": allvax_qgdp_pop, "pfizer_qgdp_pop": pfizer_qgdp_pop,
+                    "allvax_agdp_pop": allvax_agdp_pop, "pfizer_agdp_pop": pfizer_agdp_pop}
+    return vov_df, country_quarter_vov, country_vov, global_vov, denominators
+
+# compare the pandemic with the predicted, no vaccination, and no pfizer outcomes and values
+def compute_table3(inf_df, death_df, gdp_q_df, gdp_a_df, qalys, costs, country_vov, global_vov):
+    """
+    Computes Table 3: the pandemic, predicted, no vaccination, and no Pfizer-BioNTech outcomes (GDP, infections, 
+    deaths, QALYs) and values (monetized QALYs, direct and indirect costs), and the value of vaccination.
+
+    Parameters
+    ----------
+    inf_df : data frame
+        The results data of the infections regression.
+    death_df : data frame
+        The results data of the deaths regression.
+    gdp_q_df : data frame
+        The results data of the quarterly GDP regression.
+    gdp_a_df : data frame
+        The results data of the annual GDP regression.
+    qalys : data frame
+        The QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
+    country_vov : data frame
+        The value of vaccination by country, from "compute_global_vov".
+    global_vov : data frame
+        The global value of vaccination, from "compute_global_vov".
+
+    Returns
+    -------
+    table3 : data frame
+        Table 3.
+    value_dfs : dictionary
+        Copies of the results data with the outcomes and values of each scenario ("inf_df", "death_df", "gdp_q_df", 
+        "gdp_a_df"), and the QALY ("qaly_df"), monetized QALY ("mqaly_df"), and cost ("cost_df") data.
+    values : dictionary
+        The total value of vaccination ("vax_value", "pfz_value"), and the averted monetized QALYs and direct and 
+        indirect costs.
+
+    """
+    # work on copies, so the results data of the models are left as they are
+    inf_df = inf_df.copy()
+    death_df = death_df.copy()
+    gdp_q_df = gdp_q_df.copy()
+
+    gdp_q_df["pandemic_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["gdp_gap"]*gdp_q_df["gdp_projected_usd"])
+    gdp_q_df["vax_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_vax"]*gdp_q_df["gdp_projected_usd"])
+    gdp_q_df["novax_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_novax"]*gdp_q_df["gdp_projected_usd"])
+    gdp_q_df["nopfz_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_nopfz"]*gdp_q_df["gdp_projected_usd"])
+
+    gdp2020 = gdp_usd[gdp_usd["year"] == 2020]
+    gdp2020 = gdp2020.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
+    gdp_a_df = gdp_a_df.merge(gdp2020, on = "country", how = "left", suffixes = ["_2021", "_2020"])
+
+    gdp_a_df["pandemic_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
+    gdp_a_df["vax_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_vax"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
+    gdp_a_df["novax_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_novax"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
+    gdp_a_df["nopfz_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_nopfz"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
+
+    pandemic_gdp_loss = gdp_q_df["pandemic_gdp"].sum() + gdp_a_df["pandemic_gdp"].sum()
+    predicted_gdp_loss = gdp_q_df["vax_gdp"].sum() + gdp_a_df["vax_gdp"].sum()
+    novax_gdp_loss = gdp_q_df["novax_gdp"].sum() + gdp_a_df["novax_gdp"].sum()
+    nopfz_gdp_loss = gdp_q_df["nopfz_gdp"].sum() + gdp_a_df["nopfz_gdp"].sum()
+
+    vax_gdp_gain = novax_gdp_loss - predicted_gdp_loss
+    pfz_gdp_gain = nopfz_gdp_loss - predicted_gdp_loss
+
+    inf_df["pandemic_inf"] = inf_df["inf_mean"]*inf_df["tot_pop"]
+    inf_df["vax_inf"] = inf_df["pred_vax"]*inf_df["tot_pop"]
+    inf_df["novax_inf"] = inf_df["pred_novax"]*inf_df["tot_pop"]
+    inf_df["nopfz_inf"] = inf_df["pred_nopfz"]*inf_df["tot_pop"]
+
+    pandemic_inf = inf_df["pandemic_inf"].sum()
+    predicted_inf = inf_df["vax_inf"].sum()
+    novax_inf = inf_df["novax_inf"].sum()
+    nopfz_inf = inf_df["nopfz_inf"].sum()
+
+    vax_inf_averted = novax_inf - predicted_inf
+    pfz_inf_averted = nopfz_inf - predicted_inf
+
+    death_df["pandemic_death"] = death_df["daily_deaths"]*death_df["tot_pop"]
+    death_df["vax_death"] = death_df["pred_vax"]*death_df["tot_pop"]
+    death_df["novax_death"] = death_df["pred_novax"]*death_df["tot_pop"]
+    death_df["nopfz_death"] = death_df["pred_nopfz"]*death_df["tot_pop"]
+
+    pandemic_death = death_df["pandemic_death"].sum()
+    predicted_death = death_df["vax_death"].sum()
+    novax_death = death_df["novax_death"].sum()
+    nopfz_death = death_df["nopfz_death"].sum()
+
+    vax_death_averted = novax_death - predicted_death
+    pfz_death_averted = nopfz_death - predicted_death
+
+    qaly_df = inf_df.merge(death_df[["country", "yyyy_qq", "pandemic_death", "vax_death", "novax_death", "nopfz_death"]],
+                           on = ["country", "yyyy_qq"], how = "left")
+    qaly_df = qaly_df.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
+    qaly_df["pandemic_nonfatal"] = qaly_df["pandemic_inf"] - qaly_df["pandemic_death"]
+    qaly_df["vax_nonfatal"] = qaly_df["vax_inf"] - qaly_df["vax_death"]
+    qaly_df["novax_nonfatal"] = qaly_df["novax_inf"] - qaly_df["novax_death"]
+    qaly_df["nopfz_nonfatal"] = qaly_df["nopfz_inf"] - qaly_df["nopfz_death"]
+
+    qaly_df["pandemic_qaly"] = (qaly_df["pandemic_death"]*qaly_df["Q_fatal"]) + (qaly_df["pandemic_nonfatal"]*qaly_df["Q_nonfatal"])
+    qaly_df["vax_qaly"] = (qaly_df["vax_death"]*qaly_df["Q_fatal"]) + (qaly_df["vax_nonfatal"]*qaly_df["Q_nonfatal"])
+    qaly_df["novax_qaly"] = (qaly_df["novax_death"]*qaly_df["Q_fatal"]) + (qaly_df["novax_nonfatal"]*qaly_df["Q_nonfatal"])
+    qaly_df["nopfz_qaly"] = (qaly_df["nopfz_death"]*qaly_df["Q_fatal"]) + (qaly_df["nopfz_nonfatal"]*qaly_df["Q_nonfatal"])
+
+    pandemic_qaly = qaly_df["pandemic_qaly"].sum()
+    predicted_qaly = qaly_df["vax_qaly"].sum()
+    novax_qaly = qaly_df["novax_qaly"].sum()
+    nopfz_qaly = qaly_df["nopfz_qaly"].sum()
+
+    vax_qaly_averted = novax_qaly - predicted_qaly
+    pfz_qaly_averted = nopfz_qaly - predicted_qaly
+
+    mqaly_df = qaly_df.merge(fullincome, on = "country", how = "left")
+    mqaly_df["pandemic_mqaly"] = mqaly_df["pandemic_qaly"]*mqaly_df["fullincome"]
+    mqaly_df["vax_mqaly"] = mqaly_df["vax_qaly"]*mqaly_df["fullincome"]
+    mqaly_df["novax_mqaly"] = mqaly_df["novax_qaly"]*mqaly_df["fullincome"]
+    mqaly_df["nopfz_mqaly"] = mqaly_df["nopfz_qaly"]*mqaly_df["fullincome"]
+
+    pandemic_mqaly = mqaly_df["pandemic_mqaly"].sum()
+    predicted_mqaly = mqaly_df["vax_mqaly"].sum()
+    novax_mqaly = mqaly_df["novax_mqaly"].sum()
+    nopfz_mqaly = mqaly_df["nopfz_mqaly"].sum()
+
+    vax_mqaly_averted = novax_mqaly - predicted_mqaly
+    pfz_mqaly_averted = nopfz_mqaly - predicted_mqaly
+
+    cost_df = qaly_df.merge(costs, on = ["country", "yyyy_qq"], how = "left")
+    cost_df["pandemic_direct"] = cost_df["pandemic_inf"]*cost_df["nonfatal_los_cost"]
+    cost_df["vax_direct"] = cost_df["vax_inf"]*cost_df["nonfatal_los_cost"]
+    cost_df["novax_direct"] = cost_df["novax_inf"]*cost_df["nonfatal_los_cost"]
+    cost_df["nopfz_direct"] = cost_df["nopfz_inf"]*cost_df["nonfatal_los_cost"]
+
+    pandemic_direct = cost_df["pandemic_direct"].sum()
+    predicted_direct = cost_df["vax_direct"].sum()
+    novax_direct = cost_df["novax_direct"].sum()
+    nopfz_direct = cost_df["nopfz_direct"].sum()
+
+    vax_direct_averted = novax_direct - predicted_direct
+    pfz_direct_averted = nopfz_direct - predicted_direct
+
+    cost_df["pandemic_indirect"] = cost_df["pandemic_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
+    cost_df["vax_indirect"] = cost_df["vax_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
+    cost_df["novax_indirect"] = cost_df["novax_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
+    cost_df["nopfz_indirect"] = cost_df["nopfz_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
+
+    pandemic_indirect = cost_df["pandemic_indirect"].sum()
+    predicted_indirect = cost_df["vax_indirect"].sum()
+    novax_indirect = cost_df["novax_indirect"].sum()
+    nopfz_indirect = cost_df["nopfz_indirect"].sum()
+
+    vax_indirect_averted = novax_indirect - predicted_indirect
+    pfz_indirect_averted = nopfz_indirect - predicted_indirect
+
+    pandemic_loss = pandemic_gdp_loss + pandemic_mqaly + pandemic_direct + pandemic_indirect
+    predicted_loss = predicted_gdp_loss + predicted_mqaly + predicted_direct + predicted_indirect
+    novax_loss = novax_gdp_loss + novax_mqaly + novax_direct + novax_indirect
+    nopfz_loss = nopfz_gdp_loss + nopfz_mqaly + nopfz_direct + nopfz_indirect
+
+    vax_value = novax_loss - predicted_loss
+    pfz_value = nopfz_loss - predicted_loss
+
+    table_pop = pop2019[pop2019.country.isin(inf_df.country.unique())]
+    all_pop = table_pop.loc[table_pop.country.isin(country_vov.country.unique()), "tot_pop"].sum()
+
+    pandemic_loss_percapita = pandemic_loss/all_pop
+    predicted_loss_percapita = predicted_loss/all_pop
+    novax_loss_percapita = novax_loss/all_pop
+    nopfz_loss_percapita = nopfz_loss/all_pop
+
+    # We create a table that contains all the above
+
+    table3 = pd.DataFrame(columns = ["a", "b", "c", "d", "e", "f"], index = [
+        "gdpq", "gdpa", "gdp", "gdp_pct", "inf", "death", "qaly", "mqaly", "mqaly_pct",
+        "direct", "direct_pct", "indirect", "indirect_pct", "global",
+        "percap", "perdose"])
+
+    table3.loc["gdpq", "a"] = gdp_q_df["pandemic_gdp"].sum()
+    table3.loc["gdpq", "b"] = gdp_q_df["vax_gdp"].sum()
+    table3.loc["gdpq", "c"] = gdp_q_df["novax_gdp"].sum()
+    table3.loc["gdpq", "d"] = gdp_q_df["nopfz_gdp"].sum()
+    table3.loc["gdpq", "e"] = gdp_q_df["novax_gdp"].sum() - gdp_q_df["vax_gdp"].sum()
+    table3.loc["gdpq", "f"] = gdp_q_df["nopfz_gdp"].sum() - gdp_q_df["vax_gdp"].sum()
+
+    table3.loc["gdpa", "a"] = gdp_a_df["pandemic_gdp"].sum()
+    table3.loc["gdpa", "b"] = gdp_a_df["vax_gdp"].sum()
+    table3.loc["gdpa", "c"] = gdp_a_df["novax_gdp"].sum()
+    table3.loc["gdpa", "d"] = gdp_a_df["nopfz_gdp"].sum()
+    table3.loc["gdpa", "e"] = gdp_a_df["novax_gdp"].sum() - gdp_a_df["vax_gdp"].sum()
+    table3.loc["gdpa", "f"] = gdp_a_df["nopfz_gdp"].sum() - gdp_a_df["vax_gdp"].sum()
+
+    table3.loc["gdp", "a"] = pandemic_gdp_loss
+    table3.loc["gdp", "b"] = predicted_gdp_loss
+    table3.loc["gdp", "c"] = novax_gdp_loss
+    table3.loc["gdp", "d"] = nopfz_gdp_loss
+    table3.loc["gdp", "e"] = vax_gdp_gain
+    table3.loc["gdp", "f"] = pfz_gdp_gain
+
+    table3.loc["inf", "a"] = pandemic_inf
+    table3.loc["inf", "b"] = predicted_inf
+    table3.loc["inf", "c"] = novax_inf
+    table3.loc["inf", "d"] = nopfz_inf
+    table3.loc["inf", "e"] = vax_inf_averted
+    table3.loc["inf", "f"] = pfz_inf_averted
+
+    table3.loc["death", "a"] = pandemic_death
+    table3.loc["death", "b"] = predicted_death
+    table3.loc["death", "c"] = novax_death
+    table3.loc["death", "d"] = nopfz_death
+    table3.loc["death", "e"] = vax_death_averted
+    table3.loc["death", "f"] = pfz_death_averted
+
+    table3.loc["qaly", "a"] = pandemic_qaly
+    table3.loc["qaly", "b"] = predicted_qaly
+    table3.loc["qaly", "c"] = novax_qaly
+    table3.loc["qaly", "d"] = nopfz_qaly
+    table3.loc["qaly", "e"] = vax_qaly_averted
+    table3.loc["qaly", "f"] = pfz_qaly_averted
+
+    table3.loc["mqaly", "a"] = pandemic_mqaly
+    table3.loc["mqaly", "b"] = predicted_mqaly
+    table3.loc["mqaly", "c"] = novax_mqaly
+    table3.loc["mqaly", "d"] = nopfz_mqaly
+    table3.loc["mqaly", "e"] = vax_mqaly_averted
+    table3.loc["mqaly", "f"] = pfz_mqaly_averted
+
+    table3.loc["direct", "a"] = pandemic_direct
+    table3.loc["direct", "b"] = predicted_direct
+    table3.loc["direct", "c"] = novax_direct
+    table3.loc["direct", "d"] = nopfz_direct
+    table3.loc["direct", "e"] = vax_direct_averted
+    table3.loc["direct", "f"] = pfz_direct_averted
+
+    table3.loc["indirect", "a"] = pandemic_indirect
+    table3.loc["indirect", "b"] = predicted_indirect
+    table3.loc["indirect", "c"] = novax_indirect
+    table3.loc["indirect", "d"] = nopfz_indirect
+    table3.loc["indirect", "e"] = vax_indirect_averted
+    table3.loc["indirect", "f"] = pfz_indirect_averted
+
+    table3.loc["global", "a"] = pandemic_loss
+    table3.loc["global", "b"] = predicted_loss
+    table3.loc["global", "c"] = novax_loss
+    table3.loc["global", "d"] = nopfz_loss
+    table3.loc["global", "e"] = vax_value
+    table3.loc["global", "f"] = pfz_value
+
+    table3.loc["percap", "a"] = pandemic_loss_percapita
+    table3.loc["percap", "b"] = predicted_loss_percapita
+    table3.loc["percap", "c"] = novax_loss_percapita
+    table3.loc["percap", "d"] = nopfz_loss_percapita
+    table3.loc["percap", "e"] = global_vov["allvax_vov_percapita"].values[0]
+    table3.loc["percap", "f"] = global_vov["pfz_vov_percapita"].values[0]
+
+    table3.loc["perdose", "e"] = global_vov["allvax_vov_perdose"].values[0]
+    table3.loc["perdose", "f"] = global_vov["pfz_vov_perdose"].values[0]
+
+    table3.loc["gdp_pct", "e"] = table3.loc["gdp", "e"]/table3.loc["global", "e"]
+    table3.loc["gdp_pct", "f"] = table3.loc["gdp", "f"]/table3.loc["global", "f"]
+
+    table3.loc["mqaly_pct", "e"] = table3.loc["mqaly", "e"]/table3.loc["global", "e"]
+    table3.loc["mqaly_pct", "f"] = table3.loc["mqaly", "f"]/table3.loc["global", "f"]
+
+    table3.loc["direct_pct", "e"] = table3.loc["direct", "e"]/table3.loc["global", "e"]
+    table3.loc["direct_pct", "f"] = table3.loc["direct", "f"]/table3.loc["global", "f"]
+
+    table3.loc["indirect_pct", "e"] = table3.loc["indirect", "e"]/table3.loc["global", "e"]
+    table3.loc["indirect_pct", "f"] = table3.loc["indirect", "f"]/table3.loc["global", "f"]
+
+    table3.index = ["Global GDP shortfall, quarterly data", "Global GDP shortfall, annual data", "Global GDP shortfall, all",
+                    "GDP share of value (%)", "Global infections", "Global deaths", "Global QALY losses",
+                    "Global Monetary value of QALY losses", "Monetized QALY share of value (%)",
+                    "Global direct costs", "Diret costs share of value (%)", "Global indirect costs",
+                    "Indirect costs share of value (%)", "Global total losses or value (GDP + monetary QALY + direct + indirect)",
+                    "Per capita total loss or value", "Per dose value"]
+
+    table3.columns = ["Pandemic (A)", "Predicted Pandemic (B)", "Predicted Zero Vaccination (C)", "Predicted Zero Pfizer-BioNTech Vaccination (D)",
+                      "VoV (C-B)", "VoPFV (D-B)"]
+
+    value_dfs = {"inf_df": inf_df, "death_df": death_df, "gdp_q_df": gdp_q_df, "gdp_a_df": gdp_a_df, 
+                 "qaly_df": qaly_df, "mqaly_df": mqaly_df, "cost_df": cost_df}
+    values = {"vax_value": vax_value, "pfz_value": pfz_value, 
+              "vax_mqaly_averted": vax_mqaly_averted, "pfz_mqaly_averted": pfz_mqaly_averted,
+              "vax_direct_averted": vax_direct_averted, "pfz_direct_averted": pfz_direct_averted,
+              "vax_indirect_averted": vax_indirect_averted, "pfz_indirect_averted": pfz_indirect_averted}
+    return table3, value_dfs, values
+
+# estimate the value of vaccination for our data
+vov_df, country_quarter_vov, country_vov, global_vov, denominators = compute_global_vov(inf_df, death_df, gdp_q_df, 
+                                                                                         gdp_a, qalys, costs)
 
 # calculate the total pfizer value
 pfz_value = vov_df["pfz_vov"].sum()
 # calculate the total all vaccinatio nvalue
 allvax_value = vov_df["allvax_vov"].sum()
 
-# calculate total pfizer doses and total all doses
-vov_df["uptake_pfizer_doses"] = vov_df["uptake_pfizer"]*vov_df["tot_pop"]
-vov_df["uptake_doses"] = vov_df["uptake"]*vov_df["tot_pop"]
-
-# create a list of all columns to keep
-keep_cols = list(vov_df.loc[:, "averted_inf_mean_pfz":"allvax_vov"].columns) + list(["averted_gdp_gap_pfz",
-                                           "averted_gdp_gap_allvax", "averted_daily_deaths_pfz",
-                                           "averted_daily_deaths_allvax", "uptake_pfizer_doses",
-                                           "uptake_doses"])
-
-# keep those columns
-country_quarter_vov = vov_df.loc[:, (list(["country", "yyyy_qq"]) + list(keep_cols))]
-
-# collapse the data frame to the country level
-country_vov = vov_df.groupby(["country"])[keep_cols].sum().reset_index()
-# add the annual results 
-country_vov = country_vov.merge(gdp_a_df[["country", "gdp_allvax", "gdp_pfizer"]], on = "country", how = "outer")
-# calculate the full VoV as the sum of quarterly and annual results
-country_vov["pfz_full_vov"] = country_vov["pfz_vov"].add(country_vov["gdp_pfizer"], fill_value=0)
-country_vov["allvax_full_vov"] = country_vov["allvax_vov"].add(country_vov["gdp_allvax"], fill_value=0)
-# add regions to the data
-country_vov = country_vov.merge(qdata[["country", "WHO_region"]].drop_duplicates(), on = "country", how = "left")
-
-# create a new list of columns to keep
-keep_cols = list(keep_cols) + list(["pfz_full_vov", "allvax_full_vov", "uptake_pfizer_doses", "uptake_doses", "gdp_pfizer", "gdp_allvax"])
-# copy the country-specific vov dataframe
-overall_vov = country_vov.copy()
-overall_vov["country"] = "global"
-# sum over all countries to get the global value
-global_vov = overall_vov.groupby(["country"])[keep_cols].sum()
-
-sur_doses_df = qdata[qdata["yyyy_qq"] != "2021_Q4"]
-sur_doses_df["uptake_doses"] = sur_doses_df["uptake"]*sur_doses_df["tot_pop"]
-sur_doses_df["uptake_pfizer_doses"] = sur_doses_df["uptake_pfizer"]*sur_doses_df["tot_pop"]
-
-# calculate the number of doses in the infections and deaths regressions
-health_doses = sur_doses_df.merge(inf_df[["country", "yyyy_qq"]], on = ["country", "yyyy_qq"], how = "right")
-health_pfizer_doses = health_doses["uptake_pfizer_doses"].sum()
-health_allvax_doses = health_doses["uptake_doses"].sum()
-
-# calculate the number of doses in the quarterly GDP regression
-q_gdp_doses = sur_doses_df.merge(gdp_q_df[["country", "yyyy_qq"]], on = ["country", "yyyy_qq"], how = "right")
-q_gdp_pfizer_doses = q_gdp_doses["uptake_pfizer_doses"].sum()
-q_gdp_allvax_doses = q_gdp_doses["uptake_doses"].sum()
-
-# calculate the number of doses in the annual GDP regression
-pop2021 = qdata.loc[qdata["year"] == 2021, ["country", "tot_pop"]].drop_duplicates()
-a_gdp_doses = gdp_a.annual_data.merge(pop2021, how = "left", on = "country")
-a_gdp_pfizer_doses = (a_gdp_doses["cv_p2021Q4"]*a_gdp_doses["tot_pop"]).sum()
-a_gdp_allvax_doses = ((a_gdp_doses["cv_np2021Q4"] + a_gdp_doses["cv_p2021Q4"])*a_gdp_doses["tot_pop"]).sum()
-
-# calculate the value per dose of the health components of value for Pfizer
-global_vov["pfz_health_value_perdose"] = global_vov["pfz_health_value"]/health_pfizer_doses
-# calculate the value per dose of the quarterly gdp value for Pfizer
-global_vov["pfz_qgdp_value_perdose"] = global_vov["averted_gdp_gap_pfz"]/q_gdp_pfizer_doses
-# calculate the value per dose of the annual gdp value for Pfizer
-global_vov["pfz_agdp_value_perdose"] = global_vov["gdp_pfizer"]/a_gdp_pfizer_doses
-pfz_gdp_value = [global_vov["pfz_qgdp_value_perdose"].values[0], global_vov["pfz_agdp_value_perdose"].values[0]]
-pfz_gdp_doses = [q_gdp_pfizer_doses, a_gdp_pfizer_doses]
-# we then calculate the dose-weighted average of the two GDP components 
-global_vov["pfz_gdp_value_perdose"] = np.average(pfz_gdp_value, weights = pfz_gdp_doses)
-
-# we do the same for all vaccines
-global_vov["allvax_health_value_perdose"] = global_vov["allvax_health_value"]/health_allvax_doses
-global_vov["allvax_qgdp_value_perdose"] = global_vov["averted_gdp_gap_allvax"]/q_gdp_allvax_doses
-global_vov["allvax_agdp_value_perdose"] = global_vov["gdp_allvax"]/a_gdp_allvax_doses
-allvax_gdp_value = [global_vov["allvax_qgdp_value_perdose"].values[0], global_vov["allvax_agdp_value_perdose"].values[0]]
-allvax_gdp_doses = [q_gdp_allvax_doses, a_gdp_allvax_doses]
-global_vov["allvax_gdp_value_perdose"] = np.average(allvax_gdp_value, weights = allvax_gdp_doses)
-
-# we then calculate the total value per dose for Pfizer andfor all vaccines
-global_vov["pfz_vov_perdose"] = global_vov["pfz_health_value_perdose"] + global_vov["pfz_gdp_value_perdose"]
-global_vov["allvax_vov_perdose"] = global_vov["allvax_health_value_perdose"] + global_vov["allvax_gdp_value_perdose"]
-
-# load in the 2019 population data 
-pop2019 = pd.read_stata("../input/national_population_2019.dta")
-# calculate the population of the people in the countries included in the infections and death regressions
-allvax_health_countries = inf_df.country.unique()
-pfizer_health_countries = inf_df.loc[(inf_df["L1_uptake_pfizer"] != 0), "country"].unique()
-allvax_health_pop = pop2019.loc[pop2019.country.isin(allvax_health_countries), "tot_pop"].sum()
-pfizer_health_pop = pop2019.loc[pop2019.country.isin(pfizer_health_countries), "tot_pop"].sum()
-
-# calculate the population of the people in the countries included in the quarterly GDP regressions
-allvax_qgdp_countries = gdp_q_df.country.unique()
-pfizer_qgdp_countries = gdp_q_df.loc[(gdp_q_df["L1_uptake_pfizer"] != 0), "country"].unique()
-allvax_qgdp_pop = pop2019.loc[pop2019.country.isin(allvax_qgdp_countries), "tot_pop"].sum()
-pfizer_qgdp_pop = pop2019.loc[pop2019.country.isin(pfizer_qgdp_countries), "tot_pop"].sum()
-
-# calculate the population of the people in the countries included in the annual GDP regressions
-allvax_agdp_countries = gdp_a.annual_results_data.country.unique()
-pfizer_agdp_countries = gdp_a.annual_data.loc[gdp_a.annual_data["cv_p2021Q4"] != 0, "country"].unique()
-allvax_agdp_pop = pop2019.loc[pop2019.country.isin(allvax_agdp_countries), "tot_pop"].sum()
-pfizer_agdp_pop = pop2019.loc[pop2019.country.isin(pfizer_agdp_countries), "tot_pop"].sum()
-
-# calculate the value per capita of the health components of value for Pfizer
-global_vov["pfz_health_value_percapita"] = global_vov["pfz_health_value"]/pfizer_health_pop
-# calculate the value per capita of the quarterly GDP value for Pfizer
-global_vov["pfz_qgdp_value_percapita"] = global_vov["averted_gdp_gap_pfz"]/pfizer_qgdp_pop
-# calculate the value per capita of the annual GDP value for Pfizer
-global_vov["pfz_agdp_value_percapita"] = global_vov["gdp_pfizer"]/pfizer_agdp_pop
-# calculate the population-weighted average of the GDP results for Pfizer
-pfz_gdp_value = [global_vov["pfz_qgdp_value_percapita"].values[0], global_vov["pfz_agdp_value_percapita"].values[0]]
-pfz_gdp_pop = [pfizer_qgdp_pop, pfizer_agdp_pop]
-global_vov["pfz_gdp_value_percapita"] = np.average(pfz_gdp_value, weights = pfz_gdp_pop)
-
-# do the same for all vaccines
-global_vov["allvax_health_value_percapita"] = global_vov["allvax_health_value"]/allvax_health_pop
-global_vov["allvax_qgdp_value_percapita"] = global_vov["averted_gdp_gap_allvax"]/allvax_qgdp_pop
-global_vov["allvax_agdp_value_percapita"] = global_vov["gdp_allvax"]/allvax_agdp_pop
-allvax_gdp_value = [global_vov["allvax_qgdp_value_percapita"].values[0], global_vov["allvax_agdp_value_percapita"].values[0]]
-allvax_gdp_pop = [allvax_qgdp_pop, allvax_agdp_pop]
-global_vov["allvax_gdp_value_percapita"] = np.average(allvax_gdp_value, weights = allvax_gdp_pop)
-
-# calculate the full value per capita for Pfizer and all vaccines
-global_vov["pfz_vov_percapita"] = global_vov["pfz_health_value_percapita"] + global_vov["pfz_gdp_value_percapita"]
-global_vov["allvax_vov_percapita"] = global_vov["allvax_health_value_percapita"] + global_vov["allvax_gdp_value_percapita"]
+# keep the doses and populations that the value per dose and per capita are based on
+health_pfizer_doses = denominators["health_pfizer_doses"]
+health_allvax_doses = denominators["health_allvax_doses"]
+q_gdp_pfizer_doses = denominators["q_gdp_pfizer_doses"]
+q_gdp_allvax_doses = denominators["q_gdp_allvax_doses"]
+a_gdp_pfizer_doses = denominators["a_gdp_pfizer_doses"]
+a_gdp_allvax_doses = denominators["a_gdp_allvax_doses"]
+allvax_health_pop = denominators["allvax_health_pop"]
+pfizer_health_pop = denominators["pfizer_health_pop"]
+allvax_qgdp_pop = denominators["allvax_qgdp_pop"]
+pfizer_qgdp_pop = denominators["pfizer_qgdp_pop"]
+allvax_agdp_pop = denominators["allvax_agdp_pop"]
+pfizer_agdp_pop = denominators["pfizer_agdp_pop"]
 
 # save the results to Excel
 global_vov.to_excel("../output/sur_recursive_and_gdp_subsamples_global_vov.xlsx")
 
+# %% sensitivity scenarios
+
+"""
+The one-way sensitivity analyses change the infections measure, the deaths measure, or the discount rate of the 
+QALY and indirect cost inputs. Each scenario is a spec, and the scenarios share the data, the lags, and any models 
+whose inputs don't change (e.g., the discount rate scenarios reuse the base case models, and the GDP regressions 
+are only refit when the infections measure changes).
+"""
+
+# the one-way sensitivity scenarios
+sensitivity_scenarios = [{"name": "inf_lower", "inf_col": "inf_lower", "death_col": "daily_deaths", "discount": ""},
+                         {"name": "inf_upper", "inf_col": "inf_upper", "death_col": "daily_deaths", "discount": ""},
+                         {"name": "deaths_unscaled", "inf_col": "inf_mean", "death_col": "daily_deaths_unscaled", "discount": ""},
+                         {"name": "nodsct", "inf_col": "inf_mean", "death_col": "daily_deaths", "discount": "_nodsct"},
+                         {"name": "sixpct", "inf_col": "inf_mean", "death_col": "daily_deaths", "discount": "_sixpct"}]
+
+# the base case models for each pair of infections and deaths measures, starting with the ones from above
+scenario_models = {("inf_mean", "daily_deaths"): {"inf": inf, "deaths": deaths, "gdp_q": gdp_q, "gdp_a": gdp_a}}
+
+def run_scenario_models(inf_col = "inf_mean", death_col = "daily_deaths"):
+    """
+    Run (or reuse) the four base case regressions with an infections and deaths measure. The measures take the 
+    place of inf_mean and daily_deaths in the regression data, and the infection lags are rebuilt from the 
+    infections measure, so the models and their results keep the names of the base case.
+
+    Parameters
+    ----------
+    inf_col : string, optional
+        The infections measure (e.g., "inf_lower"). The default is "inf_mean".
+    death_col : string, optional
+        The deaths measure (e.g., "daily_deaths_unscaled"). The default is "daily_deaths".
+
+    Returns
+    -------
+    models : dictionary
+        The SUR_model objects of the infections ("inf"), deaths ("deaths"), quarterly GDP ("gdp_q"), and annual GDP 
+        ("gdp_a") regressions.
+
+    """
+    if (inf_col, death_col) not in scenario_models:
+        data = qdata.copy()
+        data["inf_mean"] = data[inf_col]
+        data["daily_deaths"] = data[death_col]
+        # only the infection lags depend on the measures
+        if inf_col != "inf_mean":
+            data = create_inf_lags(data, "inf_mean")
+        
+        models = {"inf": SUR_model(), "deaths": SUR_model(), "gdp_q": SUR_model(), "gdp_a": SUR_model()}
+        models["inf"].run_quarterly_basecase(depvar = "inf_mean", data = data)
+        models["deaths"].run_quarterly_basecase(depvar = "daily_deaths", data = data)
+        models["gdp_q"].run_quarterly_basecase(depvar = "gdp_gap", data = data)
+        models["gdp_a"].run_annual_gdp(data = data, gdp_usd = gdp_usd, pop2019 = pop2019)
+        scenario_models[(inf_col, death_col)] = models
+    return scenario_models[(inf_col, death_col)]
+
+def write_model_sheets(writer, models, country_quarter_vov, country_vov, global_vov):
+    """
+    Write the regression results and the value of vaccination to the sheets of an Excel file.
+
+    Parameters
+    ----------
+    writer : ExcelWriter
+        The Excel file to write to.
+    models : dictionary
+        The SUR_model objects of the infections ("inf"), quarterly GDP ("gdp_q"), and annual GDP ("gdp_a") 
+        regressions. The deaths results are in the SUR model of infections.
+    country_quarter_vov : data frame
+        The value of vaccination components by country-quarter.
+    country_vov : data frame
+        The value of vaccination components by country.
+    global_vov : data frame
+        The global value of vaccination.
+
+    Returns
+    -------
+    None.
+
+    """
+    sur_info = pd.read_html(models["inf"].results.summary.tables[0].as_html(), header = 0, index_col=0)[0]
+    sur_info.to_excel(writer, sheet_name='SUR_model_info')
+
+    inf_reg = pd.read_html(models["inf"].results.summary.tables[1].as_html(), header = 0, index_col=0)[0]
+    inf_reg.to_excel(writer, sheet_name='infections_output')
+
+    death_reg = pd.read_html(models["inf"].results.summary.tables[2].as_html(), header = 0, index_col=0)[0]
+    death_reg.to_excel(writer, sheet_name='deaths_output')
+
+    models["gdp_q"].results.summary2().tables[0].to_excel(writer, sheet_name='quarterly_gdp_OLS_info')
+    models["gdp_q"].results.summary2().tables[1].to_excel(writer, sheet_name='quarterly_gdp_output')
+
+    models["gdp_a"].annual_results.summary2().tables[0].to_excel(writer, sheet_name='annual_gdp_OLS_info')
+    models["gdp_a"].annual_results.summary2().tables[1].to_excel(writer, sheet_name='annual_gdp_output')
+
+    country_quarter_vov.to_excel(writer, sheet_name='country_quarter_vov')
+
+    country_vov.to_excel(writer, sheet_name = 'country_vov')
+
+    global_vov.to_excel(writer, sheet_name = 'global_vov')
+
+def write_tables2_and_3(path, models, table3):
+    """
+    Write Table 2 (the regression results) and Table 3 to the sheets of an Excel file.
+
+    Parameters
+    ----------
+    path : string
+        The Excel file to write.
+    models : dictionary
+        The SUR_model objects, as in "write_model_sheets".
+    table3 : data frame
+        Table 3, from "compute_table3".
+
+    Returns
+    -------
+    None.
+
+    """
+    writer = pd.ExcelWriter(path, engine='xlsxwriter')
+
+    inf_reg = pd.read_html(models["inf"].results.summary.tables[1].as_html(), header = 0, index_col=0)[0]
+    inf_reg.to_excel(writer, sheet_name='Table2 Infections')
+
+    death_reg = pd.read_html(models["inf"].results.summary.tables[2].as_html(), header = 0, index_col=0)[0]
+    death_reg.to_excel(writer, sheet_name='Table2 Deaths')
+
+    models["gdp_q"].results.summary2().tables[1].to_excel(writer, sheet_name='Table2 Quarterly GDP')
+
+    models["gdp_a"].annual_results.summary2().tables[1].to_excel(writer, sheet_name='Table2 Annual GDP')
+
+    table3.to_excel(writer, sheet_name = "Table 3")
+
+    writer.save()
+
+def run_sensitivity_scenarios(scenarios = sensitivity_scenarios):
+    """
+    Run the one-way sensitivity scenarios and compute the global value of vaccination and Table 3 in each. Each 
+    scenario writes the outputs of the base case, named for the scenario: the global value of vaccination, the 
+    adjusted infections, the regression and value of vaccination sheets, Table 2 and 3, and Table 3 alone.
+
+    Parameters
+    ----------
+    scenarios : list, optional
+        A list of scenario specs, each a dictionary with a "name", an infections measure ("inf_col"), a deaths 
+        measure ("death_col"), and the suffix of the discount rate's input files ("discount"). The default is 
+        sensitivity_scenarios.
+
+    Returns
+    -------
+    scenario_vov : dictionary
+        The global value of vaccination of each scenario, by name.
+
+    """
+    scenario_vov = dict()
+    for spec in scenarios:
+        models = run_scenario_models(spec["inf_col"], spec["death_col"])
+        scenario_qalys, scenario_costs = load_value_inputs(spec["discount"])
+        _, scenario_cq_vov, scenario_country_vov, scenario_vov[spec["name"]], _ = compute_global_vov(
+            models["inf"].results_data, models["deaths"].results_data, models["gdp_q"].results_data, models["gdp_a"], 
+            scenario_qalys, scenario_costs)
+        scenario_table3 = compute_table3(models["inf"].results_data, models["deaths"].results_data, 
+                                         models["gdp_q"].results_data, models["gdp_a"].annual_results_data, 
+                                         scenario_qalys, scenario_costs, scenario_country_vov, scenario_vov[spec["name"]])[0]
+        
+        # save the results to Excel
+        scenario_vov[spec["name"]].to_excel("../output/sur_recursive_and_gdp_subsamples_" + spec["name"] + "_global_vov.xlsx")
+        models["inf"].comp_inf_lags.to_excel("../output/sur_recursive_and_gdp_subsamples_" + spec["name"] + "_comp_inf.xlsx")
+        writer = pd.ExcelWriter("../output/sur_recursive_and_gdp_subsamples_" + spec["name"] + "_output.xlsx", engine='xlsxwriter')
+        write_model_sheets(writer, models, scenario_cq_vov, scenario_country_vov, scenario_vov[spec["name"]])
+        writer.save()
+        write_tables2_and_3("../output/tables2_and_3_" + spec["name"] + ".xlsx", models, scenario_table3)
+        scenario_table3.to_excel("../output/table3_jk_" + spec["name"] + ".xlsx")
+    return scenario_vov
+
+# run the sensitivity scenarios
+sensitivity_vov = run_sensitivity_scenarios()
+
 # %% PSA
 
-# create SUR_model objects and run PSAs for the infections, deaths, quarterly GDP, and annual GDP.
-sur_inf = SUR_model()
-sur_inf.run_quarterly_psa(depvar = "inf_mean", n_samp = 1000)
-sur_inf_dfs = sur_inf.df_list  
-    
-sur_deaths = SUR_model()
-sur_deaths.run_quarterly_psa(depvar = "daily_deaths", n_samp = 1000)
-sur_deaths_dfs = sur_deaths.df_list 
-
-sur_gdp_q = SUR_model()
-sur_gdp_q.run_quarterly_psa(depvar = "gdp_gap", n_samp = 1000)
-sur_gdp_q_dfs = sur_gdp_q.df_list 
-
-sur_gdp_a = SUR_model()
-sur_gdp_a.run_annual_gdp_psa(data = qdata, n_samp = 1000)
-sur_gdp_a_dfs = sur_gdp_a.annual_gdp_df_list 
-
-# create a list of all 1000 Pfizer results for infections, deaths, and quarterly GDP
-sur_pfz_combined_dfs = list()
-for i in range(len(sur_inf_dfs[0])):
-    pfz_df = sur_inf_dfs[0][i].merge(sur_deaths_dfs[0][i], on = ["country", "yyyy_qq"],
-                                 how = "outer")
-    pfz_df = pfz_df.merge(sur_gdp_q_dfs[0][i], on = ["country", "yyyy_qq"],
-                                 how = "outer")
-    sur_pfz_combined_dfs.append(pfz_df)
-    
-# create a list of all 1000 all vaccine results for infections, deaths, and quarterly GDP
-sur_allvax_combined_dfs = list()
-for i in range(len(sur_inf_dfs[1])):
-    allvax_df = sur_inf_dfs[1][i].merge(sur_deaths_dfs[1][i], on = ["country", "yyyy_qq"],
-                                 how = "outer")
-    allvax_df = allvax_df.merge(sur_gdp_q_dfs[1][i], on = ["country", "yyyy_qq"],
-                                 how = "outer")
-    sur_allvax_combined_dfs.append(allvax_df)
-    
-# merge QALYs, costs, and full income to the 1000 results data frames
-sur_combined_dfs = list()
-for i in range(len(sur_pfz_combined_dfs)):
-    combined_df = sur_pfz_combined_dfs[i].merge(sur_allvax_combined_dfs[i],
-                                            on = ["country", "yyyy_qq"], how = "outer")
-    combined_df = combined_df.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
-    combined_df = combined_df.merge(costs, on = ["country", "yyyy_qq"], how = "left")
-    combined_df = combined_df.merge(fullincome, on = "country", how = "left")
-    sur_combined_dfs.append(combined_df)
-  
-# use the compute_vov function from above to calculate the quaterly VOV for each of the 1000 results tables
-sur_vov_dfs = list()
-for i in sur_combined_dfs:
-    sur_vov_dfs.append(compute_vov(i))
-    
-# calculate the full value (quarterly + annual) for each of the 1000 results
-sur_pfz_vov_list = list()
-sur_allvax_vov_list = list()
-for idx, df in enumerate(sur_vov_dfs):
-    sur_pfz_value = df["pfz_vov"].sum()
-    sur_allvax_value = df["allvax_vov"].sum()
-    sur_pfz_full_value = sur_pfz_value + sur_gdp_a_dfs[0][idx].averted_gdp_gap_pfz.sum()
-    sur_allvax_full_value = sur_allvax_value + sur_gdp_a_dfs[1][idx].averted_gdp_gap_allvax.sum()
-    sur_pfz_vov_list.append(sur_pfz_full_value)
-    sur_allvax_vov_list.append(sur_allvax_full_value)
-    
+# fit the models of the PSA (infections, deaths, quarterly GDP, and annual GDP) and build their design matrices once
+psa_models = prepare_psa_models(qdata, gdp_usd, pop2019)
+# run the PSA in a pool of worker processes, and summarise the full value of each draw
+sur_psa_summary = run_psa_parallel(psa_models, qalys, costs, fullincome, n_samp = 1000)
+
 # find the 2.5th, 50th, and 97.5th percentiles.
-sur_pfz_vov_percentiles = np.percentile(sur_pfz_vov_list, [2.5, 50, 97.5])
-sur_allvax_vov_percentiles = np.percentile(sur_allvax_vov_list, [2.5, 50, 97.5])
+sur_pfz_vov_percentiles = sur_psa_summary["pfz"].percentiles([2.5, 50, 97.5])
+sur_allvax_vov_percentiles = sur_psa_summary["allvax"].percentiles([2.5, 50, 97.5])
+
+# the annual GDP loss averted is linear in the parameters, so its intervals can be found in closed form (and the 
+# PSA draws checked against them)
+annual_gdp_analytic = pd.concat({"pfz": psa_models["annual_gdp"].analytic_annual_contrasts("nopfz"), 
+                                 "allvax": psa_models["annual_gdp"].analytic_annual_contrasts("novax")}, axis = 1)
+
+# the direct effect of vaccination in the quarterly models (with the lagged infections held at their observed 
+# values) is also linear in the parameters, so its intervals can be found in closed form too
+quarterly_analytic = dict()
+for depvar in psa_depvars:
+    quarterly_analytic[depvar] = pd.concat({"pfz": psa_models[depvar].analytic_quarterly_contrasts("nopfz"), 
+                                            "allvax": psa_models[depvar].analytic_quarterly_contrasts("novax")}, axis = 1)
+quarterly_analytic = pd.concat(quarterly_analytic, axis = 1)
 
 # create a data frame with this information
 sur_psa = pd.DataFrame(data = [sur_allvax_vov_percentiles, sur_pfz_vov_percentiles],
@@ -1212,29 +958,20 @@ sur_psa = pd.DataFrame(data = [sur_allvax_vov_percentiles, sur_pfz_vov_percentil
 # create an output file that includes multiple sheets for various results
 writer = pd.ExcelWriter('../output/sur_recursive_and_gdp_subsamples_output.xlsx', engine='xlsxwriter')
 
-sur_info = pd.read_html(inf.results.summary.tables[0].as_html(), header = 0, index_col=0)[0]
-sur_info.to_excel(writer, sheet_name='SUR_model_info')
-
-inf_reg = pd.read_html(inf.results.summary.tables[1].as_html(), header = 0, index_col=0)[0]
-inf_reg.to_excel(writer, sheet_name='infections_output')
-
-death_reg = pd.read_html(inf.results.summary.tables[2].as_html(), header = 0, index_col=0)[0]
-death_reg.to_excel(writer, sheet_name='deaths_output')
-
-gdp_q.results.summary2().tables[0].to_excel(writer, sheet_name='quarterly_gdp_OLS_info')
-gdp_q.results.summary2().tables[1].to_excel(writer, sheet_name='quarterly_gdp_output')
-
-gdp_a.annual_results.summary2().tables[0].to_excel(writer, sheet_name='annual_gdp_OLS_info')
-gdp_a.annual_results.summary2().tables[1].to_excel(writer, sheet_name='annual_gdp_output')
+country_vov = country_vov.merge(qdata[["country", "WHO_region"]].drop_duplicates(), on = "country", how = "left")
+write_model_sheets(writer, {"inf": inf, "gdp_q": gdp_q, "gdp_a": gdp_a}, country_quarter_vov, country_vov, global_vov)
 
-country_quarter_vov.to_excel(writer, sheet_name='country_quarter_vov')
+sur_psa.to_excel(writer, sheet_name = "psa_percentiles")
 
-country_vov = country_vov.merge(qdata[["country", "WHO_region"]].drop_duplicates(), on = "country", how = "left")
-country_vov.to_excel(writer, sheet_name = 'country_vov')
+# the mean and standard deviation of the full value in each country over the draws
+sur_psa_country = sur_psa_summary["pfz"].group_summary().join(sur_psa_summary["allvax"].group_summary(), lsuffix = "_pfz", rsuffix = "_allvax")
+sur_psa_country.to_excel(writer, sheet_name = "psa_country_vov")
 
-global_vov.to_excel(writer, sheet_name = 'global_vov')
+# closed-form intervals of the annual GDP loss averted
+annual_gdp_analytic.to_excel(writer, sheet_name = "annual_gdp_analytic")
 
-sur_psa.to_excel(writer, sheet_name = "psa_percentiles")
+# closed-form intervals of the direct effect in the quarterly models
+quarterly_analytic.to_excel(writer, sheet_name = "quarterly_analytic")
 
 writer.save()
 
@@ -1287,243 +1024,23 @@ The outcomes or value elements are:
     - direct and indirect costs
 """
 
-gdp_q_df["pandemic_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["gdp_gap"]*gdp_q_df["gdp_projected_usd"])
-gdp_q_df["vax_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_vax"]*gdp_q_df["gdp_projected_usd"])
-gdp_q_df["novax_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_novax"]*gdp_q_df["gdp_projected_usd"])
-gdp_q_df["nopfz_gdp"] = gdp_q_df["gdp_projected_usd"] - (gdp_q_df["pred_nopfz"]*gdp_q_df["gdp_projected_usd"])
-
-gdp2020 = gdp_usd[gdp_usd["year"] == 2020]
-gdp2020 = gdp2020.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
-gdp_a_df = gdp_a_df.merge(gdp2020, on = "country", how = "left", suffixes = ["_2021", "_2020"])
-
-gdp_a_df["pandemic_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
-gdp_a_df["vax_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_vax"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
-gdp_a_df["novax_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_novax"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
-gdp_a_df["nopfz_gdp"] = (gdp_a_df["gdp_projected_usd_2020"]+gdp_a_df["gdp_projected_usd_2021"]) - (gdp_a_df["g2020"]*gdp_a_df["gdp_projected_usd_2020"]) - ((gdp_a_df["g2021_g2020_nopfz"]+gdp_a_df["g2020"])*gdp_a_df["gdp_projected_usd_2021"])
-
-pandemic_gdp_loss = gdp_q_df["pandemic_gdp"].sum() + gdp_a_df["pandemic_gdp"].sum()
-predicted_gdp_loss = gdp_q_df["vax_gdp"].sum() + gdp_a_df["vax_gdp"].sum()
-novax_gdp_loss = gdp_q_df["novax_gdp"].sum() + gdp_a_df["novax_gdp"].sum()
-nopfz_gdp_loss = gdp_q_df["nopfz_gdp"].sum() + gdp_a_df["nopfz_gdp"].sum()
-
-vax_gdp_gain = novax_gdp_loss - predicted_gdp_loss
-pfz_gdp_gain = nopfz_gdp_loss - predicted_gdp_loss
-
-inf_df["pandemic_inf"] = inf_df["inf_mean"]*inf_df["tot_pop"]
-inf_df["vax_inf"] = inf_df["pred_vax"]*inf_df["tot_pop"]
-inf_df["novax_inf"] = inf_df["pred_novax"]*inf_df["tot_pop"]
-inf_df["nopfz_inf"] = inf_df["pred_nopfz"]*inf_df["tot_pop"]
-
-pandemic_inf = inf_df["pandemic_inf"].sum()
-predicted_inf = inf_df["vax_inf"].sum()
-novax_inf = inf_df["novax_inf"].sum()
-nopfz_inf = inf_df["nopfz_inf"].sum()
-
-vax_inf_averted = novax_inf - predicted_inf
-pfz_inf_averted = nopfz_inf - predicted_inf
-
-death_df["pandemic_death"] = death_df["daily_deaths"]*death_df["tot_pop"]
-death_df["vax_death"] = death_df["pred_vax"]*death_df["tot_pop"]
-death_df["novax_death"] = death_df["pred_novax"]*death_df["tot_pop"]
-death_df["nopfz_death"] = death_df["pred_nopfz"]*death_df["tot_pop"]
-
-pandemic_death = death_df["pandemic_death"].sum()
-predicted_death = death_df["vax_death"].sum()
-novax_death = death_df["novax_death"].sum()
-nopfz_death = death_df["nopfz_death"].sum()
-
-vax_death_averted = novax_death - predicted_death
-pfz_death_averted = nopfz_death - predicted_death
-
-qaly_df = inf_df.merge(death_df[["country", "yyyy_qq", "pandemic_death", "vax_death", "novax_death", "nopfz_death"]],
-                       on = ["country", "yyyy_qq"], how = "left")
-qaly_df = qaly_df.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
-qaly_df["pandemic_nonfatal"] = qaly_df["pandemic_inf"] - qaly_df["pandemic_death"]
-qaly_df["vax_nonfatal"] = qaly_df["vax_inf"] - qaly_df["vax_death"]
-qaly_df["novax_nonfatal"] = qaly_df["novax_inf"] - qaly_df["novax_death"]
-qaly_df["nopfz_nonfatal"] = qaly_df["nopfz_inf"] - qaly_df["nopfz_death"]
-
-qaly_df["pandemic_qaly"] = (qaly_df["pandemic_death"]*qaly_df["Q_fatal"]) + (qaly_df["pandemic_nonfatal"]*qaly_df["Q_nonfatal"])
-qaly_df["vax_qaly"] = (qaly_df["vax_death"]*qaly_df["Q_fatal"]) + (qaly_df["vax_nonfatal"]*qaly_df["Q_nonfatal"])
-qaly_df["novax_qaly"] = (qaly_df["novax_death"]*qaly_df["Q_fatal"]) + (qaly_df["novax_nonfatal"]*qaly_df["Q_nonfatal"])
-qaly_df["nopfz_qaly"] = (qaly_df["nopfz_death"]*qaly_df["Q_fatal"]) + (qaly_df["nopfz_nonfatal"]*qaly_df["Q_nonfatal"])
-
-pandemic_qaly = qaly_df["pandemic_qaly"].sum()
-predicted_qaly = qaly_df["vax_qaly"].sum()
-novax_qaly = qaly_df["novax_qaly"].sum()
-nopfz_qaly = qaly_df["nopfz_qaly"].sum()
-
-vax_qaly_averted = novax_qaly - predicted_qaly
-pfz_qaly_averted = nopfz_qaly - predicted_qaly
-
-mqaly_df = qaly_df.merge(fullincome, on = "country", how = "left")
-mqaly_df["pandemic_mqaly"] = mqaly_df["pandemic_qaly"]*mqaly_df["fullincome"]
-mqaly_df["vax_mqaly"] = mqaly_df["vax_qaly"]*mqaly_df["fullincome"]
-mqaly_df["novax_mqaly"] = mqaly_df["novax_qaly"]*mqaly_df["fullincome"]
-mqaly_df["nopfz_mqaly"] = mqaly_df["nopfz_qaly"]*mqaly_df["fullincome"]
-
-pandemic_mqaly = mqaly_df["pandemic_mqaly"].sum()
-predicted_mqaly = mqaly_df["vax_mqaly"].sum()
-novax_mqaly = mqaly_df["novax_mqaly"].sum()
-nopfz_mqaly = mqaly_df["nopfz_mqaly"].sum()
-
-vax_mqaly_averted = novax_mqaly - predicted_mqaly
-pfz_mqaly_averted = nopfz_mqaly - predicted_mqaly
-
-cost_df = qaly_df.merge(costs, on = ["country", "yyyy_qq"], how = "left")
-cost_df["pandemic_direct"] = cost_df["pandemic_inf"]*cost_df["nonfatal_los_cost"]
-cost_df["vax_direct"] = cost_df["vax_inf"]*cost_df["nonfatal_los_cost"]
-cost_df["novax_direct"] = cost_df["novax_inf"]*cost_df["nonfatal_los_cost"]
-cost_df["nopfz_direct"] = cost_df["nopfz_inf"]*cost_df["nonfatal_los_cost"]
-
-pandemic_direct = cost_df["pandemic_direct"].sum()
-predicted_direct = cost_df["vax_direct"].sum()
-novax_direct = cost_df["novax_direct"].sum()
-nopfz_direct = cost_df["nopfz_direct"].sum()
-
-vax_direct_averted = novax_direct - predicted_direct
-pfz_direct_averted = nopfz_direct - predicted_direct
-
-cost_df["pandemic_indirect"] = cost_df["pandemic_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
-cost_df["vax_indirect"] = cost_df["vax_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
-cost_df["novax_indirect"] = cost_df["novax_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
-cost_df["nopfz_indirect"] = cost_df["nopfz_nonfatal"]*cost_df["nonfatal_unpaid_work_loss"]
-
-pandemic_indirect = cost_df["pandemic_indirect"].sum()
-predicted_indirect = cost_df["vax_indirect"].sum()
-novax_indirect = cost_df["novax_indirect"].sum()
-nopfz_indirect = cost_df["nopfz_indirect"].sum()
-
-vax_indirect_averted = novax_indirect - predicted_indirect
-pfz_indirect_averted = nopfz_indirect - predicted_indirect
-
-pandemic_loss = pandemic_gdp_loss + pandemic_mqaly + pandemic_direct + pandemic_indirect
-predicted_loss = predicted_gdp_loss + predicted_mqaly + predicted_direct + predicted_indirect
-novax_loss = novax_gdp_loss + novax_mqaly + novax_direct + novax_indirect
-nopfz_loss = nopfz_gdp_loss + nopfz_mqaly + nopfz_direct + nopfz_indirect
-
-vax_value = novax_loss - predicted_loss
-pfz_value = nopfz_loss - predicted_loss
-
-pop2019 = pd.read_stata("../input/national_population_2019.dta")
-pop2019 = pop2019[pop2019.country.isin(inf_df.country.unique())]
-all_pop = pop2019.loc[pop2019.country.isin(country_vov.country.unique()), "tot_pop"].sum()
-
-pandemic_loss_percapita = pandemic_loss/all_pop
-predicted_loss_percapita = predicted_loss/all_pop
-novax_loss_percapita = novax_loss/all_pop
-nopfz_loss_percapita = nopfz_loss/all_pop
-
-# We create a table that contains all the above
-
-table3 = pd.DataFrame(columns = ["a", "b", "c", "d", "e", "f"], index = [
-    "gdpq", "gdpa", "gdp", "gdp_pct", "inf", "death", "qaly", "mqaly", "mqaly_pct",
-    "direct", "direct_pct", "indirect", "indirect_pct", "global",
-    "percap", "perdose"])
-
-table3.loc["gdpq", "a"] = gdp_q_df["pandemic_gdp"].sum()
-table3.loc["gdpq", "b"] = gdp_q_df["vax_gdp"].sum()
-table3.loc["gdpq", "c"] = gdp_q_df["novax_gdp"].sum()
-table3.loc["gdpq", "d"] = gdp_q_df["nopfz_gdp"].sum()
-table3.loc["gdpq", "e"] = gdp_q_df["novax_gdp"].sum() - gdp_q_df["vax_gdp"].sum()
-table3.loc["gdpq", "f"] = gdp_q_df["nopfz_gdp"].sum() - gdp_q_df["vax_gdp"].sum()
-
-table3.loc["gdpa", "a"] = gdp_a_df["pandemic_gdp"].sum()
-table3.loc["gdpa", "b"] = gdp_a_df["vax_gdp"].sum()
-table3.loc["gdpa", "c"] = gdp_a_df["novax_gdp"].sum()
-table3.loc["gdpa", "d"] = gdp_a_df["nopfz_gdp"].sum()
-table3.loc["gdpa", "e"] = gdp_a_df["novax_gdp"].sum() - gdp_a_df["vax_gdp"].sum()
-table3.loc["gdpa", "f"] = gdp_a_df["nopfz_gdp"].sum() - gdp_a_df["vax_gdp"].sum()
-
-table3.loc["gdp", "a"] = pandemic_gdp_loss
-table3.loc["gdp", "b"] = predicted_gdp_loss
-table3.loc["gdp", "c"] = novax_gdp_loss
-table3.loc["gdp", "d"] = nopfz_gdp_loss
-table3.loc["gdp", "e"] = vax_gdp_gain
-table3.loc["gdp", "f"] = pfz_gdp_gain
-
-table3.loc["inf", "a"] = pandemic_inf
-table3.loc["inf", "b"] = predicted_inf
-table3.loc["inf", "c"] = novax_inf
-table3.loc["inf", "d"] = nopfz_inf
-table3.loc["inf", "e"] = vax_inf_averted
-table3.loc["inf", "f"] = pfz_inf_averted
-
-table3.loc["death", "a"] = pandemic_death
-table3.loc["death", "b"] = predicted_death
-table3.loc["death", "c"] = novax_death
-table3.loc["death", "d"] = nopfz_death
-table3.loc["death", "e"] = vax_death_averted
-table3.loc["death", "f"] = pfz_death_averted
-
-table3.loc["qaly", "a"] = pandemic_qaly
-table3.loc["qaly", "b"] = predicted_qaly
-table3.loc["qaly", "c"] = novax_qaly
-table3.loc["qaly", "d"] = nopfz_qaly
-table3.loc["qaly", "e"] = vax_qaly_averted
-table3.loc["qaly", "f"] = pfz_qaly_averted
-
-table3.loc["mqaly", "a"] = pandemic_mqaly
-table3.loc["mqaly", "b"] = predicted_mqaly
-table3.loc["mqaly", "c"] = novax_mqaly
-table3.loc["mqaly", "d"] = nopfz_mqaly
-table3.loc["mqaly", "e"] = vax_mqaly_averted
-table3.loc["mqaly", "f"] = pfz_mqaly_averted
-
-table3.loc["direct", "a"] = pandemic_direct
-table3.loc["direct", "b"] = predicted_direct
-table3.loc["direct", "c"] = novax_direct
-table3.loc["direct", "d"] = nopfz_direct
-table3.loc["direct", "e"] = vax_direct_averted
-table3.loc["direct", "f"] = pfz_direct_averted
-
-table3.loc["indirect", "a"] = pandemic_indirect
-table3.loc["indirect", "b"] = predicted_indirect
-table3.loc["indirect", "c"] = novax_indirect
-table3.loc["indirect", "d"] = nopfz_indirect
-table3.loc["indirect", "e"] = vax_indirect_averted
-table3.loc["indirect", "f"] = pfz_indirect_averted
-
-table3.loc["global", "a"] = pandemic_loss
-table3.loc["global", "b"] = predicted_loss
-table3.loc["global", "c"] = novax_loss
-table3.loc["global", "d"] = nopfz_loss
-table3.loc["global", "e"] = vax_value
-table3.loc["global", "f"] = pfz_value
-
-table3.loc["percap", "a"] = pandemic_loss_percapita
-table3.loc["percap", "b"] = predicted_loss_percapita
-table3.loc["percap", "c"] = novax_loss_percapita
-table3.loc["percap", "d"] = nopfz_loss_percapita
-table3.loc["percap", "e"] = global_vov["allvax_vov_percapita"].values[0]
-table3.loc["percap", "f"] = global_vov["pfz_vov_percapita"].values[0]
-
-table3.loc["perdose", "e"] = global_vov["allvax_vov_perdose"].values[0]
-table3.loc["perdose", "f"] = global_vov["pfz_vov_perdose"].values[0]
-
-table3.loc["gdp_pct", "e"] = table3.loc["gdp", "e"]/table3.loc["global", "e"]
-table3.loc["gdp_pct", "f"] = table3.loc["gdp", "f"]/table3.loc["global", "f"]
-
-table3.loc["mqaly_pct", "e"] = table3.loc["mqaly", "e"]/table3.loc["global", "e"]
-table3.loc["mqaly_pct", "f"] = table3.loc["mqaly", "f"]/table3.loc["global", "f"]
-
-table3.loc["direct_pct", "e"] = table3.loc["direct", "e"]/table3.loc["global", "e"]
-table3.loc["direct_pct", "f"] = table3.loc["direct", "f"]/table3.loc["global", "f"]
-
-table3.loc["indirect_pct", "e"] = table3.loc["indirect", "e"]/table3.loc["global", "e"]
-table3.loc["indirect_pct", "f"] = table3.loc["indirect", "f"]/table3.loc["global", "f"]
-
-table3.index = ["Global GDP shortfall, quarterly data", "Global GDP shortfall, annual data", "Global GDP shortfall, all",
-                "GDP share of value (%)", "Global infections", "Global deaths", "Global QALY losses",
-                "Global Monetary value of QALY losses", "Monetized QALY share of value (%)",
-                "Global direct costs", "Diret costs share of value (%)", "Global indirect costs",
-                "Indirect costs share of value (%)", "Global total losses or value (GDP + monetary QALY + direct + indirect)",
-                "Per capita total loss or value", "Per dose value"]
-
-table3.columns = ["Pandemic (A)", "Predicted Pandemic (B)", "Predicted Zero Vaccination (C)", "Predicted Zero Pfizer-BioNTech Vaccination (D)",
-                  "VoV (C-B)", "VoPFV (D-B)"]
-
-#table3.to_excel("../output/table3_jk.xlsx")
+# compute Table 3, and keep the outcomes and values behind it for the country-specific output and Table 4
+table3, value_dfs, values = compute_table3(inf_df, death_df, gdp_q_df, gdp_a_df, qalys, costs, country_vov, global_vov)
+inf_df = value_dfs["inf_df"]
+death_df = value_dfs["death_df"]
+gdp_q_df = value_dfs["gdp_q_df"]
+gdp_a_df = value_dfs["gdp_a_df"]
+qaly_df = value_dfs["qaly_df"]
+mqaly_df = value_dfs["mqaly_df"]
+cost_df = value_dfs["cost_df"]
+vax_value = values["vax_value"]
+pfz_value = values["pfz_value"]
+vax_mqaly_averted = values["vax_mqaly_averted"]
+pfz_mqaly_averted = values["pfz_mqaly_averted"]
+vax_direct_averted = values["vax_direct_averted"]
+pfz_direct_averted = values["pfz_direct_averted"]
+vax_indirect_averted = values["vax_indirect_averted"]
+pfz_indirect_averted = values["pfz_indirect_averted"]
 
 # %% country-specific output
 
@@ -1532,22 +1049,22 @@ We produce a similar table except for each country. In other words, it contains
 value elements and outcomes for each country.
 """
 
-country_pandemic = pd.concat([gdp_q_df.groupby("country")[["vax_gdp", "pandemic_gdp", "novax_gdp", "nopfz_gdp"]].sum().reset_index(),
+country_pandemic = pd.concat([gdp_q_df.groupby("country", observed = True)[["vax_gdp", "pandemic_gdp", "novax_gdp", "nopfz_gdp"]].sum().reset_index(),
                               gdp_a_df[["country", "vax_gdp", "pandemic_gdp", "novax_gdp", "nopfz_gdp"]]])
 
-country_pandemic = country_pandemic.merge(inf_df.groupby("country")[["vax_inf", "pandemic_inf", "novax_inf", "nopfz_inf"]].sum().reset_index(),
+country_pandemic = country_pandemic.merge(inf_df.groupby("country", observed = True)[["vax_inf", "pandemic_inf", "novax_inf", "nopfz_inf"]].sum().reset_index(),
                                           how = "outer", on = "country")
 
-country_pandemic = country_pandemic.merge(death_df.groupby("country")[["vax_death", "pandemic_death", "novax_death", "nopfz_death"]].sum().reset_index(),
+country_pandemic = country_pandemic.merge(death_df.groupby("country", observed = True)[["vax_death", "pandemic_death", "novax_death", "nopfz_death"]].sum().reset_index(),
                                           how = "outer", on = "country")
 
-country_pandemic = country_pandemic.merge(qaly_df.groupby("country")[["vax_qaly", "pandemic_qaly", "novax_qaly", "nopfz_qaly"]].sum().reset_index(),
+country_pandemic = country_pandemic.merge(qaly_df.groupby("country", observed = True)[["vax_qaly", "pandemic_qaly", "novax_qaly", "nopfz_qaly"]].sum().reset_index(),
                                           how = "outer", on = "country")
 
-country_pandemic = country_pandemic.merge(mqaly_df.groupby("country")[["vax_mqaly", "pandemic_mqaly", "novax_mqaly", "nopfz_mqaly"]].sum().reset_index(),
+country_pandemic = country_pandemic.merge(mqaly_df.groupby("country", observed = True)[["vax_mqaly", "pandemic_mqaly", "novax_mqaly", "nopfz_mqaly"]].sum().reset_index(),
                                           how = "outer", on = "country")
 
-country_pandemic = country_pandemic.merge(cost_df.groupby("country")[[
+country_pandemic = country_pandemic.merge(cost_df.groupby("country", observed = True)[[
     "vax_direct", "pandemic_direct", "novax_direct", "nopfz_direct", 
     "vax_indirect", "pandemic_indirect", "novax_indirect", "nopfz_indirect"]].sum().reset_index(),
     how = "outer", on = "country")
@@ -1712,29 +1229,29 @@ table5.loc["SUR Pfizer", "Total VoV"] = pfz_value
 table5.loc["SUR Pfizer", "2.5th Percentile"] = sur_pfz_vov_percentiles[0]
 table5.loc["SUR Pfizer", "97.5th Percentile"] = sur_pfz_vov_percentiles[2]
 
-lower = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_inf_lower_global_vov.xlsx")
+lower = sensitivity_vov["inf_lower"]
 table5.loc["Lower All", "Total VoV"] = lower.allvax_full_vov.values[0]
 table5.loc["Lower Pfizer", "Total VoV"] = lower.pfz_full_vov.values[0]
 
-upper = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_inf_upper_global_vov.xlsx")
+upper = sensitivity_vov["inf_upper"]
 table5.loc["Upper All", "Total VoV"] = upper.allvax_full_vov.values[0]
 table5.loc["Upper Pfizer", "Total VoV"] = upper.pfz_full_vov.values[0]
 
-unscaled = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_deaths_unscaled_global_vov.xlsx")
+unscaled = sensitivity_vov["deaths_unscaled"]
 table5.loc["Unscaled All", "Total VoV"] = unscaled.allvax_full_vov.values[0]
 table5.loc["Unscaled Pfizer", "Total VoV"] = unscaled.pfz_full_vov.values[0]
 
-nodsct = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_nodsct_global_vov.xlsx")
+nodsct = sensitivity_vov["nodsct"]
 table5.loc["0% All", "Total VoV"] = nodsct.allvax_full_vov.values[0]
 table5.loc["0% Pfizer", "Total VoV"] = nodsct.pfz_full_vov.values[0]
 
-sixpct = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_sixpct_global_vov.xlsx")
+sixpct = sensitivity_vov["sixpct"]
 table5.loc["6% All", "Total VoV"] = sixpct.allvax_full_vov.values[0]
 table5.loc["6% Pfizer", "Total VoV"] = sixpct.pfz_full_vov.values[0]
 
 writer = pd.ExcelWriter('../output/manuscript_tables.xlsx', engine='xlsxwriter')
 
-table1 = pd.read_excel("../output/table1_updated.xlsx")
+table1 = read_output("../output/table1_updated.xlsx")
 table1.to_excel(writer, sheet_name='Table 1')
 
 inf_reg = pd.read_html(inf.results.summary.tables[1].as_html(), header = 0, index_col=0)[0]
@@ -22,6 +22,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import seaborn as sns
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import write_output
 
 #load in data
 coverage_10 = pd.read_csv("../input/Output_10.csv", skiprows = 3, encoding = "ISO-8859-1")
@@ -164,4 +168,4 @@ structure.columns = map(str.lower, structure.columns)
 structure.columns = structure.columns.str.rstrip('_')
 structure_region = structure.merge(pop_mil[["country", "WHO Region", "World Bank income group"]], on = "country", how = "left")
 
-structure_region.to_excel("../output/daily_coverage_deaths.xlsx", index = False)
+write_output(structure_region, "../output/daily_coverage_deaths.xlsx")
@@ -24,6 +24,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import seaborn as sns
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import write_output
 
 #load in data
 coverage_5 = pd.read_csv("../input/Output_5.csv", skiprows = 3, encoding = "ISO-8859-1")
@@ -132,4 +136,4 @@ structure_region = structure_region.loc[:, cols]
 
 structure_region = structure_region.rename(columns = {"month_year": "year_month"})
 
-structure_region.to_excel("../output/daily_coverage_deaths_5year.xlsx", index = False)
+write_output(structure_region, "../output/daily_coverage_deaths_5year.xlsx")
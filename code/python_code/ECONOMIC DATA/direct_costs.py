@@ -16,7 +16,7 @@ inputs:
     - P_Data_Extract_From_World_Development_Indicators-GDP deflators.xlsx (raw file)
     - WEOOct2019all.xlsx (raw file)
     - wdi_ihme_country_match.dta (processed file; created in wdi_ihme_country_match.do)
-    - Historical-and-Projected-Covid-19-data.csv (raw file)
+    - ihme_cache/ihme_quarterly.pkl (processed file; created in ihme_data.py)
     - WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx (raw file)
 
 outputs:
@@ -27,6 +27,12 @@ outputs:
 # %% load in the required libraries
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
+from ihme_data import load_ihme_quarterly
+from donor_matching import match_donors
 
 # %% load in the data
 
@@ -92,7 +98,7 @@ whochoice["country"] = whochoice["country"].replace({
 whochoice["year"] = 2020
 
 #merge WHO CHOICE data with population data
-pop = pd.read_excel("../output/national_population_2020_2021_2022.xlsx")
+pop = read_output("../output/national_population_2020_2021_2022.xlsx")
 pop = pop.drop_duplicates(subset = "country")
 whochoice = whochoice.merge(pop[["country", "tot_pop"]], how="left", on="country")
 
@@ -101,7 +107,7 @@ whochoice = whochoice.dropna(subset=["tot_pop"])
 whochoice = whochoice[whochoice["tot_pop"] >= 1000000]
 
 #merge with relevant countries data
-countries = pd.read_excel("../output/ihme_countries.xlsx")
+countries = read_output("../output/ihme_countries.xlsx")
 countries = countries.rename(columns = {0: "country"})
 whochoice = whochoice.merge(countries, on = "country", how = "outer")
 
@@ -136,7 +142,7 @@ whochoice["who_income"] = whochoice["WHO_region"].astype(str) + "_" + whochoice[
 whochoice = whochoice[whochoice["country"] != "Djibouti"]
 
 #load in foreign exchange rates data
-forex = pd.read_excel("../output/forex_2010_to_2019_jk.xlsx")
+forex = read_output("../output/forex_2010_to_2019_jk.xlsx")
 forex2010 = forex[["country", "forex_2010"]]
 
 #merge WHO CHOICE data with foreign exchange rates data
@@ -258,7 +264,7 @@ whochoice["severe_2019_lcus"] = whochoice["severe_2010_lcus"]*whochoice["convers
 whochoice["critical_2019_lcus"] = whochoice["critical_2010_lcus"]*whochoice["conversion_factor"]
 
 # load in the foreign exchange data (see forex.py for details)
-forex = pd.read_excel("../output/forex_2010_to_2019_jk.xlsx")
+forex = read_output("../output/forex_2010_to_2019_jk.xlsx")
 # simplify the forex data to only contain the country name and 2019 foreign exchange rate
 forex2019 = forex[["country", "forex_2019"]]
 
@@ -279,77 +285,27 @@ whochoice = whochoice.merge(gdp[["country", "yr2019_pcgdp_current_2019USD"]],
 # rename the 2019 PCGDP column for ease of use
 whochoice = whochoice.rename(columns = {"yr2019_pcgdp_current_2019USD": "pcgdp"})
 
-# create two empty columns to be used for extrapolating direct costs
-whochoice["match"] = np.nan
-whochoice["ratio"] = np.nan
 # create a data frame that only contains complete data 
 whochoice_complete = whochoice.dropna(subset=["mild_2019_usd", "severe_2019_usd",
                                               "critical_2019_usd", "pcgdp"],
                              how = 'any').reset_index(drop = True)
 
-# create a function that maps direct costs 
-def map_direct_df(country):
-    """
-    Map direct costs to a country without direct cost data.
-
-    Parameters
-    ----------
-    country : string
-        A string containing the name of the country of interest.
-
-    Returns
-    -------
-    whochoice : data frame
-        A data frame that contains direct cost data for all countries.
-
-    """
-    # find the WHO Region - World Bank Income Group of the country
-    whoincome = whochoice.loc[whochoice["country"] == country, "who_income"].values[0]
-    # create a data frame of countries in that region-income group.
-    whoinc_df = whochoice_complete[whochoice_complete["who_income"] == whoincome].reset_index(drop = True)
-    # create a data frame that only has the country of interest
-    country_df = whochoice[whochoice["country"] == country]
-    # if the country doesn't have WHO CHOICE data
-    if np.isnan(country_df.loc[:, "critical_2019_usd"].values[0]):
-        # extract the country's per capita GDP
-        pcgdp = country_df["pcgdp"].values[0]
-        # if the country also doesn't have per capita GDP, just skip it
-        if np.isnan(pcgdp):
-            pass
-        # but if it does have pcgdp
-        else:
-            # get an array of PCGDP of countries in the same region-income group.
-            whoinc_pcgdp = np.array(whoinc_df.loc[:, "pcgdp"])
-            # calculate the difference between the country of interest's pcgdp and 
-            # the region-income group countries' pcgdp
-            pcgdp_diff = np.absolute(whoinc_pcgdp - pcgdp)
-            # find the value where the difference is the smallest (i.e., closest pcgdp to the country of interest)
-            index_val = pcgdp_diff.argmin()
-            # get the name of the country that has the most similar pcgdp
-            mapping_country = whoinc_df.loc[index_val, "country"]
-            # get the pcgdp value of that country
-            pcgdp_mapping = whoinc_df.loc[whoinc_df["country"] == mapping_country, "pcgdp"].values[0]
-            # take the ratio of the pcgdp of the mapping country and the country of interest
-            ratio = pcgdp/pcgdp_mapping
-            # note which country was used to map in the direct costs data
-            whochoice.loc[whochoice["country"] == country, "match"] = mapping_country
-            # add the pcgdp ratio to the data
-            whochoice.loc[whochoice["country"] == country, "ratio"] = ratio
-            # for mild, severe, and critical direct costs, assign them to be the value of 
-            # mapping country, scaled for the ratio of pcgdp
-            whochoice.loc[whochoice["country"] == country, "mild_2019_usd": "critical_2019_usd"] = (
-                whochoice.loc[whochoice["country"] == mapping_country,
-                              "mild_2019_usd": "critical_2019_usd"].values)*ratio
-    # but if the country does have WHO CHOICE data
-    else:
-        # do nothing
-        pass
-    # return the direct costs data
-    return whochoice
-    
-# for all the countries in our data, perform the utility mapping
-for c in whochoice.country.unique():
-    whochoice = map_direct_df(c)    
+# map direct costs to the countries without WHO CHOICE data (but with per capita GDP): match each to the country in
+# its WHO Region - World Bank Income Group with the closest per capita GDP (see donor_matching.py)
+cost_donors = match_donors(whochoice[whochoice["critical_2019_usd"].isna() & whochoice["pcgdp"].notna()],
+                           whochoice_complete, "pcgdp", group_col = "who_income")
+cost_donors = cost_donors[cost_donors["donor_index"].notna()]
+# take the ratio of the pcgdp of the country of interest and the mapping country
+cost_donors["ratio"] = cost_donors["pcgdp"]/cost_donors["donor_pcgdp"]
+# note which country was used to map in the direct costs data, and the pcgdp ratio
+whochoice["match"] = cost_donors["donor"]
+whochoice["ratio"] = cost_donors["ratio"]
+# for mild, severe, and critical direct costs, assign them to be the value of 
+# mapping country, scaled for the ratio of pcgdp
+cost_cols = ["mild_2019_usd", "severe_2019_usd", "critical_2019_usd"]
+whochoice.loc[cost_donors.index, cost_cols] = (
+    whochoice_complete.loc[cost_donors["donor_index"].astype(int), cost_cols].values*
+    cost_donors[["ratio"]].values)
 
 # simplify the data to only have the country name, region-income group, and direct costs in 2019USD
 direct_df = whochoice[["country", "who_income", "mild_2019_usd","severe_2019_usd", "critical_2019_usd"]]
@@ -357,119 +313,12 @@ direct_df = whochoice[["country", "who_income", "mild_2019_usd","severe_2019_usd
 # %% establish health states
 
 # load in population data
-popdata = pd.read_excel("../output/national_population_2020_2021_2022.xlsx")
-
-# load in the IHME COVID-19 projections data
-ihmeraw = pd.read_csv("../input/Historical-and-Projected-Covid-19-data.csv")
-ihme = ihmeraw[ihmeraw["version_name"] == "reference"]
-
-# create a list of the relevant columns to keep
-keep_cols = ["date", "location_name", "inf_mean", "inf_cuml_mean",
-             "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean"]
-
-# only keep the relevant columns
-ihme = ihme[keep_cols]
-
-# rename countries to author-preferred versions
-ihme = ihme.replace({'Taiwan (Province of China)': 'Taiwan', 'Viet Nam': 'Vietnam',
- 'Republic of Moldova': 'Moldova', 'Russian Federation': 'Russia',
- 'Republic of Korea': 'South Korea', 'United States of America': 'United States',
- 'Bolivia (Plurinational State of)': 'Bolivia', 'Venezuela (Bolivarian Republic of)': 'Venezuela',
- 'Iran (Islamic Republic of)': 'Iran', 'Syrian Arab Republic': 'Syria',
- 'Türkiye': 'Turkey', 'Democratic Republic of the Congo': 'Democratic Republic of Congo',
- "Côte d'Ivoire": "Cote d'Ivoire", "Cabo Verde": "Cape Verde", "United Republic of Tanzania": "Tanzania",
- "Timor": "Timor-Leste", "Micronesia (Federated States of)": "Micronesia",
- "Lao People's Democratic Republic": "Laos", "Democratic People's Republic of Korea": "North Korea",
- "Hong Kong Special Administrative Region of China": "Hong Kong", "Macao Special Administrative Region of China": "Macao"})
-
-# simplify column name to just "country"
-ihme = ihme.rename(columns = {"location_name": "country"})
-
-# make sure python interprets the year and quarter variables as datetime variables
-ihme["year"] =  pd.to_datetime(ihme['date']).dt.year
-ihme["quarter"] =  pd.to_datetime(ihme['date']).dt.quarter
-
-# sort the data
-ihme = ihme.sort_values(["country", "year", "quarter", "date"])
-
-# remove data after Q2 2022
-ihme = ihme[ihme["date"] < "2022-07-01"]
-
-# merge population data to the IHME data and only keep countries with population > 1M
-ihme_df = ihme.merge(popdata, on = ["country", "year"], how = "left")
-ihme_1m = ihme_df[(ihme_df["tot_pop"] >= 1000000) | (ihme_df["country"] == "Macao")]
-
-# set the first entry of infections and deaths to the cumulative value.
-death_df = ihme_1m[ihme_1m['daily_deaths'].notna()]
-inf_df = ihme_1m[ihme_1m['inf_mean'].notna()]
-for c in ihme_1m.country.unique():
-    first_deaths = death_df.loc[death_df["country"] == c, "date"].min()
-    first_infs = inf_df.loc[inf_df["country"] == c, "date"].min()
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_mean"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_mean"]
-
-# create a list of the epidemiologicla numeric columns
-numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
-epi_cols = list(set(ihme_1m.select_dtypes(include=numerics).columns) - set(["year", "quarter", "yyyy_qq", "tot_pop",
-                                                                            "infection_fatality"]))
-
-# extrapolate data for China based on Macao and Hong Kong (see ihme_portal.py for details)
-mc_hk = ihme_1m[ihme_1m["country"].isin(["Macao", "Hong Kong"])]
-mc_hk = mc_hk.groupby("date")[epi_cols].sum()
-china =  ihme_1m[ihme_1m["country"] == "China"].set_index("date")
-china = china[epi_cols]
-china_update = china.subtract(mc_hk, level=0)
-china_update = china_update.reset_index()
-china_update["country"] = "China"
-china_update = china_update.merge(ihme_df, on = ["country", "date"], how = "left")
-china_update = china_update.loc[:,~china_update.columns.str.contains('_y')] 
-china_update.columns = china_update.columns.str.replace(r'_x$', '')
-
-ihme_1m = ihme_1m[ihme_1m["country"] != "China"]
-ihme_1m = pd.concat([ihme_1m, china_update], axis = 0)
-
-##collapse infections and deaths to the country-quarter level
-ihme_q = ihme_1m[["date", "country", "year", "quarter", "inf_cuml_mean", "inf_mean",
-                  "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean", "tot_pop"]]
-
-# make sure python interprets the date as a datetime variable and sort the data
-ihme_q["date"] =  pd.to_datetime(ihme_q['date'])
-ihme_q = ihme_q.sort_values(["country", "year", "quarter", "date"])
-
-# create a year-quarter variable
-ihme_q["yyyy_qq"] = ihme_q["year"].astype(str) + "_Q" + ihme_q["quarter"].astype(str)
-
-# drop Macao (population below 1M) and Djibouti (incomplete data)
-ihme_q = ihme_q[(ihme_q["country"] != "Macao") & (ihme_q["country"] != "Djibouti")]
-
-# for countries whose deaths data end in the middle of a quarter, extrapolate to 
-# the end of the quarter (see ihme_portal.py for details)
-death_df["month"] =  pd.to_datetime(death_df['date']).dt.month
-kazakh_extrap = death_df.loc[(death_df["country"] == "Kazakhstan") & (death_df["year"] == 2021) &
-                             (death_df["month"] == 9), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kazakhstan") & (ihme_q["year"] == 2021) &
-                             (ihme_q["quarter"] == 3) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kazakh_extrap
-
-kyrgyz_extrap = death_df.loc[(death_df["country"] == "Kyrgyzstan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 3), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kyrgyzstan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kyrgyz_extrap
-
-uzbek_extrap = death_df.loc[(death_df["country"] == "Uzbekistan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 2), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Uzbekistan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = uzbek_extrap
-
-ihme_q_cd = ihme_q.groupby(["country", "year",
-                            "quarter", "yyyy_qq",
-                            "tot_pop"])["inf_mean", "daily_deaths",
-                                        "admis_mean", "icu_beds_mean"].sum().reset_index()
+popdata = read_output("../output/national_population_2020_2021_2022.xlsx")
+
+# load in the IHME COVID-19 projections data, collapsed to the country-quarter (see ihme_data.py), and drop Macao
+# (population below 1M) and Djibouti (incomplete data). the deaths of countries whose data end in the middle of a
+# quarter are extrapolated to the end of the quarter (see ihme_portal.py for details).
+ihme_q_cd = load_ihme_quarterly(popdata, drop_countries = ["Macao", "Djibouti"])
 
 #omit asympomatic infections -- using conservative number from Di Fusco et al. 2021
 #from Di Fusco et al. 2021, we assume 19.2% of infections are asymptomatic
@@ -670,4 +519,4 @@ los_disability["nonfatal_los_cost"] = ((los_disability["P_asymp"]*los_disability
 direct_costs = los_disability[["country", "yyyy_qq", "nonfatal_los_cost"]]
 
 # save to a file
-direct_costs.to_excel("../output/direct_costs_jk.xlsx", index = False)
+write_output(direct_costs, "../output/direct_costs_jk.xlsx")
@@ -22,11 +22,15 @@ outputs:
 # %% load in libraries
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
 
 # %% process data 
 
 #load in a list of the IHME countries
-ihme_countries = pd.read_excel("../output/ihme_countries.xlsx")
+ihme_countries = read_output("../output/ihme_countries.xlsx")
 ihme_countries = ihme_countries[0].unique()
 
 #creating a dictionary that is used to rename countries
@@ -185,4 +189,4 @@ forex_ihme = forex_ihme.reset_index(drop = False)
 forex_ihme = forex_ihme.rename(columns = {"index": "country"})
 
 # save the file to Excel
-forex_ihme.to_excel("../output/forex_2010_to_2019_jk.xlsx", index = False)
+write_output(forex_ihme, "../output/forex_2010_to_2019_jk.xlsx")
@@ -18,11 +18,15 @@ outputs:
 # %% load in packages
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
 
 # %% calculate full income
 
 # load in time use data
-time_use = pd.read_excel("../output/time_use_processed_ihme.xlsx")
+time_use = read_output("../output/time_use_processed_ihme.xlsx")
 # load in gross national income data
 gni = pd.read_stata("../input/final_pcgni_current_2019USD.dta")
 # load in hourly wage data
@@ -45,4 +49,4 @@ fullincome_df = fullincome_df.merge(nonmarket_df, on = "country")
 fullincome_df["fullincome"] = fullincome_df["pcgni"] + (fullincome_df["wage"]*fullincome_df["yearly_nonmarket"])
 
 # save to an Excel file
-fullincome_df.to_excel("../output/fullincome.xlsx", index = False)
+write_output(fullincome_df, "../output/fullincome.xlsx")
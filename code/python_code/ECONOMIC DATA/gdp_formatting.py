@@ -27,9 +27,11 @@ outputs:
 # pandas and numpy for data management
 import pandas as pd
 import numpy as np
-# sympy and math to solve for variables and to perform some mathematical operations efficiently
-from sympy import symbols, Eq, solveset, S
-import math
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
+from gdp_projections import quarterly_projection_grid, rebase_real_gdp
 
 # %% load in data
 
@@ -101,120 +103,16 @@ quarterly_gdp = quarterly_gdp.replace({"...": np.nan})
 
 # %% use Statistics Canada approach to calculate Q4 2020 GDP and then interpolate linearly after that.
 
-def generate_quarterly_projections(country, gdp):
-    """
-    Interpolates quarterly GDP from annual GDP. Specifically, we use it to input the annual projected GDP
-    for countries with quarterly actual GDP. 
-
-    Parameters
-    ----------
-    country : string
-        A string containing the country to generate quarterly GDP for.
-    gdp : string
-        A string containing the type GDP to draw from (either NGDP_R or NGDP).
-
-    Raises
-    ------
-    ValueError
-        An error message that prints if the quarterly GDP projections for 2019 do not
-        sum to the original annual GDP projections. Effectively, it's just a check that
-        the Statistics Canada approach retained the overall level of GDP we began with.
-
-    Returns
-    -------
-    None.
-
-    """
-    # get the weo data for 2018 - 2022.
-    projected2018 = weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), 2018].values[0]
-    projected2019 = weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), 2019].values[0]
-    projected2020 = weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), 2020].values[0]
-    projected2021 = weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), 2021].values[0]
-    projected2022 = weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), 2022].values[0]
-
-    # estimate the annual growth between 2018 and 2019, and 2019 and 2020.
-    annualgrowth_19_20 = (projected2020/projected2019) - 1
-    annualgrowth_18_19 = (projected2019/projected2018) - 1
-    
-    # instantiate symbols that will work as mathematical variables
-    gA = symbols("gA")
-    gB = symbols("gB")
-    
-    # solve for gA using equation S11
-    eq_19_20 = Eq(((annualgrowth_19_20 + 1)*(1 + gA + (gA**2) + (gA**3))) - (gA**4) - (gA**5) - (gA**6) - (gA**7), 0)
-    sol_19_20 = list(solveset(eq_19_20, domain = S.Reals))
-    # solve for gB using equation S12
-    eq_18_19 = Eq(((annualgrowth_18_19 + 1)*(1 + gB + (gB**2) + (gB**3))) - (gB**4) - (gB**5) - (gB**6) - (gB**7), 0)
-    sol_18_19 = list(solveset(eq_18_19, domain = S.Reals))
-    
-    # the solver produces a variety of values that could "solve" the above equations.
-    # however, we only want the real and positive value, so we keep that.
-    gA = max(sol_19_20)
-    gB = max(sol_18_19)
-    # calculate an average growth rate, gC, using the geometric mean
-    gC = math.sqrt(gA*gB)
-    
-    # instantiate a symbol that will work as a mathematical variable
-    Q1 = symbols("Q1")
-    
-    # solve for GDP in Q1 of 2019 using equation S13
-    eq_2019Q1 = Eq((projected2019/(1 + gC + (gC**2) + (gC**3))) - Q1, 0)
-    sol_2019Q1 = list(solveset(eq_2019Q1, domain = S.Reals))
-    
-    # calculate GDP in quarters 2, 3, and 4 of 2019
-    q1_2019 = sol_2019Q1[0]
-    q2_2019 = q1_2019*gC
-    q3_2019 = q1_2019*(gC**2)
-    q4_2019 = q1_2019*(gC**3)
-    
-    # we calculate the value of annual GDP (the sum of quarterly GDP) in 2019 and ensure
-    # that it still equals the annual GDP we started with (within a rounding error)
-    gdp2019_projected = sum([q1_2019, q2_2019, q3_2019, q4_2019])
-      
-    if round(gdp2019_projected) != round(projected2019):
-        raise ValueError(f"Summed quarterly projections for {country} in 2019 do not equal the annual total!")
-    
-    # we define the value of GDP in Q4 of 2019 as x1 and then, using equation S1 - S4,
-    # calculate the GDP in each quarter of 2020.
-    x1 = q4_2019
-    d1 = (projected2020 - 4*x1)/10
-    
-    q1_2020 = x1 + d1
-    q2_2020 = x1 + 2*d1
-    q3_2020 = x1 + 3*d1
-    q4_2020 = x1 + 4*d1
-    
-    # we repeat the above process to calculate the GDP in each quarter of 2021 and 2022.
-    x2 = q4_2020
-    d2 = (projected2021 - 4*x2)/10
-    
-    q1_2021 = x2 + d2
-    q2_2021 = x2 + 2*d2
-    q3_2021 = x2 + 3*d2
-    q4_2021 = x2 + 4*d2
-    
-    x3 = q4_2021
-    d3 = (projected2022 - 4*x3)/10
-    
-    q1_2022 = x3 + d3
-    q2_2022 = x3 + 2*d3
-    q3_2022 = x3 + 3*d3
-    q4_2022 = x3 + 4*d3
-    
-    # we then create a dictionary that links the GDP values in a quarter to its quarterly name.
-    quarterly_estimates = {"2019Q1": q1_2019, "2019Q2": q2_2019, "2019Q3": q3_2019, "2019Q4": q4_2019,
-                           "2020Q1": q1_2020, "2020Q2": q2_2020, "2020Q3": q3_2020, "2020Q4": q4_2020,
-                           "2021Q1": q1_2021, "2021Q2": q2_2021, "2021Q3": q3_2021, "2021Q4": q4_2021,
-                           "2022Q1": q1_2022, "2022Q2": q2_2022, "2022Q3": q3_2022, "2022Q4": q4_2022}
-    
-    # we use the dictionary to fill in the values of projected quarterly data.
-    for key, value in quarterly_estimates.items():
-        weo2019_gdp.loc[(weo2019_gdp["Country"] == country) & (weo2019_gdp["WEO Subject Code"] == gdp), key] = value
+# get the annual projections (2018 - 2022) of both types of GDP for all countries with quarterly actual GDP.
+weo2019_projected = weo2019_gdp.drop_duplicates(subset = ["Country", "WEO Subject Code"]).set_index(
+    ["Country", "WEO Subject Code"])[[2018, 2019, 2020, 2021, 2022]]
+weo2019_projected = weo2019_projected.reindex(pd.MultiIndex.from_product(
+    [quarterly_gdp["Country"].unique(), ["NGDP", "NGDP_R"]], names = ["Country", "WEO Subject Code"]))
 
-# we run the above function for all countries and for both the nominal and real GDP estimates.
-for c in quarterly_gdp["Country"].unique():
-    for g in ["NGDP", "NGDP_R"]:
-        generate_quarterly_projections(c, g)
+# interpolate quarterly GDP for 2019 - 2022 for all of them at once (see gdp_projections.py), checking that the
+# quarters of 2019 sum to the annual GDP we started with, and add the quarterly projections to the WEO data.
+quarterly_projections = quarterly_projection_grid(weo2019_projected, 2019, 2022)
+weo2019_gdp = weo2019_gdp.join(quarterly_projections, on = ["Country", "WEO Subject Code"])
 
 # %% combine quarterly and annual actual and projected GDP into a single data set.
 
@@ -282,125 +180,10 @@ combined_quarterly_annual = pd.concat([combined_quarterly[["Country", "WEO Subje
 
 # create a second data set, just to work with without disruptin the original
 combined_df = combined_quarterly_annual.copy()
-# create an empty data set with all the necessary columns but without any data
-rebased_df = pd.DataFrame(columns = ["country", "date", "Real GDP", "source", "type", "ratio"])
-
-def rebase_annual_gdp(country):
-    """
-    Rebases the annual actual and projected GDP to a common base year of 2019.
-
-    Parameters
-    ----------
-    country : string
-        A string describing the country whose GDP is to be rebased.
-
-    Returns
-    -------
-    None.
-
-    """
-    global rebased_df
-    # extract the values of nominal and real projected GDP in 2019, and calculate their ratio.
-    nom_gdp_proj = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP") &
-                         (combined_df["source"] == "projected") & (combined_df["variable"] == 2019), "value"].values[0]  
-    real_gdp_proj = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "projected") & (combined_df["variable"] == 2019), "value"].values[0]     
-    ratio_proj = nom_gdp_proj/real_gdp_proj
-    # extract the values of nominal and real actual GDP in 2019, and calculate their ratio.
-    nom_gdp_obs = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP") &
-                         (combined_df["source"] == "observed") & (combined_df["variable"] == 2019), "value"].values[0]  
-    real_gdp_obs = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "observed") & (combined_df["variable"] == 2019), "value"].values[0]     
-    ratio_obs = nom_gdp_obs/real_gdp_obs
-    # get all values of real projected GDP in our study period
-    gdp_proj_og = combined_df[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "projected")].reset_index(drop = True)    
-    # get all values of real actual GDP in our study period
-    gdp_obs_og = combined_df[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "observed")].reset_index(drop = True)    
-    # for each real projected GDP value, rebase it using the projected GDP ratio calculated above
-    # and fill in the empty rebased data frame
-    for i in range(len(gdp_proj_og)):
-        _date = gdp_proj_og.loc[i, "variable"]
-        _real_gdp = gdp_proj_og.loc[i, "value"]*ratio_proj
-        _source = gdp_proj_og.loc[i, "source"]
-        _type = gdp_proj_og.loc[i, "type"]
-        rebase = pd.DataFrame([[country, _date, _real_gdp, _source, _type, ratio_proj]],
-                              columns = ["country", "date", "Real GDP", "source", "type", "ratio"])
-        rebased_df = pd.concat([rebased_df, rebase])
-    # do the same for the actual data
-    for j in range(len(gdp_obs_og)):
-        _date2 = gdp_obs_og.loc[j, "variable"]
-        _real_gdp2 = gdp_obs_og.loc[j, "value"]*ratio_obs
-        _source2 = gdp_obs_og.loc[j, "source"]
-        _type2 = gdp_obs_og.loc[j, "type"]
-        rebase2 = pd.DataFrame([[country, _date2, _real_gdp2, _source2, _type2, ratio_obs]],
-                              columns = ["country", "date", "Real GDP", "source", "type", "ratio"])
-        rebased_df = pd.concat([rebased_df, rebase2])
-
-# get a list of countries whose GDP data is annual
-ann_countries = combined_df[combined_df["type"] == "annual"].Country.unique()
-# do the same for quarterly
-q_countries = combined_df[combined_df["type"] == "quarterly"].Country.unique()
-
-# now for every country whose data is annual, rebase to 2019.
-for c in ann_countries:
-    rebase_annual_gdp(c)
-
-# see comments in the annual function above
-def rebase_quarterly_gdp(country):
-    """
-    Rebases the quarterly actual and projected GDP to a common base year of 2019.
-
-    Parameters
-    ----------
-    country : string
-        A string describing the country whose GDP is to be rebased.
-
-    Returns
-    -------
-    None.
-
-    """
-    global rebased_df
-    nom_gdp_proj = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP") &
-                         (combined_df["source"] == "projected") & (combined_df["variable"].str.contains ("2019")),
-                         "value"].mean() 
-    real_gdp_proj = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "projected") & (combined_df["variable"].str.contains ("2019")),
-                         "value"].mean()     
-    ratio_proj = nom_gdp_proj/real_gdp_proj
-    nom_gdp_obs = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP") &
-                         (combined_df["source"] == "observed") & (combined_df["variable"].str.contains ("2019")),
-                         "value"].mean() 
-    real_gdp_obs = combined_df.loc[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "observed") & (combined_df["variable"].str.contains ("2019")),
-                         "value"].mean()     
-    ratio_obs = nom_gdp_obs/real_gdp_obs
-    gdp_proj_og = combined_df[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "projected")].reset_index(drop = True)     
-    gdp_obs_og = combined_df[(combined_df["Country"] == country) & (combined_df["WEO Subject Code"] == "NGDP_R") &
-                         (combined_df["source"] == "observed")].reset_index(drop = True)    
-    for i in range(len(gdp_proj_og)):
-        _date = gdp_proj_og.loc[i, "variable"]
-        _real_gdp = gdp_proj_og.loc[i, "value"]*ratio_proj
-        _source = gdp_proj_og.loc[i, "source"]
-        _type = gdp_proj_og.loc[i, "type"]
-        rebase = pd.DataFrame([[country, _date, _real_gdp, _source, _type, ratio_proj]],
-                              columns = ["country", "date", "Real GDP", "source", "type", "ratio"])
-        rebased_df = pd.concat([rebased_df, rebase])
-    for j in range(len(gdp_obs_og)):
-        _date2 = gdp_obs_og.loc[j, "variable"]
-        _real_gdp2 = gdp_obs_og.loc[j, "value"]*ratio_obs
-        _source2 = gdp_obs_og.loc[j, "source"]
-        _type2 = gdp_obs_og.loc[j, "type"]
-        rebase2 = pd.DataFrame([[country, _date2, _real_gdp2, _source2, _type2, ratio_obs]],
-                              columns = ["country", "date", "Real GDP", "source", "type", "ratio"])
-        rebased_df = pd.concat([rebased_df, rebase2])
-  
-# for every country with quarterly data, perform the rebasing
-for c2 in q_countries:
-    rebase_quarterly_gdp(c2)
+
+# rebase the annual and quarterly actual and projected real GDP of all countries to a common base year of 2019, using
+# the ratio of nominal and real GDP in 2019 of each country's projected and actual GDP (see gdp_projections.py).
+rebased_df = rebase_real_gdp(combined_df, base_year = 2019)
 
 # just do some basic data maintenance
 rebased_df = rebased_df.reset_index(drop = True)
@@ -434,7 +217,7 @@ ann_quart_rebased["quarter"] = ann_quart_rebased["quarter"].astype(int)
 # %% check the number of countries
 
 # load in the data with all relevant IHME countries
-ihme_countries = pd.read_excel("../output/ihme_countries.xlsx")
+ihme_countries = read_output("../output/ihme_countries.xlsx")
 
 # only keep the countries that are in our IHME data
 gdp_ihme = ann_quart_rebased[ann_quart_rebased.country.isin(ihme_countries[0].unique())]
@@ -456,12 +239,12 @@ len(gdp_gap_ann_countries.country.unique())
 len(gdp_gap_qrt_countries.country.unique())
 
 # save the file
-gdp_gap.to_excel("../output/gdp_gap_ihme.xlsx", index = False)
+write_output(gdp_gap, "../output/gdp_gap_ihme.xlsx")
 
 # %% calculate GDP losses in USD
 
 # load in the foreign exchange rates
-forex = pd.read_excel("../output/forex_2010_to_2019_jk.xlsx")
+forex = read_output("../output/forex_2010_to_2019_jk.xlsx")
 
 # since data are in millions of LCUs, multiply them by 1 million
 gdp_gap["observed_lcus"] = gdp_gap["observed_millions_of_lcus"]*1000000
@@ -481,4 +264,4 @@ gdp_forex["loss"] = gdp_forex["gdp_projected_usd"] - gdp_forex["gdp_observed_usd
 gdp_forex = gdp_forex.dropna(subset=["gdp_gap"], how='all')
 
 # save the file.
-gdp_forex.to_excel("../output/gdp_usd_ihme.xlsx", index = False)
+write_output(gdp_forex, "../output/gdp_usd_ihme.xlsx")
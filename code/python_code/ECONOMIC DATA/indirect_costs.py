@@ -9,7 +9,7 @@ __updated__ = 15 November 2023
 
 inputs:
     - national_population_2020_2021_2022.xlsx (processed file; created in ihme_portal.py)
-    - Historical-and-Projected-Covid-19-data.csv (raw file)
+    - ihme_cache/ihme_quarterly.pkl (processed file; created in ihme_data.py)
     - WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx (raw file)
     - daily_earn_2019USD.dta (processed file)
     - COVerAGE_death_age_structures (processed file; created in COVerAGE_quarterly_death_age_structures_5year.do)
@@ -22,124 +22,22 @@ outputs:
 """
 # %% load in libraries
 import pandas as pd
-import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
+from ihme_data import load_ihme_quarterly
+from life_tables import life_table_matrix, fatal_losses, age_structure_losses
 
 # %% establish health states
 
 # load in population data
-popdata = pd.read_excel("../output/national_population_2020_2021_2022.xlsx")
-
-# load in the IHME COVID-19 projections data
-ihmeraw = pd.read_csv("../input/Historical-and-Projected-Covid-19-data.csv")
-ihme = ihmeraw[ihmeraw["version_name"] == "reference"]
-
-# create a list of the relevant columns to keep
-keep_cols = ["date", "location_name", "inf_mean", "inf_cuml_mean",
-             "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean"]
-
-# only keep the relevant columns
-ihme = ihme[keep_cols]
-
-# rename countries to author-preferred versions
-ihme = ihme.replace({'Taiwan (Province of China)': 'Taiwan', 'Viet Nam': 'Vietnam',
- 'Republic of Moldova': 'Moldova', 'Russian Federation': 'Russia',
- 'Republic of Korea': 'South Korea', 'United States of America': 'United States',
- 'Bolivia (Plurinational State of)': 'Bolivia', 'Venezuela (Bolivarian Republic of)': 'Venezuela',
- 'Iran (Islamic Republic of)': 'Iran', 'Syrian Arab Republic': 'Syria',
- 'Türkiye': 'Turkey', 'Democratic Republic of the Congo': 'Democratic Republic of Congo',
- "Côte d'Ivoire": "Cote d'Ivoire", "Cabo Verde": "Cape Verde", "United Republic of Tanzania": "Tanzania",
- "Timor": "Timor-Leste", "Micronesia (Federated States of)": "Micronesia",
- "Lao People's Democratic Republic": "Laos", "Democratic People's Republic of Korea": "North Korea",
- "Hong Kong Special Administrative Region of China": "Hong Kong", "Macao Special Administrative Region of China": "Macao"})
-
-# simplify column name to just "country"
-ihme = ihme.rename(columns = {"location_name": "country"})
-
-# make sure python interprets the year and quarter variables as datetime variables
-ihme["year"] =  pd.to_datetime(ihme['date']).dt.year
-ihme["quarter"] =  pd.to_datetime(ihme['date']).dt.quarter
-
-# sort the data
-ihme = ihme.sort_values(["country", "year", "quarter", "date"])
-
-# remove data after Q2 2022
-ihme = ihme[ihme["date"] < "2022-07-01"]
-
-# merge population data to the IHME data and only keep countries with population > 1M
-ihme_df = ihme.merge(popdata, on = ["country", "year"], how = "left")
-ihme_1m = ihme_df[(ihme_df["tot_pop"] >= 1000000) | (ihme_df["country"] == "Macao")]
-
-# set the first entry of infections and deaths to the cumulative value.
-death_df = ihme_1m[ihme_1m['daily_deaths'].notna()]
-inf_df = ihme_1m[ihme_1m['inf_mean'].notna()]
-for c in ihme_1m.country.unique():
-    first_deaths = death_df.loc[death_df["country"] == c, "date"].min()
-    first_infs = inf_df.loc[inf_df["country"] == c, "date"].min()
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_mean"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_mean"]
-
-# create a list of the epidemiologicla numeric columns
-numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
-epi_cols = list(set(ihme_1m.select_dtypes(include=numerics).columns) - set(["year", "quarter", "yyyy_qq", "tot_pop",
-                                                                            "infection_fatality"]))
-
-# extrapolate data for China based on Macao and Hong Kong (see ihme_portal.py for details)
-mc_hk = ihme_1m[ihme_1m["country"].isin(["Macao", "Hong Kong"])]
-mc_hk = mc_hk.groupby("date")[epi_cols].sum()
-china =  ihme_1m[ihme_1m["country"] == "China"].set_index("date")
-china = china[epi_cols]
-china_update = china.subtract(mc_hk, level=0)
-china_update = china_update.reset_index()
-china_update["country"] = "China"
-china_update = china_update.merge(ihme_df, on = ["country", "date"], how = "left")
-china_update = china_update.loc[:,~china_update.columns.str.contains('_y')] 
-china_update.columns = china_update.columns.str.replace(r'_x$', '')
-
-ihme_1m = ihme_1m[ihme_1m["country"] != "China"]
-ihme_1m = pd.concat([ihme_1m, china_update], axis = 0)
-
-##collapse infections and deaths to the country-quarter level
-ihme_q = ihme_1m[["date", "country", "year", "quarter", "inf_cuml_mean", "inf_mean",
-                  "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean", "tot_pop"]]
-
-# make sure python interprets the date as a datetime variable and sort the data
-ihme_q["date"] =  pd.to_datetime(ihme_q['date'])
-ihme_q = ihme_q.sort_values(["country", "year", "quarter", "date"])
-
-# create a year-quarter variable
-ihme_q["yyyy_qq"] = ihme_q["year"].astype(str) + "_Q" + ihme_q["quarter"].astype(str)
-
-# drop Macao (population below 1M) and Djibouti (incomplete data)
-ihme_q = ihme_q[(ihme_q["country"] != "Macao") & (ihme_q["country"] != "Djibouti")]
-
-# for countries whose deaths data end in the middle of a quarter, extrapolate to 
-# the end of the quarter (see ihme_portal.py for details)
-death_df["month"] =  pd.to_datetime(death_df['date']).dt.month
-kazakh_extrap = death_df.loc[(death_df["country"] == "Kazakhstan") & (death_df["year"] == 2021) &
-                             (death_df["month"] == 9), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kazakhstan") & (ihme_q["year"] == 2021) &
-                             (ihme_q["quarter"] == 3) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kazakh_extrap
-
-kyrgyz_extrap = death_df.loc[(death_df["country"] == "Kyrgyzstan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 3), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kyrgyzstan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kyrgyz_extrap
-
-uzbek_extrap = death_df.loc[(death_df["country"] == "Uzbekistan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 2), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Uzbekistan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = uzbek_extrap
-
-ihme_q_cd = ihme_q.groupby(["country", "year",
-                            "quarter", "yyyy_qq",
-                            "tot_pop"])["inf_mean", "daily_deaths",
-                                        "admis_mean", "icu_beds_mean"].sum().reset_index()
+popdata = read_output("../output/national_population_2020_2021_2022.xlsx")
+
+# load in the IHME COVID-19 projections data, collapsed to the country-quarter (see ihme_data.py), and drop Macao
+# (population below 1M) and Djibouti (incomplete data). the deaths of countries whose data end in the middle of a
+# quarter are extrapolated to the end of the quarter (see ihme_portal.py for details).
+ihme_q_cd = load_ihme_quarterly(popdata, drop_countries = ["Macao", "Djibouti"])
 
 #omit asympomatic infections -- using conservative number from Di Fusco et al. 2021
 #from Di Fusco et al. 2021, we assume 19.2% of infections are asymptomatic
@@ -339,190 +237,6 @@ paid_disability["nonfatal_paid_work_loss"] = ((paid_disability["P_asymp"]*paid_d
                               + (paid_disability["P_severe"]*paid_disability["severe_cost"])
                               + (paid_disability["P_critical"]*paid_disability["critical_cost"]))
 
-# %% paid loss due to death
-
-#load in 2019 lifetables
-lifetablesraw = pd.read_excel("../input/WPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXES.xlsx",
-              sheet_name = "Estimates 1986-2021", header = 16)
-
-#change the column name of the country variable to an easily usable title
-lifetables = lifetablesraw.rename(columns = {"Region, subregion, country or area *":
-                                          "country", "Year": "year", "Age (x)": "age",
-                                          "Number of person-years lived L(x,n)": "L",
-                                          "Number of survivors l(x)": "l"})
-
-lifetables = lifetables[["country", "year", "age", "L", "l"]]
-#make sure the year and age variables are interepreted as numeric variables.
-#non-convertible entries are coerced to na.
-lifetables["year"] = pd.to_numeric(lifetables["year"], errors = "coerce")
-lifetables["age"] =  pd.to_numeric(lifetables["age"],  errors = "coerce")
-daily_earn["age"] =  pd.to_numeric(daily_earn["age"],  errors = "coerce")
-lifetables_earn = lifetables[(lifetables["year"] == 2019)]
-lifetables_earn = lifetables_earn.replace(country_dict)
-
-#add earnings to lifetable
-lifetables_earn = lifetables_earn.merge(daily_earn[["country", "age", "daily_earnings_2019USD"]],
-                                   on = ["country", "age"], how = "right")
-
-lifetables_earn["annual_earnings"] = lifetables_earn["daily_earnings_2019USD"]*365.25
-lifetables_earn = lifetables_earn[lifetables_earn["country"] != "Djibouti"]
-
-def paidwork_loss_mortality(country, age, discount_rate):
-    """
-    Calculates the paid work loss from mortality using equation 2 in the MSD.
-
-    Parameters
-    ----------
-    country : str
-        A string containing the country of interest.
-    age : int
-        An integer containing the age of interest.
-    discount_rate : float
-        A float (i.e., decimal) that equals the annual discount rate.
-
-    Returns
-    -------
-    None.
-
-    """
-    # given an age, get all the ages between it and 100 (the final age of our life table)
-    ages = list(range(age, 101))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables_earn[(lifetables_earn["country"] == country)
-                        & (lifetables_earn["age"].isin(ages))]
-    # set the initial value of the numerator in Briggs et al. equation to 0.
-    numerator = 0
-    # for all the ages of interest
-    for i in ages:
-        # get the value of L, person-years lived
-        L = df.loc[df["age"] == i, "L"].values[0]
-        # get the value of annual earnings
-        annual_earnings = df.loc[df["age"] == i, "annual_earnings"].values[0]
-        # get the difference between that age and the original age
-        age_diff = i - age
-        # calculate the discount quantitiy
-        discount = (1 + discount_rate)**(-1*(age_diff))
-        # multiply L, Q, and discount to generate a discounted paid work losss value
-        discounted_earnings = L*annual_earnings*discount
-        # add this value to the numerator to get the sum total by the end
-        numerator = numerator + discounted_earnings
-    # extract l, the number of survivors, to fill in the denominator.
-    denominator = df.loc[df["age"] == age, "l"].values[0]
-    # calculate dpaid work loss
-    # Equation 3 in the text
-    paid_work_loss = numerator/denominator
-    # add the dpaid work loss value to the lifetable.
-    lifetables_earn.loc[(lifetables_earn["country"] == country)
-                       & (lifetables_earn["age"] == age), "paid_work_loss"] = paid_work_loss
-
-# for all ages and for all countries, calculate the paid earnings loss from mortality.
-for age in range(0, 101):
-    for c in lifetables_earn.country.unique():
-        paidwork_loss_mortality(c, age, 0.03)
-        
-age_specific_df = pd.DataFrame(columns = ["country", "first_age", "last_age", "fatal_paid_loss"])
-
-def fatal_costs_age_specific(country, first_age, last_age):
-    global age_specific_df
-    """
-    Calculates population-weighted paid work costs from mortality for our age buckets.
-
-    Parameters
-    ----------
-    country : str
-        The country of interest.
-    first_age : int
-        The starting age of the age bucket. For the age bucket 0-14, use 0. For
-        the age bucket 15-24, use 15, etc.
-    last_age : int
-        The end age of the age bucket. For the age bucket 0-14, use 14. For the
-        age bucket 15-24, use 24 etc.
-
-    Returns
-    -------
-    age_specific_df: data frame
-        A data frame with three columns--country, age, and fatal_paid_loss. The first
-        two are self-explanatory, the latter is the population-weighted paid work loss
-        for death, which relies on data from the lifetables.
-    """
-    # given an age, generate all ages in the age bucket
-    ages = list(range(first_age, last_age+1))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables_earn[(lifetables_earn["country"] == country)
-                        & (lifetables_earn["age"].isin(ages))]
-    # calculate the population-weighted fatal paid work loss
-    weighted_loss = np.average(df["paid_work_loss"], weights=df["l"])
-    #create a dictionary that includes the column names of the target dataframe and 
-    #the values to fill those columns
-    d = {age_specific_df.columns[0]: country, age_specific_df.columns[1]: first_age,
-         age_specific_df.columns[2]: last_age, age_specific_df.columns[3]: weighted_loss}
-    #add those new values to the data frame
-    age_specific_df = pd.concat([age_specific_df, pd.DataFrame(d, index = [0])])
-    return age_specific_df
-
-#create a dictionary of the first and last ages of the buckets to use in the function.
-age_buckets_dict = {0:14, 15:24, 25:34, 35:44, 45:54, 55:64, 65:74, 75:100}
-
-#calculate weighted fatal paid work losss for the age buckets for each country.
-for c in lifetables_earn.country.unique():
-    for key, value in age_buckets_dict.items():
-        fatal_costs_age_specific(country = c, first_age = key, last_age = value)
-
-#sort the resulting data frame by country and age.      
-age_specific_df = age_specific_df.sort_values(["country", "first_age"]).reset_index(drop = True)
-
-# load in COVerAGE data with filled in missing quarters
-coverage = pd.read_excel("../input/COVerAGE_death_age_structures.xlsx",
-                         sheet_name = "quarterly")
-
-coverage = coverage[coverage["country"] != "Djibouti"]
-
-"""
-We use the proportions of deaths in that file to calculate the paid work loss per
-fatal case, using the age-specific paid work loss from age_specific_df.
-"""
-
-#we keep all the rows of data (days) but only keep the important columns.
-fatal_df = coverage.loc[:, "country": "prop_75"]
-#create a date variable that combines the year and quarter.
-fatal_df['yyyy_qq'] = fatal_df["year"].astype(str) + "_Q" + fatal_df["quarter"].astype(str)
-
-#because we want to produce qalys for each age group, we replace "prop" with "qaly"
-#to allow for this
-fatal_df.columns = fatal_df.columns.str.replace("prop_", "paid_work_loss_")
-
-#drop irrelevant columns
-fatal_df = fatal_df.drop(columns = ["quarter", "originally", "data_source", "year"])
-
-#make sure the date in the coverage data aligns with the qaly dataframe
-coverage['yyyy_qq'] = coverage["year"].astype(str) + "_Q" + coverage["quarter"].astype(str)
-
-#for a given country-month and age, use the proportion of deaths in that age
-#and the paid work loss loss from mortality for that age to calculate the average fatal
-#paid work loss.  
-for country in fatal_df.country.unique():
-    for quarter in fatal_df.yyyy_qq.unique():
-        for key in age_buckets_dict:
-            try:
-                fatal_df.loc[(fatal_df["country"] == country) & (fatal_df["yyyy_qq"] == quarter),
-                             "paid_work_loss_"+str(key)] = coverage.loc[(coverage["country"] == country)
-                             & (coverage["yyyy_qq"] == quarter), "prop_"+str(key)].values[0]*age_specific_df.loc[
-                             (age_specific_df["country"] == country) & (age_specific_df["first_age"] == key), 
-                             "fatal_paid_loss"].values[0]
-                pass
-            except:
-                continue
-         
-fatal_df["fatal_paid_work_loss"] = fatal_df.filter(regex = "^paid_work_loss_").sum(axis = 1)
-
-paid_losses = fatal_df[["country", "yyyy_qq", "fatal_paid_work_loss"]]
-paid_losses = paid_losses.merge(paid_disability[["country", "yyyy_qq", "nonfatal_paid_work_loss",
-                                            "asymp_cost", "mild_cost", "severe_cost",
-                                            "critical_cost"]], on = ["country", "yyyy_qq"],
-                                how = "outer")
-
 # %% unpaid work loss due to disability
 
 #from Di Fusco et al. 2022, we take the working time lost per manifestation
@@ -649,7 +363,7 @@ udl_df = udl_df.replace(country_dict)
 udl_df = udl_df[udl_df.country.isin(ihme_q_cd.country.unique())]
 
 # load in the time use data
-time_use = pd.read_excel("../output/time_use_processed_ihme.xlsx")
+time_use = read_output("../output/time_use_processed_ihme.xlsx")
 
 # calculate unpaid work time in terms of hours per day
 unpaid_time = time_use[["country", "unpaid work time"]]
@@ -683,7 +397,33 @@ unpaid_disability["nonfatal_unpaid_work_loss"] = ((unpaid_disability["P_asymp"]*
                               + (unpaid_disability["P_severe"]*unpaid_disability["severe_cost"])
                               + (unpaid_disability["P_critical"]*unpaid_disability["critical_cost"]))
 
-# %% unpaid work loss due to death
+# %% paid and unpaid work loss due to death
+
+#load in 2019 lifetables
+lifetablesraw = pd.read_excel("../input/WPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXES.xlsx",
+              sheet_name = "Estimates 1986-2021", header = 16)
+
+#change the column name of the country variable to an easily usable title
+lifetables = lifetablesraw.rename(columns = {"Region, subregion, country or area *":
+                                          "country", "Year": "year", "Age (x)": "age",
+                                          "Number of person-years lived L(x,n)": "L",
+                                          "Number of survivors l(x)": "l"})
+
+lifetables = lifetables[["country", "year", "age", "L", "l"]]
+#make sure the year and age variables are interepreted as numeric variables.
+#non-convertible entries are coerced to na.
+lifetables["year"] = pd.to_numeric(lifetables["year"], errors = "coerce")
+lifetables["age"] =  pd.to_numeric(lifetables["age"],  errors = "coerce")
+daily_earn["age"] =  pd.to_numeric(daily_earn["age"],  errors = "coerce")
+lifetables_earn = lifetables[(lifetables["year"] == 2019)]
+lifetables_earn = lifetables_earn.replace(country_dict)
+
+#add earnings to lifetable
+lifetables_earn = lifetables_earn.merge(daily_earn[["country", "age", "daily_earnings_2019USD"]],
+                                   on = ["country", "age"], how = "right")
+
+lifetables_earn["annual_earnings"] = lifetables_earn["daily_earnings_2019USD"]*365.25
+lifetables_earn = lifetables_earn[lifetables_earn["country"] != "Djibouti"]
 
 # calculate the yearly hours of unpaid work
 unpaid_df["yearly_hours"] = unpaid_df["hours"]*365.25
@@ -702,114 +442,30 @@ lifetables_unpaid2 = lifetables_unpaid2.merge(unpaid_df[["country", "annual_unpa
 lifetables_unpaid2.loc[lifetables_unpaid2["age"] < 15, "annual_unpaid_value"] = 0
 lifetables_unpaid2 = lifetables_unpaid2[lifetables_unpaid2["country"] != "Djibouti"]
 
-# calculate unpaid work loss from mortality
-def unpaidwork_loss_mortality(country, age, discount_rate):
-    """
-    Calculates the unpaid work loss from mortality.
-
-    Parameters
-    ----------
-    country : string
-        A string containing the country of interest.
-    age : int
-        An integer containing the age of interest.
-    discount_rate : float
-        A float (i.e., decimal) that equals the annual discount rate.
-
-    Returns
-    -------
-    None.
-
-    """
-    # given an age, get all the ages between it and 100 (the final age of our life table)
-    ages = list(range(age, 101))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables_unpaid2[(lifetables_unpaid2["country"] == country)
-                        & (lifetables_unpaid2["age"].isin(ages))]
-    # set the initial value of the numerator in Briggs et al. equation to 0.
-    numerator = 0
-    # for all the ages of interest
-    for i in ages:
-        # get the value of L, person-years lived
-        L = df.loc[df["age"] == i, "L"].values[0]
-        # get the value of annual earnings
-        annual_earnings = df.loc[df["age"] == i, "annual_unpaid_value"].values[0]
-        # get the difference between that age and the original age
-        age_diff = i - age
-        # calculate the discount quantitiy
-        discount = (1 + discount_rate)**(-1*(age_diff))
-        # multiply L, Q, and discount to generate a discounted unpaid work losss value
-        discounted_earnings = L*annual_earnings*discount
-        # add this value to the numerator to get the sum total by the end
-        numerator = numerator + discounted_earnings
-    # extract l, the number of survivors, to fill in the denominator.
-    denominator = df.loc[df["age"] == age, "l"].values[0]
-    # calculate dunpaid work loss
-    # Equation 3 in the text
-    unpaid_work_loss = numerator/denominator
-    # add the dunpaid work loss value to the lifetable.
-    lifetables_unpaid2.loc[(lifetables_unpaid2["country"] == country)
-                       & (lifetables_unpaid2["age"] == age), "unpaid_work_loss"] = unpaid_work_loss
-
-# for all ages and for all countries, calculate the unpaid earnings loss from mortality.
-for age in range(0, 101):
-    for c in lifetables_unpaid2.country.unique():
-        unpaidwork_loss_mortality(c, age, 0.03)
-        
-# create an empty data frame
-age_specific_df = pd.DataFrame(columns = ["country", "first_age", "last_age", "fatal_unpaid_loss"])
-
-# calculate population-weighted unpaid work costs in age groups
-def fatal_costs_age_specific(country, first_age, last_age):
-    global age_specific_df
-    """
-    Calculates population-weighted unpaid work costs from mortality for our age buckets.
-
-    Parameters
-    ----------
-    country : str
-        The country of interest.
-    first_age : int
-        The starting age of the age bucket. For the age bucket 0-14, use 0. For
-        the age bucket 15-24, use 15, etc.
-    last_age : int
-        The end age of the age bucket. For the age bucket 0-14, use 14. For the
-        age bucket 15-24, use 24 etc.
-
-    Returns
-    -------
-    age_specific_df: data frame
-        A data frame with three columns--country, age, and fatal_unpaid_loss. The first
-        two are self-explanatory, the latter is the population-weighted unpaid work loss
-        for death, which relies on data from the lifetables.
-    """
-    # given an age, generate all ages in the age bucket
-    ages = list(range(first_age, last_age+1))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables_unpaid2[(lifetables_unpaid2["country"] == country)
-                        & (lifetables_unpaid2["age"].isin(ages))]
-    # calculate the population-weighted fatal unpaid work loss
-    weighted_loss = np.average(df["unpaid_work_loss"], weights=df["l"])
-    #create a dictionary that includes the column names of the target dataframe and 
-    #the values to fill those columns
-    d = {age_specific_df.columns[0]: country, age_specific_df.columns[1]: first_age,
-         age_specific_df.columns[2]: last_age, age_specific_df.columns[3]: weighted_loss}
-    #add those new values to the data frame
-    age_specific_df = pd.concat([age_specific_df, pd.DataFrame(d, index = [0])])
-    return age_specific_df
-
-#create a dictionary of the first and last ages of the buckets to use in the function.
-age_buckets_dict = {0:14, 15:24, 25:34, 35:44, 45:54, 55:64, 65:74, 75:100}
-
-#calculate weighted fatal unpaid work losss for the age buckets for each country.
-for c in lifetables_unpaid2.country.unique():
-    for key, value in age_buckets_dict.items():
-        fatal_costs_age_specific(country = c, first_age = key, last_age = value)
-
-#sort the resulting data frame by country and age.      
-age_specific_df = age_specific_df.sort_values(["country", "first_age"]).reset_index(drop = True)
+# the discount rate for the paid and unpaid work losses from mortality, keyed by the suffix of their columns
+fatal_discount_rates = {"": 0.03}
+
+# reshape the person-years lived and the survivors of the 2019 life tables of the countries with earnings or unpaid 
+# work data, and the annual earnings and value of unpaid work, to (country x age) arrays
+lifetables_fatal = lifetables[(lifetables["year"] == 2019)]
+lifetables_fatal = lifetables_fatal.replace(country_dict)
+lifetables_fatal = lifetables_fatal[lifetables_fatal["country"].isin(set(lifetables_earn["country"]) | 
+                                                                      set(lifetables_unpaid2["country"]))]
+L_fatal = life_table_matrix(lifetables_fatal, "L", age_col = "age")
+l_fatal = life_table_matrix(lifetables_fatal, "l", age_col = "age")
+earnings = life_table_matrix(lifetables_earn, "annual_earnings", age_col = "age")
+unpaid_value = life_table_matrix(lifetables_unpaid2, "annual_unpaid_value", age_col = "age")
+
+# for all ages and for all countries, calculate the paid earnings loss and the unpaid work loss from mortality, and 
+# their population-weighted averages in our age buckets, in one call (see life_tables.py). each loss is calculated 
+# for the countries with its values.
+fatal_age_losses, fatal_bucket_losses = fatal_losses({"fatal_paid_loss": earnings, "fatal_unpaid_loss": unpaid_value}, 
+                                                     L_fatal, l_fatal, fatal_discount_rates)
+
+# %% paid loss due to death
+
+# the fatal paid work loss for each country and age bucket, sorted by country and age.
+age_specific_df = fatal_bucket_losses["fatal_paid_loss"]
 
 # load in COVerAGE data with filled in missing quarters
 coverage = pd.read_excel("../input/COVerAGE_death_age_structures.xlsx",
@@ -818,44 +474,45 @@ coverage = pd.read_excel("../input/COVerAGE_death_age_structures.xlsx",
 coverage = coverage[coverage["country"] != "Djibouti"]
 
 """
-We use the proportions of deaths in that file to calculate the unpaid work loss per
-fatal case, using the age-specific unpaid work loss from age_specific_df.
+We use the proportions of deaths in that file to calculate the paid work loss per
+fatal case, using the age-specific paid work loss from age_specific_df.
 """
 
-#we keep all the rows of data (days) but only keep the important columns.
-fatal_df = coverage.loc[:, "country": "prop_75"]
-#create a date variable that combines the year and quarter.
-fatal_df['yyyy_qq'] = fatal_df["year"].astype(str) + "_Q" + fatal_df["quarter"].astype(str)
+#make sure the date in the coverage data aligns with the age bucket losses
+coverage['yyyy_qq'] = coverage["year"].astype(str) + "_Q" + coverage["quarter"].astype(str)
+
+#for a given country-quarter, use the proportion of deaths in each age bucket and the paid work loss from mortality
+#in that age bucket to calculate the average fatal paid work loss (see life_tables.py).
+fatal_df = age_structure_losses(coverage, age_specific_df, "fatal_paid_loss", "paid_work_loss_", "fatal_paid_work_loss")
+
+paid_losses = fatal_df[["country", "yyyy_qq", "fatal_paid_work_loss"]]
+paid_losses = paid_losses.merge(paid_disability[["country", "yyyy_qq", "nonfatal_paid_work_loss",
+                                            "asymp_cost", "mild_cost", "severe_cost",
+                                            "critical_cost"]], on = ["country", "yyyy_qq"],
+                                how = "outer")
+
+# %% unpaid work loss due to death
+
+# the fatal unpaid work loss for each country and age bucket, sorted by country and age.
+age_specific_df = fatal_bucket_losses["fatal_unpaid_loss"]
 
-#because we want to produce qalys for each age group, we replace "prop" with "qaly"
-#to allow for this
-fatal_df.columns = fatal_df.columns.str.replace("prop_", "unpaid_work_loss_")
+# load in COVerAGE data with filled in missing quarters
+coverage = pd.read_excel("../input/COVerAGE_death_age_structures.xlsx",
+                         sheet_name = "quarterly")
 
-#drop irrelevant columns
-fatal_df = fatal_df.drop(columns = ["quarter", "originally", "data_source", "year"])
+coverage = coverage[coverage["country"] != "Djibouti"]
+
+"""
+We use the proportions of deaths in that file to calculate the unpaid work loss per
+fatal case, using the age-specific unpaid work loss from age_specific_df.
+"""
 
-#make sure the date in the coverage data aligns with the qaly dataframe
+#make sure the date in the coverage data aligns with the age bucket losses
 coverage['yyyy_qq'] = coverage["year"].astype(str) + "_Q" + coverage["quarter"].astype(str)
 
-#for a given country-month and age, use the proportion of deaths in that age
-#and the unpaid work loss loss from mortality for that age to calculate the average fatal
-#unpaid work loss.  
-for country in fatal_df.country.unique():
-    for quarter in fatal_df.yyyy_qq.unique():
-        for key in age_buckets_dict:
-            try:
-                fatal_df.loc[(fatal_df["country"] == country) & (fatal_df["yyyy_qq"] == quarter),
-                             "unpaid_work_loss_"+str(key)] = coverage.loc[(coverage["country"] == country)
-                             & (coverage["yyyy_qq"] == quarter), "prop_"+str(key)].values[0]*age_specific_df.loc[
-                             (age_specific_df["country"] == country) & (age_specific_df["first_age"] == key), 
-                             "fatal_unpaid_loss"].values[0]
-                pass
-            except:
-                continue
-         
-            
-# calculate the total unpaid work loss
-fatal_df["fatal_unpaid_work_loss"] = fatal_df.filter(regex = "^unpaid_work_loss_").sum(axis = 1)
+#for a given country-quarter, use the proportion of deaths in each age bucket and the unpaid work loss from mortality
+#in that age bucket to calculate the average fatal unpaid work loss (see life_tables.py).
+fatal_df = age_structure_losses(coverage, age_specific_df, "fatal_unpaid_loss", "unpaid_work_loss_", "fatal_unpaid_work_loss")
 
 # combine fatal and nonfatal unpaid work losses into a single data frame
 unpaid_losses = fatal_df[["country", "yyyy_qq", "fatal_unpaid_work_loss"]]
@@ -879,4 +536,4 @@ indirect_costs["indirect_cost_fatal"] = indirect_costs["fatal_paid_work_loss"] +
 indirect_costs = indirect_costs[["country", "yyyy_qq", "indirect_cost_nonfatal", "indirect_cost_fatal", "nonfatal_paid_work_loss", "nonfatal_unpaid_work_loss", "fatal_paid_work_loss", "fatal_unpaid_work_loss"]]
 
 # save to Excel
-indirect_costs.to_excel("../output/indirect_costs_jk.xlsx", index = False)
+write_output(indirect_costs, "../output/indirect_costs_jk.xlsx")
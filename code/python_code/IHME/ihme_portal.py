@@ -12,18 +12,25 @@ inputs:
     - WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx (raw file)
     - master_country_list.xlsx (processed file; created in Excel)
     - Vaccine-coverage-by-manufacturer-quarterly-countries.csv (raw file)
-    - Historical-and-Projected-Covid-19-data.csv (raw file)
+    - Historical-and-Projected-Covid-19-data.csv (raw file; read in ihme_data.py)
     - owid_raw_countries_w_pop_gt_1M.dta (processed file; created in owid_raw_countries_w_pop_gt_1M.do)
     - gdp_gap_ihme.xlsx (processed file; created in gdp_formatting.py)
     
 outputs:
     - ihme_quarterly_regbase_boosters.xlsx
+    - proxy_adjustment_factors.xlsx
 
 """
 
 # %% load in libraries
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
+from ihme_data import load_ihme_daily, collapse_ihme_quarterly
+from regbase import apply_regbase_schema
 
 # %% format 2020, 2021, and 2022 populations (national_population_2020_2021_202.do)
 
@@ -176,158 +183,18 @@ ihme_q_vax = ihme_q_vax.drop(columns = ["location_id"])
 ihme_q_vax = ihme_q_vax.merge(popdata, on = ["country", "year"], how = "left")
 ihme_q_vax = ihme_q_vax[(ihme_q_vax["tot_pop"] >= 1000000) | (ihme_q_vax["country"] == "Macao")]
 
-# load in the IHME COVID data
-ihmeraw = pd.read_csv("../input/Historical-and-Projected-Covid-19-data.csv")
-ihme = ihmeraw[ihmeraw["version_name"] == "reference"]
-
-# create a list of columns that we want to keep
-keep_cols = ["date", "location_name", "inf_mean", "inf_cuml_mean", "inf_cuml_upper", "inf_cuml_lower",
-             "inf_upper", "inf_lower", "cumulative_deaths", "cumulative_deaths_unscaled",
-             "daily_deaths", "daily_deaths_unscaled", "infection_fatality", "cumulative_all_fully_vaccinated",
-             "cumulative_all_effectively_vaccinated"]
-
-# reduce the IHME COVID data to include only these columns
-ihme = ihme[keep_cols]
-
-# rename countries in the IHME COVID data
-ihme = ihme.replace(replace_dict)
-
-# rename the location_name column 
-ihme = ihme.rename(columns = {"location_name": "country"})
-
-# calculate the number of countries in the data
-n_ihme_countries = len(ihme.country.unique())
-
-# create a year field in the IHME COVID data
-ihme["year"] =  pd.to_datetime(ihme['date']).dt.year
-
-# create a quarter field
-ihme["quarter"] =  pd.to_datetime(ihme['date']).dt.quarter
-
-# sort the data by country and date
-ihme = ihme.sort_values(["country", "year", "quarter", "date"])
-
-# remove data after Q2 2022
-ihme = ihme[ihme["date"] < "2022-07-01"]
-
-# add population data to the IHME COVID data
-ihme_df = ihme.merge(popdata, on = ["country", "year"], how = "left")
-
-# keep countries that are in the vaccination data 
-ihme_df = ihme_df[ihme_df.country.isin(ihme_countries_1m)]
-n_ihme_pop_countries = len(ihme_df.country.unique())
-
-# and make sure that all countries have at least 1M population or are Macao
-ihme_1m = ihme_df[(ihme_df["tot_pop"] >= 1000000) | (ihme_df["country"] == "Macao")]
+# load in the cleaned daily IHME COVID data for the countries in the vaccination data (see ihme_data.py): the
+# reference scenario to the end of Q2 2022, for countries with at least 1M people or Macao, with the first infections
+# and deaths records set to the cumulative values. IHME's data for China include Hong Kong and Macao, so their values
+# are subtracted from China's.
+ihme_1m = load_ihme_daily(popdata, countries = ihme_countries_1m, name = "ihme_daily_portal")
 n_ihme_1m_countries = len(ihme_1m.country.unique())
 
-#ihme_1m.to_excel("../output/ihme_temp.xlsx", index = False)
-
-# create a data frame that only contains entries with non-empty deaths records
-death_df = ihme_1m[ihme_1m['daily_deaths'].notna()]
-
-# create a data frame that only contains entries with non-empty infections records
-inf_df = ihme_1m[ihme_1m['inf_mean'].notna()]
-
-# for countries in the IHME COVID data
-for c in ihme_1m.country.unique():
-    # find the date of first death record
-    first_deaths = death_df.loc[death_df["country"] == c, "date"].min()
-    # find the date of first infectoin record
-    first_infs = inf_df.loc[inf_df["country"] == c, "date"].min()
-    # make sure that new deaths record on the first day equals the cumulative death record on that day.
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths"]
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths_unscaled"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths_unscaled"]
-    # make sure that the new infections record on the first day equals the cumulative infections record on that day.
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_mean"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_mean"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_lower"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_lower"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_upper"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_upper"]
-
-# create a data frame that only contains epidemimological columns
-numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
-epi_cols = list(set(ihme_1m.select_dtypes(include=numerics).columns) - set(["year", "quarter", "yyyy_qq", "tot_pop",
-                                                                            "infection_fatality"]))
-
-# create a data frame that only contains Macao and Hong Kong data
-mc_hk = ihme_1m[ihme_1m["country"].isin(["Macao", "Hong Kong"])]
-# for epidemiological columns,sum the Macao and Hong Kong values for each date
-mc_hk = mc_hk.groupby("date")[epi_cols].sum()
-# create a data frame that contains only China's data
-china =  ihme_1m[ihme_1m["country"] == "China"].set_index("date")
-# only retain the epidemiological columns in the China data
-china = china[epi_cols]
-# subtract the values in Hong Kong/Macao from the China values
-china_update = china.subtract(mc_hk, level=0)
-china_update = china_update.reset_index()
-# add a field that notes the updated China data is for China
-china_update["country"] = "China"
-# add the rest of the IHME data for China to the updated China data
-china_update = china_update.merge(ihme_df, on = ["country", "date"], how = "left")
-# remove the old China data from the IHME data
-china_update = china_update.loc[:,~china_update.columns.str.contains('_y')] 
-china_update.columns = china_update.columns.str.replace(r'_x$', '')
-
-# add the China's updated data to the IHME data
-ihme_1m = ihme_1m[ihme_1m["country"] != "China"]
-ihme_1m = pd.concat([ihme_1m, china_update], axis = 0)
-
 #ihme_1m.to_excel("../output/ihme_cases_deaths_vax_ifr_countries_w_pop_gt_1M.xlsx", index = False)
 
-# create a year-quarter field
-ihme_1m["yyyy_qq"] = ihme_1m["year"].astype(str) + "_Q" + ihme_1m["quarter"].astype(str)
-
-# retain columns that are useful
-ihme_q = ihme_1m[["date", "country", "year", "quarter", "yyyy_qq", "inf_cuml_mean", "inf_mean", "inf_upper", "inf_lower",
-                  "cumulative_deaths", "daily_deaths", "cumulative_deaths_unscaled",
-                  "daily_deaths_unscaled", "tot_pop"]]
-
-# make sure the date column is being interpreted as a datetime object
-ihme_q["date"] =  pd.to_datetime(ihme_q['date'])
-# sort the data by country and date
-ihme_q = ihme_q.sort_values(["country", "year", "quarter", "date"])
-
-# add a month column to the death data frame
-death_df["month"] =  pd.to_datetime(death_df['date']).dt.month
-# for Kazakhstan, Kyrgyzstan, and Uzbekistan, make sure their last quarter with some date 
-# has complete data by extrapolating to the end of the quarter
-kazakh_extrap = death_df.loc[(death_df["country"] == "Kazakhstan") & (death_df["year"] == 2021) &
-                             (death_df["month"] == 9), "daily_deaths"].mean()
-kazakh_extrap_unsc = death_df.loc[(death_df["country"] == "Kazakhstan") & (death_df["year"] == 2021) &
-                             (death_df["month"] == 9), "daily_deaths_unscaled"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kazakhstan") & (ihme_q["year"] == 2021) &
-                             (ihme_q["quarter"] == 3) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kazakh_extrap
-ihme_q.loc[(ihme_q["country"] == "Kazakhstan") & (ihme_q["year"] == 2021) &
-                             (ihme_q["quarter"] == 3) & (ihme_q["daily_deaths_unscaled"].isna()),
-                             "daily_deaths_unscaled"] = kazakh_extrap_unsc
-
-kyrgyz_extrap = death_df.loc[(death_df["country"] == "Kyrgyzstan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 3), "daily_deaths"].mean()
-kyrgyz_extrap_unsc = death_df.loc[(death_df["country"] == "Kyrgyzstan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 3), "daily_deaths_unscaled"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kyrgyzstan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kyrgyz_extrap
-ihme_q.loc[(ihme_q["country"] == "Kyrgyzstan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths_unscaled"].isna()),
-                             "daily_deaths_unscaled"] = kyrgyz_extrap_unsc
-
-uzbek_extrap = death_df.loc[(death_df["country"] == "Uzbekistan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 2), "daily_deaths"].mean()
-uzbek_extrap_unsc = death_df.loc[(death_df["country"] == "Uzbekistan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 2), "daily_deaths_unscaled"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Uzbekistan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = uzbek_extrap
-ihme_q.loc[(ihme_q["country"] == "Uzbekistan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths_unscaled"].isna()),
-                             "daily_deaths_unscaled"] = uzbek_extrap_unsc
-
-# collapse the IHME COVID data by country and quarter
-ihme_q_cd = ihme_q.groupby(["country", "year", "quarter", "yyyy_qq", "tot_pop"])["inf_mean", "inf_lower", "inf_upper", "daily_deaths", "daily_deaths_unscaled"].sum().reset_index()
+# collapse the IHME COVID data by country and quarter. for Kazakhstan, Kyrgyzstan, and Uzbekistan, make sure their
+# last quarter with some data has complete data by extrapolating to the end of the quarter
+ihme_q_cd = collapse_ihme_quarterly(ihme_1m, ["inf_mean", "inf_lower", "inf_upper", "daily_deaths", "daily_deaths_unscaled"])
 
 # check that every entry has 10 quarters of infections and deaths data
 ihme_cd_quarters = ihme_q_cd.country.value_counts()
@@ -392,170 +259,99 @@ vax_extrap = vax_q.copy()
 # creat an empty field for the rule we apply to it
 vax_extrap["rule"] = np.nan
 
+# the last quarter of vaccine data. countries with no doses in it (and maybe the quarter before) are extrapolated.
+last_vax_quarter = "2022_Q2"
+
+# the extrapolation rules, in the order they are tried: the rule, the number of quarters it fills (1 if the country
+# has doses in the quarter before the last, and 2 otherwise), whether it applies, and where the growth rate of each
+# filled quarter comes from. change(source, lag) is the change in people vaccinated in the quarter lag quarters
+# before the last, in the IHME ("ihme") or OWID ("owid") data. a filled quarter's doses are the doses of the quarter
+# before it times the growth in the change in people vaccinated, i.e. change(source, lag)/change(source, lag + 1) for
+# the filled quarter (lag = 0 for the last) from the data source, with the lag moved back by the "back" quarters.
+extrapolation_rules = [
+    # IHME people vaccinated still grow in the last quarter
+    ("issue 3a (Rule 1)", 1, lambda change, backstep: change("ihme", 0) > 0, [("ihme", 0)]),
+    # Bosnia and Herzegovina: the IHME growth of the quarter before
+    ("issue 4 (back-stepped Rule 3a)", 1, lambda change, backstep: backstep, [("ihme", 1)]),
+    ("issue 2a (Rule 3a)", 1, lambda change, backstep: True, [("owid", 0)]),
+    # IHME people vaccinated grow in both quarters
+    ("issue 3b (Rule 2)", 2, lambda change, backstep: (change("ihme", 0) > 0) & (change("ihme", 1) > 0),
+     [("ihme", 0), ("ihme", 0)]),
+    # IHME people vaccinated grow in the first quarter, but not the last
+    ("issue 3c (hybrid of Rule 2 and Rule 3a)", 2,
+     lambda change, backstep: (change("ihme", 1) > 0) & (change("ihme", 0) <= 0), [("ihme", 0), ("owid", 0)]),
+    ("issue 2b (Rule 3b)", 2, lambda change, backstep: True, [("owid", 0), ("owid", 0)])]
+
 # create a function that extrapolates vaccine data in 2022
-def extrapolate_growth_to_IHME(country):
+def extrapolate_growth_to_IHME(vax_extrap, last_quarter = last_vax_quarter, backstep_countries = ["Bosnia and Herzegovina"]):
     """
-    Some countries don't have 2022 dose data. For these countries we extrapolate dose data using growth rates in our other vaccination data sources. 
+    Some countries don't have dose data for the last quarter(s). For these countries we extrapolate dose data using
+    growth rates in our other vaccination data sources, by the first of extrapolation_rules that applies. The rules
+    are evaluated for all countries at once, on country by quarter arrays.
 
     Parameters
     ----------
-    country : string
-        A string containing the name of the country to extrapolate vaccine data for.
+    vax_extrap : data frame
+        A data frame that contains all vaccine data (Total_doses, and people vaccinated from IHME,
+        cumulative_all_fully_vaccinated, and from OWID, people_vaccinated), by country and quarter (yyyy_qq).
+    last_quarter : string, optional
+        The last quarter of data. The default is last_vax_quarter.
+    backstep_countries : list, optional
+        The countries whose growth rate is taken from the quarter before (Rule 3a back-stepped). The default is
+        ["Bosnia and Herzegovina"].
 
     Returns
     -------
     vax_extrap : data frame
-        A data frame that contains all vaccine data, including extrapolated data.
+        A data frame that contains all vaccine data, including extrapolated data, with the rule applied to each
+        extrapolated quarter in "rule".
 
     """
-    # if the dose data in the last quarter of data (2022_Q2) is greater than zero, do nothing
-    if vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "Total_doses"].values[0] > 0:
-        return vax_extrap
-    # but if the dose data is zero in 2022_Q2 and greater than zero in 2022_Q1,
-    elif ((vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "Total_doses"].values[0] == 0) &
-        (vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"), "Total_doses"].values[0] > 0)):
-        # find the value of people vaccinated in 2021_Q3 from IHME
-        ds1_q3_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q3"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q4 from IHME
-        ds1_q4_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q4"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q1 from IHME
-        ds1_q1_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q2 from IHME
-        ds1_q2_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q3 from OWID
-        owid_q3_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q3"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q4 from OWID
-        owid_q4_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q4"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q1 from OWID
-        owid_q1_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q2 from OWID
-        owid_q2_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"),
-                              "people_vaccinated"].values[0]
-        # and if the number of people vaccinated in IHME is bigger in 2022_Q2 than 2022_Q1,
-        if ds1_q2_22 > ds1_q1_22:
-            # using the IHME data, calculate the difference in people vaccinated between 2022_Q2 and 2022_Q1
-            A = ds1_q2_22 - ds1_q1_22
-            # using the IHME data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            B = ds1_q1_22 - ds1_q4_21
-            # define the rule
-            rule = "issue 3a (Rule 1)"
-        # or if the country is Bosnia and Herzegovina
-        elif (country == "Bosnia and Herzegovina"):
-            # using the IHME data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            A = ds1_q1_22 - ds1_q4_21
-            # using the IHME data, calculate the difference in people vaccinated between 2021_Q4 and 2021_Q3
-            B = ds1_q4_21 - ds1_q3_21
-            # define the rule
-            rule = "issue 4 (back-stepped Rule 3a)"
-        # but otherwise:
-        else:
-            # using the OWID data, calculate the difference in people vaccinated between 2022_Q2 and 2022_Q1
-            A = owid_q2_22 - owid_q1_22
-            # using the OWID data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            B = owid_q1_22 - owid_q4_21
-            # define the rule
-            rule = "issue 2a (Rule 3a)"
-        # calculate the growth rate
-        Growth = 1 + ((A-B)/B)     
-        # for the country, calculate the 2022_Q2 doses using the 2021_Q1 doses and the growth rate
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "Total_doses"] = (
-            (vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),"Total_doses"].values[0])*Growth)
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "rule"] = rule
-        return vax_extrap
-    # but if the data in 2022_Q2 and 2022_Q1 are both zero:
-    elif ((vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "Total_doses"].values[0] == 0) &
-        (vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"), "Total_doses"].values[0] == 0)):
-        # find the value of people vaccinated in 2021_Q3 from IHME 
-        ds1_q3_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q3"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q4 from IHME
-        ds1_q4_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q4"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q1 from IHME
-        ds1_q1_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q2 from IHME
-        ds1_q2_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"),
-                              "cumulative_all_fully_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q3 from OWID
-        owid_q3_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q3"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2021_Q4 from OWID
-        owid_q4_21 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q4"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q1 from OWID
-        owid_q1_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),
-                              "people_vaccinated"].values[0]
-        # find the value of people vaccinated in 2022_Q2 from OWID
-        owid_q2_22 = vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"),
-                              "people_vaccinated"].values[0]
-        # if the number of people vaccinated is greater in 2022_Q2 than 2022_Q1 than 2021_Q4
-        if ds1_q2_22 > ds1_q1_22 > ds1_q4_21:
-            # using IHME data, calculate the difference in people vaccinatde between 2022_Q2 and 2022_Q1
-            A = ds1_q2_22 - ds1_q1_22
-            # using IHME data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            B = ds1_q1_22 - ds1_q4_21
-            # using IHME data, calculate the difference in people vaccinated between 2021_Q4 and 2021_Q3
-            C = ds1_q4_21 - ds1_q3_21
-            # calculate the growth rate for 2022_Q1
-            Growth_Q1 = 1 + ((B-C)/C)
-            # calculate the growth rate for 2022_Q2
-            Growth_Q2 = 1 + ((A-B)/B)
-            # create the rule
-            rule = "issue 3b (Rule 2)"
-        # but if the number of pople vaccinated in 2022_Q1 than in 2021_Q4 and 2022_Q2 is lower than 2022_Q1
-        elif (ds1_q1_22 > ds1_q4_21) & (ds1_q2_22 <= ds1_q1_22):
-            # using OWID data, calculate the difference in people vaccinatde between 2022_Q2 and 2022_Q1
-            A = owid_q2_22 - owid_q1_22
-            # using OWID data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            B_owid = owid_q1_22 - owid_q4_21
-            # using IHME data, calculate the difference in people vaccinated between 2022_Q1 and 2021_Q4
-            B_ihme = ds1_q1_22 - ds1_q4_21
-            # using IHME data, calculate the difference in people vaccinated between 2021_Q4 and 2021_Q3
-            C = ds1_q4_21 - ds1_q3_21
-            # calculate the growth rate for 2022_Q1 using IHME data
-            Growth_Q1 = 1 + ((B_ihme-C)/C)
-            # calculate the growth rate for 2022_Q2 using OWID data
-            Growth_Q2 = 1 + ((A-B_owid)/B_owid)
-            # create the rule
-            rule = "issue 3c (hybrid of Rule 2 and Rule 3a)"
-        # otherwise
-        else:
-            # using OWID data, calculate the difference in people vaccinatde between 2022_Q2 and 2022_Q1 
-            A = owid_q2_22 - owid_q1_22
-            # using OWID data, calculate the difference in people vaccinatde between 2022_Q1 and 2021_Q4
-            B = owid_q1_22 - owid_q4_21
-            # using OWID data, calculate the difference in people vaccinatde between 2021_Q4 and 2021_Q3
-            C = owid_q4_21 - owid_q3_21
-            # calculate the growth rate for 2022_Q1
-            Growth_Q1 = 1 + ((B-C)/C)
-            # calculate the growth rate for 2022_Q2
-            Growth_Q2 = 1 + ((A-B)/B)
-            # create the rule
-            rule = "issue 2b (Rule 3b)"
-        # for the country, extrapolate 2022_Q1 doses using 2021_Q4 doses and the 2022_Q1 growth rate
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"), "Total_doses"] = (
-            (vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2021_Q4"),"Total_doses"].values[0])*Growth_Q1)
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"), "rule"] = rule
-        # for the country, extrapolate 2022_Q2 doses using 2022_Q1 doses and the 2022_Q2 growth rate
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "Total_doses"] = (
-            (vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q1"),"Total_doses"].values[0])*Growth_Q2)
-        vax_extrap.loc[(vax_extrap["country"] == country) & (vax_extrap["yyyy_qq"] == "2022_Q2"), "rule"] = rule
-        return vax_extrap
+    vax_extrap = vax_extrap.copy()
+    # arrange the doses and people vaccinated by country (rows) and quarter (columns)
+    countries = pd.Index(vax_extrap["country"].unique())
+    quarters = pd.Index(sorted(vax_extrap["yyyy_qq"].unique()))
+    rows = countries.get_indexer(vax_extrap["country"])
+    cols = quarters.get_indexer(vax_extrap["yyyy_qq"])
+    def arrange(col, dtype = float):
+        values = np.full((len(countries), len(quarters)), np.nan, dtype = dtype)
+        values[rows, cols] = vax_extrap[col].to_numpy()
+        return values
+    doses = arrange("Total_doses")
+    rule = arrange("rule", dtype = object)
+    people = {"ihme": arrange("cumulative_all_fully_vaccinated"), "owid": arrange("people_vaccinated")}
+
+    t = quarters.get_loc(last_quarter)
+    def change(source, lag):
+        return people[source][:, t - lag] - people[source][:, t - lag - 1]
+    backstep = countries.isin(backstep_countries)
+
+    # the countries with no doses in the last quarter, with and without doses in the quarter before
+    to_fill = {1: (doses[:, t] == 0) & (doses[:, t - 1] > 0), 2: (doses[:, t] == 0) & (doses[:, t - 1] == 0)}
+    not_covered = ~(doses[:, t] > 0) & ~to_fill[1] & ~to_fill[2]
+    for name, n_filled, applies, growth_sources in extrapolation_rules:
+        applies = to_fill[n_filled] & applies(change, backstep)
+        to_fill[n_filled] = to_fill[n_filled] & ~applies
+        # fill the quarters from the first to the last
+        for lag, (source, back) in zip(range(n_filled - 1, -1, -1), growth_sources):
+            A = change(source, lag + back)
+            B = change(source, lag + back + 1)
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                growth = 1 + ((A-B)/B)
+            doses[applies, t - lag] = doses[applies, t - lag - 1]*growth[applies]
+            rule[applies, t - lag] = name
+
     # if none of the rules apply, print a string describing the fact that there is an error
-    else:
+    for country in countries[not_covered]:
         print(f"The case of {country} is not covered by your rules!")
-    
-# for every country in the vaccine data, perform the extrapolation function
-for c in vax_extrap.country.unique():
-    vax_extrap = extrapolate_growth_to_IHME(c)
+
+    # write the extrapolated doses and rules back to the data frame
+    vax_extrap["Total_doses"] = doses[rows, cols]
+    vax_extrap["rule"] = rule[rows, cols]
+    return vax_extrap
+
+# for every country in the vaccine data, perform the extrapolation
+vax_extrap = extrapolate_growth_to_IHME(vax_extrap)
 
 # keep only a small number of columns in the vaccine data
 vax_df = vax_extrap[['country', 'year', 'quarter', 'yyyy_qq', 'Total_doses', "rule"]]
@@ -586,22 +382,27 @@ extrap_brand_countries = brand_vax.loc[brand_vax["rule"].notna(), "country"].uni
 # create a smaller brand-specific data frame with those extrapolated countries
 extrap_brand_df = brand_vax[brand_vax["country"].isin(extrap_brand_countries)]
 
+# the last quarter of vaccine data, the quarter before it, and the quarter before that
+vax_quarters = sorted(brand_vax["yyyy_qq"].unique())
+last_index = vax_quarters.index(last_vax_quarter)
+base_q, prev_q, last_q = vax_quarters[last_index - 2:last_index + 1]
+# the rules that only fill the last quarter
+one_quarter_rules = [x[0] for x in extrapolation_rules if x[1] == 1]
+
 # distribute the proportion of brand-specific doses across the extrapolated total doses
 for country in extrap_brand_countries: 
-    if ((brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"),"rule"].values[0] == "issue 3a (Rule 1)") | 
-        (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"), "rule"].values[0] == "issue 4 (back-stepped Rule 3a)") |
-        (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"), "rule"].values[0] == "issue 2a (Rule 3a)")):
-        total_doses = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"),"Total_doses"].values[0]
+    if brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == last_q), "rule"].values[0] in one_quarter_rules:
+        total_doses = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == last_q),"Total_doses"].values[0]
         for brand in total_cols:
-            brand_prop = (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q1"), brand].values[0]/brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q1"),"Total_doses"].values[0])
-            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"), brand] = total_doses*brand_prop
+            brand_prop = (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == prev_q), brand].values[0]/brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == prev_q),"Total_doses"].values[0])
+            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == last_q), brand] = total_doses*brand_prop
     else:
-        total_doses_Q2 = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"),"Total_doses"].values[0]
-        total_doses_Q1 = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q1"),"Total_doses"].values[0]
+        total_doses_Q2 = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == last_q),"Total_doses"].values[0]
+        total_doses_Q1 = brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == prev_q),"Total_doses"].values[0]
         for brand in brand_cols:
-            brand_prop = (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2021_Q4"), brand].values[0]/brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2021_Q4"),"Total_doses"].values[0])
-            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q2"), brand] = total_doses_Q2*brand_prop
-            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == "2022_Q1"), brand] = total_doses_Q1*brand_prop
+            brand_prop = (brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == base_q), brand].values[0]/brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == base_q),"Total_doses"].values[0])
+            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == last_q), brand] = total_doses_Q2*brand_prop
+            brand_vax.loc[(brand_vax["country"] == country) & (brand_vax["yyyy_qq"] == prev_q), brand] = total_doses_Q1*brand_prop
 
 # ensure that the total of the brand-specific doses equals the total doses
 brand_vax.loc[:, "check_total"] = brand_vax.loc[:, total_cols].sum(axis= 1, min_count = 1)
@@ -650,7 +451,7 @@ quarterly_df["quarter"] = quarterly_df["yyyy_qq"].str[-1:].astype(int)
 # %% Make the quarterly regression file (make_ihme_quarterly_regbase.do)
 
 # load in the GDP data (produced in gdp_formatting.py)
-gdp_gap = pd.read_excel("../output/gdp_gap_ihme.xlsx")
+gdp_gap = read_output("../output/gdp_gap_ihme.xlsx")
 
 # create a year, quarter, and year-quarter field in the GDP data
 gdp_gap["year"] = gdp_gap["date"].str[:4]
@@ -739,14 +540,17 @@ q_reg_df = q_reg_df.merge(popdata, on = ["country", "year"], how = "left")
 q_reg_df['country_group'] = q_reg_df.groupby(['country'], sort = False).ngroup() + 1
 q_reg_df['time'] = q_reg_df.groupby(['yyyy_qq'], sort = False).ngroup() + 1   
 
+# the vaccine uptake variables
+uptake_vars = ["uptake", "uptake_pfizer", "uptake_moderna", "uptake_astrazeneca",
+               "uptake_other", "uptake_notpfz_notmod", "uptake_notpfz", "uptake_mrna", "uptake_notmrna",
+               "uptake_pfizer_primary", "uptake_moderna_primary", "uptake_astrazeneca_primary",
+               "uptake_other_primary", "uptake_pfizer_first_booster", "uptake_moderna_first_booster",
+               "uptake_astrazeneca_first_booster", "uptake_other_first_booster", "uptake_pfizer_second_booster",
+               "uptake_moderna_second_booster", "uptake_astrazeneca_second_booster",
+               "uptake_other_second_booster"]
+
 # for our vaccine variables
-for var in ["uptake", "uptake_pfizer", "uptake_moderna", "uptake_astrazeneca",
-          "uptake_other", "uptake_notpfz_notmod", "uptake_notpfz", "uptake_mrna", "uptake_notmrna",
-          "uptake_pfizer_primary", "uptake_moderna_primary", "uptake_astrazeneca_primary",
-          "uptake_other_primary", "uptake_pfizer_first_booster", "uptake_moderna_first_booster",
-          "uptake_astrazeneca_first_booster", "uptake_other_first_booster", "uptake_pfizer_second_booster",
-          "uptake_moderna_second_booster", "uptake_astrazeneca_second_booster",
-          "uptake_other_second_booster"]:
+for var in uptake_vars:
     # create a variable that is specifically not per capita
     q_reg_df["notpc_" + var] = q_reg_df[var]
     # and create a variable that is per capita
@@ -756,102 +560,150 @@ for var in ["uptake", "uptake_pfizer", "uptake_moderna", "uptake_astrazeneca",
 for var in ["inf_mean", "inf_lower", "inf_upper", "daily_deaths", "daily_deaths_unscaled"]:
     q_reg_df[var] = q_reg_df[var]/q_reg_df["tot_pop"]
     
-# create a data frame with China, Hong Kong, and Macao people vaccinated data
-china_countries = ["China", "Hong Kong", "Macao"]
-ch_hk_mc_vax = ihme_ds1_q[ihme_ds1_q["country"].isin(china_countries)]
-# add populatoin data for these countries
-ch_hk_mc_vax = ch_hk_mc_vax.merge(popdata, on = ["country", "year"], how = "left")
-# only keep pertinent columns
-ch_hk_mc_vax = ch_hk_mc_vax[["country", "yyyy_qq", "cumulative_all_fully_vaccinated", "tot_pop"]]
+# the countries whose uptake data are estimated from other countries' (the donors'). IHME's uptake data for China
+# include Hong Kong and Macao, so China's are Hong Kong and Macao's, scaled by the ratio of people newly vaccinated.
+proxy_regions = {"China": ["Hong Kong", "Macao"]}
 
+# create a data frame with the people vaccinated data, with population data
+new_vax = ihme_ds1_q.merge(popdata, on = ["country", "year"], how = "left")
+# only keep pertinent columns
+new_vax = new_vax[["country", "yyyy_qq", "cumulative_all_fully_vaccinated", "tot_pop"]]
 # if data is missing, replace with zero.
-ch_hk_mc_vax.loc[ch_hk_mc_vax["cumulative_all_fully_vaccinated"].isna(), "cumulative_all_fully_vaccinated"] = 0
-# calculate the new people vaccinated every day in these three countries
-for c in china_countries:
-    ch_hk_mc_vax.loc[ch_hk_mc_vax["country"] == c, "new_fully_vaccinated"] = (
-        ch_hk_mc_vax.loc[ch_hk_mc_vax["country"] == c, "cumulative_all_fully_vaccinated"]
-        - ch_hk_mc_vax.loc[ch_hk_mc_vax["country"] == c, "cumulative_all_fully_vaccinated"].shift(1))
-
-# make new people vaccinated per capita
-ch_hk_mc_vax["pc_vax"] = ch_hk_mc_vax["new_fully_vaccinated"]/ch_hk_mc_vax["tot_pop"]
-
-# create an empty dataframe
-adj_df = pd.DataFrame(columns = ["quarter", "wtd_adj_factor"])
-# for each quarter 
-for quarter in q_reg_df.yyyy_qq.unique():
-    # get the number of people vaccinated per capita in China
-    china_pc_vax = ch_hk_mc_vax.loc[(ch_hk_mc_vax["country"] == "China") & (ch_hk_mc_vax["yyyy_qq"] == quarter), "pc_vax"].values[0]
-    # get the population-weighted average number of people vaccinated per capita in Hong Kong and Macao
-    hk_mc_pc_vax = ch_hk_mc_vax.loc[(ch_hk_mc_vax["country"].isin(["Hong Kong", "Macao"])) & (ch_hk_mc_vax["yyyy_qq"] == quarter)]
-    hk_mc_vax_avg = np.average(hk_mc_pc_vax["pc_vax"], weights= hk_mc_pc_vax["tot_pop"])
-    # calculate the ratio between China's vaxxed people and Hong Kong/Macao's 
-    ratio = china_pc_vax/hk_mc_vax_avg
-    # add this value to the empty data frame
-    adj_df = pd.concat([adj_df, pd.DataFrame({"quarter": [quarter], "wtd_adj_factor": [ratio]})], axis = 0, ignore_index = True)
-    # for uptake data
-    for col in [x for x in q_reg_df.columns if "uptake" in x]:
-        # find the population-weighted average number of uptake per capita in Hong Kong and Macao
-        hk_mc_brand_vax = q_reg_df.loc[(q_reg_df["country"].isin(["Hong Kong", "Macao"])) & (q_reg_df["yyyy_qq"] == quarter)]
-        hk_mc_brand_avg = np.average(hk_mc_brand_vax[col], weights=hk_mc_brand_vax["tot_pop"])
-        # if there is no data, assign China 0 doses
-        if np.isnan(hk_mc_brand_avg*ratio):
-            q_reg_df.loc[(q_reg_df["country"] == "China") & (q_reg_df["yyyy_qq"] == quarter), col] = 0
-        # otherwise, assign China the Hong Kong/Macao data scaled using the adjustment facotr
-        else:    
-            q_reg_df.loc[(q_reg_df["country"] == "China") & (q_reg_df["yyyy_qq"] == quarter), col] = (
-            hk_mc_brand_avg*ratio)
-            
-#adj_df.to_excel("../output/china_adjustment_factors.xlsx")
+new_vax["cumulative_all_fully_vaccinated"] = new_vax["cumulative_all_fully_vaccinated"].fillna(0)
+# calculate the new people vaccinated every quarter in each country, per capita
+new_vax["new_fully_vaccinated"] = new_vax.groupby("country", sort = False)["cumulative_all_fully_vaccinated"].diff()
+new_vax["pc_vax"] = new_vax["new_fully_vaccinated"]/new_vax["tot_pop"]
+
+def weighted_average(df, cols, by, weight = "tot_pop"):
+    """
+    Parameters
+    ----------
+    df : data frame
+        The data.
+    cols : list
+        The columns to average.
+    by : string
+        The column to group by (e.g., yyyy_qq).
+    weight : string, optional
+        The weights. The default is "tot_pop".
+
+    Returns
+    -------
+    averages : data frame
+        The weighted averages of cols in each group, which are empty if any value or weight in the group is empty
+        (as with np.average).
+
+    """
+    weighted = df[cols].multiply(df[weight], axis = 0)
+    averages = weighted.groupby(df[by], sort = False).sum().divide(df[weight].groupby(df[by], sort = False).sum(), axis = 0)
+    return averages.mask(weighted.isna().groupby(df[by], sort = False).any())
+
+def proxy_adjustment(df, new_vax, country, donors, cols):
+    """
+    Estimate a country's uptake data from its donors': in each quarter, the population-weighted average of the
+    donors' uptake, times the adjustment factor, the ratio of the country's people newly vaccinated per capita to the
+    population-weighted average of the donors'. Where there are no data, the country is assigned 0 doses.
+
+    Parameters
+    ----------
+    df : data frame
+        The regression data, by country and quarter (yyyy_qq), with tot_pop.
+    new_vax : data frame
+        The people newly vaccinated per capita (pc_vax), by country and quarter (yyyy_qq), with tot_pop.
+    country : string
+        The country whose uptake data are estimated.
+    donors : list
+        The countries the uptake data are estimated from.
+    cols : list
+        The uptake data.
+
+    Returns
+    -------
+    df : data frame
+        The regression data, with the country's uptake data replaced.
+    adj_df : data frame
+        The adjustment factor (wtd_adj_factor) in each quarter.
+
+    """
+    quarters = df.yyyy_qq.unique()
+    # the country's people newly vaccinated per capita, and the donors' population-weighted average
+    country_pc_vax = new_vax[new_vax["country"] == country].drop_duplicates("yyyy_qq").set_index("yyyy_qq")["pc_vax"].reindex(quarters)
+    donor_pc_vax = weighted_average(new_vax[new_vax["country"].isin(donors)], ["pc_vax"], "yyyy_qq")["pc_vax"]
+    ratio = country_pc_vax/donor_pc_vax.reindex(quarters)
+    adj_df = pd.DataFrame({"country": country, "quarter": quarters, "wtd_adj_factor": ratio.to_numpy()})
+
+    # the donors' population-weighted average uptake in each quarter, scaled by the adjustment factor
+    donor_uptake = weighted_average(df[df["country"].isin(donors)], cols, "yyyy_qq").reindex(quarters)
+    estimate = donor_uptake.multiply(ratio, axis = 0).fillna(0)
+
+    df = df.copy()
+    in_country = df["country"] == country
+    df.loc[in_country, cols] = estimate.reindex(df.loc[in_country, "yyyy_qq"]).to_numpy()
+    return df, adj_df
+
+# for the countries with proxy regions, estimate the uptake data
+adj_df = []
+for country, donors in proxy_regions.items():
+    q_reg_df, country_adj_df = proxy_adjustment(q_reg_df, new_vax, country, donors,
+                                                [x for x in q_reg_df.columns if "uptake" in x])
+    adj_df.append(country_adj_df)
+adj_df = pd.concat(adj_df, axis = 0, ignore_index = True)
+
+write_output(adj_df, "../output/proxy_adjustment_factors.xlsx")
 
 # a function to create lags of brand-specific data
-def create_lags(brand):
+def create_lags(df, brands, n_lags = 8, per_capita_countries = ["China"]):
     """
-    Create lags of brand-specific vaccination data
+    Create the cumulative uptake of each brand, and lags of the new and cumulative uptake, by country. The data
+    must be sorted by country and date.
 
     Parameters
     ----------
-    brand : string
-        A string of the brand name.
+    df : data frame
+        A data frame containing the epidemiological and vaccination data, with the per capita uptake of each brand
+        and the not per capita uptake in "notpc_" + brand.
+    brands : list
+        The uptake variables.
+    n_lags : integer, optional
+        The number of lags. The default is 8.
+    per_capita_countries : list, optional
+        The countries whose per capita uptake is summed (China, whose uptake is estimated per capita from Hong Kong
+        and Macao's). For the other countries, the not per capita uptake is summed and then divided by the
+        population. The default is ["China"].
 
     Returns
     -------
-    q_reg_df : data frame
-        A data frame containing the epidemiological and vaccination data.
+    df : data frame
+        The data, with "cum_" + brand and, for i = 1 to n_lags, "L" + i + "_" + brand and "L" + i + "_cum_" + brand.
 
     """
     # if data is missing, assign it zero
-    q_reg_df.loc[q_reg_df[brand].isna(), brand] = 0
-    # for each country
-    for c in q_reg_df.country.unique():
-        # create a string for cumulative doses
-        cuml_string = "cum_" + brand
-        # if the country is China, sum the data
-        if c == "China":
-            q_reg_df.loc[(q_reg_df["country"] == c), cuml_string] = q_reg_df.loc[(q_reg_df["country"] == c), brand].cumsum()
-            q_reg_df.loc[q_reg_df[cuml_string].isna(), cuml_string] = 0
-        # otherwise, sum the not per capita doses then divide by the population 
-        else:
-            q_reg_df.loc[(q_reg_df["country"] == c), cuml_string] = q_reg_df.loc[(q_reg_df["country"] == c), "notpc_" + brand].cumsum()
-            q_reg_df.loc[q_reg_df[cuml_string].isna(), cuml_string] = 0
-            q_reg_df.loc[(q_reg_df["country"] == c), cuml_string] = (
-                        q_reg_df.loc[(q_reg_df["country"] == c), cuml_string]/q_reg_df.loc[q_reg_df["country"] == c, "tot_pop"])
-        # create nine lags of new and cumulativ uptake
-        for i in range(1, 9):
-            lag_string = "L" + str(i) + "_" + brand
-            q_reg_df.loc[q_reg_df["country"] == c, lag_string] = q_reg_df.loc[q_reg_df["country"] == c, brand].shift(i, fill_value = 0)
-            rem_uptake_string = "L" + str(i) + "_" + cuml_string
-            q_reg_df.loc[q_reg_df["country"] == c, rem_uptake_string] = q_reg_df.loc[q_reg_df["country"] == c, cuml_string].shift(i, fill_value = 0)        
-    return q_reg_df
+    df = df.copy()
+    df[brands] = df[brands].fillna(0)
+    per_capita = df["country"].isin(per_capita_countries)
+    # sum the per capita or the not per capita doses by country (an empty quarter has no cumulative doses)
+    doses = df[["notpc_" + b for b in brands]].set_axis(brands, axis = 1)
+    doses.loc[per_capita] = df.loc[per_capita, brands].values
+    cum = doses.groupby(df["country"], sort = False).cumsum().fillna(0)
+    # and divide by the population where the doses were not per capita
+    cum.loc[~per_capita] = cum.loc[~per_capita].div(df.loc[~per_capita, "tot_pop"], axis = 0)
+    cum = cum.fillna(0)
+
+    # create the lags of new and cumulative uptake, by country
+    lags = dict()
+    for i in range(1, n_lags + 1):
+        lags[i] = (df[brands].groupby(df["country"], sort = False).shift(i, fill_value = 0),
+                   cum.groupby(df["country"], sort = False).shift(i, fill_value = 0))
+    new_cols = dict()
+    for brand in brands:
+        new_cols["cum_" + brand] = cum[brand]
+        for i in range(1, n_lags + 1):
+            new_cols["L" + str(i) + "_" + brand] = lags[i][0][brand]
+            new_cols["L" + str(i) + "_cum_" + brand] = lags[i][1][brand]
+    return pd.concat([df.drop(columns = [x for x in new_cols if x in df.columns]), pd.DataFrame(new_cols)], axis = 1)
 
 # for each uptake variable, create those lags
-for b in ["uptake", "uptake_pfizer", "uptake_moderna", "uptake_astrazeneca",
-          "uptake_other", "uptake_notpfz_notmod", "uptake_notpfz", "uptake_mrna", "uptake_notmrna",
-          "uptake_pfizer_primary", "uptake_moderna_primary", "uptake_astrazeneca_primary",
-          "uptake_other_primary", "uptake_pfizer_first_booster", "uptake_moderna_first_booster",
-          "uptake_astrazeneca_first_booster", "uptake_other_first_booster", "uptake_pfizer_second_booster",
-          "uptake_moderna_second_booster", "uptake_astrazeneca_second_booster",
-          "uptake_other_second_booster"]:
-    q_reg_df = create_lags(b)
+q_reg_df = create_lags(q_reg_df, uptake_vars)
 
 # drop not per capita data
 drop_notpc_cols = [col for col in q_reg_df.columns if "notpc" in col]
@@ -859,5 +711,7 @@ q_reg_df = q_reg_df.drop(columns = drop_notpc_cols)
 
 # remove Macao (population less than 1 million) and Turkmenistan (lots of missing data)
 q_reg_df = q_reg_df[(q_reg_df["country"] != "Macao") & (q_reg_df["country"] != "Turkmenistan")]
+# check the data and give it the regression base's types (categorical country and quarter, integer indicators), then
 # save the data file
-q_reg_df.to_excel("../output/ihme_quarterly_regbase_boosters.xlsx", index = False)
+q_reg_df = apply_regbase_schema(q_reg_df)
+write_output(q_reg_df, "../output/ihme_quarterly_regbase_boosters.xlsx")
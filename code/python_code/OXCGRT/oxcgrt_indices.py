@@ -17,6 +17,10 @@ outputs:
 
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
 
 si = pd.read_excel("../input/OxCGRT_timeseries_all.xlsx", sheet_name="stringency_index_avg")
 si.name = "si"
@@ -54,7 +58,7 @@ oxcgrt = oxcgrt.merge(gri_long, how = "outer", on = ["country", "yyyy_qq"])
 oxcgrt_na = oxcgrt[(oxcgrt["si"].isna()) | (oxcgrt["chi"].isna()) | (oxcgrt["gri"].isna())]
 oxcgrt_na = oxcgrt_na.sort_values(["country", "yyyy_qq"])
 
-ihme_countries = pd.read_excel("../output/sur_recursive_and_gdp_subsamples_output.xlsx", sheet_name="country_quarter_vov")
+ihme_countries = read_output("../output/sur_recursive_and_gdp_subsamples_output.xlsx", sheet_name="country_quarter_vov")
 ihme_countries = ihme_countries[["country", "yyyy_qq"]]
 
 oxcgrt = oxcgrt.replace({"Czech Republic": "Czechia", "Kyrgyz Republic":"Kyrgyzstan", "Slovak Republic": "Slovakia"})
@@ -68,4 +72,4 @@ for c in oxcgrt.country.unique():
         oxcgrt.loc[oxcgrt["country"] == c, "L1_" + var] = oxcgrt.loc[oxcgrt["country"] == c, var].shift(1, fill_value = 0)
 
 oxcgrt = oxcgrt.sort_values(["country", "yyyy_qq"])
-oxcgrt.to_excel("../output/oxcgrt_si_chi_gri.xlsx", index = False)
+write_output(oxcgrt, "../output/oxcgrt_si_chi_gri.xlsx")
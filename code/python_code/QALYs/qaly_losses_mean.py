@@ -9,7 +9,7 @@ __updated__ = 15 November 2023
 
 inputs:
     - national_population_2020_2021_2022.xlsx (processed file; created in ihme_portal.py)
-    - Historical-and-Projected-Covid-19-data.csv (raw file)
+    - ihme_cache/ihme_quarterly.pkl (processed file; created in ihme_data.py)
     - WPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXES.xlsx (raw file)
     - Szende et al.-2014-EQ-5D Index Population Norms.xlsx (raw file)
     - COVerAGE_death_age_structures (processed file; created in COVerAGE_quarterly_death_age_structures_5year.do)
@@ -17,7 +17,8 @@ inputs:
 outputs:
     - ihme_qaly_vars.xlsx
     - qaly_severity_splits.xlsx
-    - qaly_losses_overall.xlsx
+    - qaly_losses_overall.xlsx, qaly_losses_overall_nodsct.xlsx, qaly_losses_overall_sixpct.xlsx
+    - utility_donors.xlsx
 
 """
 
@@ -25,142 +26,23 @@ outputs:
 
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
+from ihme_data import load_ihme_quarterly
+from donor_matching import match_donors
+from life_tables import life_table_matrix, fatal_losses, age_structure_losses, person_years_col, survivors_col
 
 # %% establish health states
 
 # load in the population data
-popdata = pd.read_excel("../output/national_population_2020_2021_2022.xlsx")
-
-# load in the IHME COVID data
-ihmeraw = pd.read_csv("../input/Historical-and-Projected-Covid-19-data.csv")
-ihme = ihmeraw[ihmeraw["version_name"] == "reference"]
-
-keep_cols = ["date", "location_name", "inf_mean", "inf_cuml_mean",
-             "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean"]
-
-# create a list of columns that we want to keep
-ihme = ihme[keep_cols]
-
-# create a dictionary to rename countries to authors' preferred versions.
-ihme = ihme.replace({'Taiwan (Province of China)': 'Taiwan', 'Viet Nam': 'Vietnam',
- 'Republic of Moldova': 'Moldova', 'Russian Federation': 'Russia',
- 'Republic of Korea': 'South Korea', 'United States of America': 'United States',
- 'Bolivia (Plurinational State of)': 'Bolivia', 'Venezuela (Bolivarian Republic of)': 'Venezuela',
- 'Iran (Islamic Republic of)': 'Iran', 'Syrian Arab Republic': 'Syria',
- 'Türkiye': 'Turkey', 'Democratic Republic of the Congo': 'Democratic Republic of Congo',
- "Côte d'Ivoire": "Cote d'Ivoire", "Cabo Verde": "Cape Verde", "United Republic of Tanzania": "Tanzania",
- "Timor": "Timor-Leste", "Micronesia (Federated States of)": "Micronesia",
- "Lao People's Democratic Republic": "Laos", "Democratic People's Republic of Korea": "North Korea",
- "Hong Kong Special Administrative Region of China": "Hong Kong", "Macao Special Administrative Region of China": "Macao"})
-
-# rename columns for ease of use and sort the file by country name and date.
-ihme = ihme.rename(columns = {"location_name": "country"})
-
-# create a year and quarter field.
-ihme["year"] =  pd.to_datetime(ihme['date']).dt.year
-ihme["quarter"] =  pd.to_datetime(ihme['date']).dt.quarter
-ihme = ihme.sort_values(["country", "year", "quarter", "date"])
-
-#remove data after Q2 2022
-ihme = ihme[ihme["date"] < "2022-07-01"]
-
-# add population data
-ihme_df = ihme.merge(popdata, on = ["country", "year"], how = "left")
-ihme_1m = ihme_df[(ihme_df["tot_pop"] >= 1000000) | (ihme_df["country"] == "Macao")]
-
-# create a data frame that only contains entriWPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXESes with non-empty deaths records
-death_df = ihme_1m[ihme_1m['daily_deaths'].notna()]
-
-# create a data frame that only contains entries with non-empty infections records
-inf_df = ihme_1m[ihme_1m['inf_mean'].notna()]
-
-# for countries in the IHME COVID data
-for c in ihme_1m.country.unique():
-    # find the date of first death record
-    first_deaths = death_df.loc[death_df["country"] == c, "date"].min()
-    # find the date of first infectoin record
-    first_infs = inf_df.loc[inf_df["country"] == c, "date"].min()
-    # make sure that new deaths record on the first day equals the cumulative death record on that day.
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths"]
-    ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "daily_deaths_unscaled"] = ihme_1m.loc[(ihme_1m["date"] == first_deaths) & (ihme_1m["country"] == c), "cumulative_deaths_unscaled"]
-    # make sure that the new infections record on the first day equals the cumulative infections record on that day.
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_mean"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_mean"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_lower"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_lower"]
-    ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_upper"] = ihme_1m.loc[(ihme_1m["date"] == first_infs) & (ihme_1m["country"] == c), "inf_cuml_upper"]
-
-# create a data frame that only contains epidemimological columns
-numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
-epi_cols = list(set(ihme_1m.select_dtypes(include=numerics).columns) - set(["year", "quarter", "yyyy_qq", "tot_pop",
-                                                                            "infection_fatality"]))
-
-# create a data frame that only contains Macao and Hong Kong data
-mc_hk = ihme_1m[ihme_1m["country"].isin(["Macao", "Hong Kong"])]
-# for epidemiological columns,sum the Macao and Hong Kong values for each date
-mc_hk = mc_hk.groupby("date")[epi_cols].sum()
-# create a data frame that contains only China's data
-china =  ihme_1m[ihme_1m["country"] == "China"].set_index("date")
-# only retain the epidemiological columns in the China data
-china = china[epi_cols]
-# subtract the values in Hong Kong/Macao from the China values
-china_update = china.subtract(mc_hk, level=0)
-china_update = china_update.reset_index()
-# add a field that notes the updated China data is for China
-china_update["country"] = "China"
-# add the rest of the IHME data for China to the updated China data
-china_update = china_update.merge(ihme_df, on = ["country", "date"], how = "left")
-# remove the old China data from the IHME data
-china_update = china_update.loc[:,~china_update.columns.str.contains('_y')] 
-china_update.columns = china_update.columns.str.replace(r'_x$', '')
-
-# add the China's updated data to the IHME data
-ihme_1m = ihme_1m[ihme_1m["country"] != "China"]
-ihme_1m = pd.concat([ihme_1m, china_update], axis = 0)
-
-# collapse infections and deaths to the country-quarter level
-ihme_q = ihme_1m[["date", "country", "year", "quarter", "inf_cuml_mean", "inf_mean",
-                  "cumulative_deaths", "daily_deaths", "admis_mean", "icu_beds_mean", "tot_pop"]]
-
-# make sure the date column is being interpreted as a datetime object
-ihme_q["date"] =  pd.to_datetime(ihme_q['date'])
-# sort the data by country and date
-ihme_q = ihme_q.sort_values(["country", "year", "quarter", "date"])
-
-# create a year-quarter column
-ihme_q["yyyy_qq"] = ihme_q["year"].astype(str) + "_Q" + ihme_q["quarter"].astype(str)
-
-# remove Macao
-ihme_q = ihme_q[ihme_q["country"] != "Macao"]
-
-# add a month column to the death data frame
-death_df["month"] =  pd.to_datetime(death_df['date']).dt.month
-# for Kazakhstan, Kyrgyzstan, and Uzbekistan, make sure their last quarter with some date 
-# has complete data by extrapolating to the end of the quarter
-kazakh_extrap = death_df.loc[(death_df["country"] == "Kazakhstan") & (death_df["year"] == 2021) &
-                             (death_df["month"] == 9), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kazakhstan") & (ihme_q["year"] == 2021) &
-                             (ihme_q["quarter"] == 3) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kazakh_extrap
-
-kyrgyz_extrap = death_df.loc[(death_df["country"] == "Kyrgyzstan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 3), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Kyrgyzstan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = kyrgyz_extrap
-
-uzbek_extrap = death_df.loc[(death_df["country"] == "Uzbekistan") & (death_df["year"] == 2022) &
-                             (death_df["month"] == 2), "daily_deaths"].mean()
-
-ihme_q.loc[(ihme_q["country"] == "Uzbekistan") & (ihme_q["year"] == 2022) &
-                             (ihme_q["quarter"] == 1) & (ihme_q["daily_deaths"].isna()),
-                             "daily_deaths"] = uzbek_extrap
-
-# collapse to the country-quarter
-ihme_q_cd = ihme_q.groupby(["country", "year",
-                            "quarter", "yyyy_qq",
-                            "tot_pop"])["inf_mean", "daily_deaths",
-                                        "admis_mean", "icu_beds_mean"].sum().reset_index()
+popdata = read_output("../output/national_population_2020_2021_2022.xlsx")
+
+# load in the IHME COVID data, collapsed to the country-quarter (see ihme_data.py), and drop Macao. the deaths
+# of countries whose data end in the middle of a quarter are extrapolated to the end of the quarter (see
+# ihme_portal.py for details).
+ihme_q_cd = load_ihme_quarterly(popdata, drop_countries = ["Macao"])
 
 #omit asympomatic infections -- using conservative number from Di Fusco et al. 2021
 #from Di Fusco et al. 2021, we assume 19.2% of infections are asymptomatic
@@ -193,7 +75,7 @@ ihme_q_cd["N_mild"] = (ihme_q_cd["inf_mean"] - ihme_q_cd["N_asymp"] - ihme_q_cd[
 #check that every entry has 10 quarters of vax data
 ihme_quarters = ihme_q_cd.country.value_counts()
 
-ihme_q_cd.to_excel("../output/ihme_qaly_vars.xlsx", index = False)
+write_output(ihme_q_cd, "../output/ihme_qaly_vars.xlsx")
 
 #sum the severity splits for each country-month.
 severity_splits = ihme_q_cd[["country", "yyyy_qq", "inf_mean",
@@ -232,7 +114,7 @@ severity_splits["Q_nonfatal"] = ((severity_splits["P_asymp"]*asymp_inf)
                               + (severity_splits["P_severe"]*severe)
                               + (severity_splits["P_critical"]*critical))
 
-severity_splits.to_excel("../output/qaly_severity_splits.xlsx", index = False)
+write_output(severity_splits, "../output/qaly_severity_splits.xlsx")
 
 # %% calculate fatal QALY losses
 
@@ -300,198 +182,61 @@ q_utilities["life_exp"] = q_utilities["life_exp"].astype(float)
 
 # only keep the health utilities and life expectancies from the Szende article
 szende_utilities = q_utilities[q_utilities["country"].isin(utilities["country"].unique())].reset_index(drop = True)
-#create an array of just the life expectancies.
-szende_expectancies = np.array(szende_utilities.iloc[:, 1])
-
-# create a function that maps health utilities from Szende to countries without utilities.
-# we do this by finding the country in Szende with the closest life expectancy to the country of interest then transferring the utilities.
-def map_utilities(country):
-    """
-    Maps background health utilities from Szende et al. to countries not in Szende.
-
-    Parameters
-    ----------
-    country : str
-        A string containting the country of interest.
-
-    Returns
-    -------
-    None.
-
-    """
-    # if the country is in Szende, we need not map its own utilities to itself.
-    if country in szende_utilities.country.unique():
-        pass
-    else:
-        # get the expectancy of the country without health utilities
-        expectancy = q_utilities.loc[(q_utilities["country"] == country), "life_exp"].values[0]
-        # calculate the difference between this life expectancy and the life expectancy of the Szende countries.
-        expectancy_diff = np.absolute(szende_expectancies - expectancy)
-        # find the smallest absolute difference (i.e., closest life expectancy)
-        index_val = expectancy_diff.argmin()
-        # get the name of the country with this smallest difference
-        mapping_country = szende_utilities.loc[index_val, "country"]
-        # set the utilities of the target country to the utilities from Szende
-        q_utilities.loc[q_utilities["country"] == country, "18–24": "Total"] = q_utilities.loc[q_utilities["country"] == mapping_country, "18–24": "Total"].values
-    # some of the utilities in Szende miss either the oldest age group (75+) or the youngest (18-24)
-    # if that is the case, we set the utility to nearest age group.
-    if np.isnan(q_utilities.loc[q_utilities["country"] == country, "75+"].values[0]):
-        q_utilities.loc[q_utilities["country"] == country, "75+"] = q_utilities.loc[q_utilities["country"] == country, "65–74"].values[0]
-    else:
-        pass
-    if np.isnan(q_utilities.loc[q_utilities["country"] == country, "18–24"].values[0]):
-        q_utilities.loc[q_utilities["country"] == country, "18–24"] = q_utilities.loc[q_utilities["country"] == country, "25–34"].values[0]
-    else:
-        pass
-    
-# for all the countries in our data, perform the utility mapping
-for c in q_utilities.country.unique():
-    map_utilities(c)    
-
-# create a fucntion that adds these mapped health utilities to the life tables.
-def add_utilities_to_lifetables2019(country):
-    """
-    Adds the utility values to the lifetables to facilitate subsequent calculations.    
-
-    Parameters
-    ----------
-    country : str
-        A string containing the country of interest.
-
-    Returns
-    -------
-    None.
-
-    """
-    # for the given country, set the health utility for ages according to the age groups in Szende.
-    lifetables2019.loc[lifetables2019["country"] == country, "Q"] = q_utilities.loc[q_utilities["country"] == country, "75+"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 75), "Q"] = q_utilities.loc[q_utilities["country"] == country, "65–74"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 65), "Q"] = q_utilities.loc[q_utilities["country"] == country, "55–64"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 55), "Q"] = q_utilities.loc[q_utilities["country"] == country, "45–54"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 45), "Q"] = q_utilities.loc[q_utilities["country"] == country, "35–44"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 35), "Q"] = q_utilities.loc[q_utilities["country"] == country, "25–34"].values[0]
-    lifetables2019.loc[(lifetables2019["country"] == country) & (lifetables2019["Age (x)"] < 25), "Q"] = q_utilities.loc[q_utilities["country"] == country, "18–24"].values[0]
-
-# for all countries in our data, add the utilities to the life table.
-for c in lifetables2019.country.unique():
-    add_utilities_to_lifetables2019(c)
+# match each country without health utilities to the country in Szende with the closest life expectancy at birth
+# (see donor_matching.py), and give it that country's utilities.
+utility_donors = match_donors(q_utilities[~q_utilities["country"].isin(szende_utilities["country"])],
+                              szende_utilities, "life_exp")
+utility_cols = list(q_utilities.loc[:, "18–24": "Total"].columns)
+matched = utility_donors.index[utility_donors["donor_index"].notna()]
+q_utilities.loc[matched, utility_cols] = szende_utilities.loc[
+    utility_donors.loc[matched, "donor_index"].astype(int), utility_cols].values
+
+# some of the utilities in Szende miss either the oldest age group (75+) or the youngest (18-24)
+# if that is the case, we set the utility to nearest age group.
+utility_sources = q_utilities[["country", "life_exp"]].join(utility_donors[["donor", "donor_life_exp"]])
+utility_sources["filled_75+"] = q_utilities["75+"].isna()
+utility_sources["filled_18–24"] = q_utilities["18–24"].isna()
+q_utilities["75+"] = q_utilities["75+"].fillna(q_utilities["65–74"])
+q_utilities["18–24"] = q_utilities["18–24"].fillna(q_utilities["25–34"])
+
+# save the donor country and the filled age groups of each country
+write_output(utility_sources, "../output/utility_donors.xlsx")
+
+# the first age of each age group in Szende after the youngest. the ages below 25 (including children) take the
+# utility of 18-24 year olds, and the ages from 75 that of 75+.
+utility_bands = {25: "25–34", 35: "35–44", 45: "45–54", 55: "55–64", 65: "65–74", 75: "75+"}
+band_cols = ["18–24"] + list(utility_bands.values())
+
+# add the health utilities to the life tables, looking up the age group of each age
+band = np.searchsorted(list(utility_bands), lifetables2019["Age (x)"].to_numpy(), side = "right")
+country_utilities = q_utilities.drop_duplicates("country").set_index("country")[band_cols]
+lifetables2019["Q"] = country_utilities.reindex(lifetables2019["country"]).to_numpy()[np.arange(len(lifetables2019)), band]
     
-# %% calculate QALY loss from mortality
-
-# create a function that uses the Briggs et al equation to calculate QALY losses
-# from mortality.
-def qaly_loss_mortality(country, age, discount_rate):
-    """
-    Calculates the QALY loss from mortality using the Briggs et al. formula.
-
-    Parameters
-    ----------
-    country : str
-        A string containing the country of interest.
-    age : int
-        An integer containing the age of interest.
-    discount_rate : float
-        A float (i.e., decimal) that equals the annual discount rate.
-
-    Returns
-    -------
-    None.
-
-    """
-    # given an age, get all the ages between it and 100 (the final age of our life table)
-    ages = list(range(age, 101))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables2019[(lifetables2019["country"] == country)
-                        & (lifetables2019["Age (x)"].isin(ages))]
-    # set the initial value of the numerator in Briggs et al. equation to 0.
-    numerator = 0
-    # for all the ages of interest
-    for i in ages:
-        # get the value of L, person-years lived
-        L = df.loc[df["Age (x)"] == i, "Number of person-years lived L(x,n)"].values[0]
-        # get the value of Q, health utility
-        Q = df.loc[df["Age (x)"] == i, "Q"].values[0]
-        # get the difference between that age and the original age
-        age_diff = i - age
-        # calculate the discount quantitiy
-        discount = (1 + discount_rate)**(-1*(age_diff))
-        # multiply L, Q, and discount to generate a discounted QALYs value
-        discounted_QALYs = L*Q*discount
-        # add this value to the numerator to get the sum total by the end
-        numerator = numerator + discounted_QALYs
-    # extract l, the number of survivors, to fill in the denominator.
-    denominator = df.loc[df["Age (x)"] == age, "Number of survivors l(x)"].values[0]
-    # calculate dQALY
-    # Equation 3 in the text
-    dQALY = numerator/denominator
-    # add the dQALY value to the lifetable.
-    lifetables2019.loc[(lifetables2019["country"] == country)
-                       & (lifetables2019["Age (x)"] == age), "dQALY"] = dQALY
-
-# for all ages and for all countries, calculate the QALY loss from mortality.
-for age in range(0, 101):
-    for c in lifetables2019.country.unique():
-        qaly_loss_mortality(c, age, 0.03)
+# %% calculate QALY loss from mortality, and fatal QALYs in the age buckets
+
+# the discount rates for the QALY losses from mortality, keyed by the suffix of their columns (3% is the main
+# analysis; 0% and 6% are the sensitivity analyses)
+discount_rates = {"": 0.03, "_nodsct": 0, "_sixpct": 0.06}
+
+# reshape the person-years lived, the survivors and the health utilities to (country x age) arrays
+L = life_table_matrix(lifetables2019, person_years_col)
+l = life_table_matrix(lifetables2019, survivors_col)
+Q = life_table_matrix(lifetables2019, "Q")
+
+# for all ages and for all countries, calculate the QALY loss from mortality with the Briggs et al. equation
+# (Equation 3 in the text), and its population-weighted average in our age buckets (Equation 4 in the text), for
+# each discount rate.
+age_losses, bucket_losses = fatal_losses({"Q_fatal": Q}, L, l, discount_rates)
+for i, suffix in enumerate(discount_rates):
+    # add the dQALY values to the lifetable.
+    losses = pd.DataFrame(age_losses["Q_fatal"][i], index = L.index, columns = L.columns).stack().rename("dQALY" + suffix)
+    lifetables2019 = lifetables2019.drop(columns = "dQALY" + suffix, errors = "ignore").merge(
+        losses, left_on = ["country", "Age (x)"], right_index = True, how = "left")
 
 #lifetables2019.to_excel("../output/age_specific_qaly_losses.xlsx", index = False)
 
-# %% calculate fatal QALYs into 5-year age buckets based on lifetables.
-
-# create a function that uses population-weighted averages to calculate 5-year
-# age buckets.
-
-age_specific_df = pd.DataFrame(columns = ["country", "first_age", "last_age", "Q_fatal"])
-def fatal_qaly_age_specific(country, first_age, last_age):
-    global age_specific_df
-    """
-    Calculates population-weighted QALY losses from mortality for our age buckets.
-
-    Parameters
-    ----------
-    country : str
-        The country of interest.
-    first_age : int
-        The starting age of the age bucket. For the age bucket 0-14, use 0. For
-        the age bucket 15-24, use 15, etc.
-    last_age : int
-        The end age of the age bucket. For the age bucket 0-14, use 14. For the
-        age bucket 15-24, use 24 etc.
-
-    Returns
-    -------
-    age_specific_df: data frame
-        A data frame with three columns--country, age, and fatal_qaly. The first
-        two are self-explanatory, the latter is the population-weighted QALY loss
-        for death, which relies on data from the lifetables.
-    """
-    # given an age, generate all ages in the age bucket
-    ages = list(range(first_age, last_age+1))
-    # create a smaller data set that is country-specific and only includes the
-    # ages of interest.
-    df = lifetables2019[(lifetables2019["country"] == country)
-                        & (lifetables2019["Age (x)"].isin(ages))]
-    # calculate the population-weighted fatal QALY
-    # Equation 4 in the text.
-    weighted_qaly = np.average(df["dQALY"], weights=df["Number of survivors l(x)"])
-    #create a dictionary that includes the column names of the target dataframe and 
-    #the values to fill those columns
-    d = {age_specific_df.columns[0]: country, age_specific_df.columns[1]: first_age,
-         age_specific_df.columns[2]: last_age, age_specific_df.columns[3]: weighted_qaly}
-    #add those new values to the data frame
-    age_specific_df = pd.concat([age_specific_df, pd.DataFrame(d, index = [0])])
-    return age_specific_df
-
-#create a dictionary of the first and last ages of the buckets to use in the function.
-age_buckets_dict = {0:14, 15:24, 25:34, 35:44, 45:54, 55:64, 65:74, 75:100}
-
-#calculate weighted fatal QALYs for the age buckets for each country.
-for c in lifetables2019.country.unique():
-    for key, value in age_buckets_dict.items():
-        fatal_qaly_age_specific(country = c, first_age = key, last_age = value)
-
-#sort the resulting data frame by country and age.      
-age_specific_df = age_specific_df.sort_values(["country", "first_age"]).reset_index(drop = True)
+# the fatal QALYs for each country and age bucket, sorted by country and age.
+age_specific_df = bucket_losses["Q_fatal"]
 
 #age_specific_df.to_excel("../output/age_buckets_qaly_losses.xlsx", index = False)
 
@@ -506,51 +251,27 @@ We use the proportions of deaths in that file to calculate the QALY loss per
 fatal case, using the age-specific QALYs from age_specific_df.
 """
 
-#we keep all the rows of data (days) but only keep the important columns.
-fatal_df = coverage.loc[:, "country": "prop_75"]
-#create a date variable that combines the year and quarter.
-fatal_df['yyyy_qq'] = fatal_df["year"].astype(str) + "_Q" + fatal_df["quarter"].astype(str)
-
-#because we want to produce qalys for each age group, we replace "prop" with "qaly"
-#to allow for this
-fatal_df.columns = fatal_df.columns.str.replace("prop_", "qaly_")
-
-#drop irrelevant columns
-fatal_df = fatal_df.drop(columns = ["quarter", "originally", "data_source", "year"])
-
-#make sure the date in the coverage data aligns with the qaly dataframe
+#make sure the date in the coverage data aligns with the age bucket losses
 coverage['yyyy_qq'] = coverage["year"].astype(str) + "_Q" + coverage["quarter"].astype(str)
 
-#for a given country-month and age, use the proportion of deaths in that age
-#and the QALY loss from mortality for that age to calculate the average fatal
-#QALY.  
-for country in fatal_df.country.unique():
-    for quarter in fatal_df.yyyy_qq.unique():
-        for key in age_buckets_dict:
-            try:
-                fatal_df.loc[(fatal_df["country"] == country) & (fatal_df["yyyy_qq"] == quarter),
-                             "qaly_"+str(key)] = coverage.loc[(coverage["country"] == country)
-                             & (coverage["yyyy_qq"] == quarter), "prop_"+str(key)].values[0]*age_specific_df.loc[
-                             (age_specific_df["country"] == country) & (age_specific_df["first_age"] == key), 
-                             "Q_fatal"].values[0]
-                pass
-            except:
-                continue
-         
-fatal_df["Q_fatal"] = fatal_df.filter(regex = "^qaly_").sum(axis = 1)
-
-# %% combine the fatal and nonfatal QALY loss information into a single table.
-
-# add the QALYs per fatal case to severity_splits
-severity_splits = severity_splits.merge(fatal_df[["country", "yyyy_qq", "Q_fatal"]],
-                      on = ["country", "yyyy_qq"], how = "right")
-
-# use the QALYs per nonfatal case and the QALYs per fatal case, along with the
-# proportion of nonfatal and fatal cases to calculate overall QALYs per case.
-severity_splits["Q_overall"] = ((severity_splits["N_asymp"]*asymp_inf/severity_splits["inf_mean"])
-                              + (severity_splits["N_mild"]*mild/severity_splits["inf_mean"])
-                              + (severity_splits["N_severe"]*severe/severity_splits["inf_mean"])
-                              + (severity_splits["N_critical"]*critical/severity_splits["inf_mean"])
-                              + (severity_splits["daily_deaths"]*severity_splits["Q_fatal"]/severity_splits["inf_mean"]))
-
-severity_splits.to_excel("../output/qaly_losses_overall.xlsx", index = False)
+# %% combine the fatal and nonfatal QALY loss information into a single table for each discount rate.
+
+for suffix in discount_rates:
+    #for a given country-quarter, use the proportion of deaths in each age bucket and the QALY loss from mortality
+    #in that age bucket to calculate the average fatal QALY (see life_tables.py).
+    fatal_df = age_structure_losses(coverage, age_specific_df, "Q_fatal" + suffix, "qaly_", "Q_fatal")
+    
+    # add the QALYs per fatal case to severity_splits
+    overall = severity_splits.merge(fatal_df[["country", "yyyy_qq", "Q_fatal"]],
+                                    on = ["country", "yyyy_qq"], how = "right")
+    
+    # use the QALYs per nonfatal case and the QALYs per fatal case, along with the
+    # proportion of nonfatal and fatal cases to calculate overall QALYs per case.
+    overall["Q_overall"] = ((overall["N_asymp"]*asymp_inf/overall["inf_mean"])
+                          + (overall["N_mild"]*mild/overall["inf_mean"])
+                          + (overall["N_severe"]*severe/overall["inf_mean"])
+                          + (overall["N_critical"]*critical/overall["inf_mean"])
+                          + (overall["daily_deaths"]*overall["Q_fatal"]/overall["inf_mean"]))
+    
+    # the 3% file is the main analysis; the 0% and 6% files are read by the sensitivity analyses
+    write_output(overall, "../output/qaly_losses_overall" + suffix + ".xlsx")
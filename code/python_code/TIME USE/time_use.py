@@ -20,6 +20,10 @@ outputs:
 # %% load in packages
 import pandas as pd
 import numpy as np
+import sys
+# the shared reader and writer of the processed files in ../output
+sys.path.append("..")
+from output_store import read_output, write_output
 
 # %% load in files
 # load in OECD time use data
@@ -57,7 +61,7 @@ oecd['use'] = np.select(conditions, uses, default = "other time")
 simple_oecd = oecd.groupby(["Country", "use"])["Time (minutes)"].sum().reset_index()
 
 # read in the population data file and only keep countries whose population are above 1000 thousand (1M)
-countries = pd.read_excel("../output/ihme_countries.xlsx")
+countries = read_output("../output/ihme_countries.xlsx")
 countries.columns = ["country"]
 
 # merge OECD time use data with IHME countries
@@ -317,4 +321,4 @@ countries_wide = pd.pivot(time_mapped, index = ["country", "UN_region", "WHO_reg
 countries_wide["nonmarket time"] = countries_wide["unpaid work time"] + countries_wide["leisure time"]
 
 # save the file
-countries_wide.to_excel("../output/time_use_processed_ihme.xlsx", index = False)
+write_output(countries_wide, "../output/time_use_processed_ihme.xlsx")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+donor_matching.py: Matches countries without some data to the donor country whose data they take.
+
+Countries without data (e.g., the Szende et al. health utilities, or the WHO CHOICE costs) take the data of the
+donor country with the closest value of a matching variable (life expectancy at birth, or per capita GDP),
+optionally within the same group (e.g., the WHO region-World Bank income group). As with np.argmin over the donors,
+a tie goes to the donor that comes first.
+
+The donors' values are sorted once, and every country's nearest donor is found with one np.searchsorted over them,
+comparing the donors just below and just above its value. match_donors returns the matches as a table, so they can
+be checked.
+
+usage (from a script folder, e.g. QALYs):
+    import sys
+    sys.path.append("..")
+    from donor_matching import match_donors
+"""
+import numpy as np
+import pandas as pd
+
+def nearest_donors(values, donor_values, groups = None, donor_groups = None):
+    """
+    Finds the donor with the closest value (in the same group) for each value.
+
+    Parameters
+    ----------
+    values : array
+        The values of the matching variable of the countries to match.
+    donor_values : array
+        The values of the matching variable of the donors.
+    groups : array, optional
+        The group of each country to match. The default is None, which puts every country and donor in one group.
+    donor_groups : array, optional
+        The group of each donor. The default is None.
+
+    Returns
+    -------
+    donors : array
+        The position of each country's donor in the donors, or -1 for countries without one (a missing value or
+        group, or no donors with a value in the group).
+
+    """
+    values = np.asarray(values, dtype = float)
+    donor_values = np.asarray(donor_values, dtype = float)
+    if groups is None:
+        codes = np.zeros(len(values), dtype = int)
+        donor_codes = np.zeros(len(donor_values), dtype = int)
+    else:
+        all_codes, _ = pd.factorize(pd.concat([pd.Series(groups), pd.Series(donor_groups)], ignore_index = True))
+        codes, donor_codes = all_codes[:len(values)], all_codes[len(values):]
+    valid = ~np.isnan(values) & (codes >= 0)
+    donor_valid = np.flatnonzero(~np.isnan(donor_values) & (donor_codes >= 0))
+
+    # sort the donors by group and value with an integer key (the group and the rank of the value), keeping the
+    # first donor of each key
+    ranks = np.unique(np.concatenate([values[valid], donor_values[donor_valid]]))
+    size = len(ranks) + 1
+    donor_keys = donor_codes[donor_valid]*size + np.searchsorted(ranks, donor_values[donor_valid])
+    donor_keys, first = np.unique(donor_keys, return_index = True)
+    sorted_donors = donor_valid[first]
+    if len(sorted_donors) == 0:
+        return np.full(len(values), -1)
+    keys = np.where(valid, codes*size + np.searchsorted(ranks, np.where(valid, values, 0)), -1)
+
+    # the donors just above (or at) and just below each value, if they are in the same group
+    above = np.searchsorted(donor_keys, keys)
+    below = above - 1
+    above_ok = valid & (above < len(donor_keys))
+    below_ok = valid & (below >= 0)
+    above = sorted_donors[np.clip(above, 0, len(sorted_donors) - 1)]
+    below = sorted_donors[np.clip(below, 0, len(sorted_donors) - 1)]
+    above_ok &= donor_codes[above] == codes
+    below_ok &= donor_codes[below] == codes
+
+    # take the closer one, and the one that comes first if they are as close
+    above_diff = np.absolute(donor_values[above] - values)
+    below_diff = np.absolute(donor_values[below] - values)
+    take_below = below_ok & (~above_ok | (below_diff < above_diff) | ((below_diff == above_diff) & (below < above)))
+    return np.where(take_below, below, np.where(above_ok, above, -1))
+
+def match_donors(countries, donors, value_col, group_col = None, country_col = "country"):
+    """
+    Matches each country to the donor with the closest value of value_col (in the same group_col).
+
+    Parameters
+    ----------
+    countries : data frame
+        The countries to match, with country_col, value_col and group_col.
+    donors : data frame
+        The donors, with the same columns.
+    value_col : string
+        The matching variable (e.g., "life_exp").
+    group_col : string, optional
+        The column of the groups that donors must share. The default is None (no groups).
+    country_col : string, optional
+        The country column. The default is "country".
+
+    Returns
+    -------
+    matches : data frame
+        A table with the index of countries, with country_col, value_col (and group_col), "donor", "donor_" +
+        value_col, and "donor_index" (the donor's index in donors). The donor columns are missing for countries
+        without a donor.
+
+    """
+    cols = [country_col, value_col] + ([group_col] if group_col is not None else [])
+    matches = countries[cols].copy()
+    positions = nearest_donors(countries[value_col], donors[value_col],
+                               None if group_col is None else countries[group_col],
+                               None if group_col is None else donors[group_col])
+    found = positions >= 0
+    matched = donors.iloc[positions[found]]
+    matches["donor"] = pd.Series(matched[country_col].to_numpy(), index = matches.index[found])
+    matches["donor_" + value_col] = pd.Series(matched[value_col].to_numpy(), index = matches.index[found])
+    matches["donor_index"] = pd.Series(matched.index, index = matches.index[found])
+    return matches
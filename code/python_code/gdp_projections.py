@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+gdp_projections.py: Interpolates quarterly GDP projections from annual GDP projections, and rebases real GDP.
+
+The quarterly projections follow the Statistics Canada approach. In the first year, GDP grows at a constant quarterly
+rate, gC, the geometric mean of the quarterly growth rates that give the annual growth into and out of that year
+(equations S11 and S12), and its quarters sum to the annual GDP (equation S13). In each later year, GDP changes
+linearly from the last quarter of the previous year, x, by a step d = (annual GDP - 4x)/10, so that its quarters
+x + d, ..., x + 4d sum to the annual GDP (equations S1 - S4).
+
+quarterly_projection_grid does this for all the rows of a (country x year) table of annual projections at once, and
+for any span of years, so the projections of other WEO vintages are one call.
+
+rebase_real_gdp rebases the real GDP of every country, source (projected or observed) and type (annual or quarterly)
+to the prices of a base year, by multiplying it by the ratio of nominal to real GDP in that year (for quarterly data,
+the ratio of their means over the quarters of the year). The ratios come from one grouped mean.
+
+usage (from a script folder, e.g. ECONOMIC DATA):
+    import sys
+    sys.path.append("..")
+    from gdp_projections import quarterly_projection_grid, rebase_real_gdp
+"""
+import numpy as np
+import pandas as pd
+
+def quarterly_growth(annual_growth):
+    """
+    Solves equations S11 and S12 for the quarterly growth factor, g, given the annual growth. The equations,
+    (annual_growth + 1)*(1 + g + g^2 + g^3) - g^4 - g^5 - g^6 - g^7 = 0, factor into
+    (1 + g)*(1 + g^2)*(g^4 - (annual_growth + 1)) = 0, so their real solutions are -1 and +/-(annual_growth + 1)^(1/4),
+    and we want the real and positive one.
+
+    Parameters
+    ----------
+    annual_growth : float or array
+        The annual growth, or an array of them (e.g., for all countries at once).
+
+    Returns
+    -------
+    growth : float or array
+        The quarterly growth factor, g.
+
+    """
+    return np.power(np.asarray(annual_growth, dtype = float) + 1, 0.25)
+
+def quarterly_projection_grid(annual, first_year = 2019, last_year = 2022):
+    """
+    Interpolates quarterly GDP from annual GDP for all the rows of annual at once.
+
+    Parameters
+    ----------
+    annual : data frame
+        The annual GDP, with a row per country (and type of GDP) and a column per year, from the year before
+        first_year to last_year.
+    first_year : integer, optional
+        The first year to interpolate. The default is 2019.
+    last_year : integer, optional
+        The last year to interpolate, after first_year. The default is 2022.
+
+    Raises
+    ------
+    ValueError
+        An error message that prints if the quarterly GDP in first_year does not sum to its annual GDP for some
+        rows (e.g., because their annual GDP is missing).
+
+    Returns
+    -------
+    quarterly : data frame
+        The quarterly GDP, with the index of annual and a column per quarter ("2019Q1", ..., "2022Q4").
+
+    """
+    years = list(range(first_year, last_year + 1))
+    values = {year: annual[year].to_numpy(dtype = float) for year in [first_year - 1] + years}
+
+    # solve for gA using equation S11 and for gB using equation S12, and take their geometric mean, gC
+    gA = quarterly_growth(values[first_year + 1]/values[first_year] - 1)
+    gB = quarterly_growth(values[first_year]/values[first_year - 1] - 1)
+    gC = np.sqrt(gA*gB)
+
+    # calculate GDP in the quarters of the first year, with Q1 from equation S13
+    growth = gC[:, None]**np.arange(4)
+    first = values[first_year]/growth.sum(axis = 1)
+    quarters = [first[:, None]*growth]
+
+    # we calculate the value of annual GDP (the sum of quarterly GDP) in the first year and ensure
+    # that it still equals the annual GDP we started with (within a rounding error)
+    bad = np.round(quarters[0].sum(axis = 1)) != np.round(values[first_year])
+    if bad.any():
+        raise ValueError("Summed quarterly projections for " + ", ".join(str(x) for x in annual.index[bad]) +
+                         " in " + str(first_year) + " do not equal the annual total!")
+
+    # for each later year, step linearly from GDP in Q4 of the previous year (equations S1 - S4)
+    for year in years[1:]:
+        x = quarters[-1][:, 3]
+        d = (values[year] - 4*x)/10
+        quarters.append(x[:, None] + d[:, None]*np.arange(1, 5))
+
+    columns = [str(year) + "Q" + str(quarter) for year in years for quarter in range(1, 5)]
+    return pd.DataFrame(np.concatenate(quarters, axis = 1), index = annual.index, columns = columns)
+
+def rebase_real_gdp(gdp, base_year = 2019):
+    """
+    Rebases the annual and quarterly actual and projected real GDP to a common base year.
+
+    Parameters
+    ----------
+    gdp : data frame
+        The GDP in long format, with "Country", "WEO Subject Code" (NGDP or NGDP_R), "variable" (the year, or the
+        quarter as e.g. "2019Q1"), "value", "source" (projected or observed) and "type" (annual or quarterly).
+    base_year : integer, optional
+        The base year. The default is 2019.
+
+    Returns
+    -------
+    rebased_df : data frame
+        The rebased real GDP, with "country", "date", "Real GDP", "source", "type" and "ratio" (the ratio of nominal
+        to real GDP in the base year of the country and source), with the annual data first, sorted by country,
+        with the projected data before the observed data.
+
+    """
+    year = gdp["variable"].astype(str).str[:4]
+    # the ratio of nominal to real GDP in the base year, for each country and source, as the ratio of their means
+    # over the base year
+    base = gdp[year == str(base_year)].groupby(["Country", "source", "WEO Subject Code"])["value"].mean().unstack()
+    ratios = (base["NGDP"]/base["NGDP_R"]).rename("ratio")
+
+    # multiply all the real GDP by its ratio
+    real = gdp[gdp["WEO Subject Code"] == "NGDP_R"].join(ratios, on = ["Country", "source"])
+    real = real.sort_values(["type", "Country", "source"], ascending = [True, True, False], kind = "stable")
+    return pd.DataFrame({"country": real["Country"], "date": real["variable"], "Real GDP": real["value"]*real["ratio"],
+                         "source": real["source"], "type": real["type"], "ratio": real["ratio"]}).reset_index(drop = True)
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+ihme_data.py: Reads and cleans the IHME COVID data once for all the scripts that use it.
+
+inputs:
+    - Historical-and-Projected-Covid-19-data.csv (raw file)
+    - national_population_2020_2021_2022.xlsx (processed file; created in ihme_portal.py)
+
+outputs:
+    - ihme_cache/ihme_quarterly.pkl
+
+The CSV holds every scenario and the whole projection horizon, so it is read a chunk of rows at a time, with only
+the columns the scripts use (with their types given), and only the rows of the reference scenario to the end of
+Q2 2022 are kept. The cleaned data have authors' country names and population, for countries with at least 1M people
+(and Macao), with the first infections and deaths records set to the cumulative values, and China's data net of Hong
+Kong's and Macao's (IHME's data for China include them). The deaths of the countries whose data end in the middle of
+a quarter are extrapolated to the end of the quarter.
+
+load_ihme_quarterly returns the country-quarter sums, which are added up while the CSV is read, so that memory
+depends on the size of the result rather than of the CSV. load_ihme_daily returns the cleaned daily data (for
+ihme_portal.py, which also uses the daily vaccination records). Both are saved in ../output/ihme_cache with a key
+made from the CSV, the population data, the options and this file, and are read back while the key matches, so the
+CSV is only read again when something changes.
+
+Running this file saves the country-quarter sums for the population in national_population_2020_2021_2022.xlsx,
+which is what qaly_losses_mean.py, direct_costs.py and indirect_costs*.py read.
+
+usage (from a script folder, e.g. QALYs):
+    import sys
+    sys.path.append("..")
+    from ihme_data import load_ihme_quarterly
+"""
+import hashlib
+import os
+import pandas as pd
+from output_store import read_output
+
+root = os.path.dirname(os.path.abspath(__file__))
+ihme_path = os.path.join(root, "input", "Historical-and-Projected-Covid-19-data.csv")
+ihme_cache_dir = os.path.join(root, "output", "ihme_cache")
+
+# the columns of the IHME COVID data that the scripts use
+ihme_text_cols = ["date", "location_name", "version_name"]
+ihme_value_cols = ["inf_mean", "inf_cuml_mean", "inf_cuml_upper", "inf_cuml_lower", "inf_upper", "inf_lower",
+                   "cumulative_deaths", "cumulative_deaths_unscaled", "daily_deaths", "daily_deaths_unscaled",
+                   "infection_fatality", "cumulative_all_fully_vaccinated", "cumulative_all_effectively_vaccinated",
+                   "admis_mean", "icu_beds_mean"]
+ihme_dtypes = {**{x: str for x in ihme_text_cols}, **{x: "float64" for x in ihme_value_cols}}
+
+# a dictionary to rename countries to authors' preferred versions.
+replace_dict = {'Taiwan (Province of China)': 'Taiwan', 'Viet Nam': 'Vietnam',
+ 'Republic of Moldova': 'Moldova', 'Russian Federation': 'Russia',
+ 'Republic of Korea': 'South Korea', 'United States of America': 'United States',
+ 'Bolivia (Plurinational State of)': 'Bolivia', 'Venezuela (Bolivarian Republic of)': 'Venezuela',
+ 'Iran (Islamic Republic of)': 'Iran', 'Syrian Arab Republic': 'Syria',
+ 'Türkiye': 'Turkey', 'Democratic Republic of the Congo': 'Democratic Republic of Congo',
+ "Côte d'Ivoire": "Cote d'Ivoire", "Cabo Verde": "Cape Verde", "United Republic of Tanzania": "Tanzania",
+ "Timor": "Timor-Leste", "Micronesia (Federated States of)": "Micronesia",
+ "Lao People's Democratic Republic": "Laos", "Democratic People's Republic of Korea": "North Korea",
+ "Hong Kong Special Administrative Region of China": "Hong Kong", "Macao Special Administrative Region of China": "Macao"}
+
+# the first-day records that are set to the cumulative value, for the deaths and for the infections
+first_death_cols = {"daily_deaths": "cumulative_deaths", "daily_deaths_unscaled": "cumulative_deaths_unscaled"}
+first_inf_cols = {"inf_mean": "inf_cuml_mean", "inf_lower": "inf_cuml_lower", "inf_upper": "inf_cuml_upper"}
+
+# the countries whose deaths data end in the middle of a quarter: the year and quarter to complete, and the month
+# whose average daily deaths are used to complete it
+death_extrapolations = [("Kazakhstan", 2021, 3, 9), ("Kyrgyzstan", 2022, 1, 3), ("Uzbekistan", 2022, 1, 2)]
+
+# the columns that the cost and QALY scripts sum to the country-quarter
+quarterly_cols = ["inf_mean", "daily_deaths", "admis_mean", "icu_beds_mean"]
+
+# the number of rows of the CSV to read at a time
+ihme_chunk_size = 500000
+
+def iter_ihme_csv(path = ihme_path, countries = None, chunksize = None):
+    """
+    Read the IHME COVID data a chunk of rows at a time, keeping only the rows that are used: the reference scenario
+    to the end of Q2 2022 (and the given countries), so that the whole file is never in memory.
+
+    Parameters
+    ----------
+    path : string, optional
+        The path of the IHME COVID data. The default is ihme_path.
+    countries : list, optional
+        The countries to keep (authors' names). The default is None, for all countries.
+    chunksize : integer, optional
+        The number of rows to read at a time. The default is None, which uses ihme_chunk_size.
+
+    Yields
+    ------
+    chunk : data frame
+        The kept rows of a chunk, with authors' country names in "country" and year and quarter fields.
+
+    """
+    for chunk in pd.read_csv(path, usecols = list(ihme_dtypes), dtype = ihme_dtypes,
+                             chunksize = ihme_chunk_size if chunksize is None else chunksize):
+        # the dates are written as YYYY-MM-DD, so they can be compared as strings
+        chunk = chunk[(chunk["version_name"] == "reference") & (chunk["date"] < "2022-07-01")]
+        chunk = chunk.drop(columns = ["version_name"])
+
+        # rename countries and the location_name column
+        chunk["location_name"] = chunk["location_name"].replace(replace_dict)
+        chunk = chunk.rename(columns = {"location_name": "country"})
+        if countries is not None:
+            chunk = chunk[chunk["country"].isin(countries)]
+
+        # create a year and quarter field
+        dates = pd.to_datetime(chunk["date"])
+        chunk["year"] = dates.dt.year
+        chunk["quarter"] = dates.dt.quarter
+        yield chunk
+
+def read_ihme_csv(path = ihme_path, countries = None, chunksize = None):
+    """
+    Returns
+    -------
+    ihme : data frame
+        The kept rows of the IHME COVID data (see iter_ihme_csv), sorted by country and date.
+
+    """
+    ihme = pd.concat(list(iter_ihme_csv(path, countries, chunksize)), axis = 0)
+    return ihme.sort_values(["country", "year", "quarter", "date"])
+
+def clean_ihme_daily(ihme, popdata, countries = None):
+    """
+    Parameters
+    ----------
+    ihme : data frame
+        The IHME COVID data, from read_ihme_csv.
+    popdata : data frame
+        The population data, with country, year and tot_pop.
+    countries : list, optional
+        The countries to keep (before the 1M population filter). The default is None, for all countries.
+
+    Returns
+    -------
+    ihme_1m : data frame
+        The cleaned daily data (see above), with a year-quarter field.
+
+    """
+    # add population data and only keep countries with population > 1M, and Macao
+    ihme_df = ihme.merge(popdata, on = ["country", "year"], how = "left")
+    if countries is not None:
+        ihme_df = ihme_df[ihme_df.country.isin(countries)]
+    ihme_1m = ihme_df[(ihme_df["tot_pop"] >= 1000000) | (ihme_df["country"] == "Macao")].copy()
+
+    # make sure that the new deaths and infections records on the first day equal the cumulative records on that
+    # day. the first day is the country's first non-empty daily_deaths (inf_mean) record.
+    first_deaths = ihme_1m[ihme_1m["daily_deaths"].notna()].groupby("country")["date"].min()
+    first_infs = ihme_1m[ihme_1m["inf_mean"].notna()].groupby("country")["date"].min()
+    on_first_deaths = ihme_1m["date"] == ihme_1m["country"].map(first_deaths)
+    on_first_infs = ihme_1m["date"] == ihme_1m["country"].map(first_infs)
+    for daily, cumulative in first_death_cols.items():
+        ihme_1m.loc[on_first_deaths, daily] = ihme_1m.loc[on_first_deaths, cumulative]
+    for daily, cumulative in first_inf_cols.items():
+        ihme_1m.loc[on_first_infs, daily] = ihme_1m.loc[on_first_infs, cumulative]
+
+    # the epidemiological columns
+    numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
+    epi_cols = list(set(ihme_1m.select_dtypes(include=numerics).columns) - set(["year", "quarter", "yyyy_qq", "tot_pop",
+                                                                                "infection_fatality"]))
+
+    # IHME's data for China include Hong Kong and Macao, so subtract their values from China's for each date
+    mc_hk = ihme_1m[ihme_1m["country"].isin(["Macao", "Hong Kong"])]
+    mc_hk = mc_hk.groupby("date")[epi_cols].sum()
+    china = ihme_1m[ihme_1m["country"] == "China"].set_index("date")
+    china = china[epi_cols]
+    china_update = china.subtract(mc_hk, level=0)
+    china_update = china_update.reset_index()
+    china_update["country"] = "China"
+    # add the rest of the IHME data for China to the updated China data
+    china_update = china_update.merge(ihme_df, on = ["country", "date"], how = "left")
+    china_update = china_update.loc[:,~china_update.columns.str.contains('_y')]
+    china_update.columns = china_update.columns.str.replace(r'_x$', '', regex = True)
+
+    # replace the old China data
+    ihme_1m = ihme_1m[ihme_1m["country"] != "China"]
+    ihme_1m = pd.concat([ihme_1m, china_update], axis = 0)
+
+    # create a year-quarter field
+    ihme_1m["yyyy_qq"] = ihme_1m["year"].astype(str) + "_Q" + ihme_1m["quarter"].astype(str)
+    return ihme_1m
+
+def ihme_cache_key(popdata, options, path = ihme_path):
+    """
+    Returns
+    -------
+    key : string
+        A hex digest of the CSV's size and modification time, the population data, the options (e.g., the countries
+        kept) and this file.
+
+    """
+    stat = os.stat(path)
+    hasher = hashlib.sha256()
+    hasher.update(repr([os.path.abspath(path), stat.st_size, stat.st_mtime_ns, options]).encode())
+    hasher.update(pd.util.hash_pandas_object(popdata, index = False).to_numpy().tobytes())
+    with open(os.path.abspath(__file__), "rb") as f:
+        hasher.update(f.read())
+    return hasher.hexdigest()
+
+def cached_ihme(name, key, build):
+    """
+    Parameters
+    ----------
+    name : string
+        The name of the saved file, ../output/ihme_cache/<name>.pkl.
+    key : string
+        The key of the data, from ihme_cache_key.
+    build : function
+        Makes the data if the saved file is missing or has another key.
+
+    Returns
+    -------
+    data : data frame
+        The saved data if its key matches, and the data from build (which is then saved) otherwise.
+
+    """
+    cache_path = os.path.join(ihme_cache_dir, name + ".pkl")
+    if os.path.exists(cache_path):
+        cached = pd.read_pickle(cache_path)
+        if cached["key"] == key:
+            return cached["data"].copy()
+
+    data = build()
+
+    # write to a temporary file first, so that a script reading the file never sees it half-written
+    os.makedirs(ihme_cache_dir, exist_ok = True)
+    temp_path = cache_path + "." + str(os.getpid()) + ".tmp"
+    pd.to_pickle({"key": key, "data": data}, temp_path)
+    os.replace(temp_path, cache_path)
+    return data
+
+def load_ihme_daily(popdata, countries = None, name = "ihme_daily", path = ihme_path):
+    """
+    Get the cleaned daily IHME COVID data, from ../output/ihme_cache/<name>.pkl if it was saved with the same CSV,
+    population data, countries and code, and by reading the CSV (and saving the result) otherwise.
+
+    Parameters
+    ----------
+    popdata : data frame
+        The population data, with country, year and tot_pop.
+    countries : list, optional
+        The countries to keep (before the 1M population filter). The default is None, for all countries.
+    name : string, optional
+        The name of the saved file. The default is "ihme_daily".
+    path : string, optional
+        The path of the IHME COVID data. The default is ihme_path.
+
+    Returns
+    -------
+    ihme_1m : data frame
+        The cleaned daily data.
+
+    """
+    if countries is not None:
+        countries = sorted(countries)
+    key = ihme_cache_key(popdata, ["daily", countries], path)
+    return cached_ihme(name, key, lambda: clean_ihme_daily(read_ihme_csv(path, countries), popdata, countries))
+
+def collapse_ihme_quarterly(ihme_1m, cols, drop_countries = None):
+    """
+    Parameters
+    ----------
+    ihme_1m : data frame
+        The cleaned daily data, from load_ihme_daily.
+    cols : list
+        The columns to sum to the country-quarter (e.g., inf_mean and daily_deaths).
+    drop_countries : list, optional
+        Countries to drop (e.g., Macao). The default is None, for none.
+
+    Returns
+    -------
+    ihme_q_cd : data frame
+        The sums of cols by country, year, quarter, year-quarter and population.
+
+    """
+    ihme_q = ihme_1m[["date", "country", "year", "quarter", "yyyy_qq"] + cols + ["tot_pop"]].copy()
+    if drop_countries is not None:
+        ihme_q = ihme_q[~ihme_q["country"].isin(drop_countries)]
+
+    # make sure the date column is being interpreted as a datetime object, and sort the data
+    ihme_q["date"] = pd.to_datetime(ihme_q["date"])
+    ihme_q = ihme_q.sort_values(["country", "year", "quarter", "date"])
+
+    # for Kazakhstan, Kyrgyzstan, and Uzbekistan, make sure their last quarter with some data has complete data by
+    # extrapolating the average daily deaths of its last month to the end of the quarter
+    death_df = ihme_1m[ihme_1m["daily_deaths"].notna()]
+    death_month = pd.to_datetime(death_df["date"]).dt.month
+    for country, year, quarter, month in death_extrapolations:
+        in_month = (death_df["country"] == country) & (death_df["year"] == year) & (death_month == month)
+        for col in ["daily_deaths", "daily_deaths_unscaled"]:
+            if col in cols:
+                ihme_q.loc[(ihme_q["country"] == country) & (ihme_q["year"] == year) &
+                           (ihme_q["quarter"] == quarter) & (ihme_q[col].isna()),
+                           col] = death_df.loc[in_month, col].mean()
+
+    # collapse to the country-quarter
+    return ihme_q.groupby(["country", "year", "quarter", "yyyy_qq", "tot_pop"])[cols].sum().reset_index()
+
+def stream_ihme_quarterly(popdata, cols = quarterly_cols, path = ihme_path, chunksize = None):
+    """
+    Collapse the IHME COVID data to the country-quarter while reading it, giving the same sums as
+    collapse_ihme_quarterly(clean_ihme_daily(read_ihme_csv(path), popdata), cols) without the daily data of every
+    country in memory. The daily rows of the countries with special treatment (China, Hong Kong and Macao, and the
+    countries whose deaths are extrapolated) are kept and cleaned as usual. The other countries' rows are summed by
+    country-quarter chunk by chunk, and their first infections and deaths records are set to the cumulative values by
+    adding the difference to the quarter's sums at the end.
+
+    Parameters
+    ----------
+    popdata : data frame
+        The population data, with country, year and tot_pop.
+    cols : list, optional
+        The columns to sum. The default is quarterly_cols.
+    path : string, optional
+        The path of the IHME COVID data. The default is ihme_path.
+    chunksize : integer, optional
+        The number of rows to read at a time. The default is None, which uses ihme_chunk_size.
+
+    Returns
+    -------
+    ihme_q_cd : data frame
+        The sums of cols by country, year, quarter, year-quarter and population.
+
+    """
+    keys = ["country", "year", "quarter", "tot_pop"]
+    special_countries = ["China", "Hong Kong", "Macao"] + [x[0] for x in death_extrapolations]
+    # the first-day records that are changed, by the column that marks the first day
+    first_cols = {"daily_deaths": {x: y for x, y in first_death_cols.items() if x in cols},
+                  "inf_mean": {x: y for x, y in first_inf_cols.items() if x in cols}}
+
+    special = []
+    sums = []
+    firsts = {x: [] for x in first_cols}
+    for chunk in iter_ihme_csv(path, chunksize = chunksize):
+        is_special = chunk["country"].isin(special_countries)
+        special.append(chunk[is_special])
+
+        # add population data and only keep countries with population > 1M
+        chunk = chunk[~is_special].merge(popdata, on = ["country", "year"], how = "left")
+        chunk = chunk[chunk["tot_pop"] >= 1000000]
+        sums.append(chunk.groupby(keys)[cols].sum())
+
+        # keep each country's earliest non-empty records in the chunk
+        for marker in first_cols:
+            marked = chunk[chunk[marker].notna()]
+            firsts[marker].append(marked[marked["date"] == marked.groupby("country")["date"].transform("min")])
+
+    # set the first records to the cumulative values, by adding the difference to the sums
+    for marker, changes in first_cols.items():
+        marked = pd.concat(firsts[marker], axis = 0)
+        marked = marked[marked["date"] == marked.groupby("country")["date"].transform("min")]
+        change = marked[keys].copy()
+        for col in cols:
+            change[col] = 0.0
+        for daily, cumulative in changes.items():
+            change[daily] = marked[cumulative].fillna(0) - marked[daily].fillna(0)
+        sums.append(change.groupby(keys)[cols].sum())
+    ihme_q_cd = pd.concat(sums, axis = 0).groupby(level = keys).sum().reset_index()
+    ihme_q_cd["yyyy_qq"] = ihme_q_cd["year"].astype(str) + "_Q" + ihme_q_cd["quarter"].astype(str)
+
+    # clean and collapse the countries with special treatment as usual
+    special = pd.concat(special, axis = 0).sort_values(["country", "year", "quarter", "date"])
+    special = collapse_ihme_quarterly(clean_ihme_daily(special, popdata), cols)
+
+    ihme_q_cd = pd.concat([ihme_q_cd, special], axis = 0)
+    ihme_q_cd = ihme_q_cd[["country", "year", "quarter", "yyyy_qq", "tot_pop"] + cols]
+    return ihme_q_cd.sort_values(["country", "year", "quarter", "yyyy_qq", "tot_pop"]).reset_index(drop = True)
+
+def load_ihme_quarterly(popdata, drop_countries = None, cols = quarterly_cols, name = "ihme_quarterly",
+                        path = ihme_path):
+    """
+    Get the country-quarter sums of the IHME COVID data (see stream_ihme_quarterly), from
+    ../output/ihme_cache/<name>.pkl if they were saved with the same CSV, population data, columns and code, and by
+    reading the CSV (and saving the result) otherwise.
+
+    Parameters
+    ----------
+    popdata : data frame
+        The population data, with country, year and tot_pop.
+    drop_countries : list, optional
+        Countries to drop (e.g., Macao). The default is None, for none.
+    cols : list, optional
+        The columns to sum. The default is quarterly_cols.
+    name : string, optional
+        The name of the saved file. The default is "ihme_quarterly".
+    path : string, optional
+        The path of the IHME COVID data. The default is ihme_path.
+
+    Returns
+    -------
+    ihme_q_cd : data frame
+        The sums of cols by country, year, quarter, year-quarter and population.
+
+    """
+    key = ihme_cache_key(popdata, ["quarterly", list(cols)], path)
+    ihme_q_cd = cached_ihme(name, key, lambda: stream_ihme_quarterly(popdata, list(cols), path))
+    if drop_countries is not None:
+        ihme_q_cd = ihme_q_cd[~ihme_q_cd["country"].isin(drop_countries)].reset_index(drop = True)
+    return ihme_q_cd
+
+if __name__ == "__main__":
+    # save the country-quarter data for the scripts that use the processed population file
+    load_ihme_quarterly(read_output(os.path.join(root, "output", "national_population_2020_2021_2022.xlsx")))
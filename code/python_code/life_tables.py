@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+life_tables.py: Computes the losses from a death (QALYs, paid and unpaid work) from the UN WPP single-age life tables.
+
+The losses from a death at age a are the Briggs et al. sum over the remaining ages i = a, ..., 100 of the person-years
+lived L(i), times a value per year of life V(i) (e.g., the health utility Q), discounted by (1 + r)^-(i - a), divided
+by the survivors l(a). The life tables are reshaped to (country x age) arrays and the sums for all the ages are
+taken at once, as reversed cumulative sums of L(i)*V(i)*(1 + r)^-i, for any number of discount rates.
+
+The losses are then averaged over the age buckets of the COVerAGE death age structures, weighted by the survivors
+l(a). fatal_losses does both for any number of values per year of life (QALYs, annual earnings, the annual value of
+unpaid work, ...) and discount rates in one call, so a new outcome is another entry in its dictionary of values.
+
+age_structure_losses turns them into the losses per death in each country-quarter, by joining the quarterly
+proportions of deaths in each age bucket (prop_0, ..., prop_75) to the (country x age bucket) losses on the country.
+
+usage (from a script folder, e.g. QALYs):
+    import sys
+    sys.path.append("..")
+    from life_tables import life_table_matrix, fatal_losses
+"""
+import numpy as np
+import pandas as pd
+
+# the columns of the life tables
+age_col = "Age (x)"
+person_years_col = "Number of person-years lived L(x,n)"
+survivors_col = "Number of survivors l(x)"
+
+# the ages of the life tables (100 is the final age)
+life_table_ages = list(range(0, 101))
+
+# the first and last ages of the age buckets of the COVerAGE death age structures
+age_buckets_dict = {0:14, 15:24, 25:34, 35:44, 45:54, 55:64, 65:74, 75:100}
+
+def life_table_matrix(lifetables, col, country_col = "country", age_col = age_col):
+    """
+    Parameters
+    ----------
+    lifetables : data frame
+        The single-age life tables, with a row per country and age.
+    col : string
+        The column to reshape.
+    country_col : string, optional
+        The country column. The default is "country".
+    age_col : string, optional
+        The age column. The default is "Age (x)".
+
+    Returns
+    -------
+    matrix : data frame
+        The column as a (country x age) data frame, with the countries in the order they appear in the life tables
+        and the ages in life_table_ages.
+
+    """
+    matrix = lifetables.pivot(index = country_col, columns = age_col, values = col).astype(float)
+    return matrix.reindex(index = lifetables[country_col].unique(), columns = life_table_ages)
+
+def discounted_life_years(values, L, l, discount_rates):
+    """
+    Calculates the discounted value of the remaining life years at each age using the Briggs et al. formula, for
+    all the countries, ages and discount rates at once.
+
+    Parameters
+    ----------
+    values : data frame or array
+        The value of a year of life (e.g., the health utility Q) at each age, as a (country x age) matrix; or a
+        single value for every country and age (1 gives the discounted life expectancy).
+    L : data frame
+        The person-years lived, L(x,n), as a (country x age) matrix from life_table_matrix.
+    l : data frame
+        The number of survivors, l(x), as a (country x age) matrix from life_table_matrix.
+    discount_rates : float or list
+        The annual discount rate, or a list of them.
+
+    Returns
+    -------
+    losses : array
+        The discounted losses from a death at each age (e.g., dQALY), with shape (discount rate x country x age),
+        or (country x age) if a single discount rate is given.
+
+    """
+    rates = np.atleast_1d(np.asarray(discount_rates, dtype = float))
+    ages = np.asarray(L.columns, dtype = float)
+    # the discount factor from age 0 to each age, (1 + r)^-i, for each discount rate
+    discount = (1 + rates[:, None])**(-ages[None, :])
+    # the discounted value of the years lived at each age, summed from the last age back to each age
+    discounted = (np.asarray(L, dtype = float)*np.asarray(values, dtype = float))[None, :, :]*discount[:, None, :]
+    remaining = np.flip(np.cumsum(np.flip(discounted, axis = 2), axis = 2), axis = 2)
+    # discount back to each age, and divide by the survivors at that age (Equation 3 in the text)
+    losses = remaining/discount[:, None, :]/np.asarray(l, dtype = float)[None, :, :]
+    if np.ndim(discount_rates) == 0:
+        return losses[0]
+    return losses
+
+def age_bucket_average(losses, l, age_buckets = age_buckets_dict):
+    """
+    Calculates the population-weighted average of the losses at each age over the age buckets (Equation 4 in the
+    text), with the survivors l(x) as the weights.
+
+    Parameters
+    ----------
+    losses : array
+        The losses at each age, with the ages on the last axis, e.g. from discounted_life_years.
+    l : data frame
+        The number of survivors, l(x), as a (country x age) matrix from life_table_matrix.
+    age_buckets : dictionary, optional
+        The last age of each age bucket, keyed by its first age. The default is age_buckets_dict.
+
+    Returns
+    -------
+    averages : array
+        The average losses in each age bucket, with the age buckets (in the order of age_buckets) on the last axis.
+
+    """
+    ages = np.asarray(l.columns, dtype = float)
+    # a matrix of the weight of each age in each age bucket
+    weights = np.stack([np.where((ages >= first) & (ages <= last), np.asarray(l, dtype = float), 0)
+                        for first, last in age_buckets.items()], axis = -1)
+    weighted = np.nan_to_num(np.asarray(losses, dtype = float))[..., :, None]*weights[..., :, :]
+    averages = weighted.sum(axis = -2)/weights.sum(axis = -2)
+    # as in np.average, a missing loss or weight in an age bucket makes its average missing
+    in_bucket = weights != 0
+    missing = (np.isnan(np.asarray(losses, dtype = float))[..., :, None] & in_bucket).any(axis = -2)
+    return np.where(missing, np.nan, averages)
+
+def fatal_losses(values, L, l, discount_rates, age_buckets = age_buckets_dict):
+    """
+    Calculates the discounted losses from a death at each age, and their population-weighted averages over the age
+    buckets, for several values of a year of life and discount rates at once.
+
+    Parameters
+    ----------
+    values : dictionary
+        The value of a year of life at each age as a (country x age) data frame, keyed by the name of the loss (e.g.,
+        {"Q_fatal": Q}). Each loss is calculated for the countries of its data frame; the life tables of countries
+        without them are missing, and so are their losses.
+    L : data frame
+        The person-years lived, L(x,n), as a (country x age) matrix from life_table_matrix.
+    l : data frame
+        The number of survivors, l(x), as a (country x age) matrix from life_table_matrix.
+    discount_rates : dictionary
+        The annual discount rates, keyed by the suffix of their columns (e.g., {"": 0.03, "_nodsct": 0}).
+    age_buckets : dictionary, optional
+        The last age of each age bucket, keyed by its first age. The default is age_buckets_dict.
+
+    Returns
+    -------
+    age_losses : dictionary
+        For each loss, the losses from a death at each age, as an array with shape (discount rate x country x age)
+        in the order of discount_rates and of the countries of its values.
+    bucket_losses : dictionary
+        For each loss, a data frame with a row per country and age bucket ("country", "first_age" and "last_age",
+        sorted by country and first age) and a column per discount rate (the name of the loss and its suffix).
+
+    """
+    rates = list(discount_rates.values())
+    age_losses = dict()
+    bucket_losses = dict()
+    for name, value in values.items():
+        # the life tables of the countries (and ages) with values
+        value = value.reindex(columns = L.columns)
+        name_L = L.reindex(index = value.index)
+        name_l = l.reindex(index = value.index)
+        age_losses[name] = discounted_life_years(value, name_L, name_l, rates)
+        averages = age_bucket_average(age_losses[name], name_l, age_buckets)
+
+        # reshape the averages to a row per country and age bucket
+        buckets = pd.DataFrame({"country": np.repeat(value.index.to_numpy(), len(age_buckets)),
+                                "first_age": np.tile(list(age_buckets.keys()), len(value.index)),
+                                "last_age": np.tile(list(age_buckets.values()), len(value.index))})
+        for i, suffix in enumerate(discount_rates):
+            buckets[name + suffix] = averages[i].reshape(-1)
+        bucket_losses[name] = buckets.sort_values(["country", "first_age"]).reset_index(drop = True)
+    return age_losses, bucket_losses
+
+def age_structure_losses(coverage, bucket_losses, loss_col, prefix, total_col, age_buckets = age_buckets_dict):
+    """
+    Calculates the average loss per death in each country-quarter, as the sum over the age buckets of the proportion
+    of deaths in the age bucket times the loss from a death in it.
+
+    Parameters
+    ----------
+    coverage : data frame
+        The COVerAGE death age structures, with "country", "yyyy_qq" and the proportions of deaths in each age
+        bucket ("prop_" + its first age).
+    bucket_losses : data frame
+        The losses from a death in each age bucket, with "country" and "first_age", e.g. from fatal_losses.
+    loss_col : string
+        The column of bucket_losses with the losses.
+    prefix : string
+        The prefix of the columns with the losses in each age bucket (e.g., "qaly_" for "qaly_0", ..., "qaly_75").
+    total_col : string
+        The column with the average loss per death (e.g., "Q_fatal").
+    age_buckets : dictionary, optional
+        The last age of each age bucket, keyed by its first age. The default is age_buckets_dict.
+
+    Returns
+    -------
+    fatal_df : data frame
+        A data frame with a row per row of coverage, with "country", "yyyy_qq", the losses in each age bucket and
+        their sum in total_col. A missing proportion counts as zero. The losses of countries without bucket_losses
+        are missing, and the countries are printed.
+
+    """
+    first_ages = list(age_buckets.keys())
+    # the (country x age bucket) losses, in the rows of coverage
+    losses = bucket_losses.pivot(index = "country", columns = "first_age", values = loss_col)
+    losses = losses.reindex(columns = first_ages).astype(float)
+    has_losses = coverage["country"].isin(losses.index).to_numpy()
+    missing = coverage.loc[~has_losses, "country"].unique()
+    if len(missing) > 0:
+        print("No " + loss_col + " for the COVerAGE countries: " + ", ".join(str(x) for x in missing) + ".")
+    row_losses = losses.reindex(index = coverage["country"]).to_numpy()
+
+    # multiply the proportion of deaths in each age bucket by the loss from a death in it, and sum over the buckets
+    props = coverage[["prop_" + str(x) for x in first_ages]].to_numpy(dtype = float)
+    bucket_cols = [prefix + str(x) for x in first_ages]
+    fatal_df = pd.concat([coverage[["country", "yyyy_qq"]],
+                          pd.DataFrame(props*row_losses, index = coverage.index, columns = bucket_cols)], axis = 1)
+    fatal_df[total_col] = fatal_df[bucket_cols].sum(axis = 1).where(has_losses)
+    return fatal_df
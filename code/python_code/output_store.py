@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+output_store.py: Reads and writes the processed files that the scripts hand to each other in ../output.
+
+Each processed file is written as a typed columnar file (parquet or feather) next to the Excel file it replaces,
+e.g. ../output/fullincome.parquet for ../output/fullincome.xlsx, with the pandas schema (column types, including
+categories) stored in its metadata. The Excel file is still written for people to open unless export_excel is
+False. Readers take the columnar file if it is at least as new as the Excel file, and the Excel file otherwise,
+so files made elsewhere (e.g., by the Stata code) or edited by hand are still picked up.
+
+The columnar files need pyarrow; without it, everything is read from and written to Excel as before.
+
+usage (from a script folder, e.g. ANALYSIS):
+    import sys
+    sys.path.append("..")
+    from output_store import read_output, write_output
+"""
+import importlib.util
+import os
+import warnings
+import pandas as pd
+
+# the format of the intermediate files ("parquet", "feather", or "excel" for the Excel files only)
+store_format = os.environ.get("OUTPUT_STORE_FORMAT", "parquet")
+# whether to also write the Excel files
+export_excel = os.environ.get("OUTPUT_STORE_EXCEL", "1") != "0"
+
+store_extensions = {"parquet": ".parquet", "feather": ".feather"}
+
+def columnar_enabled():
+    """
+    Returns
+    -------
+    enabled : boolean
+        Whether the columnar files are used (a columnar store_format, with pyarrow installed).
+
+    """
+    return store_format in store_extensions and importlib.util.find_spec("pyarrow") is not None
+
+def store_path(path):
+    """
+    Parameters
+    ----------
+    path : string
+        The path of the Excel file, e.g. "../output/fullincome.xlsx".
+
+    Returns
+    -------
+    store_path : string
+        The path of the columnar file, e.g. "../output/fullincome.parquet".
+
+    """
+    return os.path.splitext(path)[0] + store_extensions[store_format]
+
+def write_output(df, path, excel = None):
+    """
+    Write a processed file: the columnar file, and the Excel file if export_excel (or excel) is set or the columnar
+    file can't be written. The index is not written, as in to_excel(path, index = False).
+
+    Parameters
+    ----------
+    df : data frame
+        The data to write.
+    path : string
+        The path of the Excel file, e.g. "../output/fullincome.xlsx".
+    excel : boolean, optional
+        Whether to write the Excel file. The default is None, which uses export_excel.
+
+    Returns
+    -------
+    None.
+
+    """
+    if excel is None:
+        excel = export_excel
+    if not columnar_enabled():
+        df.to_excel(path, index = False)
+        return
+
+    # write the Excel file first, so that the columnar file is the newer of the two
+    if excel:
+        df.to_excel(path, index = False)
+    columnar = store_path(path)
+    try:
+        if store_format == "parquet":
+            df.to_parquet(columnar, index = False)
+        else:
+            df.reset_index(drop = True).to_feather(columnar)
+    except (TypeError, ValueError) as e:
+        # e.g., an object column with mixed types; keep only the Excel file so a stale columnar file isn't read
+        warnings.warn("Could not write " + columnar + " (" + str(e) + "); writing " + path + " only.")
+        if os.path.exists(columnar):
+            os.remove(columnar)
+        if not excel:
+            df.to_excel(path, index = False)
+
+def resolve_output(path):
+    """
+    Parameters
+    ----------
+    path : string
+        The path of the Excel file, e.g. "../output/fullincome.xlsx".
+
+    Returns
+    -------
+    path : string
+        The file that read_output reads: the columnar file if it exists and is at least as new as the Excel file, 
+        and the Excel file otherwise.
+
+    """
+    if columnar_enabled():
+        columnar = store_path(path)
+        if os.path.exists(columnar) and (not os.path.exists(path) or os.path.getmtime(columnar) >= os.path.getmtime(path)):
+            return columnar
+    return path
+
+def read_output(path, **kwargs):
+    """
+    Read a processed file: the columnar file if it exists and is at least as new as the Excel file, and the Excel
+    file otherwise.
+
+    Parameters
+    ----------
+    path : string
+        The path of the Excel file, e.g. "../output/fullincome.xlsx".
+    **kwargs
+        Options for pd.read_excel (e.g., sheet_name). The columnar file is only used without them.
+
+    Returns
+    -------
+    df : data frame
+        The data.
+
+    """
+    if len(kwargs) == 0:
+        source = resolve_output(path)
+        if source != path:
+            if store_format == "parquet":
+                return pd.read_parquet(source)
+            return pd.read_feather(source)
+    return pd.read_excel(path, **kwargs)
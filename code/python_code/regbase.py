@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+regbase.py: The schema of the quarterly regression base file, and a loader that checks and applies it.
+
+inputs:
+    - ihme_quarterly_regbase_boosters.xlsx (processed file; created in ihme_portal.py)
+
+The regression base has a row per country-quarter. In the schema, the country, quarter and region columns are
+categorical (sorted, so that they sort as the strings did), the year, quarter and indicator columns are nullable
+integers, and the other columns (infections, deaths, uptake, GDP gap and population) are float64. The uptake columns
+are regressors, so they keep float64's precision.
+
+A data frame filtered from the regression base keeps the categories of the countries and quarters that were
+filtered out; drop_unused_categories removes them, so that a regression formula doesn't make all-zero dummy columns
+of them.
+
+ihme_portal.py writes the file with the schema applied, so the columnar file already has these types and loading it
+only checks them. Other data frames' country and quarter columns can be given the regression base's categories with
+match_regbase_keys, so that merges with it on ["country", "yyyy_qq"] join on the category codes.
+
+usage (from a script folder, e.g. ANALYSIS):
+    import sys
+    sys.path.append("..")
+    from regbase import load_regbase, match_regbase_keys, drop_unused_categories
+"""
+import os
+import pandas as pd
+from output_store import read_output
+
+root = os.path.dirname(os.path.abspath(__file__))
+regbase_path = os.path.join(root, "output", "ihme_quarterly_regbase_boosters.xlsx")
+
+# the columns that identify a row
+regbase_keys = ["country", "yyyy_qq"]
+# the categorical columns
+regbase_categories = ["country", "yyyy_qq", "WHO_region", "WB_income_group_1"]
+# the integer columns (year, quarter, and the country and time indicators)
+regbase_integers = {"year": "Int16", "quarter": "Int8", "country_group": "Int16", "time": "Int16"}
+# the float64 columns that the regression base must have
+regbase_float64 = ["inf_mean", "inf_lower", "inf_upper", "daily_deaths", "daily_deaths_unscaled", "gdp_gap", "tot_pop"]
+
+def regbase_dtypes(columns):
+    """
+    Parameters
+    ----------
+    columns : list
+        The columns of the regression base.
+
+    Returns
+    -------
+    dtypes : dictionary
+        The type of each column, keyed by column: "category", a nullable integer type, or "float64".
+
+    """
+    dtypes = dict()
+    for col in columns:
+        if col in regbase_categories:
+            dtypes[col] = "category"
+        elif col in regbase_integers:
+            dtypes[col] = regbase_integers[col]
+        else:
+            dtypes[col] = "float64"
+    return dtypes
+
+def apply_regbase_schema(df):
+    """
+    Check the regression base and give its columns the types in regbase_dtypes. Columns that already have their
+    type are not copied.
+
+    Parameters
+    ----------
+    df : data frame
+        The regression base.
+
+    Returns
+    -------
+    df : data frame
+        The regression base, with the schema's types.
+
+    """
+    # check the columns and the country-quarter keys
+    required = regbase_categories + list(regbase_integers) + regbase_float64
+    missing = [x for x in required if x not in df.columns]
+    if len(missing) > 0:
+        raise ValueError("The regression base is missing the columns: " + ", ".join(missing) + ".")
+    if df[regbase_keys].isna().any().any():
+        raise ValueError("The regression base has rows without a country or quarter.")
+    duplicated = df.duplicated(subset = regbase_keys)
+    if duplicated.any():
+        raise ValueError("The regression base has " + str(duplicated.sum()) + " duplicated country-quarters, e.g. " +
+                         " ".join(df.loc[duplicated, regbase_keys].astype(str).iloc[0]) + ".")
+    text_cols = [x for x in df.columns if x not in regbase_categories and
+                 not pd.api.types.is_numeric_dtype(df[x])]
+    if len(text_cols) > 0:
+        raise ValueError("The regression base has non-numeric data in the columns: " + ", ".join(text_cols) + ".")
+
+    # cast the columns whose type differs from the schema's (with sorted categories)
+    casts = dict()
+    for col, dtype in regbase_dtypes(df.columns).items():
+        if dtype == "category":
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                casts[col] = pd.CategoricalDtype(sorted(df[col].dropna().unique()))
+        elif df[col].dtype != dtype:
+            casts[col] = dtype
+    if len(casts) > 0:
+        df = df.astype(casts)
+    return df
+
+def load_regbase(path = regbase_path):
+    """
+    Read the regression base (the columnar file if it is current, and the Excel file otherwise) with the schema's
+    types.
+
+    Parameters
+    ----------
+    path : string, optional
+        The path of the Excel file. The default is regbase_path.
+
+    Returns
+    -------
+    df : data frame
+        The regression base.
+
+    """
+    return apply_regbase_schema(read_output(path))
+
+def match_regbase_keys(df, regbase, keys = regbase_keys):
+    """
+    Give another data frame's key columns the regression base's categories, so that a merge with the regression base
+    joins on the category codes. Keys that aren't in the regression base become missing, so this is for data frames
+    that are merged into the regression base (or into data frames taken from it), not the other way round.
+
+    Parameters
+    ----------
+    df : data frame
+        The data frame to merge with the regression base.
+    regbase : data frame
+        The regression base, or a data frame taken from it.
+    keys : list, optional
+        The key columns. The default is regbase_keys.
+
+    Returns
+    -------
+    df : data frame
+        A copy of df with the key columns cast to the regression base's types.
+
+    """
+    return df.astype({x: regbase[x].dtype for x in keys})
+
+def drop_unused_categories(df, columns = regbase_keys):
+    """
+    Remove the categories that no row has from the categorical columns, e.g. the countries and quarters that were
+    filtered out of the regression base.
+
+    Parameters
+    ----------
+    df : data frame
+        A data frame taken from the regression base.
+    columns : list, optional
+        The columns to check, if df has them (e.g., the annual GDP data has no quarters). The default is 
+        regbase_keys.
+
+    Returns
+    -------
+    df : data frame
+        df, or a copy with the unused categories removed.
+
+    """
+    drops = {x: df[x].cat.remove_unused_categories() for x in columns
+             if x in df.columns and isinstance(df[x].dtype, pd.CategoricalDtype) and df[x].nunique() < len(df[x].cat.categories)}
+    if len(drops) > 0:
+        df = df.assign(**drops)
+    return df
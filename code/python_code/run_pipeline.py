@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+run_pipeline.py: Runs the Python scripts in dependency order, re-running only the ones whose code or inputs changed.
+
+Each stage lists the files its script reads and writes (relative to this folder), and depends on the stages that
+write its inputs. Before a stage runs, its fingerprint is taken: a hash of its script and of every input file (of the
+parquet file of a processed file, if that is what read_output reads). The stage is run if the fingerprint differs
+from the one saved after its last successful run, or if one of its outputs is missing. The stages whose dependencies
+are done run at the same time, each as a separate process in its script's folder, with its log in
+output/pipeline_logs. The fingerprints are saved in output/pipeline_state.json.
+
+The Stata code and the files made by hand (e.g., ihme_countries.xlsx, master_country_list.xlsx) are not stages;
+they are inputs, so changing them re-runs the stages that read them.
+
+usage:
+    python run_pipeline.py                  # run the stages that are out of date
+    python run_pipeline.py fullincome       # only bring fullincome (and the stages it depends on) up to date
+    python run_pipeline.py --force          # run every stage
+    python run_pipeline.py --dry-run        # list the stages that would run
+    python run_pipeline.py --jobs 4         # run at most 4 stages at a time
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import output_store
+
+root = os.path.dirname(os.path.abspath(__file__))
+state_path = os.path.join(root, "output", "pipeline_state.json")
+log_dir = os.path.join(root, "output", "pipeline_logs")
+
+# the one-way sensitivity scenarios of the analysis, which each write their own outputs
+sensitivity_names = ["inf_lower", "inf_upper", "deaths_unscaled", "nodsct", "sixpct"]
+
+# the inputs and outputs of each stage, as read and written by its script
+stages = {
+    "forex_only": {
+        "script": "ECONOMIC DATA/forex_only.py",
+        "inputs": ["output_store.py",
+                   "output/ihme_countries.xlsx",
+                   "input/WEO_Documentation.xlsx",
+                   "input/P_Data_Extract_From_World_Development_Indicators-Forex.xlsx",
+                   "input/RprtRateXchg_20010331_20220930.csv",
+                   "input/Exchange rate, new LCU per USD extended backward, period average.xlsx"],
+        "outputs": ["output/forex_2010_to_2019_jk.xlsx"]},
+    "gdp_formatting": {
+        "script": "ECONOMIC DATA/gdp_formatting.py",
+        "inputs": ["output_store.py",
+                   "input/WEOOct2019all.xlsx",
+                   "input/WEOApr2023all.xlsx",
+                   "input/GDP_quarterly_real_seas_adj.xlsx",
+                   "input/GDP_quarterly_nominal_seas_adj.xlsx",
+                   "gdp_projections.py",
+                   "output/ihme_countries.xlsx",
+                   "output/forex_2010_to_2019_jk.xlsx"],
+        "outputs": ["output/gdp_gap_ihme.xlsx", "output/gdp_usd_ihme.xlsx"]},
+    # reads the IHME COVID data once for the cost and QALY scripts, which run at the same time (ihme_portal.py uses
+    # its own population data, so it keeps its own copy)
+    "ihme_data": {
+        "script": "ihme_data.py",
+        "inputs": ["output_store.py",
+                   "input/Historical-and-Projected-Covid-19-data.csv",
+                   "output/national_population_2020_2021_2022.xlsx"],
+        "outputs": ["output/ihme_cache/ihme_quarterly.pkl"]},
+    "ihme_portal": {
+        "script": "IHME/ihme_portal.py",
+        "inputs": ["output_store.py",
+                   "ihme_data.py",
+                   "regbase.py",
+                   "input/WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx",
+                   "input/WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-median_variant.xlsx",
+                   "input/master_country_list.xlsx",
+                   "input/Vaccine-coverage-by-manufacturer-quarterly-countries.csv",
+                   "input/Historical-and-Projected-Covid-19-data.csv",
+                   "input/owid_raw_countries_w_pop_gt_1M.dta",
+                   "output/gdp_gap_ihme.xlsx"],
+        "outputs": ["output/ihme_quarterly_regbase_boosters.xlsx", "output/proxy_adjustment_factors.xlsx"]},
+    "time_use": {
+        "script": "TIME USE/time_use.py",
+        "inputs": ["output_store.py",
+                   "input/Economic parameters.xlsx",
+                   "input/Charmes2019_unpaid_paid_work.xlsx",
+                   "input/WPP2022_POP_F01_2_POPULATION_SINGLE_AGE_MALE.xlsx",
+                   "input/WPP2022_POP_F01_3_POPULATION_SINGLE_AGE_FEMALE.xlsx",
+                   "input/master_country_list.xlsx",
+                   "output/ihme_countries.xlsx"],
+        "outputs": ["output/time_use_processed_ihme.xlsx"]},
+    "fullincome": {
+        "script": "ECONOMIC DATA/fullincome.py",
+        "inputs": ["output_store.py",
+                   "input/final_pcgni_current_2019USD.dta",
+                   "input/hrly_wage_2019USD_final.dta",
+                   "output/time_use_processed_ihme.xlsx"],
+        "outputs": ["output/fullincome.xlsx"]},
+    "direct_costs": {
+        "script": "ECONOMIC DATA/direct_costs.py",
+        "inputs": ["output_store.py",
+                   "input/who_choice_2010.xlsx",
+                   "input/master_country_list.xlsx",
+                   "input/P_Data_Extract_From_World_Development_Indicators-GDP deflators.xlsx",
+                   "input/WEOOct2019all.xlsx",
+                   "input/wdi_ihme_country_match.dta",
+                   "ihme_data.py",
+                   "donor_matching.py",
+                   "output/ihme_cache/ihme_quarterly.pkl",
+                   "input/WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx",
+                   "output/national_population_2020_2021_2022.xlsx",
+                   "output/ihme_countries.xlsx",
+                   "output/forex_2010_to_2019_jk.xlsx"],
+        "outputs": ["output/direct_costs_jk.xlsx"]},
+    "qaly_losses_mean": {
+        "script": "QALYs/qaly_losses_mean.py",
+        "inputs": ["output_store.py",
+                   "ihme_data.py",
+                   "life_tables.py",
+                   "donor_matching.py",
+                   "output/ihme_cache/ihme_quarterly.pkl",
+                   "input/WPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXES.xlsx",
+                   "input/Szende et al.-2014-EQ-5D Index Population Norms.xlsx",
+                   "input/COVerAGE_death_age_structures.xlsx",
+                   "output/national_population_2020_2021_2022.xlsx"],
+        "outputs": ["output/ihme_qaly_vars.xlsx", "output/qaly_severity_splits.xlsx", "output/utility_donors.xlsx"] +
+                   ["output/qaly_losses_overall" + x + ".xlsx" for x in ["", "_nodsct", "_sixpct"]]},
+    "coverage_age_structures": {
+        "script": "COVerAGE/coverage_age_structures.py",
+        "inputs": ["output_store.py",
+                   "input/Output_10.csv", "input/master_country_list.xlsx"],
+        "outputs": ["output/daily_coverage_deaths.xlsx"]},
+    "coverage_age_structures_5year": {
+        "script": "COVerAGE/coverage_age_structures_5year.py",
+        "inputs": ["output_store.py",
+                   "input/Output_5.csv", "input/master_country_list.xlsx"],
+        "outputs": ["output/daily_coverage_deaths_5year.xlsx"]},
+    # the script also reads sur_recursive_and_gdp_subsamples_output.xlsx, but only to compare country coverage; it
+    # isn't listed, as it would make a cycle with the analysis
+    "oxcgrt_indices": {
+        "script": "OXCGRT/oxcgrt_indices.py",
+        "inputs": ["output_store.py",
+                   "input/OxCGRT_timeseries_all.xlsx"],
+        "outputs": ["output/oxcgrt_si_chi_gri.xlsx"]},
+    "sur_recursive_and_gdp_subsamples": {
+        "script": "ANALYSIS/sur_recursive_and_gdp_subsamples.py",
+        "inputs": ["output_store.py",
+                   "regbase.py",
+                   "sur_models.py",
+                   "input/national_population_2019.dta",
+                   "output/ihme_quarterly_regbase_boosters.xlsx",
+                   "output/oxcgrt_si_chi_gri.xlsx",
+                   "output/gdp_usd_ihme.xlsx",
+                   "output/fullincome.xlsx",
+                   "output/direct_costs_jk.xlsx",
+                   "output/table1_updated.xlsx"] +
+                  ["output/qaly_losses_overall" + x + ".xlsx" for x in ["", "_nodsct", "_sixpct"]] +
+                  ["output/indirect_costs_jk" + x + ".xlsx" for x in ["", "_nodsct", "_sixpct"]],
+        "outputs": ["output/sur_recursive_and_gdp_subsamples_global_vov.xlsx",
+                    "output/sur_recursive_and_gdp_subsamples_output.xlsx",
+                    "output/country_comparison.xlsx",
+                    "output/manuscript_tables.xlsx"] +
+                   ["output/sur_recursive_and_gdp_subsamples_" + x + y + ".xlsx" for x in sensitivity_names 
+                    for y in ["_global_vov", "_comp_inf", "_output"]] +
+                   ["output/" + y + x + ".xlsx" for x in sensitivity_names for y in ["tables2_and_3_", "table3_jk_"]]},
+}
+
+# the three indirect cost scripts only differ in the discounting
+for suffix in ["", "_nodsct", "_sixpct"]:
+    stages["indirect_costs" + suffix] = {
+        "script": "ECONOMIC DATA/indirect_costs" + suffix + ".py",
+        "inputs": ["output_store.py",
+                   "ihme_data.py",
+                   "life_tables.py",
+                   "output/ihme_cache/ihme_quarterly.pkl",
+                   "input/WPP2022_POP_F01_1_POPULATION_SINGLE_AGE_BOTH_SEXES-import.xlsx",
+                   "input/WPP2022_MORT_F06_1_SINGLE_AGE_LIFE_TABLE_ESTIMATES_BOTH_SEXES.xlsx",
+                   "input/COVerAGE_death_age_structures.xlsx",
+                   "input/daily_earn_2019USD.dta",
+                   "input/hrly_wage_2019USD_final.dta",
+                   "output/national_population_2020_2021_2022.xlsx",
+                   "output/time_use_processed_ihme.xlsx"] +
+                  (["input/paid_work_loss_nonfatal_case.dta"] if suffix != "" else []),
+        "outputs": ["output/indirect_costs_jk" + suffix + ".xlsx"]}
+
+def stage_dependencies(stages):
+    """
+    Parameters
+    ----------
+    stages : dictionary
+        The stages, with the files each one reads ("inputs") and writes ("outputs").
+
+    Returns
+    -------
+    dependencies : dictionary
+        The stages that write the inputs of each stage.
+
+    """
+    writers = {output: name for name, stage in stages.items() for output in stage["outputs"]}
+    return {name: sorted({writers[x] for x in stage["inputs"] if x in writers and writers[x] != name})
+            for name, stage in stages.items()}
+
+def stage_order(stages, dependencies):
+    """
+    Returns
+    -------
+    order : list
+        The stages in an order in which every stage comes after the stages it depends on.
+
+    """
+    order = []
+    visiting = set()
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError("The stages have a cycle through " + name + ".")
+        visiting.add(name)
+        for dependency in dependencies[name]:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+    for name in stages:
+        visit(name)
+    return order
+
+def file_hash(path, file_hashes):
+    """
+    Hash a file's contents, reusing the hash from file_hashes if the file's size and modification time haven't
+    changed.
+
+    Parameters
+    ----------
+    path : string
+        The path of the file, relative to this folder.
+    file_hashes : dictionary
+        The [size, modification time, hash] of the files hashed before; updated in place.
+
+    Returns
+    -------
+    hash : string
+        The hash of the file, or None if it doesn't exist.
+
+    """
+    full_path = os.path.join(root, path)
+    if not os.path.exists(full_path):
+        return None
+    stat = os.stat(full_path)
+    cached = file_hashes.get(path)
+    if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    hasher = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    file_hashes[path] = [stat.st_size, stat.st_mtime_ns, hasher.hexdigest()]
+    return file_hashes[path][2]
+
+def stage_fingerprint(name, file_hashes):
+    """
+    Returns
+    -------
+    fingerprint : string
+        A hash of the stage's script and of the files it reads now.
+
+    """
+    stage = stages[name]
+    hasher = hashlib.sha256()
+    hasher.update(str(file_hash(stage["script"], file_hashes)).encode())
+    for path in stage["inputs"]:
+        # a processed file is read from its parquet file if it's the newer one
+        if path.startswith("output/"):
+            path = os.path.relpath(output_store.resolve_output(os.path.join(root, path)), root)
+        hasher.update((path + ":" + str(file_hash(path, file_hashes))).encode())
+    return hasher.hexdigest()
+
+def outputs_exist(name):
+    """
+    Returns
+    -------
+    exist : boolean
+        Whether every output of the stage exists (as an Excel or columnar file).
+
+    """
+    return all(os.path.exists(os.path.join(root, x)) or
+               (output_store.columnar_enabled() and os.path.exists(output_store.store_path(os.path.join(root, x))))
+               for x in stages[name]["outputs"])
+
+def load_state():
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            return json.load(f)
+    return {"fingerprints": {}, "file_hashes": {}}
+
+def save_state(state):
+    os.makedirs(os.path.dirname(state_path), exist_ok = True)
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent = 1)
+
+def run_stage(name):
+    """
+    Run a stage's script in its own folder, with its output going to output/pipeline_logs/<name>.log.
+
+    Returns
+    -------
+    returncode : integer
+        The exit code of the script.
+
+    """
+    script = os.path.join(root, stages[name]["script"])
+    os.makedirs(log_dir, exist_ok = True)
+    with open(os.path.join(log_dir, name + ".log"), "w") as log:
+        return subprocess.run([sys.executable, os.path.basename(script)], cwd = os.path.dirname(script),
+                              stdout = log, stderr = subprocess.STDOUT).returncode
+
+def run_pipeline(targets = None, force = False, dry_run = False, jobs = None):
+    """
+    Bring the stages up to date, running the stages whose dependencies are done at the same time.
+
+    Parameters
+    ----------
+    targets : list, optional
+        The stages to bring up to date (with the stages they depend on). The default is None, for all stages.
+    force : boolean, optional
+        If True, run every stage. The default is False.
+    dry_run : boolean, optional
+        If True, only list the stages that would run. The default is False.
+    jobs : integer, optional
+        The most stages to run at a time. The default is None, for the number of CPUs.
+
+    Returns
+    -------
+    status : dictionary
+        "ran", "up to date", "would run", "failed" or "blocked" (a dependency failed) for each stage.
+
+    """
+    dependencies = stage_dependencies(stages)
+    order = stage_order(stages, dependencies)
+    # keep the targets and the stages they depend on
+    selected = set()
+    def select(name):
+        if name not in selected:
+            selected.add(name)
+            for dependency in dependencies[name]:
+                select(dependency)
+    for name in (targets if targets else order):
+        if name not in stages:
+            raise KeyError("Unknown stage " + name + "; the stages are: " + ", ".join(order) + ".")
+        select(name)
+    pending = [x for x in order if x in selected]
+
+    state = load_state()
+    status = dict()
+    running = dict()
+    with ThreadPoolExecutor(max_workers = jobs or os.cpu_count()) as pool:
+        while pending or running:
+            for name in list(pending):
+                dependency_status = [status.get(x) for x in dependencies[name]]
+                if any(x in ("failed", "blocked") for x in dependency_status):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    print(name + ": blocked")
+                    continue
+                if any(x not in ("ran", "up to date", "would run") for x in dependency_status):
+                    continue
+                pending.remove(name)
+
+                # fingerprint the stage once its dependencies are done
+                fingerprint = stage_fingerprint(name, state["file_hashes"])
+                out_of_date = (force or fingerprint != state["fingerprints"].get(name) or not outputs_exist(name) or
+                               (dry_run and "would run" in dependency_status))
+                if not out_of_date:
+                    status[name] = "up to date"
+                elif dry_run:
+                    status[name] = "would run"
+                    print(name + ": would run")
+                else:
+                    print(name + ": running")
+                    running[pool.submit(run_stage, name)] = (name, fingerprint)
+
+            if running:
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint = running.pop(future)
+                    if future.result() == 0:
+                        status[name] = "ran"
+                        state["fingerprints"][name] = fingerprint
+                        print(name + ": done")
+                    else:
+                        status[name] = "failed"
+                        state["fingerprints"].pop(name, None)
+                        print(name + ": failed (see " + os.path.join(log_dir, name + ".log") + ")")
+                    if not dry_run:
+                        save_state(state)
+    if not dry_run:
+        save_state(state)
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Run the Python stages that are out of date, in dependency order.")
+    parser.add_argument("targets", nargs = "*", help = "the stages to bring up to date (default: all)")
+    parser.add_argument("--force", action = "store_true", help = "run every stage")
+    parser.add_argument("--dry-run", action = "store_true", help = "only list the stages that would run")
+    parser.add_argument("--jobs", type = int, default = None, help = "the most stages to run at a time")
+    args = parser.parse_args()
+
+    status = run_pipeline(args.targets, force = args.force, dry_run = args.dry_run, jobs = args.jobs)
+    if any(x in ("failed", "blocked") for x in status.values()):
+        sys.exit(1)
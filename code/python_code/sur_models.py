@@ -0,0 +1,2076 @@
+# -*- coding: utf-8 -*-
+"""
+sur_models.py: The regressions of the value of vaccination analysis (the SUR on infections and deaths, and the
+quarterly and annual GDP regressions), their counterfactual predictions, and the probabilistic sensitivity analysis.
+
+The models are fit once per run (see fit_regression), and SUR_model builds the base case and the no pfizer and no
+vaccination counterfactuals of each one. The PSA draws the parameters of every model from multivariate normal
+distributions in seeded chunks (psa_chunks), evaluates them on design matrices that are built once
+(prepare_psa_models), and folds the value of each draw into running summaries (PSA_accumulator), either in this
+process (run_psa_streaming) or in a pool of spawned worker processes (run_psa_parallel) with the same results.
+
+The module has no side effects when imported, so the PSA worker processes can import it under the spawn start
+method.
+
+usage (from a script folder, e.g. ANALYSIS):
+    import sys
+    sys.path.append("..")
+    from sur_models import SUR_model, prepare_psa_models, run_psa_parallel
+"""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import hashlib
+import multiprocessing as mp
+import os
+import re
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+from linearmodels.system import SUR
+from scipy.stats import multivariate_normal, norm
+import statsmodels.stats.api as sms
+from statsmodels.compat import lzip
+import statsmodels.formula.api as smf
+from statsmodels.iolib.summary import Summary
+from statsmodels.iolib.summary2 import Summary as Summary2
+from statsmodels.iolib.table import SimpleTable
+from regbase import drop_unused_categories
+
+# the slope (non fixed effect) variables in the quarterly regressions
+slope_vars = ["L1_uptake_pfizer", "L2_cum_uptake_pfizer", "L1_uptake_notpfz", "L2_cum_uptake_notpfz", "L1_gri", 
+              "L1_inf_pc", "L2_cum_inf_pc"]
+
+# fitted regressions, keyed by a hash of the regression data, formula and covariance options
+fit_cache = dict()
+# set to a folder (e.g., sur_models.fit_cache_dir = "../output/fit_cache") to also keep the fits on disk between runs
+fit_cache_dir = None
+
+def fit_key(data, kind, formula, cov_type):
+    """
+    Hash the regression data, formula and covariance options into a key for the fit cache. Only the columns named
+    in the formula are hashed, so a regression is reused when other columns of the data change.
+
+    Parameters
+    ----------
+    data : data frame
+        A data frame containing the regression data.
+    kind : string
+        "sur" (a SUR on a dictionary of formulae) or "ols".
+    formula : string or dictionary
+        The formula, or a dictionary of formulae for a SUR.
+    cov_type : string
+        The covariance estimator.
+
+    Returns
+    -------
+    key : string
+        A hex digest identifying the regression.
+
+    """
+    # find the columns used in the formula (or formulae)
+    names = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", str(formula)))
+    cols = [x for x in data.columns if x in names]
+    hasher = hashlib.sha256()
+    hasher.update(pd.util.hash_pandas_object(data[cols], index = True).to_numpy().tobytes())
+    hasher.update(repr([cols, kind, formula, cov_type]).encode())
+    return hasher.hexdigest()
+
+def fit_regression(data, kind, formula, cov_type, keep_results = False):
+    """
+    Fit a regression once per run and reuse it for every later caller with the same data, formula and covariance
+    options. The parameters, covariance matrix, labelled design matrices and residuals are kept in fit_cache (and
+    in fit_cache_dir, if set). The results object can't be restored from disk, so a caller that needs it (e.g., for
+    the regression tables) sets keep_results and refits if the record came from disk.
+
+    Parameters
+    ----------
+    data : data frame
+        A data frame containing the regression data.
+    kind : string
+        "sur" (a SUR on a dictionary of formulae, fit by OLS) or "ols" (missing rows dropped).
+    formula : string or dictionary
+        The formula, or a dictionary of formulae for a SUR.
+    cov_type : string
+        The covariance estimator ("robust" for a SUR, e.g. "HC1" for OLS).
+    keep_results : boolean, optional
+        Whether the record needs the model and results objects. The default is False.
+
+    Returns
+    -------
+    fit : dictionary
+        The "params", "cov", "exog" (a list with a design matrix for each equation), "resids", "model" and
+        "results" of the regression.
+
+    """
+    if kind == "ols":
+        # drop the rows with missing data here (as missing = "drop" would), so their countries and quarters go too
+        names = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", formula))
+        data = data.dropna(subset = [x for x in data.columns if x in names])
+    # the countries and quarters filtered out of the data would otherwise be all-zero dummy columns
+    data = drop_unused_categories(data)
+    key = fit_key(data, kind, formula, cov_type)
+    fit = fit_cache.get(key)
+    # look on disk if the regression wasn't fit in this run
+    if fit is None and fit_cache_dir is not None and os.path.exists(os.path.join(fit_cache_dir, key + ".pkl")):
+        fit = pd.read_pickle(os.path.join(fit_cache_dir, key + ".pkl"))
+        fit_cache[key] = fit
+    if fit is not None and (fit["results"] is not None or not keep_results):
+        return fit
+
+    if kind == "sur":
+        model = SUR.from_formula(formula, data)
+        results = model.fit(method = "ols", cov_type = cov_type)
+        params = results.params
+        cov = results.cov
+        #label the columns in the design matrix of each equation
+        exog = []
+        for i, eq in enumerate(formula.keys()):
+            eq_exog = pd.DataFrame(model._exog[i].ndarray)
+            eq_exog.columns = [x for x in params.index if x.startswith(eq + "_")]
+            exog.append(eq_exog)
+        resids = results.resids
+    elif kind == "ols":
+        model = smf.ols(formula = formula, data = data, missing = "drop")
+        results = model.fit(cov_type = cov_type)
+        params = results.params
+        cov = results.cov_params()
+        exog = [pd.DataFrame(model.exog, columns = params.index)]
+        resids = results.resid
+
+    fit = {"params": params, "cov": cov, "exog": exog, "resids": resids, "model": model, "results": results}
+    fit_cache[key] = fit
+    # the statsmodels formula results don't unpickle, so only the arrays go to disk
+    if fit_cache_dir is not None:
+        os.makedirs(fit_cache_dir, exist_ok = True)
+        pd.to_pickle({**fit, "model": None, "results": None}, os.path.join(fit_cache_dir, key + ".pkl"))
+    return fit
+
+def summarise_contrasts(contrasts, mean_params, cov_params, level = 0.95):
+    """
+    Find the mean and variance of linear contrasts of the parameters in closed form (c'b and c'Vc), with 
+    normal-approximation intervals.
+
+    Parameters
+    ----------
+    contrasts : data frame
+        A (n_params x n_contrasts) data frame of contrast weights, indexed by parameter name. Parameters that are 
+        missing get a weight of 0.
+    mean_params : series
+        The parameter estimates.
+    cov_params : data frame
+        The covariance matrix of the parameter estimates.
+    level : float, optional
+        The coverage of the intervals. The default is 0.95.
+
+    Returns
+    -------
+    summary : data frame
+        The "mean", "sd", "lower" and "upper" bound of each contrast.
+
+    """
+    weights = contrasts.reindex(mean_params.index).fillna(0).to_numpy(dtype = float)
+    cov = pd.DataFrame(cov_params).reindex(index = mean_params.index, columns = mean_params.index).to_numpy(dtype = float)
+    mean = weights.T @ mean_params.to_numpy(dtype = float)
+    sd = np.sqrt(np.maximum(np.einsum("pk,pq,qk->k", weights, cov, weights), 0))
+    z = norm.ppf(0.5 + level/2)
+    return pd.DataFrame({"mean": mean, "sd": sd, "lower": mean - z*sd, "upper": mean + z*sd}, index = contrasts.columns)
+
+class Absorbed_results:
+    """
+    The results of a regression fit with the country and quarter fixed effects absorbed (see 
+    "SUR_model.fit_absorbed"), with the interface of the dummy-variable results that the script reads: the 
+    parameters, their covariance, the residuals, and the summary tables of a SUR ("summary") or an OLS regression 
+    ("summary2"). The covariance only covers the slope parameters, so the fixed effects have no standard errors.
+    """
+    def __init__(self, params, cov, resids, nobs, n_params, cov_type):
+        self.params = params
+        self.cov = cov
+        self.resids = resids
+        self.nobs = nobs
+        self.df_model = n_params
+        self.df_resid = nobs - n_params
+        self.cov_type = cov_type
+        self.std_errors = pd.Series(np.sqrt(np.diag(cov)), index = cov.index).reindex(params.index)
+        self.tstats = params/self.std_errors
+        self.pvalues = pd.Series(2*norm.sf(np.abs(self.tstats)), index = params.index)
+
+    # the names of the statsmodels results
+    @property
+    def bse(self):
+        return self.std_errors
+
+    @property
+    def tvalues(self):
+        return self.tstats
+
+    @property
+    def resid(self):
+        return self.resids.iloc[:, 0]
+
+    def cov_params(self):
+        return self.cov
+
+    def coef_table(self, level = 0.95):
+        """
+        Parameters
+        ----------
+        level : float, optional
+            The coverage of the confidence intervals. The default is 0.95.
+
+        Returns
+        -------
+        table : data frame
+            The estimate, standard error, z statistic, p-value and confidence interval of each parameter.
+
+        """
+        z = norm.ppf(0.5 + level/2)
+        return pd.DataFrame({"Coef.": self.params, "Std.Err.": self.std_errors, "z": self.tstats, 
+                             "P>|z|": self.pvalues, "[0.025": self.params - z*self.std_errors, 
+                             "0.975]": self.params + z*self.std_errors})
+
+    def info_table(self):
+        """
+        Returns
+        -------
+        table : data frame
+            The estimator, covariance type, and number of observations and parameters.
+
+        """
+        return pd.DataFrame({"Value": ["OLS, fixed effects absorbed", self.cov_type, self.nobs, self.df_model, 
+                                       self.df_resid]},
+                            index = ["Estimator:", "Covariance type:", "No. Observations:", "No. Parameters:", 
+                                     "Df Residuals:"])
+
+    @property
+    def summary(self):
+        """
+        The summary as in the SUR results: an information table, then a table of coefficients for each equation.
+        """
+        smry = Summary()
+        info = self.info_table()
+        smry.tables.append(SimpleTable(info.values.astype(str), headers = ["Value"], stubs = list(info.index)))
+        coefs = self.coef_table()
+        for eq in self.resids.columns:
+            eq_coefs = coefs.loc[[x for x in coefs.index if x.startswith(eq + "_")] if len(self.resids.columns) > 1 else coefs.index]
+            smry.tables.append(SimpleTable(eq_coefs.round(4).values.astype(str), headers = list(eq_coefs.columns), 
+                                           stubs = list(eq_coefs.index), title = eq))
+        return smry
+
+    def summary2(self):
+        """
+        The summary as in the OLS results: an information table and a table of coefficients.
+        """
+        smry = Summary2()
+        smry.add_df(self.info_table(), header = False)
+        smry.add_df(self.coef_table())
+        return smry
+
+# the sets of countries and quarters without a dummy (the base categories) that have been reported, so each set is 
+# reported once a run rather than once for every model and scenario
+reported_missing_dummies = set()
+
+# create a class that contains functions for various regression optoins
+class SUR_model:
+    def __init__(self):
+        # instantiate outputs as Nonetypes
+        self.depvar = None
+        self.data = None
+        self.reg_data = None
+        self.formulae = None
+        self.model = None
+        self.results = None
+        self.params = None
+        self.nopfz_uptake = None
+        self.novax_uptake = None
+        self.results_data = None
+        self.n_samp = None
+        self.percentiles_pfz = None
+        self.percentiles_allvax = None
+        self.outcome_list = None
+        self.nopfz_inf_lags = None
+        self.novax_inf_lags = None
+        self.comp_inf_lags = None
+        self.bp_test_dep = None
+        self.annual_data = None
+        self.annual_formula = None
+        self.annual_mod = None
+        self.annual_results = None
+        self.annual_results_data = None    
+        self.annual_psa_setup = None
+        self.row_index = None
+        self.row_grid = None
+        self.missing_dummies = None
+        self.psa_setup = None
+        self.psa_keys = None
+        self.averted_pfz_array = None
+        self.averted_allvax_array = None
+
+    def build_row_index(self, data, param_names, prefix = "infections_"):
+        """
+        Build an integer index from each (country, yyyy_qq) in the regression data to its row in the design matrix, 
+        so the counterfactual design matrices can be adjusted without scanning the dummy columns. Countries and 
+        quarters without a dummy column (the base categories) are returned, as they are not adjusted.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data, in the same row order as the design matrix.
+        param_names : list
+            The names of the model parameters.
+        prefix : string, optional
+            The prefix of the parameter names. The default is "infections_".
+
+        Returns
+        -------
+        row_index : dictionary
+            A dictionary from (country, yyyy_qq) to the row in the design matrix.
+        row_grid : array
+            A (country x quarter position) array of rows in the design matrix, with -1 after a country's last row.
+        missing_dummies : dictionary
+            The countries and quarters in the data that have no dummy column in the design matrix.
+
+        """
+        # map each country-quarter to its row
+        row_index = dict(zip(zip(data["country"], data["yyyy_qq"]), range(len(data))))
+        
+        # lay the rows out by country and by quarter within the country
+        country_codes = pd.factorize(data["country"])[0]
+        quarter_pos = data.groupby("country", sort = False).cumcount().to_numpy()
+        row_grid = np.full((country_codes.max() + 1, quarter_pos.max() + 1), -1)
+        row_grid[country_codes, quarter_pos] = np.arange(len(data))
+        
+        # find the base categories (the caller reports them)
+        missing_dummies = {"country": [c for c in data.country.unique() if (prefix + "country[T." + c + "]") not in param_names],
+                           "yyyy_qq": [q for q in data.yyyy_qq.unique() if (prefix + "yyyy_qq[T." + q + "]") not in param_names]}
+        return row_index, row_grid, missing_dummies
+
+    def first_vax_quarters(self, data, uptake_col):
+        """
+        Find the first quarter of vaccination for each country. Countries that are never vaccinated get the first 
+        quarter of the data, as in the original idxmax lookup.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data.
+        uptake_col : string
+            The uptake field used to find the first quarter of vaccination ("uptake_pfizer" or "uptake").
+
+        Returns
+        -------
+        first_vax : series
+            A series of the first quarter of vaccination, indexed by country.
+
+        """
+        first_vax = data[data[uptake_col].ne(0)].groupby("country", sort = False, observed = True)["yyyy_qq"].first()
+        first_vax = pd.Series(data.country.unique(), index = data.country.unique()).map(first_vax)
+        return first_vax.fillna(data["yyyy_qq"].iloc[0])
+
+    def freeze_gri(self, exog, data, row_index, param_names, prefix, uptake_col, q_list):
+        """
+        Set the government response index in a counterfactual design matrix to its value in the first quarter of 
+        vaccination, for that quarter and every quarter after it. The design matrix is changed in place.
+
+        Parameters
+        ----------
+        exog : data frame
+            The no pfizer or no vaccination design matrix.
+        data : data frame
+            A data frame containing the regression data, in the same row order as the design matrix.
+        row_index : dictionary
+            A dictionary from (country, yyyy_qq) to the row in the design matrix.
+        param_names : list
+            The names of the model parameters.
+        prefix : string
+            The prefix of the parameter names.
+        uptake_col : string
+            The uptake field used to find the first quarter of vaccination ("uptake_pfizer" or "uptake").
+        q_list : list
+            A list of the quarters in which the government response index can be held fixed.
+
+        Returns
+        -------
+        None.
+
+        """
+        gri_col = exog.columns.get_loc(prefix + "L1_gri")
+        rows = []
+        values = []
+        for c, first_vax in self.first_vax_quarters(data, uptake_col).items():
+            # base categories and countries first vaccinated outside of q_list are not adjusted
+            if ((prefix + "country[T." + c + "]") not in param_names or first_vax not in q_list or 
+                (prefix + "yyyy_qq[T." + first_vax + "]") not in param_names or (c, first_vax) not in row_index):
+                continue
+            country_fixed_gri = exog.iat[row_index[(c, first_vax)], gri_col]
+            for val in q_list[q_list.index(first_vax): ]:
+                if (prefix + "yyyy_qq[T." + val + "]") not in param_names:
+                    break
+                if (c, val) in row_index:
+                    rows.append(row_index[(c, val)])
+                    values.append(country_fixed_gri)
+        exog.iloc[rows, gri_col] = values
+
+    def demean_fixed_effects(self, values, country_codes, quarter_codes, tol = 1e-14, max_iter = 10000):
+        """
+        Remove the country and quarter means from each column by alternating projections, i.e. the residuals from a 
+        regression of each column on the country and quarter dummies.
+
+        Parameters
+        ----------
+        values : array
+            A (n_rows x n_columns) array to demean.
+        country_codes : array
+            The integer country code of each row.
+        quarter_codes : array
+            The integer quarter code of each row.
+        tol : float, optional
+            The convergence tolerance, relative to the largest absolute value. The default is 1e-14.
+        max_iter : integer, optional
+            The maximum number of alternating projections. The default is 10000.
+
+        Returns
+        -------
+        values : array
+            The demeaned (n_rows x n_columns) array.
+
+        """
+        values = np.array(values, dtype = float)
+        scale = max(np.abs(values).max(), 1)
+        country_counts = np.bincount(country_codes)[:, None]
+        quarter_counts = np.bincount(quarter_codes)[:, None]
+        for i in range(max_iter):
+            # subtract the country means, then the quarter means
+            country_means = np.zeros((len(country_counts), values.shape[1]))
+            np.add.at(country_means, country_codes, values)
+            values -= (country_means/country_counts)[country_codes]
+            quarter_means = np.zeros((len(quarter_counts), values.shape[1]))
+            np.add.at(quarter_means, quarter_codes, values)
+            quarter_means = quarter_means/quarter_counts
+            values -= quarter_means[quarter_codes]
+            # stop once the means left to remove are negligible
+            if np.abs(quarter_means).max() <= tol*scale:
+                break
+        return values
+
+    def fit_absorbed(self, data, equations, cov_type = "robust"):
+        """
+        Fit quarterly regressions by OLS with the country and quarter fixed effects absorbed, so only the slope 
+        variables are held as dense columns. The slopes are estimated on data demeaned by country and quarter, and the 
+        fixed effects are then recovered by index. The parameters are labelled as in the dummy-variable regression 
+        (the first country and quarter are the base categories), so the predictions match the dummy-variable path.
+        
+        The slopes, residuals and robust covariance of the slopes are those of the dummy-variable regression (by the 
+        Frisch-Waugh-Lovell theorem), including the covariance across the equations of a SUR fit by OLS. The HC1 
+        correction, n/(n - p), counts the p parameters of the dummy-variable regression: the intercept, the slopes, 
+        and a dummy for each country and quarter in the data but the first.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data. Rows with missing data are dropped.
+        equations : dictionary
+            The dependent variable of each equation, keyed by the prefix of its parameter names (e.g., 
+            {"infections_": "inf_mean", "deaths_": "daily_deaths"} as in the SUR model, or {"": "gdp_gap"}).
+        cov_type : string, optional
+            "robust" for the heteroskedasticity-robust covariance of the SUR model, or "HC1" as in the quarterly GDP 
+            regression. The default is "robust".
+
+        Returns
+        -------
+        results : Absorbed_results
+            The parameters, the covariance of the slope parameters, and the residuals of each equation.
+
+        """
+        depvars = list(equations.values())
+        data = data.dropna(subset = depvars + slope_vars + ["country", "yyyy_qq"], how = "any")
+        y = data[depvars].to_numpy(dtype = float)
+        x = data[slope_vars].to_numpy(dtype = float)
+        # code the fixed effects as integers, with the levels in the data sorted as in the formula dummies
+        country_codes, countries = pd.factorize(data["country"], sort = True)
+        quarter_codes, quarters = pd.factorize(data["yyyy_qq"], sort = True)
+        countries = [str(c) for c in countries]
+        quarters = [str(q) for q in quarters]
+        
+        # estimate the slopes of every equation on the demeaned data
+        demeaned = self.demean_fixed_effects(np.column_stack([y, x]), country_codes, quarter_codes)
+        y_dm, x_dm = demeaned[:, :len(depvars)], demeaned[:, len(depvars):]
+        slopes = np.linalg.lstsq(x_dm, y_dm, rcond = None)[0]
+        resids = y_dm - np.dot(x_dm, slopes)
+        
+        params = []
+        for i, prefix in enumerate(equations):
+            # the remaining fitted values are the fixed effects. split them into country and quarter effects
+            fe_fit = y[:, i] - np.dot(x, slopes[:, i]) - resids[:, i]
+            country_fe = np.zeros(len(countries))
+            quarter_fe = np.zeros(len(quarters))
+            for j in range(10000):
+                country_fe = np.bincount(country_codes, fe_fit - quarter_fe[quarter_codes])/np.bincount(country_codes)
+                new_quarter_fe = np.bincount(quarter_codes, fe_fit - country_fe[country_codes])/np.bincount(quarter_codes)
+                converged = np.abs(new_quarter_fe - quarter_fe).max() <= 1e-14*max(np.abs(fe_fit).max(), 1)
+                quarter_fe = new_quarter_fe
+                if converged:
+                    break
+            
+            # label the parameters as in the dummy-variable regression
+            params.append(pd.Series(np.concatenate([[country_fe[0] + quarter_fe[0]], slopes[:, i], 
+                                                    country_fe[1:] - country_fe[0], quarter_fe[1:] - quarter_fe[0]]),
+                                    index = ([prefix + "Intercept"] + [prefix + x for x in slope_vars] + 
+                                             [prefix + "country[T." + c + "]" for c in countries[1:]] + 
+                                             [prefix + "yyyy_qq[T." + q + "]" for q in quarters[1:]])))
+        params = pd.concat(params)
+        
+        # heteroskedasticity-robust covariance of the slopes of all the equations, from the scores of each equation
+        xtx_inv = np.linalg.inv(np.dot(x_dm.T, x_dm))
+        scores = np.hstack([x_dm*resids[:, [i]] for i in range(len(depvars))])
+        bread = np.kron(np.eye(len(depvars)), xtx_inv)
+        cov = bread.dot(np.dot(scores.T, scores)).dot(bread)
+        # the parameters of each equation in the dummy-variable regression
+        n_params = 1 + len(slope_vars) + (len(countries) - 1) + (len(quarters) - 1)
+        if cov_type == "HC1":
+            cov = cov*len(y)/(len(y) - n_params)
+        slope_names = [prefix + x for prefix in equations for x in slope_vars]
+        cov = pd.DataFrame(cov, index = slope_names, columns = slope_names)
+        
+        resids = pd.DataFrame(resids, index = data.index, 
+                              columns = [prefix.rstrip("_") if prefix != "" else depvar for prefix, depvar in equations.items()])
+        return Absorbed_results(params, cov, resids, len(y), n_params, cov_type)
+
+    def check_absorbed_fit(self, absorbed, data, kind, formula, cov_type, rtol = 1e-6):
+        """
+        Check that an absorbed fit matches the dummy-variable regression: the same parameters, and the same 
+        covariance of the slope parameters.
+
+        Parameters
+        ----------
+        absorbed : Absorbed_results
+            The results from "fit_absorbed".
+        data : data frame
+            The regression data of the absorbed fit.
+        kind : string
+            "sur" or "ols", as in "fit_regression".
+        formula : string or dictionary
+            The formula of the dummy-variable regression, or a dictionary of formulae for a SUR.
+        cov_type : string
+            The covariance estimator.
+        rtol : float, optional
+            The relative tolerance, of the largest absolute value. The default is 1e-6.
+
+        Raises
+        ------
+        ValueError
+            An error message that prints if the absorbed fit and the dummy-variable fit differ.
+
+        Returns
+        -------
+        None.
+
+        """
+        dummy_fit = fit_regression(data, kind, formula, cov_type)
+        params = dummy_fit["params"].reindex(absorbed.params.index)
+        cov = pd.DataFrame(dummy_fit["cov"]).reindex(index = absorbed.cov.index, columns = absorbed.cov.columns)
+        params_diff = np.abs(params - absorbed.params).max()/max(np.abs(params).max(), 1e-300)
+        cov_diff = np.abs(cov - absorbed.cov).max().max()/max(np.abs(cov).max().max(), 1e-300)
+        if (len(dummy_fit["params"]) != len(absorbed.params) or not params_diff <= rtol or not cov_diff <= rtol):
+            raise ValueError(f"The absorbed fit differs from the dummy-variable fit (parameters: {params_diff:.2e}, covariance: {cov_diff:.2e}).")
+
+    def predict_exog(self, exog, betas, data, prefix):
+        """
+        Predict from a design matrix that may hold only some of the parameters as columns. Parameters with a column 
+        are multiplied through as usual, and the intercept and the fixed effects without a column are added by index 
+        using the country and quarter of each row.
+
+        Parameters
+        ----------
+        exog : data frame
+            The labelled design matrix (all columns, or only the slope columns).
+        betas : series or data frame
+            The parameters, or a (n_params x n_samp) data frame of parameter draws.
+        data : data frame
+            A data frame with the country and quarter of each row of the design matrix.
+        prefix : string
+            The prefix of the parameter names.
+
+        Returns
+        -------
+        predictions : array
+            A (n_rows x n_samp) array of predictions.
+
+        """
+        betas = pd.DataFrame(betas)
+        dense_cols = [x for x in betas.index if x in exog.columns]
+        predictions = np.dot(exog[dense_cols].to_numpy(dtype = float), betas.loc[dense_cols].to_numpy())
+        absorbed = betas.loc[[x for x in betas.index if x not in exog.columns]]
+        if len(absorbed) > 0:
+            if (prefix + "Intercept") in absorbed.index:
+                predictions = predictions + absorbed.loc[prefix + "Intercept"].to_numpy()
+            for fe_var in ["country", "yyyy_qq"]:
+                fe_codes, fe_names = pd.factorize(prefix + fe_var + "[T." + data[fe_var].astype(str) + "]")
+                # base categories have no parameter and add nothing
+                predictions = predictions + absorbed.reindex(fe_names).fillna(0).to_numpy()[fe_codes]
+        return predictions
+
+    def contrast_weights(self, exog, param_names, data, prefix, weights):
+        """
+        Find the contrast weights c such that weights'(predictions) = c'b, where the predictions are made from a 
+        design matrix as in "predict_exog".
+
+        Parameters
+        ----------
+        exog : data frame
+            The labelled design matrix (all columns, or only the slope columns).
+        param_names : list
+            The names of the parameters that the predictions use.
+        data : data frame
+            A data frame with the country and quarter of each row of the design matrix.
+        prefix : string
+            The prefix of the parameter names.
+        weights : data frame
+            A (n_rows x n_contrasts) data frame of the weight of each row in each contrast.
+
+        Returns
+        -------
+        contrasts : data frame
+            A (n_params x n_contrasts) data frame of contrast weights.
+
+        """
+        row_weights = weights.to_numpy(dtype = float)
+        contrasts = pd.DataFrame(0.0, index = param_names, columns = weights.columns)
+        dense_cols = [x for x in param_names if x in exog.columns]
+        contrasts.loc[dense_cols] = exog[dense_cols].to_numpy(dtype = float).T @ row_weights
+        absorbed = [x for x in param_names if x not in exog.columns]
+        if len(absorbed) > 0:
+            if (prefix + "Intercept") in absorbed:
+                contrasts.loc[prefix + "Intercept"] = row_weights.sum(axis = 0)
+            for fe_var in ["country", "yyyy_qq"]:
+                fe_codes, fe_names = pd.factorize(prefix + fe_var + "[T." + data[fe_var].astype(str) + "]")
+                fe_weights = np.zeros((len(fe_names), row_weights.shape[1]))
+                np.add.at(fe_weights, fe_codes, row_weights)
+                # base categories have no parameter
+                keep = [i for i, x in enumerate(fe_names) if x in absorbed]
+                contrasts.loc[fe_names[keep]] = contrasts.loc[fe_names[keep]].to_numpy() + fe_weights[keep]
+        return contrasts
+
+    def country_weights(self, countries, scale):
+        """
+        Build the row weights of the country and total contrasts.
+
+        Parameters
+        ----------
+        countries : series
+            The country of each row.
+        scale : array
+            The population or projected GDP that scales each row.
+
+        Returns
+        -------
+        weights : data frame
+            A (n_rows x (n_countries + 1)) data frame that sums the scaled rows of each country, and of all 
+            countries ("total").
+
+        """
+        codes, names = pd.factorize(pd.Series(countries).astype(str), sort = True)
+        weights = np.zeros((len(codes), len(names) + 1))
+        weights[np.arange(len(codes)), codes] = scale
+        weights[:, -1] = scale
+        return pd.DataFrame(weights, columns = list(names) + ["total"])
+
+    def analytic_quarterly_contrasts(self, scenario, level = 0.95):
+        """
+        Closed-form uncertainty of the direct effect of (pfizer) vaccination in the quarterly models, by country and 
+        in total. The direct effect holds the lagged infection variables at their observed values, which makes the 
+        averted outcomes linear in the parameters; the effect through the recursion on the lagged infections is 
+        not linear and is left to the PSA. Call "prepare_quarterly_psa" first.
+
+        Parameters
+        ----------
+        scenario : string
+            "nopfz" (no pfizer vaccination) or "novax" (no vaccination).
+        level : float, optional
+            The coverage of the intervals. The default is 0.95.
+
+        Returns
+        -------
+        summary : data frame
+            The "mean", "sd", "lower" and "upper" bound of the averted outcome in each country and in total.
+
+        """
+        setup = self.psa_setup
+        prefix = setup["prefix"]
+        param_names = [x for x in setup["mean_params"].index if prefix in x]
+        
+        # the counterfactual design matrix, with the observed lagged infections
+        lag_cols = [prefix + "L1_inf_pc", prefix + "L2_cum_inf_pc"]
+        cf_exog = setup[scenario + "_exog"].copy()
+        cf_exog[lag_cols] = setup["vax_exog"][lag_cols].to_numpy()
+        
+        weights = self.country_weights(setup["reg_data"]["country"], setup["scale"][:, 0])
+        contrasts = (self.contrast_weights(setup["vax_exog"], param_names, setup["reg_data"], prefix, weights) - 
+                     self.contrast_weights(cf_exog, param_names, setup["counterfactual_data"], prefix, weights))
+        # infections and deaths are averted if the counterfactual is higher, gdp losses if it is lower
+        if self.depvar == "inf_mean" or self.depvar == "daily_deaths":
+            contrasts = -contrasts
+        return summarise_contrasts(contrasts, setup["mean_params"], setup["cov_params"], level)
+
+    def analytic_annual_contrasts(self, scenario, level = 0.95):
+        """
+        Closed-form uncertainty of the annual GDP loss averted by (pfizer) vaccination, by country and in total. The 
+        averted loss is linear in the parameters, so this gives the exact mean and variance that the annual PSA 
+        samples. Call "prepare_annual_gdp_psa" first.
+
+        Parameters
+        ----------
+        scenario : string
+            "nopfz" (no pfizer vaccination) or "novax" (no vaccination).
+        level : float, optional
+            The coverage of the intervals. The default is 0.95.
+
+        Returns
+        -------
+        summary : data frame
+            The "mean", "sd", "lower" and "upper" bound of the averted GDP loss in each country and in total.
+
+        """
+        setup = self.annual_psa_setup
+        param_names = list(setup["mean_params"].index)
+        weights = self.country_weights(setup["gdp_value"]["country"], setup["gdp_value"]["gdp_projected_usd"].to_numpy(dtype = float))
+        contrasts = (self.contrast_weights(setup["vax_exog"], param_names, setup["gdp_value"], "", weights) - 
+                     self.contrast_weights(setup[scenario + "_exog"], param_names, setup["gdp_value"], "", weights))
+        return summarise_contrasts(contrasts, setup["mean_params"], setup["cov_params"], level)
+
+    def recurse_inf_lags(self, inf_exog, inf_betas, inf_data, uptake_col, q_dict):
+        """
+        Adjust the natural immunity variables (L1_inf_pc and L2_cum_inf_pc) so that they reflect trends in the 
+        absence of pfizer/all vaccination. Rows are taken from the (country x quarter position) grid built in 
+        "build_row_index", and the predicted infections are propagated forward in a single time-ordered pass over all countries at once. 
+        Passing several columns of parameters runs the recursion for every draw together.
+
+        Parameters
+        ----------
+        inf_exog : data frame
+            The no pfizer or no vaccination design matrix for the infections equation (all columns, or only the 
+            slope columns).
+        inf_betas : series or data frame
+            The infections parameters, or a (n_params x n_samp) data frame of parameter draws.
+        inf_data : data frame
+            A data frame containing the infections regression data.
+        uptake_col : string
+            The uptake field used to find the first quarter of vaccination ("uptake_pfizer" or "uptake").
+        q_dict : dictionary
+            A dictionary of quarters, and the quarters two or more after it.
+
+        Returns
+        -------
+        l1_inf : array
+            A (n_rows x n_samp) array of the adjusted L1_inf_pc values.
+        l2_cum_inf : array
+            A (n_rows x n_samp) array of the adjusted L2_cum_inf_pc values.
+
+        """
+        inf_betas = pd.DataFrame(inf_betas)
+        n_samp = inf_betas.shape[1]
+        # split the lagged infection variables from the rest of the design matrix
+        lag_cols = ["infections_L1_inf_pc", "infections_L2_cum_inf_pc"]
+        other_cols = [x for x in inf_betas.index if x not in lag_cols]
+        # the part of the prediction that does not change in the recursion
+        fixed_pred = self.predict_exog(inf_exog, inf_betas.loc[other_cols], inf_data, "infections_")
+        l1_betas = inf_betas.loc["infections_L1_inf_pc"].to_numpy()
+        l2_betas = inf_betas.loc["infections_L2_cum_inf_pc"].to_numpy()
+        # start at the observed lagged infections
+        l1_inf = np.repeat(inf_exog[["infections_L1_inf_pc"]].to_numpy(dtype = float), n_samp, axis = 1)
+        l2_cum_inf = np.repeat(inf_exog[["infections_L2_cum_inf_pc"]].to_numpy(dtype = float), n_samp, axis = 1)
+        tot_pop = inf_data["tot_pop"].to_numpy(dtype = float)
+        
+        # flag the rows that are two or more quarters after vaccination. countries and quarters without a dummy 
+        # (the base categories) are not adjusted
+        row_first_vax = inf_data["country"].map(self.first_vax_quarters(inf_data, uptake_col))
+        has_dummy = ~inf_data["country"].isin(self.missing_dummies["country"]) & ~inf_data["yyyy_qq"].isin(self.missing_dummies["yyyy_qq"])
+        follow_on = np.array([val in q_dict.get(fv, []) for fv, val in zip(row_first_vax, inf_data["yyyy_qq"])])
+        adjust = has_dummy.to_numpy() & follow_on
+        
+        # use the (country x quarter position) grid of row numbers from the row index
+        row_grid = self.row_grid
+        
+        # population in the previous quarter (1 in the first quarter) and the running cumulative lagged infections
+        l1_tot_pop = np.ones(row_grid.shape)
+        l1_tot_pop[:, 1:] = np.where(row_grid[:, :-1] >= 0, tot_pop[row_grid[:, :-1]], 1)
+        l1_cuml = np.zeros((row_grid.shape[0], n_samp))
+        
+        for j in range(row_grid.shape[1]):
+            rows = row_grid[:, j]
+            in_data = rows >= 0
+            to_adjust = in_data & adjust[rows]
+            cur = rows[to_adjust]
+            if j == 0:
+                l1_inf[cur] = 0
+                l2_cum_inf[cur] = 0
+            else:
+                # lagged infections are the predicted infections in the previous quarter
+                prev = row_grid[to_adjust, j - 1]
+                l1_inf[cur] = fixed_pred[prev] + l1_inf[prev]*l1_betas + l2_cum_inf[prev]*l2_betas
+                # lagged cumulative infections are the cumulative lagged infections through the previous quarter
+                l2_cum_inf[cur] = l1_cuml[to_adjust]/l1_tot_pop[to_adjust, j - 1][:, None]
+            # add this quarter's lagged infections to the running total
+            l1_cuml[in_data] += l1_inf[rows[in_data]]*l1_tot_pop[in_data, j][:, None]
+        return l1_inf, l2_cum_inf
+
+    def run_quarterly_basecase(self, data, depvar="inf_mean", absorb = False, check_absorbed = False):
+        """
+        Run base case on quarterly data (infections, deaths, quartlery GDP)
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame with the regression data (qdata in the analysis script).
+        depvar : string, optional
+            A string with the dependent variable. The default is "inf_mean".
+        absorb : boolean, optional
+            If True, fit and predict with the country and quarter fixed effects absorbed instead of expanded into 
+            dummy columns (see "fit_absorbed"). The default is False.
+        check_absorbed : boolean, optional
+            If True (with absorb), check that the absorbed fits match the dummy-variable fits (see 
+            "check_absorbed_fit"). The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.depvar = depvar
+        self.data = data
+        # drop countries from the regression base file that don't have data
+        inf_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
+        
+        # set up and run the regression on infections and deaths
+        formulae = {'infections': 'inf_mean ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq',
+                    'deaths': 'daily_deaths ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq'}
+        self.formulae = formulae
+        
+        if absorb:
+            # fit the SUR regression on infections and deaths with the fixed effects absorbed
+            sur_equations = {"infections_": "inf_mean", "deaths_": "daily_deaths"}
+            inf_fit = self.fit_absorbed(inf_data, sur_equations, cov_type = "robust")
+            if check_absorbed:
+                self.check_absorbed_fit(inf_fit, inf_data, "sur", formulae, "robust")
+            inf_params = inf_fit.params
+            # keep only the slope columns in the design matrix
+            inf_exog = inf_data[slope_vars].astype(float)
+            inf_exog.columns = ["infections_" + x for x in slope_vars]
+        else:
+            # run (or reuse) the SUR regression using the infections and deaths formulae
+            inf_fit = fit_regression(inf_data, "sur", formulae, "robust")
+            
+            #extract the mean parameter coefficients and covariance matrix from regression
+            inf_params = inf_fit["params"]
+            
+            #take the labelled design matrix
+            inf_exog = inf_fit["exog"][0].copy()
+        # index the rows of the design matrix by country and quarter
+        self.row_index, self.row_grid, self.missing_dummies = self.build_row_index(inf_data, inf_params.index, "infections_")
+        
+        # create a dictionary of quarters, and the quarters two or more after it
+        q_dict = {"2020_Q4" : ["2021_Q2", "2021_Q3", "2021_Q4"],
+                  "2021_Q1" : ["2021_Q3", "2021_Q4"],
+                  "2021_Q2": ["2021_Q4"],
+                  "2021_Q3": [""],
+                  "2021_Q4": [""]}
+        
+        # create a list of the quarters that are keys in the dictionary
+        q_list = list(q_dict.keys())
+        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
+        nopfz_inf = inf_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
+            nopfz_inf[col] = 0
+        
+        # in the no Pfizer scenario, set the government response index to its pre-vax value
+        self.freeze_gri(nopfz_inf, inf_data, self.row_index, inf_params.index, "infections_", "uptake_pfizer", q_list)
+        
+        #create a "novax" design matrix (i.e., to set vax parameters to 0)
+        novax_inf = inf_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
+                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
+            novax_inf[col] = 0
+        
+        # in the no vaccination scenario, set the government response index to its pre-vax value
+        self.freeze_gri(novax_inf, inf_data, self.row_index, inf_params.index, "infections_", "uptake", q_list)
+           
+        # get the infection coefficients from the SUR model
+        inf_betas = inf_params.loc[[x for x in inf_params.index if "infections_" in x],]
+        
+        # in the no Pfizer scenario, we adjust infections (which represent natural immunity)
+        # so that they reflect trends in the absence of Pfizer vaccination
+        nopfz_l1, nopfz_l2 = self.recurse_inf_lags(nopfz_inf, inf_betas, inf_data, "uptake_pfizer", q_dict)
+        nopfz_inf["infections_L1_inf_pc"] = nopfz_l1[:, 0]
+        nopfz_inf["infections_L2_cum_inf_pc"] = nopfz_l2[:, 0]
+        # in the no vaccination scenario, we adjust infections (which represent natural immunity)
+        # so that they reflect trends in the absence of any vaccination
+        novax_l1, novax_l2 = self.recurse_inf_lags(novax_inf, inf_betas, inf_data, "uptake", q_dict)
+        novax_inf["infections_L1_inf_pc"] = novax_l1[:, 0]
+        novax_inf["infections_L2_cum_inf_pc"] = novax_l2[:, 0]
+        
+        # save the infections in the no pfizer and no vaccination scenarios to compare
+        self.nopfz_inf_lags = nopfz_inf[["infections_L1_inf_pc", "infections_L2_cum_inf_pc"]]
+        self.novax_inf_lags = novax_inf[["infections_L1_inf_pc", "infections_L2_cum_inf_pc"]]
+        comp_inf_lags = inf_data[["country", "yyyy_qq", "L1_inf_pc", "L2_cum_inf_pc"]].join(self.nopfz_inf_lags, how = "outer")
+        comp_inf_lags = comp_inf_lags.join(self.novax_inf_lags, how = "outer", lsuffix = "_nopfz", rsuffix = "_novax")
+        self.comp_inf_lags = comp_inf_lags
+        
+        if absorb:
+            # fit the regression of the dependent variable with the fixed effects absorbed
+            if depvar == "inf_mean" or depvar == "daily_deaths":
+                # the SUR regression on infections and deaths was fit above
+                reg_data = inf_data.copy()
+                prefix = "infections_" if depvar == "inf_mean" else "deaths_"
+                absorbed_fit = inf_fit
+            elif depvar == "gdp_gap":
+                reg_data = data[data["type"] == "quarterly"]
+                reg_data = reg_data[reg_data["country"] != "Moldova"]
+                prefix = ""
+                absorbed_fit = self.fit_absorbed(reg_data, {"": "gdp_gap"}, cov_type = "HC1")
+                if check_absorbed:
+                    formula = "gdp_gap ~ L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq"
+                    self.check_absorbed_fit(absorbed_fit, reg_data, "ols", formula, "HC1")
+            model = None
+            mean_params = absorbed_fit.params
+            self.results = absorbed_fit
+        # if the dependent variable was set as infections or deaths
+        elif depvar == "inf_mean" or depvar == "daily_deaths":
+            # run the SUR model on either dependent variable 
+            reg_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
+            model_fit = fit_regression(reg_data, "sur", formulae, "robust", keep_results = True)
+            model = model_fit["model"]
+            # and save the parameters
+            mean_params = model_fit["params"]
+            self.results = model_fit["results"]
+        # but if the dependent variable was GDP
+        elif depvar == "gdp_gap":
+            # run an OLS regression on quarterly GDP
+            reg_data = data[data["type"] == "quarterly"]
+            reg_data = reg_data[reg_data["country"] != "Moldova"]
+            formula = "gdp_gap ~ L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq"
+            model_fit = fit_regression(reg_data, "ols", formula, "HC1", keep_results = True)
+            model = model_fit["model"]
+            # and save the parameters
+            mean_params = model_fit["params"]
+            self.results = model_fit["results"]
+        
+        self.reg_data = reg_data
+        self.model = model
+        
+        self.params = mean_params
+        
+        # with the fixed effects absorbed, the design matrix only has the slope columns
+        if absorb:
+            vax_exog = reg_data[slope_vars].reset_index(drop = True).astype(float)
+            vax_exog.columns = [prefix + x for x in slope_vars]
+        # if the dependent variable is infections
+        elif depvar == "inf_mean":
+            prefix = "infections_"
+            #grab the design matrix from the model
+            vax_exog = model_fit["exog"][0].copy()
+            # grab the residuals
+            resids = model_fit["resids"]["infections"]
+            # and run a Breusch-Pagan test
+            bp_test_names = ['Lagrange multiplier statistic', 'p-value',
+             'f-value', 'f p-value']
+            bp_test_result = sms.het_breuschpagan(resids, vax_exog)
+            self.bp_test_dep = lzip(bp_test_names, bp_test_result)
+        # do the same process but for deaths, if deaths are the dependnet variable
+        elif depvar == "daily_deaths":
+            prefix = "deaths_"
+            #grab the design matrix from the model
+            vax_exog = model_fit["exog"][1].copy()
+            resids = model_fit["resids"]["deaths"]
+            bp_test_names = ['Lagrange multiplier statistic', 'p-value',
+             'f-value', 'f p-value']
+            bp_test_result = sms.het_breuschpagan(resids, vax_exog)
+            self.bp_test_dep = lzip(bp_test_names, bp_test_result)
+        #and if the dependent variable is GDP, just get the design matrix
+        elif depvar == "gdp_gap":
+            prefix = ""
+            #grab the labelled design matrix from the model
+            vax_exog = model_fit["exog"][0].copy()
+        
+        # index the rows of the dependent variable's design matrix by country and quarter
+        dep_row_index, _, dep_missing = self.build_row_index(reg_data, mean_params.index, prefix)
+        # report the countries and quarters that the counterfactuals don't adjust, once for each set of them
+        missing_key = (tuple(dep_missing["country"]), tuple(dep_missing["yyyy_qq"]))
+        if missing_key not in reported_missing_dummies:
+            reported_missing_dummies.add(missing_key)
+            model_name = prefix.rstrip("_") if prefix != "" else "gdp_gap"
+            warnings.warn(f"No dummy in the {model_name} design matrix for countries {dep_missing['country']} and quarters {dep_missing['yyyy_qq']}; these are not adjusted in the counterfactuals.")
+        
+        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
+        nopfz_exog = vax_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in vax_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
+            nopfz_exog[col] = 0
+        
+        # adjust the GRI for no pfizer vaccination
+        self.freeze_gri(nopfz_exog, reg_data, dep_row_index, mean_params.index, prefix, "uptake_pfizer", q_list)
+
+        #create a "novax" design matrix (i.e., to set vax parameters to 0)
+        novax_exog = vax_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in vax_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
+                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
+            novax_exog[col] = 0
+
+        # adjust the GRI for no vaccination of any kind
+        self.freeze_gri(novax_exog, reg_data, dep_row_index, mean_params.index, prefix, "uptake", q_list)
+        
+        # extract the mean parameters
+        betas = mean_params.loc[[x for x in mean_params.index if prefix in x],]
+        
+        #predict inf_mean values using the original design matrix and the i-th iteration of parameter estimates
+        vax_predictions = self.predict_exog(vax_exog, betas, reg_data, prefix)[:, 0]
+        
+        # set the natural immunity variables to the adjusted values in the absence of pfizer/all vaccination 
+        if depvar == "inf_mean" or depvar == "daily_deaths":
+            nopfz_exog[(prefix + "L1_inf_pc")] = nopfz_inf["infections_L1_inf_pc"]
+            nopfz_exog[(prefix + "L2_cum_inf_pc")] = nopfz_inf["infections_L2_cum_inf_pc"]
+            novax_exog[(prefix + "L1_inf_pc")] = novax_inf["infections_L1_inf_pc"]
+            novax_exog[(prefix + "L2_cum_inf_pc")] = novax_inf["infections_L2_cum_inf_pc"]
+        elif depvar == "gdp_gap":
+            matching_rows = list(inf_data[inf_data.isin(reg_data.to_dict(orient='list')).all(axis=1)].index)
+            inf_in_nopfz = nopfz_inf.loc[matching_rows].reset_index()
+            inf_in_novax = novax_inf.loc[matching_rows].reset_index()
+            nopfz_exog[(prefix + "L1_inf_pc")] = inf_in_nopfz["infections_L1_inf_pc"]
+            nopfz_exog[(prefix + "L2_cum_inf_pc")] = inf_in_nopfz["infections_L2_cum_inf_pc"]
+            novax_exog[(prefix + "L1_inf_pc")] = inf_in_novax["infections_L1_inf_pc"]
+            novax_exog[(prefix + "L2_cum_inf_pc")] = inf_in_novax["infections_L2_cum_inf_pc"]
+    
+        # predict the dependent variable based on the betas and the no pfizer/vaccination variables
+        nopfz_predictions = self.predict_exog(nopfz_exog, betas, reg_data, prefix)[:, 0]
+        novax_predictions = self.predict_exog(novax_exog, betas, reg_data, prefix)[:, 0]
+        
+        #add the predictions to the data frame
+        reg_data["pred_vax"] = vax_predictions
+        reg_data["pred_nopfz"] = nopfz_predictions
+        reg_data["pred_novax"] = novax_predictions
+        if depvar == "inf_mean" or depvar == "daily_deaths":
+            #calculate the impact of vaccination/pfizer for each country-quarter
+            reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_nopfz"] - reg_data["pred_vax"])*reg_data["tot_pop"]
+            reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_novax"] - reg_data["pred_vax"])*reg_data["tot_pop"]
+        else:
+            reg_data[f"averted_{depvar}_pfz"] = (reg_data["pred_vax"] - reg_data["pred_nopfz"])*reg_data["gdp_projected_usd"]
+            reg_data[f"averted_{depvar}_allvax"] = (reg_data["pred_vax"] - reg_data["pred_novax"])*reg_data["gdp_projected_usd"]
+        self.results_data = reg_data
+    
+    def run_annual_gdp(self, data, gdp_usd, pop2019):     
+        """
+        Run the regression for the annual GDP.
+
+        Parameters
+        ----------
+        data : data frame
+            Data frame for the regrssion (qdata in the analysis script).
+        gdp_usd : data frame
+            The observed and projected GDP in USD (gdp_usd_ihme.xlsx). A "year" field is added to it.
+        pop2019 : data frame
+            The 2019 population of each country (national_population_2019.dta).
+
+        Returns
+        -------
+        None.
+
+        """
+        # create a data frame with only annual GDP data
+        annual_data = data[data["type"] == "annual"]
+        # create a year field in the GDP in USD data
+        gdp_usd["year"] = gdp_usd["date"].str[:4].astype(int)
+        # get gdp in 2019
+        pcgdp2019 = gdp_usd[(gdp_usd["year"] == 2019) & (gdp_usd["type"] == "annual")]
+        # collapse 2019 gdp by country
+        pcgdp2019 = pcgdp2019.groupby("country")[["gdp_observed_usd"]].sum().reset_index()
+        pcgdp2019 = pcgdp2019.rename(columns = {"gdp_observed_usd": "gdp2019"})
+        # add population data to 2019 gdp
+        pcgdp2019 = pcgdp2019.merge(pop2019, how = "left", on = "country")
+        # calculate 2019 per capita GDP
+        pcgdp2019["pcgdp2019"] = pcgdp2019["gdp2019"]/pcgdp2019["tot_pop"]
+
+        # add 2019 per capita gdp to the annual GDP data
+        annual_data = annual_data.merge(pcgdp2019[["country", "pcgdp2019"]], how = "left", on = "country")
+        
+        # collapse gdp_gap to the country-year
+        annual_gaps = annual_data.groupby(["country", "year"], observed = True)[["gdp_gap"]].mean().reset_index()
+
+        # pivot the DataFrame to have years as columns and 'value' as values
+        annual_gaps = annual_gaps.pivot(index='country', columns='year', values='gdp_gap')
+
+        # calculate the difference between the years 2021 and 2020
+        annual_gaps['g2021_g2020'] = annual_gaps[2021] - annual_gaps[2020]
+        
+        # calculate total infections and deaths by taking them out of per capita terms
+        annual_data["n"] = annual_data["inf_mean"]*annual_data["tot_pop"]
+        annual_data["d"] = annual_data["daily_deaths"]*annual_data["tot_pop"]
+
+        # calculate cumulative infections and deaths
+        for c in annual_data.country.unique():
+            annual_data.loc[annual_data["country"] == c, "cn"] = annual_data.loc[annual_data["country"] == c, "n"].cumsum()
+            annual_data.loc[annual_data["country"] == c, "cd"] = annual_data.loc[annual_data["country"] == c, "d"].cumsum()
+        
+        # divide cumulative infections and deaths by population
+        annual_data["cn"] = annual_data["cn"]/annual_data["tot_pop"]
+        annual_data["cd"] = annual_data["cd"]/annual_data["tot_pop"]
+        # create fields for cumulative pfizer and non-pfizer uptake
+        annual_data["cv_np"] = annual_data["cum_uptake_notpfz"]
+        annual_data["cv_p"] = annual_data["cum_uptake_pfizer"]
+        annual_countries = annual_data.loc[(annual_data["yyyy_qq"] == "2021_Q1") & (annual_data["cum_uptake"] > 0), "country"].unique()
+        annual_data = annual_data[annual_data.country.isin(annual_countries)]
+
+        # create data frames specifically for 2021_Q4 and 2020_Q4
+        annual_data2021Q4 = annual_data[annual_data["yyyy_qq"] == "2021_Q4"]
+        annual_data2020Q4 = annual_data[annual_data["yyyy_qq"] == "2020_Q4"]
+
+        # we create an annual regression file that includes the cumulative vaccintions through Q4_2021 and the 
+        # cumulative infections and deaths in 2020_Q4
+        annual_reg_df = annual_gaps.merge(annual_data2021Q4[["country", "cv_np", "cv_p"]], on = "country", how = "outer")
+        annual_reg_df = annual_reg_df.merge(annual_data2020Q4[["country", "cn", "cd"]], on = "country", how = "outer")
+
+        # we rename columns and drop missing values
+        annual_reg_df = annual_reg_df.rename(columns = {2020: "g2020", 2021: "g2021", "cv_np": "cv_np2021Q4",  "cv_p": "cv_p2021Q4", "cn": "cn2020Q4", "cd": "cd2020Q4"})
+        annual_reg_df = annual_reg_df.dropna(subset = ["g2021", "g2020", "cv_np2021Q4", "cv_p2021Q4", "cn2020Q4"], how = "any").reset_index(drop = True)
+
+        # we perform the annual regression
+        formula = "g2021_g2020 ~ g2020 + cv_np2021Q4 + cv_p2021Q4 + cn2020Q4"
+        annual_fit = fit_regression(annual_reg_df, "ols", formula, "HC1", keep_results = True)
+        annual_gdp_mod = annual_fit["model"]
+        annual_gdp_res = annual_fit["results"]
+        
+        self.annual_data = annual_reg_df
+        self.annual_formula = formula
+        self.annual_mod = annual_gdp_mod
+        self.annual_results = annual_gdp_res
+        
+        # we predict our dependent variable in the presence of vaccination
+        annual_reg_df["g2021_g2020_vax"] = annual_gdp_res.predict(annual_reg_df)
+        
+        # then predict in the absence of pfizer
+        nopfz_annual = annual_reg_df.copy()
+        nopfz_annual["cv_p2021Q4"] = 0
+        nopfz_annual["g2021_g2020_nopfz"] = annual_gdp_res.predict(nopfz_annual)
+        
+        # then predict in the absence of all vaccination
+        novax_annual = nopfz_annual.copy()
+        novax_annual["cv_np2021Q4"] = 0
+        novax_annual["cv_p2021Q4"] = 0
+        novax_annual["g2021_g2020_novax"] = annual_gdp_res.predict(novax_annual)
+        
+        # we get the 2021 projected GDP in USD
+        gdp2021 = gdp_usd[gdp_usd["year"] == 2021]
+        gdp2021 = gdp2021.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
+        gdp_value = novax_annual.merge(gdp2021, on = "country", how = "left")
+        
+        # calculate GDP in the presence of vaccination, absence of vaccination, and absence of pfizer
+        gdp_value["gdp_vax"] = (gdp_value["g2021_g2020_vax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
+        gdp_value["gdp_novax"] = (gdp_value["g2021_g2020_novax"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
+        gdp_value["gdp_nopfz"] = (gdp_value["g2021_g2020_nopfz"]+gdp_value["g2020"])*gdp_value["gdp_projected_usd"]
+        
+        # calculate the impact of vaccination and pfizer on annual GDP
+        gdp_value["gdp_allvax"] = gdp_value["gdp_vax"] - gdp_value["gdp_novax"]
+        gdp_value["gdp_pfizer"] = gdp_value["gdp_vax"] - gdp_value["gdp_nopfz"]
+        
+        self.annual_results_data = gdp_value        
+
+    def prepare_quarterly_psa(self, data, depvar="inf_mean", absorb = False):
+        """
+        Fit the models and build the design matrices that the batched PSA evaluates the parameter draws on. 
+        Everything that does not depend on the draws is kept in self.psa_setup.
+        
+        Please see comments in the function "run_quarterly_basecase" for details.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data (qdata in the analysis script).
+        depvar : string, optional
+            A string containing the dependent variable of interest. The default is "inf_mean".
+        absorb : boolean, optional
+            If True, the predictions only multiply the slope columns and add the fixed effects by index (see 
+            "predict_exog"). The models are still fit with dummies, as the draws need the full covariance matrix. 
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.depvar = depvar
+        #drop countries from the regression base file that don't have data
+        inf_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
+        
+        #set up and run the regression
+        formulae = {'infections': 'inf_mean ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq',
+                    'deaths': 'daily_deaths ~ 1 + L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq'}
+        self.formulae = formulae
+        
+        inf_fit = fit_regression(inf_data, "sur", formulae, "robust")
+        
+        #extract the mean parameter coefficients and covariance matrix from regression
+        inf_params = inf_fit["params"]
+        inf_cov = inf_fit["cov"]
+        
+        #take the labelled design matrix
+        inf_exog = inf_fit["exog"][0].copy()
+        # index the rows of the design matrix by country and quarter
+        self.row_index, self.row_grid, self.missing_dummies = self.build_row_index(inf_data, inf_params.index, "infections_")
+        # keep only the slope columns if the fixed effects are added by index
+        if absorb:
+            inf_exog = inf_exog[["infections_" + x for x in slope_vars]]
+        
+        q_dict = {"2020_Q4" : ["2021_Q2", "2021_Q3", "2021_Q4"],
+                  "2021_Q1" : ["2021_Q3", "2021_Q4"],
+                  "2021_Q2": ["2021_Q4"],
+                  "2021_Q3": [""],
+                  "2021_Q4": [""]}
+        
+        q_list = list(q_dict.keys())
+        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
+        nopfz_inf = inf_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x]:
+            nopfz_inf[col] = 0
+        
+        self.freeze_gri(nopfz_inf, inf_data, self.row_index, inf_params.index, "infections_", "uptake_pfizer", q_list)
+        
+        #create a "novax" design matrix (i.e., to set vax parameters to 0)
+        novax_inf = inf_exog.copy()
+        #set those vax parameters to 0.
+        for col in [x for x in inf_exog.columns if "L1_uptake_pfizer" in x or "L2_cum_uptake_pfizer" in x or
+                    "L1_uptake_notpfz" in x or "L2_cum_uptake_notpfz" in x]:
+            novax_inf[col] = 0
+        
+        self.freeze_gri(novax_inf, inf_data, self.row_index, inf_params.index, "infections_", "uptake", q_list)
+        
+        if depvar == "inf_mean" or depvar == "daily_deaths":
+            reg_data = data.dropna(subset = ["inf_mean", "daily_deaths", "L1_gri"], how = "any").reset_index(drop = True)
+            model_fit = fit_regression(reg_data, "sur", formulae, "robust")
+            mean_params = model_fit["params"]
+            cov_params = model_fit["cov"]
+            
+        elif depvar == "gdp_gap":
+            reg_data = data[data["type"] == "quarterly"]
+            reg_data = reg_data[reg_data["country"] != "Moldova"]
+            formula = "gdp_gap ~ L1_uptake_pfizer + L2_cum_uptake_pfizer + L1_uptake_notpfz + L2_cum_uptake_notpfz + L1_gri + L1_inf_pc + L2_cum_inf_pc + country + yyyy_qq"
+            model_fit = fit_regression(reg_data, "ols", formula, "HC1")
+            mean_params = model_fit["params"]
+            cov_params = model_fit["cov"]
+        
+        if depvar == "inf_mean":
+            prefix = "infections_"
+            #grab the design matrix from the model
+            vax_exog = model_fit["exog"][0].copy()
+            
+        elif depvar == "daily_deaths":
+            prefix = "deaths_"
+            #grab the design matrix from the model
+            vax_exog = model_fit["exog"][1].copy()
+            
+        elif depvar == "gdp_gap":
+            prefix = ""
+            #grab the labelled design matrix from the model
+            vax_exog = model_fit["exog"][0].copy()
+        
+        if absorb:
+            vax_exog = vax_exog[[prefix + x for x in slope_vars]]
+        
+        # the nopfz and novax design matrices are the infections design matrices relabelled for the dependent variable
+        nopfz_exog = nopfz_inf.copy()
+        novax_exog = novax_inf.copy()
+        counterfactual_data = inf_data
+        matching_rows = None
+        if depvar == "gdp_gap":
+            # keep only the infections rows that are in the quarterly GDP data
+            matching_rows = list(inf_data[inf_data.isin(reg_data.to_dict(orient='list')).all(axis=1)].index)
+            counterfactual_data = inf_data.loc[matching_rows].reset_index(drop = True)
+            nopfz_exog = nopfz_exog.loc[matching_rows].reset_index(drop = True)
+            novax_exog = novax_exog.loc[matching_rows].reset_index(drop = True)
+        nopfz_exog.columns = nopfz_exog.columns.str.replace("infections_", prefix)
+        novax_exog.columns = novax_exog.columns.str.replace("infections_", prefix)
+        
+        # scale the predictions by population (infections, deaths) or by projected GDP
+        if depvar == "inf_mean" or depvar == "daily_deaths":
+            scale = reg_data["tot_pop"].to_numpy(dtype = float)[:, None]
+        else:
+            scale = reg_data["gdp_projected_usd"].to_numpy(dtype = float)[:, None]
+        
+        self.reg_data = reg_data
+        self.psa_setup = {"prefix": prefix, "q_dict": q_dict, "inf_data": inf_data, "reg_data": reg_data,
+                          "inf_params": inf_params, "inf_cov": inf_cov, "mean_params": mean_params, "cov_params": cov_params,
+                          "nopfz_inf": nopfz_inf, "novax_inf": novax_inf, "vax_exog": vax_exog, "nopfz_exog": nopfz_exog,
+                          "novax_exog": novax_exog, "counterfactual_data": counterfactual_data, 
+                          "matching_rows": matching_rows, "scale": scale}
+
+    def make_psa_samplers(self, seed = 102015):
+        """
+        Create the multivariate normal distributions of the infections and dependent variable parameters that the 
+        PSA draws come from. Both use the same seed.
+
+        Parameters
+        ----------
+        seed : integer or SeedSequence, optional
+            The seed for the draws. An integer seeds the draws as in "run_quarterly_psa_batch", and a SeedSequence (a 
+            chunk of the PSA, see "psa_chunks") seeds a numpy Generator. The default is 102015.
+
+        Returns
+        -------
+        samplers : tuple
+            The seeded (infections, dependent variable) distributions; successive draws from them continue the 
+            same streams.
+
+        """
+        setup = self.psa_setup
+        mvn_inf = multivariate_normal(mean = setup["inf_params"], cov = setup["inf_cov"], allow_singular = True, 
+                                      seed = seed if isinstance(seed, int) else np.random.default_rng(seed))
+        mvn = multivariate_normal(mean = setup["mean_params"], cov = setup["cov_params"], allow_singular = True, 
+                                  seed = seed if isinstance(seed, int) else np.random.default_rng(seed))
+        return mvn_inf, mvn
+
+    def draw_psa_samples(self, n_samp, seed = 102015, samplers = None):
+        """
+        Take draws of the infections and dependent variable parameters from multivariate normal distributions. Both 
+        use the same seed.
+
+        Parameters
+        ----------
+        n_samp : integer
+            An integer describing the number of draws.
+        seed : integer or SeedSequence, optional
+            The seed for the draws, if no samplers are given (see "make_psa_samplers"). The default is 102015.
+        samplers : tuple, optional
+            The distributions from "make_psa_samplers" to continue drawing from, e.g. to draw the PSA in chunks that 
+            together match a single draw of all samples. The default is None.
+
+        Returns
+        -------
+        inf_samples : data frame
+            A (n_params x n_samp) data frame of the infections parameter draws.
+        dep_samples : data frame
+            A (n_params x n_samp) data frame of the dependent variable parameter draws.
+
+        """
+        setup = self.psa_setup
+        if samplers is None:
+            samplers = self.make_psa_samplers(seed)
+        mvn_inf, mvn = samplers
+        #using the parameters, take draws of parameter estimates from a multivariate normal distribution
+        inf_samples = pd.DataFrame(mvn_inf.rvs(size = n_samp).reshape(n_samp, -1)).T
+        inf_samples.index = setup["inf_params"].index
+        inf_samples = inf_samples.loc[[x for x in inf_samples.index if "infections_" in x],]
+        
+        samples = pd.DataFrame(mvn.rvs(size = n_samp).reshape(n_samp, -1)).T
+        samples.index = setup["mean_params"].index
+        dep_samples = samples.loc[[x for x in samples.index if setup["prefix"] in x],]
+        return inf_samples, dep_samples
+
+    def evaluate_psa_draws(self, inf_samples, dep_samples, scenario):
+        """
+        Evaluate the averted outcomes of one scenario for a set of parameter draws, using the design matrices from 
+        "prepare_quarterly_psa".
+
+        Parameters
+        ----------
+        inf_samples : data frame
+            A (n_params x n_samp) data frame of the infections parameter draws.
+        dep_samples : data frame
+            A (n_params x n_samp) data frame of the dependent variable parameter draws.
+        scenario : string
+            "nopfz" (no pfizer vaccination) or "novax" (no vaccination).
+
+        Returns
+        -------
+        averted : array
+            A (n_rows x n_samp) array of averted outcomes for each country-quarter and draw.
+
+        """
+        setup = self.psa_setup
+        prefix = setup["prefix"]
+        uptake_col = "uptake_pfizer" if scenario == "nopfz" else "uptake"
+        
+        # adjust the natural immunity variables for all draws at once
+        cf_l1, cf_l2 = self.recurse_inf_lags(setup[scenario + "_inf"], inf_samples, setup["inf_data"], uptake_col, setup["q_dict"])
+        if setup["matching_rows"] is not None:
+            cf_l1, cf_l2 = cf_l1[setup["matching_rows"]], cf_l2[setup["matching_rows"]]
+        
+        # split the lagged infection variables from the rest of the parameters
+        lag_cols = [prefix + "L1_inf_pc", prefix + "L2_cum_inf_pc"]
+        other_samples = dep_samples.loc[[x for x in dep_samples.index if x not in lag_cols]]
+        l1_betas = dep_samples.loc[lag_cols[0]].to_numpy()
+        l2_betas = dep_samples.loc[lag_cols[1]].to_numpy()
+        
+        #predict the dependent variable for every draw with the original design matrix
+        pred_vax = self.predict_exog(setup["vax_exog"], dep_samples, setup["reg_data"], prefix)
+        #predict the dependent variable for every draw with the counterfactual design matrix and adjusted lags
+        pred_cf = (self.predict_exog(setup[scenario + "_exog"], other_samples, setup["counterfactual_data"], prefix) + 
+                   cf_l1*l1_betas + cf_l2*l2_betas)
+        
+        #calculate averted outcomes for each country-quarter and draw
+        if self.depvar == "inf_mean" or self.depvar == "daily_deaths":
+            return (pred_cf - pred_vax)*setup["scale"]
+        else:
+            return (pred_vax - pred_cf)*setup["scale"]
+
+    def store_psa_arrays(self, averted_pfz, averted_allvax):
+        """
+        Keep the (n_rows x n_samp) arrays of averted outcomes and summarise them over the country-quarters.
+
+        Parameters
+        ----------
+        averted_pfz : array
+            A (n_rows x n_samp) array of outcomes averted by pfizer vaccination.
+        averted_allvax : array
+            A (n_rows x n_samp) array of outcomes averted by all vaccination.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.n_samp = averted_pfz.shape[1]
+        #keep the country-quarters that label the rows of the averted outcome arrays
+        self.psa_keys = self.reg_data[["country", "yyyy_qq"]].reset_index(drop = True)
+        self.averted_pfz_array = averted_pfz
+        self.averted_allvax_array = averted_allvax
+        #sum over all country-quarters to get total averted outcomes in each draw
+        averted_outcome_list = list([np.nansum(averted_pfz, axis = 0), np.nansum(averted_allvax, axis = 0)])
+        self.percentiles_pfz = np.percentile(averted_outcome_list[0], [2.5, 50, 97.5])
+        self.percentiles_allvax = np.percentile(averted_outcome_list[1], [2.5, 50, 97.5])
+        self.outcome_list = averted_outcome_list
+
+    def run_quarterly_psa_batch(self, data, depvar="inf_mean", n_samp = 1000, absorb = False):
+        """
+        Perform the probabilistic sensitivity analysis with all draws evaluated at once. The draws (seeded with 
+        102015) are stacked into a (n_params x n_samp) coefficient matrix, so the vax, nopfz and novax predictions 
+        for every draw come from a few matrix-matrix products.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data (qdata in the analysis script).
+        depvar : string, optional
+            A string containing the dependent variable of interest. The default is "inf_mean".
+        n_samp : integer, optional
+            An integer describing the number of iterations to perform in the simulation. The default is 1000.
+        absorb : boolean, optional
+            If True, the predictions only multiply the slope columns and add the fixed effects by index (see 
+            "predict_exog"). The models are still fit with dummies, as the draws need the full covariance matrix. 
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.prepare_quarterly_psa(data = data, depvar = depvar, absorb = absorb)
+        inf_samples, dep_samples = self.draw_psa_samples(n_samp, seed = 102015)
+        averted_pfz = self.evaluate_psa_draws(inf_samples, dep_samples, "nopfz")
+        averted_allvax = self.evaluate_psa_draws(inf_samples, dep_samples, "novax")
+        self.store_psa_arrays(averted_pfz, averted_allvax)
+
+    def prepare_annual_gdp_psa(self, data, gdp_usd, pop2019):
+        """
+        Build the annual GDP regression data, fit the regression, and keep what the PSA draws are evaluated with 
+        (the parameters, design matrices, and 2021 projected GDP) in self.annual_psa_setup.
+        
+        Please see comments in the function "run_annual_gdp" for details.
+
+        Parameters
+        ----------
+        data : data frame
+            A data frame containing the regression data (qdata in the analysis script).
+        gdp_usd : data frame
+            The observed and projected GDP in USD (gdp_usd_ihme.xlsx). A "year" field is added to it.
+        pop2019 : data frame
+            The 2019 population of each country (national_population_2019.dta).
+
+        Returns
+        -------
+        None.
+
+        """
+        annual_data = data[data["type"] == "annual"]
+        gdp_usd["year"] = gdp_usd["date"].str[:4].astype(int)
+        pcgdp2019 = gdp_usd[(gdp_usd["year"] == 2019) & (gdp_usd["type"] == "annual")]
+        pcgdp2019 = pcgdp2019.groupby("country")[["gdp_observed_usd"]].sum().reset_index()
+        pcgdp2019 = pcgdp2019.rename(columns = {"gdp_observed_usd": "gdp2019"})
+        pcgdp2019 = pcgdp2019.merge(pop2019, how = "left", on = "country")
+        pcgdp2019["pcgdp2019"] = pcgdp2019["gdp2019"]/pcgdp2019["tot_pop"]
+
+        annual_data = annual_data.merge(pcgdp2019[["country", "pcgdp2019"]], how = "left", on = "country")
+        
+        annual_gaps = annual_data.groupby(["country", "year"], observed = True)[["gdp_gap"]].mean().reset_index()
+
+        # Pivot the DataFrame to have years as columns and 'value' as values
+        annual_gaps = annual_gaps.pivot(index='country', columns='year', values='gdp_gap')
+
+        # Calculate the difference between the years 2021 and 2020
+        annual_gaps['g2021_g2020'] = annual_gaps[2021] - annual_gaps[2020]
+        
+        annual_data["n"] = annual_data["inf_mean"]*annual_data["tot_pop"]
+        annual_data["d"] = annual_data["daily_deaths"]*annual_data["tot_pop"]
+
+        for c in annual_data.country.unique():
+            annual_data.loc[annual_data["country"] == c, "cn"] = annual_data.loc[annual_data["country"] == c, "n"].cumsum()
+            annual_data.loc[annual_data["country"] == c, "cd"] = annual_data.loc[annual_data["country"] == c, "d"].cumsum()
+        
+        annual_data["cn"] = annual_data["cn"]/annual_data["tot_pop"]
+        annual_data["cd"] = annual_data["cd"]/annual_data["tot_pop"]
+        annual_data["cv_np"] = annual_data["cum_uptake_notpfz"]
+        annual_data["cv_p"] = annual_data["cum_uptake_pfizer"]
+        annual_countries = annual_data.loc[(annual_data["yyyy_qq"] == "2021_Q1") & (annual_data["cum_uptake"] > 0), "country"].unique()
+        annual_data = annual_data[annual_data.country.isin(annual_countries)]
+
+        annual_data2021Q4 = annual_data[annual_data["yyyy_qq"] == "2021_Q4"]
+        annual_data2020Q4 = annual_data[annual_data["yyyy_qq"] == "2020_Q4"]
+
+
+        annual_reg_df = annual_gaps.merge(annual_data2021Q4[["country", "cv_np", "cv_p"]], on = "country", how = "outer")
+        annual_reg_df = annual_reg_df.merge(annual_data2020Q4[["country", "cn", "cd"]], on = "country", how = "outer")
+
+        annual_reg_df = annual_reg_df.rename(columns = {2020: "g2020", 2021: "g2021", "cv_np": "cv_np2021Q4",  "cv_p": "cv_p2021Q4", "cn": "cn2020Q4", "cd": "cd2020Q4"})
+        annual_reg_df = annual_reg_df.dropna(subset = ["g2021", "g2020", "cv_np2021Q4", "cv_p2021Q4", "cn2020Q4"], how = "any").reset_index(drop = True)
+        
+        formula = "g2021_g2020 ~ g2020 + cv_np2021Q4 + cv_p2021Q4 + cn2020Q4"
+        annual_fit = fit_regression(annual_reg_df, "ols", formula, "HC1")
+        
+        #grab the labelled design matrix from the model
+        vax_exog = annual_fit["exog"][0].copy()
+        
+        #create a "nopfz" design matrix (i.e., to set vax parameters to 0)
+        nopfz_exog = vax_exog.copy()
+        #set those vax parameters to 0.
+        nopfz_exog["cv_p2021Q4"] = 0
+        
+        #create a "novax" design matrix (i.e., to set vax parameters to 0)
+        novax_exog = vax_exog.copy()
+        #set those vax parameters to 0.
+        novax_exog["cv_p2021Q4"] = 0
+        novax_exog["cv_np2021Q4"] = 0
+        
+        # get the 2021 projected GDP in USD of each country in the regression
+        gdp2021 = gdp_usd[gdp_usd["year"] == 2021]
+        gdp2021 = gdp2021.groupby("country")[["gdp_projected_usd"]].sum().reset_index()
+        gdp_value = annual_reg_df.merge(gdp2021, on = "country", how = "left")
+        
+        self.annual_psa_setup = {"reg_data": annual_reg_df, "mean_params": annual_fit["params"], 
+                                 "cov_params": annual_fit["cov"], "vax_exog": vax_exog, "nopfz_exog": nopfz_exog, 
+                                 "novax_exog": novax_exog, "gdp_value": gdp_value}
+
+    def make_annual_psa_sampler(self, seed = 102015):
+        """
+        Create the multivariate normal distribution of the annual GDP parameters that the PSA draws come from.
+
+        Parameters
+        ----------
+        seed : integer or SeedSequence, optional
+            The seed for the draws, as in "make_psa_samplers". The default is 102015.
+
+        Returns
+        -------
+        mvn : frozen multivariate normal distribution
+            A seeded distribution; successive draws from it continue the same stream.
+
+        """
+        setup = self.annual_psa_setup
+        return multivariate_normal(mean = setup["mean_params"], cov = setup["cov_params"], allow_singular = True, 
+                                   seed = seed if isinstance(seed, int) else np.random.default_rng(seed))
+
+    def draw_annual_psa_samples(self, n_samp, seed = 102015, sampler = None):
+        """
+        Take draws of the annual GDP parameters from a multivariate normal distribution.
+
+        Parameters
+        ----------
+        n_samp : integer
+            An integer describing the number of draws.
+        seed : integer or SeedSequence, optional
+            The seed for the draws, if no sampler is given. The default is 102015.
+        sampler : frozen multivariate normal distribution, optional
+            A distribution from "make_annual_psa_sampler" to continue drawing from, e.g. to draw the PSA in chunks. 
+            The default is None.
+
+        Returns
+        -------
+        samples : data frame
+            A (n_params x n_samp) data frame of the parameter draws.
+
+        """
+        if sampler is None:
+            sampler = self.make_annual_psa_sampler(seed)
+        samples = pd.DataFrame(sampler.rvs(size = n_samp).reshape(n_samp, -1)).T
+        samples.index = self.annual_psa_setup["mean_params"].index
+        return samples
+
+    def evaluate_annual_psa_draws(self, samples):
+        """
+        Evaluate the averted annual GDP loss of each country for a set of parameter draws.
+
+        Parameters
+        ----------
+        samples : data frame
+            A (n_params x n_samp) data frame of the parameter draws.
+
+        Returns
+        -------
+        averted_pfz : array
+            A (n_countries x n_samp) array of the GDP loss averted by pfizer vaccination.
+        averted_allvax : array
+            A (n_countries x n_samp) array of the GDP loss averted by all vaccination.
+
+        """
+        setup = self.annual_psa_setup
+        betas = samples.to_numpy()
+        # predict the change in the GDP gap with and without (pfizer) vaccination for all draws at once
+        pred_vax = setup["vax_exog"].to_numpy(dtype = float) @ betas
+        pred_nopfz = setup["nopfz_exog"].to_numpy(dtype = float) @ betas
+        pred_novax = setup["novax_exog"].to_numpy(dtype = float) @ betas
+        
+        g2020 = setup["gdp_value"]["g2020"].to_numpy(dtype = float)[:, None]
+        gdp_projected = setup["gdp_value"]["gdp_projected_usd"].to_numpy(dtype = float)[:, None]
+        gdp_vax = (pred_vax + g2020)*gdp_projected
+        averted_pfz = gdp_vax - (pred_nopfz + g2020)*gdp_projected
+        averted_allvax = gdp_vax - (pred_novax + g2020)*gdp_projected
+        return averted_pfz, averted_allvax
+
+def compute_vov_draws(averted, df):
+    """
+    Computes the value of vaccination for many draws at once, as "compute_vov" does in the analysis script. The
+    averted outcomes are (n_rows x n_draws) arrays, and the QALY, full income, and cost columns of each row are
+    broadcast over the draws.
+
+    Parameters
+    ----------
+    averted : dictionary
+        The (n_rows x n_draws) arrays of averted outcomes, keyed by the "compute_vov" column names (e.g.,
+        "averted_inf_mean_pfz", "averted_daily_deaths_allvax", "averted_gdp_gap_pfz").
+    df : data frame
+        A data frame of the n_rows country-quarters with the QALY losses, full income, and costs.
+
+    Returns
+    -------
+    vov : dictionary
+        The (n_rows x n_draws) arrays of the value of pfizer ("pfz") and all ("allvax") vaccination.
+
+    """
+    # the per-row columns, as (n_rows x 1) arrays to broadcast over the draws
+    static = {col: df[col].to_numpy(dtype = float)[:, None] for col in ["Q_nonfatal", "Q_fatal", "fullincome",
+              "nonfatal_los_cost", "nonfatal_unpaid_work_loss"]}
+
+    vov = dict()
+    for vax in ["pfz", "allvax"]:
+        averted_inf = averted["averted_inf_mean_" + vax]
+        averted_deaths = averted["averted_daily_deaths_" + vax]
+        averted_nf = averted_inf - averted_deaths
+
+        # monetized averted qalys
+        monetized = averted_nf*static["Q_nonfatal"]*static["fullincome"] + averted_deaths*static["Q_fatal"]*static["fullincome"]
+        # averted direct costs and unpaid work loss
+        averted_costs = averted_nf*static["nonfatal_unpaid_work_loss"] + averted_inf*static["nonfatal_los_cost"]
+        health_value = monetized + averted_costs
+
+        # add the averted gdp gap, treating a missing value as 0 if the other is present
+        gdp = averted["averted_gdp_gap_" + vax]
+        vov[vax] = np.where(np.isnan(health_value), gdp, np.where(np.isnan(gdp), health_value, health_value + gdp))
+    return vov
+
+class PSA_accumulator:
+    """
+    Running summaries of one PSA outcome that are updated a chunk of draws at a time, so the draws themselves don't 
+    have to be kept: the total of each draw (all of them, or a fixed-size reservoir sample of them), and the running 
+    mean and variance of the outcome in each group (e.g., country).
+    """
+    def __init__(self, groups, reservoir_size = None, seed = 102015):
+        self.groups = groups
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+        self.n_draws = 0
+        self.totals = list() if reservoir_size is None else np.empty(reservoir_size)
+        self.group_mean = np.zeros(len(groups))
+        self.group_m2 = np.zeros(len(groups))
+
+    def add(self, totals, group_values):
+        """
+        Fold a chunk of draws into the summaries.
+
+        Parameters
+        ----------
+        totals : array
+            The total outcome of each draw in the chunk.
+        group_values : array
+            A (n_groups x n_draws) array of the outcome in each group and draw.
+
+        Returns
+        -------
+        None.
+
+        """
+        n_chunk = len(totals)
+        # combine the chunk's group means and variances with the running ones
+        chunk_mean = group_values.mean(axis = 1)
+        chunk_m2 = ((group_values - chunk_mean[:, None])**2).sum(axis = 1)
+        delta = chunk_mean - self.group_mean
+        n_total = self.n_draws + n_chunk
+        self.group_mean = self.group_mean + delta*n_chunk/n_total
+        self.group_m2 = self.group_m2 + chunk_m2 + delta**2*self.n_draws*n_chunk/n_total
+        
+        # keep every draw total, or a uniform reservoir sample of them
+        if self.reservoir_size is None:
+            self.totals.append(np.asarray(totals, dtype = float))
+        else:
+            for i, total in enumerate(totals):
+                seen = self.n_draws + i
+                if seen < self.reservoir_size:
+                    self.totals[seen] = total
+                else:
+                    j = self.rng.integers(0, seen + 1)
+                    if j < self.reservoir_size:
+                        self.totals[j] = total
+        self.n_draws = n_total
+
+    def draws(self):
+        """
+        Returns
+        -------
+        totals : array
+            The kept draw totals.
+
+        """
+        if self.reservoir_size is None:
+            return np.concatenate(self.totals) if len(self.totals) > 0 else np.empty(0)
+        return self.totals[:min(self.n_draws, self.reservoir_size)]
+
+    def percentiles(self, q = [2.5, 50, 97.5]):
+        """
+        Parameters
+        ----------
+        q : list, optional
+            The percentiles to find. The default is [2.5, 50, 97.5].
+
+        Returns
+        -------
+        percentiles : array
+            The percentiles of the draw totals (exact, unless a reservoir is used).
+
+        """
+        return np.percentile(self.draws(), q)
+
+    def group_summary(self):
+        """
+        Returns
+        -------
+        summary : data frame
+            The mean and standard deviation of the outcome in each group over the draws.
+
+        """
+        sd = np.sqrt(self.group_m2/(self.n_draws - 1)) if self.n_draws > 1 else np.full(len(self.groups), np.nan)
+        return pd.DataFrame({"mean": self.group_mean, "sd": sd}, index = self.groups)
+
+# the quarterly models of the PSA, keyed by their dependent variable, and the annual GDP model
+psa_depvars = ["inf_mean", "daily_deaths", "gdp_gap"]
+psa_model_names = psa_depvars + ["annual_gdp"]
+# the counterfactual scenarios, and the name of the vaccination whose value they give
+psa_scenarios = {"nopfz": "pfz", "novax": "allvax"}
+
+def prepare_psa_models(data, gdp_usd, pop2019, absorb = False):
+    """
+    Fit the models of the PSA and build the design matrices their draws are evaluated on (see 
+    "prepare_quarterly_psa" and "prepare_annual_gdp_psa").
+
+    Parameters
+    ----------
+    data : data frame
+        A data frame containing the regression data (qdata in the analysis script).
+    gdp_usd : data frame
+        The observed and projected GDP in USD.
+    pop2019 : data frame
+        The 2019 population of each country.
+    absorb : boolean, optional
+        If True, predict with the fixed effects added by index (see "predict_exog"). The default is False.
+
+    Returns
+    -------
+    models : dictionary
+        The prepared SUR_model objects, keyed by the names in psa_model_names.
+
+    """
+    models = dict()
+    for depvar in psa_depvars:
+        models[depvar] = SUR_model()
+        models[depvar].prepare_quarterly_psa(data = data, depvar = depvar, absorb = absorb)
+    models["annual_gdp"] = SUR_model()
+    models["annual_gdp"].prepare_annual_gdp_psa(data, gdp_usd, pop2019)
+    return models
+
+def psa_chunks(n_samp, chunk_size):
+    """
+    Split the PSA draws into chunks, each with its own seed spawned from 102015, so a chunk's draws are the same 
+    whichever process evaluates it.
+
+    Parameters
+    ----------
+    n_samp : integer
+        The number of draws.
+    chunk_size : integer
+        The most draws in a chunk.
+
+    Returns
+    -------
+    chunks : list
+        The (seed, number of draws) of each chunk, in order.
+
+    """
+    chunk_sizes = [min(chunk_size, n_samp - i) for i in range(0, n_samp, chunk_size)]
+    return list(zip(np.random.SeedSequence(102015).spawn(len(chunk_sizes)), chunk_sizes))
+
+def evaluate_psa_chunk(models, name, scenario, chunk_seed, chunk_n):
+    """
+    Draw one chunk of parameters of a model and evaluate the averted outcomes of one scenario.
+
+    Parameters
+    ----------
+    models : dictionary
+        The prepared models from "prepare_psa_models".
+    name : string
+        The model, one of psa_model_names.
+    scenario : string
+        "nopfz" (no pfizer vaccination) or "novax" (no vaccination).
+    chunk_seed : SeedSequence
+        The seed of the chunk.
+    chunk_n : integer
+        The number of draws in the chunk.
+
+    Returns
+    -------
+    averted : array
+        A (n_rows x chunk_n) array of the averted outcomes in each country-quarter (or country, for the annual GDP) 
+        and draw.
+
+    """
+    model = models[name]
+    if name == "annual_gdp":
+        samples = model.draw_annual_psa_samples(chunk_n, seed = chunk_seed)
+        averted_pfz, averted_allvax = model.evaluate_annual_psa_draws(samples)
+        return averted_pfz if scenario == "nopfz" else averted_allvax
+    inf_samples, dep_samples = model.draw_psa_samples(chunk_n, seed = chunk_seed)
+    return model.evaluate_psa_draws(inf_samples, dep_samples, scenario)
+
+def psa_layout(models, qalys, costs, fullincome):
+    """
+    Lay out the country-quarters of the three quarterly regressions once, with the QALYs, costs, and full income 
+    that value them, and the countries that the results are grouped by.
+
+    Parameters
+    ----------
+    models : dictionary
+        The prepared models from "prepare_psa_models".
+    qalys : data frame
+        The QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
+    fullincome : data frame
+        The full income of each country.
+
+    Returns
+    -------
+    layout : dictionary
+        The shared country-quarters ("frame"), the rows of each regression in it ("positions"), the countries 
+        ("countries"), and the country of each row of the frame and of the annual results ("frame_codes", 
+        "annual_codes").
+
+    """
+    keys = [models[depvar].psa_setup["reg_data"][["country", "yyyy_qq"]] for depvar in psa_depvars]
+    frame = keys[0].merge(keys[1], on = ["country", "yyyy_qq"], how = "outer")
+    frame = frame.merge(keys[2], on = ["country", "yyyy_qq"], how = "outer")
+    frame = frame.merge(qalys, on = ["country", "yyyy_qq"], how = "left")
+    frame = frame.merge(costs, on = ["country", "yyyy_qq"], how = "left")
+    frame = frame.merge(fullincome, on = "country", how = "left")
+    frame_index = pd.MultiIndex.from_frame(frame[["country", "yyyy_qq"]])
+    positions = {depvar: frame_index.get_indexer(pd.MultiIndex.from_frame(keys[i])) for i, depvar in enumerate(psa_depvars)}
+    
+    # group the quarterly and annual results by country
+    annual_countries = models["annual_gdp"].annual_psa_setup["gdp_value"]["country"]
+    countries = pd.Index(sorted(set(frame["country"]).union(annual_countries)))
+    return {"frame": frame, "positions": positions, "countries": countries, 
+            "frame_codes": countries.get_indexer(frame["country"]), "annual_codes": countries.get_indexer(annual_countries)}
+
+def fold_psa_chunk(layout, accumulators, averted, chunk_n):
+    """
+    Value the draws of one chunk ("compute_vov_draws") and fold the full value of each draw into the accumulators.
+
+    Parameters
+    ----------
+    layout : dictionary
+        The layout from "psa_layout".
+    accumulators : dictionary
+        The PSA_accumulator objects of pfizer ("pfz") and all ("allvax") vaccination.
+    averted : dictionary
+        The averted outcomes of the chunk from "evaluate_psa_chunk", keyed by (model name, scenario).
+    chunk_n : integer
+        The number of draws in the chunk.
+
+    Returns
+    -------
+    None.
+
+    """
+    frame = layout["frame"]
+    # put the quarterly outcomes on the shared country-quarters
+    blocks = dict()
+    for depvar in psa_depvars:
+        for scenario, vax in psa_scenarios.items():
+            block = np.full((len(frame), chunk_n), np.nan)
+            block[layout["positions"][depvar]] = averted[(depvar, scenario)]
+            blocks["averted_" + depvar + "_" + vax] = block
+    
+    # value all the draws of the chunk at once
+    quarterly = compute_vov_draws(blocks, frame)
+    
+    # fold the chunk into the running summaries
+    for scenario, vax in psa_scenarios.items():
+        quarterly_vov = np.nan_to_num(quarterly[vax])
+        annual_vov = np.nan_to_num(averted[("annual_gdp", scenario)])
+        by_country = np.zeros((len(layout["countries"]), chunk_n))
+        np.add.at(by_country, layout["frame_codes"], quarterly_vov)
+        np.add.at(by_country, layout["annual_codes"], annual_vov)
+        accumulators[vax].add(quarterly_vov.sum(axis = 0) + annual_vov.sum(axis = 0), by_country)
+
+def run_psa_streaming(models, qalys, costs, fullincome, n_samp = 1000, chunk_size = 100, reservoir_size = None):
+    """
+    Run the PSA of the full (quarterly and annual) value of vaccination without keeping the draws. The draws are 
+    taken, evaluated, and valued ("compute_vov_draws") a chunk at a time (see "psa_chunks"), and each draw's value 
+    is folded into PSA_accumulator objects straight away, so no per-draw data frames are kept or merged. Each chunk 
+    has its own seed, so the results depend on chunk_size, and "run_psa_parallel" gives the same results.
+
+    Parameters
+    ----------
+    models : dictionary
+        The prepared models from "prepare_psa_models".
+    qalys : data frame
+        The QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
+    fullincome : data frame
+        The full income of each country.
+    n_samp : integer, optional
+        An integer describing the number of draws. The default is 1000.
+    chunk_size : integer, optional
+        The number of draws evaluated at a time. The default is 100.
+    reservoir_size : integer, optional
+        If set, keep a reservoir sample of this many draw totals for the percentiles instead of all of them. The 
+        default is None.
+
+    Returns
+    -------
+    accumulators : dictionary
+        The PSA_accumulator objects of the full value of pfizer ("pfz") and all ("allvax") vaccination, grouped 
+        by country.
+
+    """
+    layout = psa_layout(models, qalys, costs, fullincome)
+    accumulators = {vax: PSA_accumulator(layout["countries"], reservoir_size) for vax in psa_scenarios.values()}
+    for chunk_seed, chunk_n in psa_chunks(n_samp, chunk_size):
+        averted = {(name, scenario): evaluate_psa_chunk(models, name, scenario, chunk_seed, chunk_n) 
+                   for name in psa_model_names for scenario in psa_scenarios}
+        fold_psa_chunk(layout, accumulators, averted, chunk_n)
+    return accumulators
+
+# the prepared models in a PSA worker process, set by "init_psa_worker"
+worker_models = None
+
+def init_psa_worker(models):
+    """
+    Keep the prepared models in a PSA worker process, so they are sent to each worker once rather than with 
+    every chunk.
+
+    Parameters
+    ----------
+    models : dictionary
+        The prepared models from "prepare_psa_models".
+
+    Returns
+    -------
+    None.
+
+    """
+    global worker_models
+    worker_models = models
+
+def run_psa_task(name, scenario, chunk_seed, chunk_n):
+    """
+    Evaluate one chunk of one model and scenario in a PSA worker process (see "evaluate_psa_chunk").
+    """
+    return evaluate_psa_chunk(worker_models, name, scenario, chunk_seed, chunk_n)
+
+@contextmanager
+def main_not_rerun():
+    """
+    A context in which the spawned worker processes don't re-run the calling script. Under the spawn start method, 
+    each worker runs the __main__ module's file again before it takes any work, and the analysis scripts have no 
+    main guard, so they would redo the whole analysis. The workers only need this module, which they import when 
+    they unpickle their work.
+    """
+    main_module = sys.modules["__main__"]
+    saved = {x: main_module.__dict__[x] for x in ["__file__", "__spec__"] if x in main_module.__dict__}
+    main_module.__dict__.pop("__file__", None)
+    main_module.__spec__ = None
+    try:
+        yield
+    finally:
+        main_module.__dict__.pop("__spec__", None)
+        main_module.__dict__.update(saved)
+
+def run_psa_parallel(models, qalys, costs, fullincome, n_samp = 1000, chunk_size = 100, reservoir_size = None, 
+                     n_jobs = None):
+    """
+    Run the PSA as in "run_psa_streaming", with the chunks of each model and scenario evaluated in a pool of 
+    worker processes. The workers are started with the spawn method (the only one on Windows) and get the prepared 
+    models once, from "init_psa_worker". Each chunk draws from its own seed, and the chunks are valued and folded 
+    in order, so the results are the same as those of "run_psa_streaming" with the same chunk_size.
+
+    Parameters
+    ----------
+    models : dictionary
+        The prepared models from "prepare_psa_models".
+    qalys : data frame
+        The QALY losses by country-quarter.
+    costs : data frame
+        The direct and indirect costs by country-quarter.
+    fullincome : data frame
+        The full income of each country.
+    n_samp : integer, optional
+        An integer describing the number of draws. The default is 1000.
+    chunk_size : integer, optional
+        The number of draws in a chunk. The default is 100.
+    reservoir_size : integer, optional
+        If set, keep a reservoir sample of this many draw totals for the percentiles instead of all of them. The 
+        default is None.
+    n_jobs : integer, optional
+        The number of worker processes. The default is None (the number of CPUs); 1 runs "run_psa_streaming".
+
+    Returns
+    -------
+    accumulators : dictionary
+        The PSA_accumulator objects of the full value of pfizer ("pfz") and all ("allvax") vaccination, grouped 
+        by country.
+
+    """
+    if n_jobs == 1:
+        return run_psa_streaming(models, qalys, costs, fullincome, n_samp = n_samp, chunk_size = chunk_size, 
+                                 reservoir_size = reservoir_size)
+    layout = psa_layout(models, qalys, costs, fullincome)
+    accumulators = {vax: PSA_accumulator(layout["countries"], reservoir_size) for vax in psa_scenarios.values()}
+    chunks = psa_chunks(n_samp, chunk_size)
+    tasks = [(name, scenario, chunk_seed, chunk_n) for chunk_seed, chunk_n in chunks 
+             for name in psa_model_names for scenario in psa_scenarios]
+    with main_not_rerun():
+        with ProcessPoolExecutor(max_workers = n_jobs, mp_context = mp.get_context("spawn"), 
+                                 initializer = init_psa_worker, initargs = (models,)) as pool:
+            results = pool.map(run_psa_task, *zip(*tasks))
+            # fold the chunks in order as their results come back
+            for chunk_seed, chunk_n in chunks:
+                averted = {(name, scenario): next(results) for name in psa_model_names for scenario in psa_scenarios}
+                fold_psa_chunk(layout, accumulators, averted, chunk_n)
+    return accumulators
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+test_sur_models.py: Checks of the regressions and the PSA in sur_models.py on a small synthetic panel.
+
+Run from code/python_code with "python -m pytest tests".
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sur_models import SUR_model, prepare_psa_models, run_psa_parallel, run_psa_streaming
+
+quarters = [f"{y}_Q{q}" for y in [2020, 2021] for q in range(1, 5)]
+quarterly_countries = [f"Q{i}" for i in range(12)]
+annual_countries = [f"A{i}" for i in range(10)]
+
+def synthetic_data(seed = 0):
+    """
+    Build a synthetic quarterly panel with the fields of qdata, and the GDP, population, QALY, cost, and full
+    income data that the PSA values it with. The quarterly GDP countries have a missing quarter each, so the
+    panel is unbalanced.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for c in quarterly_countries + annual_countries:
+        tot_pop = rng.uniform(1e6, 5e7)
+        # pfizer vaccination starts in 2020_Q4 or 2021_Q1, and other vaccines a quarter later in some countries
+        pfz_start = rng.integers(3, 5)
+        other_start = pfz_start + rng.integers(0, 2)
+        uptake_pfizer = np.where(np.arange(8) >= pfz_start, rng.uniform(0.01, 0.2, 8), 0)
+        uptake_notpfz = np.where(np.arange(8) >= other_start, rng.uniform(0.01, 0.1, 8), 0)
+        inf_pc = rng.uniform(0.001, 0.05, 8)
+        gri = rng.uniform(20, 80, 8)
+        for i, q in enumerate(quarters):
+            rows.append({"country": c, "yyyy_qq": q, "year": int(q[:4]),
+                         "type": "quarterly" if c in quarterly_countries else "annual",
+                         "tot_pop": tot_pop, "gdp_projected_usd": tot_pop*rng.uniform(2000, 4000),
+                         "uptake_pfizer": uptake_pfizer[i], "uptake": uptake_pfizer[i] + uptake_notpfz[i],
+                         "cum_uptake_pfizer": uptake_pfizer[:i + 1].sum(),
+                         "cum_uptake_notpfz": uptake_notpfz[:i + 1].sum(),
+                         "cum_uptake": uptake_pfizer[:i + 1].sum() + uptake_notpfz[:i + 1].sum(),
+                         "L1_uptake_pfizer": uptake_pfizer[i - 1] if i > 0 else 0,
+                         "L2_cum_uptake_pfizer": uptake_pfizer[:i - 1].sum() if i > 1 else 0,
+                         "L1_uptake_notpfz": uptake_notpfz[i - 1] if i > 0 else 0,
+                         "L2_cum_uptake_notpfz": uptake_notpfz[:i - 1].sum() if i > 1 else 0,
+                         "L1_gri": gri[i - 1] if i > 0 else gri[0],
+                         "L1_inf_pc": inf_pc[i - 1] if i > 0 else 0,
+                         "L2_cum_inf_pc": inf_pc[:i - 1].sum() if i > 1 else 0})
+    data = pd.DataFrame(rows)
+    data["inf_mean"] = (0.01 - 0.05*data["L1_uptake_pfizer"] - 0.03*data["L1_uptake_notpfz"] + 0.0002*data["L1_gri"] +
+                        0.3*data["L1_inf_pc"] + rng.normal(0, 0.005, len(data)))
+    data["daily_deaths"] = 0.01*data["inf_mean"] + rng.normal(0, 0.0001, len(data))
+    data["gdp_gap"] = (-0.05 + 0.1*data["cum_uptake"] - 0.0005*data["L1_gri"] - 0.5*data["L1_inf_pc"] +
+                       rng.normal(0, 0.01, len(data)))
+    # drop a quarter of each quarterly GDP country
+    drop = [(c, quarters[rng.integers(1, 8)]) for c in quarterly_countries]
+    data = data[~pd.MultiIndex.from_frame(data[["country", "yyyy_qq"]]).isin(drop)].reset_index(drop = True)
+
+    countries = quarterly_countries + annual_countries
+    pop2019 = data.groupby("country", as_index = False)["tot_pop"].first()
+    gdp_usd = pd.DataFrame([{"country": c, "date": f"{y}Q{q}", "type": "quarterly" if c in quarterly_countries else "annual",
+                             "gdp_observed_usd": rng.uniform(1e9, 1e11), "gdp_projected_usd": rng.uniform(1e9, 1e11)}
+                            for c in countries for y in [2019, 2020, 2021] for q in range(1, 5)])
+    qalys = data[["country", "yyyy_qq"]].copy()
+    qalys["Q_nonfatal"] = rng.uniform(0.001, 0.01, len(qalys))
+    qalys["Q_fatal"] = rng.uniform(5, 20, len(qalys))
+    qalys["Q_overall"] = qalys["Q_nonfatal"] + qalys["Q_fatal"]
+    costs = data[["country", "yyyy_qq"]].copy()
+    costs["nonfatal_los_cost"] = rng.uniform(10, 100, len(costs))
+    costs["nonfatal_unpaid_work_loss"] = rng.uniform(1, 10, len(costs))
+    fullincome = pd.DataFrame({"country": countries, "fullincome": rng.uniform(5000, 50000, len(countries))})
+    return data, gdp_usd, pop2019, qalys, costs, fullincome
+
+@pytest.fixture(scope = "module")
+def synthetic():
+    return synthetic_data()
+
+def test_psa_parallel_matches_streaming(synthetic):
+    data, gdp_usd, pop2019, qalys, costs, fullincome = synthetic
+    models = prepare_psa_models(data, gdp_usd, pop2019)
+    streaming = run_psa_streaming(models, qalys, costs, fullincome, n_samp = 50, chunk_size = 20)
+    parallel = run_psa_parallel(models, qalys, costs, fullincome, n_samp = 50, chunk_size = 20, n_jobs = 2)
+    for vax in ["pfz", "allvax"]:
+        assert len(parallel[vax].draws()) == 50
+        assert np.array_equal(parallel[vax].draws(), streaming[vax].draws())
+        assert parallel[vax].group_summary().index.equals(streaming[vax].group_summary().index)
+        assert np.array_equal(parallel[vax].group_summary().to_numpy(), streaming[vax].group_summary().to_numpy())
+    # the draws are not all the same
+    assert np.std(streaming["pfz"].draws()) > 0
+
+@pytest.mark.parametrize("depvar", ["inf_mean", "daily_deaths", "gdp_gap"])
+def test_absorbed_fit_matches_dummy_fit(synthetic, depvar):
+    data = synthetic[0]
+    dummy = SUR_model()
+    dummy.run_quarterly_basecase(data, depvar = depvar)
+    absorbed = SUR_model()
+    # check_absorbed also compares the parameters and covariance with the dummy-variable regression
+    absorbed.run_quarterly_basecase(data, depvar = depvar, absorb = True, check_absorbed = True)
+
+    assert sorted(absorbed.params.index) == sorted(dummy.params.index)
+    np.testing.assert_allclose(absorbed.params.reindex(dummy.params.index), dummy.params, rtol = 1e-6, atol = 1e-10)
+    # the infections without (pfizer) vaccination, and the counterfactual predictions and averted outcomes
+    np.testing.assert_allclose(absorbed.comp_inf_lags.iloc[:, 2:].to_numpy(dtype = float), 
+                               dummy.comp_inf_lags.iloc[:, 2:].to_numpy(dtype = float), rtol = 1e-6, atol = 1e-10)
+    cols = ["pred_vax", "pred_nopfz", "pred_novax", f"averted_{depvar}_pfz", f"averted_{depvar}_allvax"]
+    assert absorbed.results_data[["country", "yyyy_qq"]].equals(dummy.results_data[["country", "yyyy_qq"]])
+    np.testing.assert_allclose(absorbed.results_data[cols].to_numpy(dtype = float), 
+                               dummy.results_data[cols].to_numpy(dtype = float), rtol = 1e-6, atol = 1e-6)
+    # the vaccines change the counterfactuals
+    assert not np.allclose(dummy.results_data["pred_vax"], dummy.results_data["pred_novax"])